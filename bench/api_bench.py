@@ -0,0 +1,121 @@
+"""
+ApiCollector 오프라인 측정: bench/ecount_api_mock.py (OpenAPI 모의 서버) 에 대고 창고별재고현황 수집.
+
+bench/rpa_bench.py 의 같은 리포트(balance) 소요 시간과 비교해 OpenAPI 모드 전환 효과를 본다.
+흐름마다 다음을 기록한다.
+- 소요 시간, 성공 여부, 요청 수 / 페이지 수 / 재시도 / 속도 제한 대기 (클라이언트), 429 응답 수 (서버)
+- 저장된 엑셀 검증: 행 수 / 재고수량 합이 픽스처와 같은지 (read_excel_table 로 에이전트와 같은 방식으로 읽음)
+- 두 번째 수집에서 파일 sha256 유지 여부 (내용이 같으면 파일을 다시 쓰지 않아 파싱 캐시 '업로드 생략' 경로)
+--expire 를 주면 두 번째 수집 전에 세션을 모두 만료시켜 재로그인 경로를 확인한다.
+
+실행 (저장소 루트에서):
+    python -m bench.api_bench                               # x1, x10
+    python -m bench.api_bench --scale 100 --page-size 500 --workers 8
+    python -m bench.api_bench --server-rate 5 --rate 10     # 서버 한도보다 빠르게 → 429 재시도 확인
+결과는 bench/results/api-<시각>.json 에 남는다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bench import fixtures  # noqa: E402
+from bench.ecount_api_mock import CREDENTIALS, DEFAULT_LATENCY, MockApi, serve  # noqa: E402
+from utils.ecount_api import ApiCollector  # noqa: E402
+from utils.excel_reader import read_excel_table  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+FLOWS = ("inventory_balance",)
+
+
+def verify(path, mock):
+    """저장된 엑셀이 모의 서버 데이터와 같은지 → (일치 여부, 설명)"""
+    df = read_excel_table(path)
+    if df is None:
+        return False, "헤더 없음"
+    expected_rows = len(mock.balance)
+    expected_qty = sum(float(r["BAL_QTY"]) for r in mock.balance)
+    qty = float(pd.to_numeric(df["재고수량"], errors="coerce").fillna(0).sum())
+    ok = len(df) == expected_rows and abs(qty - expected_qty) < 1e-6
+    return ok, f"{len(df):,}/{expected_rows:,}행, 수량 합 {qty:,.0f}/{expected_qty:,.0f}"
+
+
+def run_scale(scale, args):
+    mock = MockApi(fixtures.build(scale), rate=args.server_rate,
+                   latency={"request": args.request_ms, "per_1k": args.per_1k_ms})
+    server, url = serve(mock)
+    work = tempfile.mkdtemp(prefix="api-bench-")
+    api = ApiCollector(*CREDENTIALS, work, api_url=url, workers=args.workers, rate=args.rate,
+                       page_size=args.page_size, log=lambda m: print(m) if args.verbose else None)
+    results = {}
+    print(f"\n▶ x{scale}: 잔량 {len(mock.balance):,}행 / 품목 {len(mock.products):,}행 "
+          f"(페이지 {args.page_size}, 동시 {args.workers}, 초당 {args.rate or '∞'} / 서버 {args.server_rate or '∞'})")
+    try:
+        first_sha = {}
+        for attempt in ("cold", "warm"):
+            if attempt == "warm" and args.expire:
+                mock.expire_sessions()
+            for report in FLOWS:
+                if attempt == "cold":
+                    api._products = None   # 품목 목록 재사용 없이 처음부터 측정
+                mock.reset_stats()
+                calls0, retries0, waited0 = api.calls, api.retries, api.limiter.waited
+                started = time.perf_counter()
+                ok, msg = api.fetch(report)
+                elapsed = time.perf_counter() - started
+                r = {"ok": ok, "message": msg, "elapsed": round(elapsed, 3), "calls": api.calls - calls0,
+                     "retries": api.retries - retries0, "rate_wait": round(api.limiter.waited - waited0, 3),
+                     "throttled": mock.throttled, "server_requests": dict(mock.requests)}
+                if ok:
+                    info = api.last_download
+                    r["verified"], r["check"] = verify(info["path"], mock)
+                    if attempt == "cold":
+                        first_sha[report] = info["sha256"]
+                    else:
+                        r["sha_kept"] = info["sha256"] == first_sha.get(report)
+                results[f"x{scale}/{report}/{attempt}"] = r
+                print(f"  {report:<18} {attempt:<5} {'✅' if ok else '❌'} {elapsed:>6.2f}s  요청 {r['calls']:>3}  "
+                      f"재시도 {r['retries']:>2}  429 {r['throttled']:>2}  대기 {r['rate_wait']:>5.2f}s"
+                      + (f"  {r['check']}{'' if r['verified'] else ' ⚠️ 불일치'}" if ok else f"  {msg}")
+                      + (f"  sha {'유지' if r['sha_kept'] else '변경'}" if "sha_kept" in r else ""))
+    finally:
+        api.close()
+        server.shutdown()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10], help="픽스처 배율 (1 / 10 / 100)")
+    ap.add_argument("--page-size", type=int, default=1000, help="페이지당 행 수")
+    ap.add_argument("--workers", type=int, default=4, help="동시 페이지 요청 수")
+    ap.add_argument("--rate", type=float, default=0, help="클라이언트 초당 요청 한도 (0 = 제한 없음)")
+    ap.add_argument("--server-rate", type=float, default=0, help="모의 서버 초당 허용 요청 (초과 시 429)")
+    ap.add_argument("--request-ms", type=float, default=DEFAULT_LATENCY["request"], help="요청당 지연 (ms)")
+    ap.add_argument("--per-1k-ms", type=float, default=DEFAULT_LATENCY["per_1k"], help="응답 1,000행당 지연 (ms)")
+    ap.add_argument("--expire", action="store_true", help="두 번째 수집 전에 세션 만료 (재로그인 경로)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="수집기 로그 출력")
+    args = ap.parse_args()
+
+    results = {}
+    for scale in args.scale:
+        results.update(run_scale(scale, args))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, datetime.now().strftime("api-%Y%m%d-%H%M%S.json"))
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=1)
+    print(f"\n결과 저장: {out_path}")
+    failed = [k for k, r in results.items() if not r["ok"] or not r.get("verified") or r.get("sha_kept") is False]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+로컬 이카운트 OpenAPI 모의 서버: ApiCollector(utils/ecount_api.py) 를 실제 이카운트 없이 리허설 / 측정.
+
+bench/fixtures.py 의 export 픽스처(창고별재고현황 / 품목마스터)를 JSON 으로 바꿔 OpenAPI 와 같은 모양으로 돌려준다.
+- POST /OAPI/V2/Zone                → {"Status": "200", "Data": {"ZONE": "SIM"}}
+- POST /OAPI/V2/OAPILogin           → Data.Datas.SESSION_ID (API_CERT_KEY 검사)
+- POST /OAPI/V2/InventoryBalance/GetListInventoryBalanceStatusByLocation?SESSION_ID=
+       창고×품목 잔량 (픽스처의 유효기간 로트를 합산), PAGE_CURRENT / PAGE_SIZE 페이지 조회, TotalCnt
+- POST /OAPI/V2/InventoryBasic/GetBasicProductsList?SESSION_ID=   품목 목록 (같은 페이지 규칙)
+세션 만료(Status 401), 속도 제한(초당 rate 건 초과 시 HTTP 429 + Retry-After), 요청 / 1,000행당 지연을 흉내 낸다.
+
+실행 (저장소 루트에서):
+    python -m bench.ecount_api_mock --port 8766      # ECOUNT_API_URL=http://127.0.0.1:8766 로 에이전트 연결
+측정은 bench/api_bench.py.
+"""
+import argparse
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.parse
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openpyxl
+
+CREDENTIALS = ("SIMBENCH", "bench", "bench-api-key")
+
+# 품목구분 표기 → 이카운트 코드 (utils/ecount_api.PROD_TYPES 의 역)
+PROD_TYPE_CODES = {"원재료": "0", "제품": "1", "반제품": "2", "상품": "3", "부재료": "4", "무형상품": "7"}
+
+DEFAULT_LATENCY = {
+    "request": 40,       # 요청 하나 기본 (ms)
+    "per_1k": 30,        # 응답 1,000행마다 추가
+}
+
+
+def _sheet_rows(path):
+    """export 모양 엑셀 (1행 안내, 2행 헤더) → dict 행 목록"""
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = list(book.worksheets[0].iter_rows(values_only=True))
+    finally:
+        book.close()
+    header = [str(c).strip() if c is not None else "" for c in rows[1]]
+    return [dict(zip(header, r)) for r in rows[2:]]
+
+
+def _fixture_file(manifest, suffix):
+    found = sorted(f for f in os.listdir(manifest["dir"]) if f.endswith(suffix))
+    return os.path.join(manifest["dir"], found[-1])
+
+
+def load_data(manifest):
+    """픽스처 → (잔량 행, 품목 행). 잔량은 (창고, 품목)별로 로트를 합산하고 합계 행은 뺀다"""
+    products = []
+    for r in _sheet_rows(_fixture_file(manifest, "_품목마스터(1).xlsx")):
+        code = str(r.get("품목코드") or "").strip()
+        if not code:
+            continue
+        products.append({"PROD_CD": code, "PROD_DES": str(r.get("품목명") or ""), "SIZE_DES": "",
+                         "PROD_TYPE": PROD_TYPE_CODES.get(str(r.get("품목구분") or ""), ""),
+                         "IN_PRICE": f"{float(r.get('입고단가') or 0):.4f}",
+                         "CLASS_CD": str(r.get("품목그룹1") or ""), "CLASS_CD2": str(r.get("품목그룹2") or ""),
+                         "CLASS_CD3": str(r.get("품목그룹3") or "")})
+    names = {p["PROD_CD"]: p["PROD_DES"] for p in products}
+
+    qty = defaultdict(float)
+    wh_names = {}
+    for r in _sheet_rows(_fixture_file(manifest, "_창고별재고현황(1).xlsx")):
+        code, wh = str(r.get("품목코드") or "").strip(), str(r.get("창고코드") or "").strip()
+        if not code or not wh:
+            continue
+        qty[(wh, code)] += float(r.get("재고수량") or 0)
+        wh_names[wh] = str(r.get("창고명") or "")
+    balance = [{"WH_CD": wh, "WH_DES": wh_names[wh], "PROD_CD": code, "PROD_DES": names.get(code, ""),
+                "PROD_SIZE_DES": "", "BAL_QTY": f"{q:.4f}"}
+               for (wh, code), q in sorted(qty.items())]
+    return balance, products
+
+
+class MockApi:
+    """모의 OpenAPI 상태 (세션 / 속도 제한 / 요청 통계)"""
+
+    def __init__(self, manifest, credentials=CREDENTIALS, rate=0.0, burst=2, latency=None, session_ttl=0):
+        self.manifest = manifest
+        self.credentials = credentials
+        self.rate = rate
+        self.burst = burst
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.session_ttl = session_ttl
+        self.balance, self.products = load_data(manifest)
+        self.sessions = {}
+        self.requests = Counter()
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+
+    def sleep(self, rows=0):
+        ms = self.latency["request"] + self.latency["per_1k"] * rows / 1000
+        if ms:
+            time.sleep(ms / 1000.0)
+
+    def record(self, route):
+        with self.lock:
+            self.requests[route] += 1
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests.clear()
+            self.throttled = 0
+
+    def allow(self):
+        """회사 단위 속도 제한 (토큰 버킷). 초과면 False"""
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def new_session(self):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[token] = time.monotonic()
+        return token
+
+    def session_valid(self, token):
+        with self.lock:
+            started = self.sessions.get(token)
+            if started is None:
+                return False
+            if self.session_ttl and time.monotonic() - started > self.session_ttl:
+                del self.sessions[token]
+                return False
+            return True
+
+    def expire_sessions(self):
+        with self.lock:
+            self.sessions.clear()
+
+
+def make_handler(api):
+    routes = {
+        "/OAPI/V2/InventoryBalance/GetListInventoryBalanceStatusByLocation": ("balance", lambda: api.balance),
+        "/OAPI/V2/InventoryBasic/GetBasicProductsList": ("products", lambda: api.products),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload, headers=()):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _ok(self, data):
+            self._send(200, {"Status": "200", "Data": data})
+
+        def _error(self, status, message):
+            self._send(200, {"Status": status, "Error": {"Message": message}})
+
+        def do_POST(self):
+            split = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(split.query))
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._error("400", "JSON 본문 오류")
+
+            if not api.allow():
+                api.record("throttled")
+                return self._send(429, {"Status": "429", "Error": {"Message": "요청 한도 초과"}},
+                                  headers=[("Retry-After", f"{1.0 / api.rate:.2f}")])
+
+            path = split.path.rstrip("/")
+            if path == "/OAPI/V2/Zone":
+                api.record("zone")
+                api.sleep()
+                return self._ok({"ZONE": "SIM", "DOMAIN": ".ecount.com"})
+            if path == "/OAPI/V2/OAPILogin":
+                api.record("login")
+                api.sleep()
+                given = (body.get("COM_CODE"), body.get("USER_ID"), body.get("API_CERT_KEY"))
+                if api.credentials is not None and given != tuple(api.credentials):
+                    return self._error("403", "인증키 불일치")
+                return self._ok({"Datas": {"SESSION_ID": api.new_session()}})
+            if path not in routes:
+                return self._send(404, {"Status": "404", "Error": {"Message": "not found"}})
+
+            route, source = routes[path]
+            api.record(route)
+            if not api.session_valid(query.get("SESSION_ID", "")):
+                return self._error("401", "세션이 만료되었습니다")
+            rows = source()
+            size = int(body.get("PAGE_SIZE") or len(rows) or 1)
+            current = max(1, int(body.get("PAGE_CURRENT") or 1))
+            part = rows[(current - 1) * size:current * size]
+            api.sleep(len(part))
+            return self._ok({"TotalCnt": len(rows), "Result": part})
+
+    return Handler
+
+
+def serve(api, port=0, host="127.0.0.1"):
+    """백그라운드 스레드로 모의 서버 시작 → (server, api_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="ecount-api-mock").start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    from bench import fixtures
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--scale", type=int, default=1, help="픽스처 배율")
+    ap.add_argument("--rate", type=float, default=0, help="서버 측 초당 허용 요청 (0 = 제한 없음)")
+    ap.add_argument("--session-ttl", type=float, default=0, help="세션 유지 초 (0 = 만료 없음)")
+    args = ap.parse_args()
+    mock = MockApi(fixtures.build(args.scale), rate=args.rate, session_ttl=args.session_ttl)
+    srv, url = serve(mock, port=args.port)
+    print(f"ECOUNT OpenAPI 모의 서버: {url}  (ECOUNT_API_URL={url}, 회사코드/ID/인증키 {'/'.join(CREDENTIALS)}, "
+          f"Ctrl+C 종료)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
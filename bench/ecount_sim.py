@@ -0,0 +1,503 @@
+"""
+오프라인 벤치마크용 이카운트 ERP 시뮬레이터 (utils/ecount_rpa.py 의 Playwright 흐름 리허설).
+
+EcountRPA 가 의존하는 화면 요소만 흉내 낸다.
+- /login/              : #com_code / #id / #passwd / #save 로그인 폼 (세션 쿠키 있으면 메인으로 이동)
+- /ec5/view/erp        : 메뉴검색 #txtSearch (입력마다 자동완성 XHR, Enter → 메뉴 열기), 즐겨찾기 링크,
+                         작업 iframe (name=ifrm)
+- /ec5/menu/<report>   : iframe 안 리포트 화면. 기준일자/창고코드 입력(Tab 4번째), 출력구분 (종) / 월별 / 최근 1년 /
+                         +4일, F3(검색창) / F8(조회) 키, 조회 중 로딩 오버레이, 그리드 행, #btnExcel 다운로드
+- /ec5/download/<report> : bench/fixtures.py 로 만든 엑셀을 첨부파일로 응답
+- /static/*            : 화면마다 붙는 배경 이미지 / 웹폰트 / 외부(localhost) 추적 스크립트 (경량 프로필 측정용)
+실제 화면처럼 조회 중이거나 조회 전에 Excel 을 누르면 다운로드가 일어나지 않고,
+다운로드는 '마지막으로 조회한' 창고 기준이라 대기가 짧으면 이전 창고 파일을 받게 된다 (대기/셀렉터 수정 검증용).
+지연은 종류별(페이지 / XHR / 조회 / 다운로드)로 따로 준다.
+실행: python -m bench.ecount_sim [--port 8765] [--scale 1] [--query-ms 800] ...
+"""
+import argparse
+import html
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SESSION_COOKIE = "ECSIM_SESSION"
+
+# 리포트 키 → (메뉴명, 즐겨찾기 등록 여부, 다운로드할 픽스처 파일명 접미사)
+REPORTS = {
+    "balance": ("창고별재고현황", False, "_창고별재고현황(1).xlsx"),
+    "warehouse": ("관리항목별재고현황", True, None),          # 창고명별 파일
+    "item_master": ("품목등록", True, "_품목마스터(1).xlsx"),
+    "movement": ("재고변동표", True, "_재고변동표(1).xlsx"),
+}
+MENU_TO_REPORT = {title: key for key, (title, _, _) in REPORTS.items()}
+
+DEFAULT_LATENCY = {
+    "page": 150,       # 로그인/메인/메뉴 화면 HTML
+    "xhr": 80,         # 메뉴검색 자동완성, 메뉴 열기, 창고코드 확인 등
+    "query": 800,      # 리포트 조회 기본
+    "query_per_1k": 50,  # 조회 결과 1,000행마다 추가
+    "download": 500,   # Excel 변환
+    "static": 30,      # 이미지 / 폰트 / 외부 스크립트
+}
+
+
+class Simulator:
+    """시뮬레이터 상태: 픽스처, 계정, 세션, 지연 설정, 요청 기록
+
+    credentials: (회사코드, 아이디, 비밀번호). None 이면 빈 값만 아니면 통과.
+    session_ttl: 세션 유지 초 (0 = 만료 없음) → 세션 만료 / 재로그인 경로 리허설
+    """
+
+    def __init__(self, manifest, credentials=None, latency=None, session_ttl=0):
+        self.manifest = manifest
+        self.credentials = credentials
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.session_ttl = session_ttl
+        self.warehouses = {str(w["warehouse_code"]): w["warehouse_name"] for w in manifest["warehouses"]}
+        self.sessions = {}
+        self.requests = Counter()
+        self.events = []
+        self.lock = threading.Lock()
+
+    # ───────── 상태 ─────────
+
+    def sleep(self, kind, rows=0):
+        ms = self.latency.get(kind, 0)
+        if kind == "query":
+            ms += self.latency.get("query_per_1k", 0) * rows / 1000
+        if ms:
+            time.sleep(ms / 1000.0)
+
+    def record(self, route, **detail):
+        with self.lock:
+            self.requests[route] += 1
+            self.events.append(dict(detail, route=route, at=round(time.monotonic(), 3)))
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests.clear()
+            self.events = []
+
+    def check_login(self, com_code, user_id, user_pw):
+        if not (com_code and user_id and user_pw):
+            return False
+        return self.credentials is None or (com_code, user_id, user_pw) == tuple(self.credentials)
+
+    def new_session(self):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[token] = time.monotonic()
+        return token
+
+    def session_valid(self, token):
+        with self.lock:
+            started = self.sessions.get(token)
+            if started is None:
+                return False
+            if self.session_ttl and time.monotonic() - started > self.session_ttl:
+                del self.sessions[token]
+                return False
+            return True
+
+    def expire_sessions(self):
+        """모든 세션 만료 (다음 요청부터 로그인 화면으로)"""
+        with self.lock:
+            self.sessions.clear()
+
+    # ───────── 리포트 데이터 ─────────
+
+    def report_rows(self, report, wh_code=""):
+        m = self.manifest
+        if report == "balance":
+            return m["inventory_rows"]
+        if report == "warehouse":
+            return m["inventory_rows"] // max(1, len(self.warehouses)) if wh_code in self.warehouses else 0
+        if report == "item_master":
+            return m["items"]
+        return m["movement_rows"]
+
+    def report_file(self, report, wh_code=""):
+        """다운로드할 픽스처 파일 경로 (없으면 None)"""
+        if report == "warehouse":
+            name = self.warehouses.get(wh_code)
+            if name is None:
+                return None
+            suffix = f"_{name}(1).xlsx"
+        else:
+            suffix = REPORTS[report][2]
+        found = sorted(f for f in os.listdir(self.manifest["dir"]) if f.endswith(suffix))
+        return os.path.join(self.manifest["dir"], found[-1]) if found else None
+
+
+# ───────── 화면 ─────────
+
+# 실제 화면처럼 이미지 / 웹폰트 / 외부 추적 스크립트를 붙인다 (경량 프로필 차단 효과 측정용).
+# 외부 호스트는 localhost 로 흉내 낸다 (로그인 주소는 127.0.0.1 이므로 다른 사이트로 판정됨)
+STATIC = {
+    "bg.png": ("image/png", 60 * 1024),
+    "ui.woff2": ("font/woff2", 90 * 1024),
+    "track.js": ("application/javascript", 30 * 1024),
+}
+
+_HEAD = """<script async src="http://localhost:{port}/static/track.js"></script>
+<style>
+@font-face {{ font-family: EcUi; src: url(/static/ui.woff2) format("woff2"); }}
+body {{ font-family: EcUi, sans-serif; font-size: 13px; margin: 8px;
+       background: url(/static/bg.png) no-repeat -9999px -9999px; }}
+"""
+_STYLE = """
+#loading { position: fixed; inset: 0; background: rgba(255,255,255,.6); display: none; }
+#msg { color: #c00; min-height: 16px; }
+#suggest li { cursor: pointer; }
+table { border-collapse: collapse; } td, th { border: 1px solid #ccc; padding: 2px 6px; }
+</style>"""
+
+LOGIN_PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>ECOUNT 로그인 (시뮬레이터)</title>{style}</head>
+<body>
+<h2>ECOUNT ERP 로그인</h2>
+<form method="post" action="/login/">
+  <div>회사코드 <input id="com_code" name="com_code" autocomplete="off"></div>
+  <div>아이디 <input id="id" name="id" autocomplete="off"></div>
+  <div>비밀번호 <input id="passwd" name="passwd" type="password"></div>
+  <button id="save" type="submit">로그인</button>
+</form>
+<div id="msg">{message}</div>
+</body></html>"""
+
+MAIN_PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>ECOUNT ERP (시뮬레이터)</title>{style}</head>
+<body>
+<div id="header">
+  <input id="txtSearch" placeholder="메뉴검색" autocomplete="off">
+  <ul id="suggest"></ul>
+</div>
+<div id="favorites">즐겨찾기: {favorites}</div>
+<div id="msg"></div>
+<iframe name="ifrm" id="ifrm" src="/ec5/menu/home" style="width: 100%; height: 700px; border: 0"></iframe>
+<script>
+const box = document.getElementById('txtSearch');
+const suggest = document.getElementById('suggest');
+async function openMenu(name) {{
+  suggest.innerHTML = '';
+  const r = await fetch('/ec5/api/menu?name=' + encodeURIComponent(name));
+  const data = await r.json();
+  document.getElementById('msg').textContent = data.ok ? '' : data.message;
+  if (data.ok) document.getElementById('ifrm').src = data.url;
+}}
+document.querySelectorAll('#favorites a').forEach(a => a.addEventListener('click', e => {{
+  e.preventDefault();
+  openMenu(a.dataset.menu);
+}}));
+box.addEventListener('input', async () => {{
+  const r = await fetch('/ec5/api/suggest?q=' + encodeURIComponent(box.value));
+  const names = await r.json();
+  suggest.innerHTML = '';
+  for (const name of names) {{
+    const li = document.createElement('li');
+    li.textContent = name + ' (메뉴)';
+    li.addEventListener('click', () => openMenu(name));
+    suggest.appendChild(li);
+  }}
+}});
+box.addEventListener('keydown', e => {{
+  if (e.key === 'Enter') {{ e.preventDefault(); openMenu(box.value.trim()); }}
+}});
+</script>
+</body></html>"""
+
+HOME_PAGE = """<!doctype html><html><head><meta charset="utf-8">{style}</head>
+<body><p>대시보드 (시뮬레이터)</p></body></html>"""
+
+# 조건 영역 Tab 순서: 기준일자 시작(1) → 종료(2) → 오늘(3) → 창고코드(4)  (첫 창고 시퀀스의 Tab 4회, F3 후 Tab 3회)
+REPORT_PAGE = """<!doctype html><html><head><meta charset="utf-8">{style}</head>
+<body>
+<div id="loading" class="loading">데이터를 불러오는 중...</div>
+<h3>{title} · 시뮬레이터</h3>
+<div id="cond">
+  <div>기준일자 <input id="dtFrom" value="{date_from}"> ~ <input id="dtTo" value="{date_to}">
+    <button type="button" id="btnToday">오늘</button></div>
+  <div>창고 <input id="txtWhCd" autocomplete="off"> <span id="whName"></span></div>
+  <div>출력구분
+    <label><input type="radio" name="outType" value="item" checked>품목별</label>
+    <label><input type="radio" name="outType" value="jong">(종)</label></div>
+  <div>집계
+    <label><input type="radio" name="aggr" value="daily" checked>일별</label>
+    <label><input type="radio" name="aggr" value="monthly">월별</label></div>
+  <div>기간 <button type="button" id="btn1m">최근 1개월</button> <button type="button" id="btn1y">최근 1년</button>
+    <button type="button" id="btn4d">+4일</button></div>
+</div>
+<div><button type="button" id="btnSearch">조회(F8)</button> <button type="button" id="btnExcel">Excel</button></div>
+<div id="msg"></div>
+<table id="grid"><thead><tr><th>No</th><th>품목코드</th><th>수량</th></tr></thead><tbody></tbody></table>
+<script>
+const REPORT = '{report}';
+const PREVIEW_ROWS = 100;
+let buffer = '', whCode = '', period = '', busy = false, queried = null;
+const $ = id => document.getElementById(id);
+const msg = text => {{ $('msg').textContent = text; }};
+const checked = name => document.querySelector('input[name=' + name + ']:checked').value;
+
+async function api(path) {{
+  const r = await fetch('/ec5/api/' + path);
+  return r.json();
+}}
+function loading(on) {{ $('loading').style.display = on ? 'block' : 'none'; }}
+function render(rows) {{
+  const tbody = document.querySelector('#grid tbody');
+  tbody.innerHTML = '';
+  for (let i = 0; i < Math.min(rows, PREVIEW_ROWS); i++) {{
+    const tr = document.createElement('tr');
+    tr.innerHTML = '<td>' + (i + 1) + '</td><td>ITEM' + i + '</td><td>' + (i % 7) + '</td>';
+    tbody.appendChild(tr);
+  }}
+}}
+async function runQuery() {{
+  if (busy) return;
+  if (REPORT === 'warehouse' && !whCode) {{ msg('창고코드를 입력하세요'); return; }}
+  busy = true; loading(true); msg('');
+  try {{
+    const params = new URLSearchParams({{report: REPORT, wh: whCode, out: checked('outType'),
+                                          aggr: checked('aggr'), period: period}});
+    const data = await api('query?' + params);
+    render(data.rows);
+    queried = {{wh: whCode}};
+  }} finally {{
+    busy = false; loading(false);
+  }}
+}}
+async function setWarehouse(code) {{
+  const data = await api('warehouse?code=' + encodeURIComponent(code));
+  if (data.ok) {{ whCode = code; $('txtWhCd').value = code; $('whName').textContent = data.name; }}
+  else msg(data.message);
+}}
+async function init() {{
+  loading(true);
+  try {{
+    const data = await api('init?report=' + REPORT);
+    // 품목등록은 화면을 열면 목록이 바로 조회된다
+    if (data.rows) {{ render(data.rows); queried = {{wh: ''}}; }}
+  }} finally {{ loading(false); }}
+}}
+document.addEventListener('keydown', e => {{
+  if (e.key === 'F8') {{ e.preventDefault(); runQuery(); return; }}
+  // 검색창: 포커스가 기준일자로 돌아가므로 Tab 3회면 창고코드 칸
+  if (e.key === 'F3') {{ e.preventDefault(); buffer = ''; $('dtFrom').focus(); api('search-form?report=' + REPORT); return; }}
+  if (e.key === 'Enter') {{
+    if (buffer) {{ e.preventDefault(); setWarehouse(buffer); buffer = ''; }}
+    return;
+  }}
+  if (e.key.length === 1 && /[0-9A-Za-z]/.test(e.key)) buffer += e.key;
+}});
+$('btnSearch').addEventListener('click', runQuery);
+$('btn1m').addEventListener('click', () => {{ period = '1m'; }});
+$('btn1y').addEventListener('click', () => {{ period = '1y'; }});
+$('btn4d').addEventListener('click', () => {{ period = '+4d'; runQuery(); }});
+$('btnExcel').addEventListener('click', () => {{
+  if (busy) {{ msg('조회 중에는 Excel 변환을 할 수 없습니다'); return; }}
+  if (!queried) {{ msg('조회 후 Excel 변환이 가능합니다'); return; }}
+  const a = document.createElement('a');
+  a.href = '/ec5/download/' + REPORT + '?wh=' + encodeURIComponent(queried.wh);
+  a.download = '';
+  document.body.appendChild(a);
+  a.click();
+  a.remove();
+}});
+init();
+</script>
+</body></html>"""
+
+
+def make_handler(sim):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        # ───────── 응답 ─────────
+
+        def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=(), cache="no-store"):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", cache)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _style(self):
+            return _HEAD.format(port=self.server.server_address[1]) + _STYLE
+
+        def _json(self, body):
+            self._send(200, json.dumps(body, ensure_ascii=False), "application/json; charset=utf-8")
+
+        def _redirect(self, location, headers=()):
+            self._send(302, b"", headers=[("Location", location), *headers])
+
+        def _session(self):
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            morsel = cookie.get(SESSION_COOKIE)
+            return morsel is not None and sim.session_valid(morsel.value)
+
+        # ───────── 라우팅 ─────────
+
+        def do_GET(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            path = urllib.parse.unquote(parsed.path)
+            query = {k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+
+            if path in ("/", "/login", "/login/"):
+                sim.record("login_page")
+                sim.sleep("page")
+                if self._session():
+                    return self._redirect("/ec5/view/erp")
+                return self._send(200, LOGIN_PAGE.format(style=self._style(), message=""))
+            if path == "/favicon.ico":
+                return self._send(404, b"", "text/plain")
+            if path.startswith("/static/") and path[len("/static/"):] in STATIC:
+                content_type, size = STATIC[path[len("/static/"):]]
+                sim.record("static", name=path[len("/static/"):], host=self.headers.get("Host", ""))
+                sim.sleep("static")
+                body = (b"//" + b"x" * (size - 2)) if content_type.endswith("javascript") else bytes(size)
+                return self._send(200, body, content_type, cache="max-age=3600")
+            if not self._session():
+                sim.record("expired", path=path)
+                if path.startswith("/ec5/api/"):
+                    return self._send(401, json.dumps({"ok": False, "message": "세션 만료"}), "application/json")
+                return self._redirect("/login/")
+
+            if path == "/ec5/view/erp":
+                sim.record("main_page")
+                sim.sleep("page")
+                favorites = " ".join(
+                    f'<a href="#" title="{html.escape(title)}" data-menu="{html.escape(title)}">{html.escape(title)}</a>'
+                    for title, favorite, _ in REPORTS.values() if favorite)
+                return self._send(200, MAIN_PAGE.format(style=self._style(), favorites=favorites))
+            if path == "/ec5/menu/home":
+                return self._send(200, HOME_PAGE.format(style=self._style()))
+            if path.startswith("/ec5/menu/"):
+                report = path[len("/ec5/menu/"):]
+                if report not in REPORTS:
+                    return self._send(404, "메뉴 없음")
+                sim.record("menu_page", report=report)
+                sim.sleep("page")
+                today = datetime.now()
+                return self._send(200, REPORT_PAGE.format(
+                    style=self._style(), title=REPORTS[report][0], report=report,
+                    date_from=(today - timedelta(days=30)).strftime("%Y/%m/%d"), date_to=today.strftime("%Y/%m/%d")))
+            if path.startswith("/ec5/api/"):
+                return self._api(path[len("/ec5/api/"):], query)
+            if path.startswith("/ec5/download/"):
+                return self._download(path[len("/ec5/download/"):], query.get("wh", ""))
+            return self._send(404, "not found", "text/plain")
+
+        def do_POST(self):
+            path = urllib.parse.urlsplit(self.path).path
+            if path.rstrip("/") != "/login":
+                return self._send(404, "not found", "text/plain")
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {k: v[-1] for k, v in urllib.parse.parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+            sim.sleep("page")
+            if not sim.check_login(form.get("com_code"), form.get("id"), form.get("passwd")):
+                sim.record("login_failed")
+                return self._send(200, LOGIN_PAGE.format(style=self._style(), message="회사코드/아이디/비밀번호를 확인하세요"))
+            sim.record("login")
+            token = sim.new_session()
+            return self._redirect("/ec5/view/erp", [("Set-Cookie", f"{SESSION_COOKIE}={token}; Path=/; HttpOnly")])
+
+        def _api(self, name, query):
+            sim.sleep("query" if name == "query" else "xhr",
+                      sim.report_rows(query.get("report", ""), query.get("wh", "")) if name == "query" else 0)
+            if name == "suggest":
+                q = query.get("q", "").strip()
+                sim.record("suggest")
+                return self._json([title for title in MENU_TO_REPORT if q and q in title])
+            if name == "menu":
+                name_q = query.get("name", "").strip()
+                matches = [title for title in MENU_TO_REPORT if name_q and name_q in title]
+                report = MENU_TO_REPORT.get(name_q) or (MENU_TO_REPORT[matches[0]] if len(matches) == 1 else None)
+                sim.record("menu", name=name_q, ok=report is not None)
+                if report is None:
+                    return self._json({"ok": False, "message": f"'{name_q}' 메뉴를 찾을 수 없습니다"})
+                return self._json({"ok": True, "url": f"/ec5/menu/{report}"})
+            if name == "init":
+                report = query.get("report", "")
+                sim.record("init", report=report)
+                return self._json({"rows": sim.report_rows(report) if report == "item_master" else 0})
+            if name == "warehouse":
+                code = query.get("code", "")
+                wh_name = sim.warehouses.get(code)
+                sim.record("warehouse", code=code, ok=wh_name is not None)
+                if wh_name is None:
+                    return self._json({"ok": False, "message": f"창고코드 {code} 없음"})
+                return self._json({"ok": True, "name": wh_name})
+            if name == "search-form":
+                sim.record("search_form")
+                return self._json({"ok": True})
+            if name == "query":
+                report, wh_code = query.get("report", ""), query.get("wh", "")
+                rows = sim.report_rows(report, wh_code)
+                sim.record("query", report=report, wh=wh_code, rows=rows, out=query.get("out"),
+                           aggr=query.get("aggr"), period=query.get("period"))
+                return self._json({"rows": rows})
+            return self._send(404, "not found", "text/plain")
+
+        def _download(self, report, wh_code):
+            path = sim.report_file(report, wh_code) if report in REPORTS else None
+            sim.record("download", report=report, wh=wh_code, ok=path is not None)
+            if path is None:
+                return self._send(404, "파일 없음", "text/plain")
+            sim.sleep("download")
+            with open(path, "rb") as f:
+                data = f.read()
+            filename = urllib.parse.quote(f"{REPORTS[report][0]}.xlsx")
+            return self._send(200, data, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                              [("Content-Disposition", f"attachment; filename=\"export.xlsx\"; filename*=UTF-8''{filename}")])
+
+    return Handler
+
+
+def serve(sim, port=0, host="127.0.0.1"):
+    """백그라운드 스레드로 시뮬레이터 시작 → (server, login_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(sim))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="ecount-sim").start()
+    return server, f"http://{host}:{server.server_address[1]}/login/"
+
+
+def latency_args(ap):
+    """지연 관련 CLI 인자 (bench.rpa_bench 와 공용)"""
+    for kind, default in DEFAULT_LATENCY.items():
+        ap.add_argument(f"--{kind.replace('_', '-')}-ms", dest=f"latency_{kind}", type=float, default=default,
+                        help=f"{kind} 지연 (ms, 기본 {default})")
+
+
+def latency_from(args):
+    return {kind: getattr(args, f"latency_{kind}") for kind in DEFAULT_LATENCY}
+
+
+if __name__ == "__main__":
+    from bench import fixtures
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--scale", type=int, default=1, help="다운로드 픽스처 배율")
+    ap.add_argument("--session-ttl", type=float, default=0, help="세션 유지 초 (0 = 만료 없음)")
+    latency_args(ap)
+    args = ap.parse_args()
+    simulator = Simulator(fixtures.build(args.scale), latency=latency_from(args), session_ttl=args.session_ttl)
+    srv, url = serve(simulator, port=args.port)
+    print(f"ECOUNT 시뮬레이터: {url}  (ECOUNT_LOGIN_URL={url} 로 에이전트 연결, Ctrl+C 종료)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,444 @@
+"""
+오프라인 벤치마크용 PostgREST 호환 인메모리 서버.
+
+ecount_agent 가 쓰는 만큼만 구현한다.
+- GET    /rest/v1/<table>?select=&order=&limit=&offset=&<필터>
+- POST   /rest/v1/<table>[?on_conflict=]   (Prefer: resolution=merge-duplicates → 키 기준 upsert)
+- PATCH / DELETE /rest/v1/<table>?<필터>
+- POST   /rest/v1/rpc/<name>  → RPC_HANDLERS (SQL 함수와 같은 의미의 파이썬 구현, 없으면 404)
+필터: eq / neq / gt / gte / lt / lte / like / ilike / in / is.null, not.<op>, or=(...)
+요청 본문 gzip(Content-Encoding) 지원. 요청 수는 (메서드, 테이블) 별로 센다.
+실행: python -m bench.fake_postgrest [--port 54321] [--latency-ms 0]
+"""
+import argparse
+import gzip
+import json
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KST = timezone(timedelta(hours=9))
+
+# on_conflict 가 없을 때 upsert 키 (실제 DB 의 PK / 유니크 인덱스)
+TABLE_KEYS = {
+    "system_config": ("key",),
+    "item_master": ("division", "item_code"),
+    "warehouse_codes": ("warehouse_code",),
+    "warehouse_inventory_details": ("warehouse_name", "item_code", "expiration_date"),
+    "rpa_run_journal": ("run_id", "step", "item"),
+    "rpa_traces": ("run_id", "span_id"),
+}
+INVENTORY_VALUE_FIELDS = ("item_name_spec", "category", "stock_qty", "unit_price", "inventory_cost")
+
+
+# ───────── 필터 ─────────
+
+def _split_top(text, sep=","):
+    """괄호/따옴표 밖의 sep 로만 분리"""
+    parts, buf, depth, quoted = [], "", 0, False
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append(buf)
+            buf = ""
+        else:
+            buf += ch
+    parts.append(buf)
+    return parts
+
+
+def _like(pattern, flags=0):
+    regex = "".join(".*" if c in "*%" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", flags | re.DOTALL)
+
+
+def _text(v):
+    if v is None:
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _predicate(column, expr):
+    """'eq.x' / 'not.like.*a*' / 'in.("a","b")' → row → bool"""
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, arg = expr.partition(".")
+    if op == "in":
+        values = {v.strip().strip('"').replace('\\"', '"') for v in _split_top(arg.strip()[1:-1])}
+        test = lambda v: _text(v) in values
+    elif op == "is":
+        test = (lambda v: v is None) if arg == "null" else (lambda v: _text(v) == arg)
+    elif op in ("like", "ilike"):
+        rx = _like(arg, re.IGNORECASE if op == "ilike" else 0)
+        test = lambda v: v is not None and bool(rx.match(str(v)))
+    elif op in ("gt", "gte", "lt", "lte"):
+        cmp = {"gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+               "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b}[op]
+
+        def test(v):
+            if v is None:
+                return False
+            try:
+                return cmp(float(v), float(arg))
+            except (TypeError, ValueError):
+                return cmp(str(v), arg)
+    elif op == "eq":
+        test = lambda v: _text(v) == arg
+    elif op == "neq":
+        test = lambda v: v is not None and _text(v) != arg
+    else:
+        raise ValueError(f"지원하지 않는 연산자: {op}")
+    if negate:
+        return lambda row: not test(row.get(column))
+    return lambda row: test(row.get(column))
+
+
+def _or_predicate(expr):
+    preds = []
+    for part in _split_top(expr.strip()[1:-1]):
+        column, _, rest = part.partition(".")
+        preds.append(_predicate(column, rest))
+    return lambda row: any(p(row) for p in preds)
+
+
+RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def parse_query(query):
+    """쿼리 문자열 → (옵션 dict, 필터 함수 목록)"""
+    opts, preds = {}, []
+    for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True):
+        if name in RESERVED:
+            opts[name] = value
+        elif name == "or":
+            preds.append(_or_predicate(value))
+        else:
+            preds.append(_predicate(name, value))
+    return opts, preds
+
+
+def _order_key(column):
+    def key(row):
+        # NULL 은 오름차순 끝 / 내림차순 처음 (PostgreSQL 기본)
+        v = row.get(column)
+        return (v is None, float(v) if isinstance(v, (int, float)) else ("" if v is None else v))
+    return key
+
+
+# ───────── 저장소 ─────────
+
+class Store:
+    """테이블명 → 행(dict) 목록. 모든 변경은 하나의 락 안에서 (RPC 는 트랜잭션처럼 원자적)"""
+
+    def __init__(self):
+        self.tables = {}
+        self.lock = threading.RLock()
+        self.requests = Counter()
+        # 💡 limit/offset 페이지 조회(select_all)마다 전체를 다시 거르고 정렬하면 서버 쪽 비용이
+        # 실제 DB(인덱스 스캔)보다 훨씬 커져 측정이 왜곡되므로, 변경이 없는 동안 정렬 결과를 재사용한다
+        self._sorted = {}
+
+    def table(self, name):
+        self._sorted.pop(name, None)   # 호출자가 행을 바꿀 수 있으므로 캐시 무효화
+        return self.tables.setdefault(name, [])
+
+    def reset(self):
+        with self.lock:
+            self.tables.clear()
+            self._sorted.clear()
+
+    def seed(self, name, rows):
+        with self.lock:
+            self.tables[name] = [dict(r) for r in rows]
+            self._sorted.pop(name, None)
+
+    def _filtered(self, name, query):
+        params = [(k, v) for k, v in urllib.parse.parse_qsl(query, keep_blank_values=True)
+                  if k not in ("limit", "offset")]
+        cache_key = urllib.parse.urlencode(params)
+        cached = self._sorted.get(name)
+        if cached and cached[0] == cache_key:
+            return cached[1]
+        opts, preds = parse_query(query)
+        rows = [r for r in self.tables.get(name, []) if all(p(r) for p in preds)]
+        for part in reversed([p for p in opts.get("order", "").split(",") if p]):
+            column, _, direction = part.partition(".")
+            desc = direction.startswith("desc")
+            rows.sort(key=_order_key(column), reverse=desc)
+        self._sorted[name] = (cache_key, rows)
+        return rows
+
+    def select(self, name, query):
+        opts, _ = parse_query(query)
+        rows = self._filtered(name, query)
+        offset = int(opts.get("offset", 0) or 0)
+        limit = opts.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+        select = opts.get("select", "*")
+        if select and select != "*":
+            cols = [c.strip() for c in select.split(",")]
+            rows = [{c: r.get(c) for c in cols} for r in rows]
+        return [dict(r) for r in rows]
+
+    def upsert(self, name, rows, keys):
+        table = self.table(name)
+        index = {tuple(_text(r.get(k)) for k in keys): i for i, r in enumerate(table)}
+        for row in rows:
+            key = tuple(_text(row.get(k)) for k in keys)
+            if key in index:
+                table[index[key]].update(row)
+            else:
+                index[key] = len(table)
+                table.append(dict(row))
+
+    def insert(self, name, rows):
+        self.table(name).extend(dict(r) for r in rows)
+
+    def delete(self, name, preds):
+        table = self.table(name)
+        kept = [r for r in table if not all(p(r) for p in preds)]
+        removed = len(table) - len(kept)
+        self.tables[name] = kept
+        return removed
+
+    def update(self, name, preds, values):
+        count = 0
+        for r in self.table(name):
+            if all(p(r) for p in preds):
+                r.update(values)
+                count += 1
+        return count
+
+
+# ───────── RPC (SQL 함수와 같은 의미) ─────────
+
+def _inv_key(r):
+    return (_text(r.get("warehouse_name")), _text(r.get("item_code")), _text(r.get("expiration_date")))
+
+
+def _inv_values(r):
+    return tuple(_text(r.get(f)) if f in ("item_name_spec", "category") else float(r.get(f) or 0)
+                 for f in INVENTORY_VALUE_FIELDS)
+
+
+def rpc_apply_inventory_delta(store, p_upserts=(), p_deletes=()):
+    """inventory_delta_sync.sql"""
+    keys = {_inv_key(d) for d in p_deletes}
+    table = store.table("warehouse_inventory_details")
+    before = len(table)
+    store.tables["warehouse_inventory_details"] = [r for r in table if _inv_key(r) not in keys]
+    deleted = before - len(store.tables["warehouse_inventory_details"])
+    store.upsert("warehouse_inventory_details", p_upserts, TABLE_KEYS["warehouse_inventory_details"])
+    return {"upserted": len(p_upserts), "deleted": deleted}
+
+
+def rpc_merge_inventory_snapshot(store, p_rows=(), p_warehouses=(), p_patterns=(), p_record_date=None,
+                                 p_history=True):
+    """inventory_snapshot_merge.sql"""
+    patterns = [_like(p) for p in p_patterns]
+    names = set(p_warehouses)
+    in_scope = lambda r: r.get("warehouse_name") in names or any(p.match(r.get("warehouse_name") or "")
+                                                                 for p in patterns)
+    table = store.table("warehouse_inventory_details")
+    old = [r for r in table if in_scope(r)]
+    history = 0
+    if p_history:
+        def totals(rows):
+            out = {}
+            for r in rows:
+                k = (r["warehouse_name"], r["item_code"])
+                qty, name = out.get(k, (0.0, None))
+                out[k] = (qty + float(r.get("stock_qty") or 0), max(filter(None, (name, r.get("item_name_spec"))),
+                                                                     default=None))
+            return out
+        o, n = totals(old), totals(p_rows)
+        record_date = p_record_date or datetime.now(KST).strftime("%Y-%m-%d")
+        entries = []
+        for k in set(o) | set(n):
+            prev, curr = o.get(k, (0.0, None))[0], n.get(k, (0.0, None))[0]
+            if prev != curr:
+                entries.append({"record_date": record_date, "warehouse_name": k[0], "item_code": k[1],
+                                "item_name_spec": (n.get(k) or o.get(k))[1], "prev_qty": prev,
+                                "curr_qty": curr, "diff_qty": curr - prev})
+        store.insert("inventory_history", entries)
+        history = len(entries)
+
+    snapshot = {_inv_key(r): r for r in p_rows}
+    kept = [r for r in table if not in_scope(r) or _inv_key(r) in snapshot]
+    deleted = len(table) - len(kept)
+    store.tables["warehouse_inventory_details"] = kept
+    current = {_inv_key(r): r for r in kept}
+    inserted = updated = 0
+    changed = []
+    for key, row in snapshot.items():
+        existing = current.get(key)
+        if existing is None:
+            inserted += 1
+            changed.append(row)
+        elif _inv_values(existing) != _inv_values(row):
+            updated += 1
+            changed.append(row)
+    store.upsert("warehouse_inventory_details", changed, TABLE_KEYS["warehouse_inventory_details"])
+    return {"inserted": inserted, "updated": updated, "deleted": deleted,
+            "unchanged": len(p_rows) - inserted - updated, "history": history}
+
+
+def rpc_sync_monthly_history(store, p_warehouse, p_rows=(), p_months=(), p_window=()):
+    """monthly_history_sync.sql"""
+    if not p_warehouse.endswith("_월별"):
+        raise ValueError("sync_monthly_history: 월별 이력만 동기화할 수 있습니다")
+    table = store.table("inventory_history")
+    window, months = set(p_window), set(p_months)
+    new_keys = {(r["item_code"], r["record_date"]) for r in p_rows}
+    kept, expired, deleted = [], 0, 0
+    for r in table:
+        if r.get("warehouse_name") == p_warehouse:
+            date = str(r.get("record_date"))[:10]
+            if date not in window:
+                expired += 1
+                continue
+            if date in months and (r.get("item_code"), date) not in new_keys:
+                deleted += 1
+                continue
+        kept.append(r)
+    store.tables["inventory_history"] = kept
+    # 부분 유니크 인덱스 (warehouse_name, item_code, record_date) 기준 upsert
+    index = {(r["item_code"], str(r["record_date"])[:10]): r for r in kept if r.get("warehouse_name") == p_warehouse}
+    for row in p_rows:
+        existing = index.get((row["item_code"], row["record_date"]))
+        values = {k: row.get(k) for k in ("item_name_spec", "curr_qty", "diff_qty")}
+        if existing is not None:
+            existing.update(values)
+        else:
+            new = {"warehouse_name": p_warehouse, "item_code": row["item_code"],
+                   "record_date": row["record_date"], **values}
+            kept.append(new)
+            index[(row["item_code"], row["record_date"])] = new
+    return {"upserted": len(p_rows), "deleted": deleted, "expired": expired}
+
+
+RPC_HANDLERS = {
+    "apply_inventory_delta": rpc_apply_inventory_delta,
+    "merge_inventory_snapshot": rpc_merge_inventory_snapshot,
+    "sync_monthly_history": rpc_sync_monthly_history,
+}
+
+
+# ───────── HTTP ─────────
+
+def make_handler(store, latency_ms=0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive (에이전트 커넥션 풀과 같은 조건)
+        disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 지연 ACK 로 요청마다 ~40ms 가 붙는 것 방지
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body=None):
+            data = b"" if body is None else json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            return json.loads(raw) if raw else None
+
+        def _route(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            path = urllib.parse.unquote(parsed.path)
+            if not path.startswith("/rest/v1/"):
+                return None, None
+            return path[len("/rest/v1/"):].strip("/"), parsed.query
+
+        def _handle(self, method):
+            name, query = self._route()
+            body = self._body() if method in ("POST", "PATCH") else None
+            if name is None:
+                return self._reply(404, {"message": "not found"})
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            store.requests[(method, name.split("/")[0] if not name.startswith("rpc/") else name)] += 1
+            prefer = self.headers.get("Prefer", "")
+            minimal = "return=minimal" in prefer
+            try:
+                with store.lock:
+                    if name.startswith("rpc/"):
+                        fn = RPC_HANDLERS.get(name[4:])
+                        if fn is None:
+                            return self._reply(404, {"code": "PGRST202", "message": f"function {name[4:]} not found"})
+                        return self._reply(200, fn(store, **(body or {})))
+                    if method == "GET":
+                        return self._reply(200, store.select(name, query))
+                    opts, preds = parse_query(query)
+                    if method == "POST":
+                        rows = body if isinstance(body, list) else [body]
+                        if "merge-duplicates" in prefer:
+                            keys = tuple(opts["on_conflict"].split(",")) if opts.get("on_conflict") \
+                                else TABLE_KEYS.get(name, ("id",))
+                            store.upsert(name, rows, keys)
+                        else:
+                            store.insert(name, rows)
+                        return self._reply(201, None if minimal else rows)
+                    if method == "PATCH":
+                        store.update(name, preds, body or {})
+                        return self._reply(204)
+                    if method == "DELETE":
+                        store.delete(name, preds)
+                        return self._reply(204)
+            except Exception as e:   # SQL 오류와 같은 400 으로
+                return self._reply(400, {"message": str(e)})
+            return self._reply(405, {"message": method})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return Handler
+
+
+def serve(store=None, port=0, host="127.0.0.1", latency_ms=0):
+    """백그라운드 스레드로 서버 시작 → (server, store, base_url)"""
+    store = store or Store()
+    server = ThreadingHTTPServer((host, port), make_handler(store, latency_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-postgrest").start()
+    return server, store, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=54321)
+    ap.add_argument("--latency-ms", type=float, default=0, help="요청마다 추가할 지연 (원격 Supabase 왕복 흉내)")
+    args = ap.parse_args()
+    srv, _, url = serve(port=args.port, latency_ms=args.latency_ms)
+    print(f"fake PostgREST: {url}/rest/v1/  (Ctrl+C 종료)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
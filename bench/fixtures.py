@@ -0,0 +1,171 @@
+"""
+오프라인 벤치마크 픽스처: 이카운트 export 와 같은 구조의 엑셀 + 가짜 DB 시드 데이터.
+
+기록된 품목 마스터(IWP_item_master_20260615.xlsx, 본사 품목)를 품목 카탈로그로 삼아
+scale 배(1× / 10× / 100×)로 품목코드를 늘린 변형을 만든다. 생성물은 다운로드 폴더와 같은 파일명 규칙:
+- {MMDD}_창고별재고현황(1).xlsx   : 창고별 재고 (process_inventory_excel, 단가 참조용 통합 파일)
+- {MMDD}_{창고명}(1).xlsx          : 관리항목별 창고 상세 (process_warehouse_inventory_files)
+- {MMDD}_품목마스터(1).xlsx        : 품목등록 export (process_item_master_excel)
+- {MMDD}_재고변동표(1).xlsx        : 월별 재고변동표 12개월+이번 달 (process_inventory_movement_excel)
+파일명(MMDD, 에이전트와 같이 로컬 시각)과 월 구간(KST)이 실행 날짜에 묶여 있으므로
+bench/.fixtures/x{scale}-{YYYYMMDD}/ 에 날짜별로 캐시한다.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import openpyxl
+from dateutil.relativedelta import relativedelta
+
+KST = timezone(timedelta(hours=9))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDED_ITEM_MASTER = os.path.join(ROOT, "IWP_item_master_20260615.xlsx")
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fixtures")
+
+# (창고코드, 통합 파일 표기, 정식 창고명)
+WAREHOUSES = [("W001", "본사 A급 창고", "본사A급"), ("W002", "본사 B급 창고", "본사B급"),
+              ("W003", "반품 창고", "반품창고"), ("W004", "본사 C급 창고", "본사C급"),
+              ("W005", "샘플 창고", "샘플창고")]
+BRANDS = ["쿠퍼스", "IWP", "브루마스터", "홈브루", "[기타]"]
+
+
+def load_catalog(path=RECORDED_ITEM_MASTER):
+    """기록된 품목 마스터의 본사 품목 → [(코드, 품목명, 카테고리, 입고단가)]"""
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = list(book.worksheets[0].iter_rows(values_only=True))
+    finally:
+        book.close()
+    header = [str(c).strip() for c in rows[0]]
+    idx = {name: header.index(name) for name in ("구분", "품목코드", "품목명", "카테고리", "입고단가")}
+    return [(str(r[idx["품목코드"]]).strip(), str(r[idx["품목명"]]).strip(), str(r[idx["카테고리"]]).strip(),
+             int(r[idx["입고단가"]] or 0))
+            for r in rows[1:] if r[idx["구분"]] == "본사" and r[idx["품목코드"]]]
+
+
+def scaled_catalog(scale):
+    """카탈로그를 scale 배로 (복제본은 품목코드 뒤에 R{n} 접미사)"""
+    base = load_catalog()
+    return [(code if rep == 0 else f"{code}R{rep}", name if rep == 0 else f"{name} {rep}", cat, price)
+            for rep in range(scale) for code, name, cat, price in base]
+
+
+def _write_sheet(path, title, header, rows):
+    """이카운트 export 모양: 1행 회사/기간 안내, 2행 헤더, 이후 본문 (write-only 스트리밍)"""
+    book = openpyxl.Workbook(write_only=True)
+    sheet = book.create_sheet()
+    sheet.append([title])
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    tmp = path + ".part"
+    book.save(tmp)
+    os.replace(tmp, path)
+
+
+def _exp_code(rng):
+    kind = rng.integers(0, 4)
+    if kind == 0:
+        return None
+    date = datetime(2026, 1, 1) + timedelta(days=int(rng.integers(0, 1200)))
+    return date.strftime("%Y%m%d")
+
+
+def build(scale=1, seed=42, now=None, out_dir=None, force=False):
+    """픽스처 생성 (이미 있으면 재사용) → manifest dict"""
+    now = now or datetime.now(KST)
+    today = datetime.now()
+    out_dir = out_dir or os.path.join(FIXTURE_DIR, f"x{scale}-{today:%Y%m%d}")
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    os.makedirs(out_dir, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    mmdd = today.strftime("%m%d")
+    catalog = scaled_catalog(scale)
+    n = len(catalog)
+
+    # 재고 로트: 품목마다 창고 1~2곳, 창고마다 유효기간 로트 1~2개
+    lots = []
+    for i, (code, name, cat, price) in enumerate(catalog):
+        for w in rng.choice(len(WAREHOUSES), size=int(rng.integers(1, 3)), replace=False):
+            for _ in range(int(rng.integers(1, 3))):
+                qty = int(rng.integers(0, 400))
+                lots.append((int(w), code, name, cat, price, _exp_code(rng), qty))
+
+    # 1. 창고별재고현황 (통합)
+    balance_rows = [(code, f"{name}[{cat}]", f"[{cat}]", WAREHOUSES[w][0], WAREHOUSES[w][1], exp or "",
+                     qty, price if rng.random() > 0.1 else 0)
+                    for w, code, name, cat, price, exp, qty in lots]
+    balance_rows.append(("합계", "", "", "", "", "", sum(r[6] for r in balance_rows), ""))
+    _write_sheet(os.path.join(out_dir, f"{mmdd}_창고별재고현황(1).xlsx"), f"회사명 : IWP / {now:%Y/%m/%d} 현재",
+                 ["품목코드", "품목명[규격]", "품목구분", "창고코드", "창고명", "관리항목명", "재고수량", "입고단가"],
+                 balance_rows)
+
+    # 2. 관리항목별 창고 상세 (창고마다 한 파일)
+    for w, (_, _, wh_name) in enumerate(WAREHOUSES):
+        rows = [(code, f"{name}[{cat}]", exp or "00", f"{exp[:4]}/{exp[4:6]}/{exp[6:]}" if exp else "", qty)
+                for lw, code, name, cat, price, exp, qty in lots if lw == w]
+        rows.append((f"{wh_name} 계", "", "", "", sum(r[4] for r in rows)))
+        _write_sheet(os.path.join(out_dir, f"{mmdd}_{wh_name}(1).xlsx"), f"관리항목별재고현황 / {wh_name}",
+                     ["품목코드", "품목명", "유효기간코드", "유효기간일", "수량"], rows)
+
+    # 3. 품목마스터 (품목그룹1 = 브랜드, 일부 단종 / 무형상품 / 제외 카테고리)
+    master_rows = []
+    for i, (code, name, cat, price) in enumerate(catalog):
+        group2 = "단종" if i % 53 == 0 else ""
+        category = "무형상품" if i % 97 == 0 else ("원재료" if i % 71 == 0 else cat)
+        master_rows.append((code, name, category, price, BRANDS[i % len(BRANDS)], group2, ""))
+    _write_sheet(os.path.join(out_dir, f"{mmdd}_품목마스터(1).xlsx"), "품목등록",
+                 ["품목코드", "품목명", "품목구분", "입고단가", "품목그룹1", "품목그룹2", "품목그룹3"], master_rows)
+
+    # 4. 재고변동표 (품목별 전일재고 / 13개월 월 행 / 'XXX 계' 행, 일부 품목은 몇 달 전 활동 중단)
+    months = [(now - relativedelta(months=m)).strftime("%Y/%m") for m in range(12, -1, -1)]
+    movement_rows = []
+    active = rng.random(n) < 0.7
+    for i, (code, name, cat, price) in enumerate(catalog):
+        if not active[i]:
+            continue
+        stop = int(rng.integers(0, len(months) + 1)) if i % 4 == 0 else 0
+        rate = float(rng.gamma(1.5, 30))
+        bal = int(rng.integers(0, 500))
+        movement_rows.append((code, f"{name}[{cat}]", "", "전일재고", "", "", bal))
+        total_in = total_out = 0
+        for m, month in enumerate(months):
+            live = m < len(months) - stop
+            qin = int(rng.poisson(rate)) if live and rng.random() < 0.3 else 0
+            qout = int(rng.poisson(rate)) if live else 0
+            bal += qin - qout
+            total_in += qin
+            total_out += qout
+            movement_rows.append((code, f"{name}[{cat}]", "", month, qin, qout, bal))
+        movement_rows.append((f"{code} 계", "", "", "", total_in, total_out, ""))
+    _write_sheet(os.path.join(out_dir, f"{mmdd}_재고변동표(1).xlsx"), f"재고변동표 {months[0]} ~ {months[-1]}",
+                 ["품목코드", "품목명", "규격", "일자", "입고수량", "출고수량", "잔량"], movement_rows)
+
+    manifest = {
+        "scale": scale, "date": now.strftime("%Y-%m-%d"), "dir": out_dir, "items": n,
+        "inventory_rows": len(lots), "movement_rows": len(movement_rows),
+        "warehouses": [{"warehouse_code": c, "warehouse_name": name} for c, _, name in WAREHOUSES],
+        "item_master": [{"division": "본사", "item_code": code, "item_name": name, "category": cat,
+                         "unit_price": price, "brand": "", "safety_stock": 0, "activity_status": "정상소진",
+                         "safety_months": 2.0 if i % 3 else None, "buffer_multiplier": 1, "excess_threshold": 5}
+                        for i, (code, name, cat, price) in enumerate(catalog)],
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="벤치마크 픽스처 생성")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--force", action="store_true", help="캐시가 있어도 다시 생성")
+    args = ap.parse_args()
+    for s in args.scale:
+        m = build(s, force=args.force)
+        print(f"x{s}: 품목 {m['items']:,} / 재고 로트 {m['inventory_rows']:,} / 변동표 {m['movement_rows']:,}행 → {m['dir']}")
@@ -0,0 +1,245 @@
+"""
+EcountRPA 흐름 오프라인 측정: bench/ecount_sim.py (로컬 이카운트 시뮬레이터) 에 대고 로그인 → 리포트 수집을 끝까지 실행.
+
+실제 이카운트 대신 시뮬레이터를 쓰므로 느린 단계를 추측이 아니라 측정으로 확인하고,
+대기/셀렉터 수정을 배포 전에 검증할 수 있다. 흐름마다 다음을 기록한다.
+- 소요 시간, 성공 여부, 받은 파일이 픽스처와 같은지 (sha256, 대기가 짧아 이전 창고 파일을 받으면 불일치)
+- 단계별(login / navigate / download) 소요 시간 합 (EcountRPA metrics_cb)
+- 화면 대기 라벨별 통계 (WaitStats: 어느 대기가 오래 걸리거나 타임아웃 나는지)
+- 시뮬레이터가 받은 요청 수 (메뉴검색 자동완성 / 조회 / 다운로드 / 정적 리소스 ...)
+- 브라우저 리소스 통계 (--profile lean 이면 차단 건수 / 절약 바이트, utils/lean_profile.py)
+- 크롬 프로세스 최대 메모리 (psutil 설치 시) / 크롬 실행 횟수 (--accounts 2 --shared 로 본사·허브 공유 비교)
+--trace 를 주면 Playwright 트레이스를 남긴다 (`playwright show-trace <zip>` 으로 동작별 타임라인/스냅샷 확인).
+
+실행 (저장소 루트에서, playwright 브라우저 필요: `playwright install chromium` 또는 --channel chrome):
+    python -m bench.rpa_bench                                   # 번들 Chromium, headless, 전체 흐름
+    python -m bench.rpa_bench --flows warehouse --workers 3     # 창고 순회 병렬 탭
+    python -m bench.rpa_bench --query-ms 3000 --download-ms 2000 --trace
+    python -m bench.rpa_bench --profile full && python -m bench.rpa_bench --profile lean   # 경량 프로필 비교
+    python -m bench.rpa_bench --accounts 2 && python -m bench.rpa_bench --accounts 2 --shared  # 크롬 공유 비교
+결과는 bench/results/rpa-<시각>.json 에 남는다.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bench import fixtures  # noqa: E402
+from bench.ecount_sim import Simulator, serve, latency_args, latency_from  # noqa: E402
+from utils.browser_supervisor import BrowserSupervisor  # noqa: E402
+from utils.ecount_rpa import EcountRPA  # noqa: E402
+from utils.lean_profile import summary as resource_summary  # noqa: E402
+from utils.run_journal import file_sha256  # noqa: E402
+
+try:
+    import psutil   # 선택: 크롬 메모리 측정
+except ImportError:
+    psutil = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+CREDENTIALS = ("SIMBENCH", "bench", "bench")
+
+# 흐름 → (수집 호출, 받아야 할 파일명의 리포트 부분 목록)
+FLOWS = {
+    "balance": (lambda rpa, m, workers: rpa.get_inventory_balance(),
+                lambda m: ["창고별재고현황"]),
+    "warehouse": (lambda rpa, m, workers: rpa.get_item_inventory_by_warehouse(m["warehouses"], workers=workers),
+                  lambda m: [w["warehouse_name"] for w in m["warehouses"]]),
+    "item_master": (lambda rpa, m, workers: rpa.get_item_master_excel(),
+                    lambda m: ["품목마스터"]),
+    "movement": (lambda rpa, m, workers: rpa.get_inventory_movement(),
+                 lambda m: ["재고변동표"]),
+}
+
+
+def verify_downloads(manifest, download_dir, names):
+    """받은 파일과 픽스처 원본 비교 → 불일치/누락 파일명 목록"""
+    mmdd = datetime.now().strftime("%m%d")
+    bad = []
+    for name in names:
+        filename = f"{mmdd}_{name}(1).xlsx"
+        got = os.path.join(download_dir, filename)
+        if not os.path.exists(got) or file_sha256(got) != file_sha256(os.path.join(manifest["dir"], filename)):
+            bad.append(filename)
+    return bad
+
+
+class _BrowserMemory:
+    """이 프로세스 아래 크롬 프로세스들의 RSS 합을 주기적으로 재서 최댓값 기록 (psutil 없으면 생략)"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="browser-memory")
+
+    def _sample(self):
+        total = 0
+        for proc in psutil.Process().children(recursive=True):
+            try:
+                if "chrom" in proc.name().lower() or "headless_shell" in proc.name().lower():
+                    total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / 1024 / 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            mb = self._sample()
+            self.peak_mb = max(self.peak_mb or 0.0, round(mb, 1))
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        return False
+
+
+def run_account(args, sim, manifest, login_url, com_code, work_dir, supervisor=None):
+    """계정 하나로 로그인 → 흐름 순차 실행 → 결과 dict (여러 계정이면 각자 스레드에서 동시에 호출)"""
+    tag = f"[{com_code}] " if args.accounts > 1 else ""
+    stages = defaultdict(lambda: {"count": 0, "total": 0.0, "failed": 0})
+    resources = []
+
+    def on_metric(stage, seconds, ok):
+        st = stages[stage]
+        st["count"] += 1
+        st["total"] += seconds
+        st["failed"] += 0 if ok else 1
+
+    rpa = EcountRPA(com_code, *CREDENTIALS[1:], os.path.join(work_dir, com_code), headless=not args.headed,
+                    warehouse_workers=args.workers, download_timeout=args.download_timeout,
+                    metrics_cb=on_metric, login_url=login_url, browser_channel=args.channel,
+                    profile=args.profile, allow_hosts=args.allow_hosts, resource_cb=resources.append,
+                    supervisor=supervisor)
+    # 실제 계정의 저장 세션 / 리소스 크기 학습(chrome_profile_pw/)을 건드리지 않도록 벤치 폴더에 보관
+    rpa._state_path = os.path.join(work_dir, f"storage_state_{com_code}.json")
+    rpa._sizes_path = os.path.join(RESULTS_DIR, "resource_sizes.json")
+    result = {"flows": {}}
+    trace_path = None
+    try:
+        started = time.perf_counter()
+        ok, msg = rpa.login()
+        result["login"] = {"ok": ok, "message": msg, "sec": round(time.perf_counter() - started, 3),
+                           "shared_browser": rpa._shared}
+        print(f"{tag}🔐 로그인 {'성공' if ok else '실패'} ({result['login']['sec']:.2f}s"
+              f"{', 공유 브라우저' if rpa._shared else ''}) {msg}")
+        if not ok:
+            return result
+        if args.trace:
+            rpa._context.tracing.start(screenshots=True, snapshots=True)
+
+        for name in args.flows:
+            collect, expected = FLOWS[name]
+            started = time.perf_counter()
+            ok, msg = collect(rpa, manifest, args.workers)
+            elapsed = time.perf_counter() - started
+            mismatched = verify_downloads(manifest, rpa.download_path, expected(manifest)) if ok else []
+            result["flows"][name] = {"ok": ok, "message": msg, "sec": round(elapsed, 3), "mismatched_files": mismatched}
+            print(f"{tag}  {name:<12} {'✅' if ok and not mismatched else '❌'} {elapsed:>7.2f}s  {msg}"
+                  + (f"  ⚠️ 파일 불일치 {mismatched}" if mismatched else ""))
+
+        if args.trace:
+            trace_path = os.path.join(RESULTS_DIR, datetime.now().strftime(f"rpa-trace-{com_code}-%Y%m%d-%H%M%S.zip"))
+            rpa._context.tracing.stop(path=trace_path)
+            result["trace"] = trace_path
+    finally:
+        result["stages"] = {k: dict(v, total=round(v["total"], 3)) for k, v in stages.items()}
+        result["waits"] = rpa.wait_stats.as_dict()
+        rpa.close()
+        result["resources"] = resources[-1] if resources else None
+
+    print(f"{tag}⏱️ 단계별 합계: " + " | ".join(
+        f"{k} {v['count']}회 {v['total']:.2f}s" + (f" 실패 {v['failed']}" if v["failed"] else "")
+        for k, v in result["stages"].items()))
+    print(f"{tag}⏱️ 화면 대기: {rpa.wait_stats.summary()}")
+    if result["resources"]:
+        print(f"{tag}🪶 리소스 ({args.profile}): {resource_summary(result['resources'])}")
+    if trace_path:
+        print(f"{tag}🧭 트레이스: {trace_path}  (playwright show-trace 로 열기)")
+    return result
+
+
+def run(args):
+    manifest = fixtures.build(args.scale)
+    sim = Simulator(manifest, credentials=CREDENTIALS if args.accounts == 1 else None,
+                    latency=latency_from(args), session_ttl=args.session_ttl)
+    server, login_url = serve(sim, port=args.port)
+    supervisor = BrowserSupervisor(log=logging.info) if args.shared else None
+    work_dir = tempfile.mkdtemp(prefix="rpa-bench-")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    com_codes = [CREDENTIALS[0]] + [f"{CREDENTIALS[0]}{n}" for n in range(2, args.accounts + 1)]
+    accounts = {}
+    try:
+        with _BrowserMemory() as memory:
+            # 본사/허브 레인처럼 계정마다 스레드 하나 (Playwright sync 객체는 스레드별)
+            threads = [threading.Thread(target=lambda c=c: accounts.__setitem__(
+                c, run_account(args, sim, manifest, login_url, c, work_dir, supervisor)), name=f"account-{c}")
+                for c in com_codes]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+    finally:
+        if supervisor is not None:
+            supervisor.close()
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {"scale": args.scale, "latency_ms": sim.latency, "workers": args.workers, "profile": args.profile,
+              "shared": args.shared, "chrome_launches": supervisor.launches if supervisor else len(com_codes),
+              "peak_browser_mb": memory.peak_mb, "requests": dict(sim.requests), "accounts": accounts}
+    if memory.peak_mb is not None:
+        print(f"\n🧠 크롬 최대 메모리 {memory.peak_mb:,.0f}MB (크롬 실행 {result['chrome_launches']}회)")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--flows", nargs="+", choices=list(FLOWS), default=list(FLOWS), help="측정할 수집 흐름")
+    ap.add_argument("--scale", type=int, default=1, help="다운로드 픽스처 배율")
+    ap.add_argument("--port", type=int, default=8765,
+                    help="시뮬레이터 포트 (고정해야 full 실행에서 학습한 리소스 크기로 lean 절약량을 계산)")
+    ap.add_argument("--workers", type=int, default=1, help="창고 순회 동시 탭 수")
+    ap.add_argument("--channel", default=None, help="브라우저 채널 (기본: Playwright 번들 Chromium, 예: chrome)")
+    ap.add_argument("--headed", action="store_true", help="브라우저 창 표시")
+    ap.add_argument("--profile", choices=("full", "lean"), default="full", help="브라우저 프로필")
+    ap.add_argument("--allow-hosts", nargs="*", default=[], help="경량 프로필에서 추가로 허용할 호스트")
+    ap.add_argument("--download-timeout", type=float, default=90, help="리포트 하나의 다운로드 제한 시간(초)")
+    ap.add_argument("--session-ttl", type=float, default=0, help="시뮬레이터 세션 유지 초 (0 = 만료 없음)")
+    ap.add_argument("--accounts", type=int, default=1, help="동시에 돌릴 계정 수 (본사/허브 동시 실행 흉내)")
+    ap.add_argument("--shared", action="store_true", help="계정들이 크롬 하나를 공유 (utils/browser_supervisor.py)")
+    ap.add_argument("--trace", action="store_true", help="Playwright 트레이스 zip 저장")
+    ap.add_argument("-v", "--verbose", action="store_true", help="EcountRPA 로그 출력")
+    latency_args(ap)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    result = run(args)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, datetime.now().strftime("rpa-%Y%m%d-%H%M%S.json"))
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    print(f"결과 저장: {out_path}")
+    failed = any(not acc.get("login", {}).get("ok") or any(not r["ok"] or r["mismatched_files"]
+                                                            for r in acc["flows"].values())
+                 for acc in result["accounts"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
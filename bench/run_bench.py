@@ -0,0 +1,226 @@
+"""
+오프라인 리플레이 벤치마크: 에이전트의 엑셀 → DB 동기화를 실제 이카운트 / Supabase 없이 측정.
+
+bench/fixtures.py 의 export 픽스처를 bench/fake_postgrest.py (PostgREST 호환 인메모리 서버) 에 대고
+ecount_agent 의 process_* 함수를 그대로 끝까지 실행한다. 시나리오마다 새 DB 에 마스터(창고/품목/설정)만 시드하고
+- cold : 대상 테이블이 빈 상태에서 첫 동기화
+- warm : 같은 파일로 한 번 더 (변경 없음 → 비교/생략 경로)
+를 돌려 다음을 기록한다.
+- total_sec  : 함수 전체 시간
+- parse_sec  : 엑셀 파싱 구간 (에이전트 메트릭 ecount_rpa_stage_duration_seconds{stage="parse"} 합)
+- upload_sec : 나머지 (DB 조회 / 비교 / 업로드) = total - parse
+- requests   : 가짜 서버가 받은 요청 수 (엔드포인트별 내역은 결과 JSON 에)
+- peak_mb    : tracemalloc 최대 할당량 (시간 측정과 섞이지 않도록 별도 cold 실행에서 측정)
+
+실행 (저장소 루트에서, 에이전트 의존성 설치 필요):
+    python -m bench.run_bench                         # x1, x10
+    python -m bench.run_bench --scale 1 10 100 --repeat 3
+    python -m bench.run_bench --check                 # bench/baseline.json 대비 회귀면 종료 코드 1
+    python -m bench.run_bench --save-baseline         # 현재 결과를 기준선으로 저장
+결과는 bench/results/<시각>.json 에도 남는다.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bench import fixtures  # noqa: E402
+from bench.fake_postgrest import serve  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SCENARIOS = [
+    ("inventory_balance", lambda agent, m: agent.process_inventory_excel(m["dir"])),
+    ("warehouse_details", lambda agent, m: agent.process_warehouse_inventory_files(m["dir"], m["warehouses"])),
+    ("item_master", lambda agent, m: agent.process_item_master_excel(m["dir"])),
+    ("inventory_movement", lambda agent, m: agent.process_inventory_movement_excel(m["dir"])),
+]
+TIME_FIELDS = ("total_sec", "parse_sec", "upload_sec")
+MIN_TIME_DELTA = 0.05     # 이보다 작은 시간 차이는 잡음으로 보고 회귀 판정에서 제외 (초)
+MIN_MEMORY_DELTA = 1.0    # MB
+WARMUP_SCALE = 1          # 측정 전 한 번 돌려 임포트/정규식 컴파일 등 첫 호출 비용을 빼 둔다
+
+
+class _ErrorCounter(logging.Handler):
+    """에이전트 로그의 ERROR 건수 (process_* 는 예외를 로그로 삼키므로 실패 감지용)"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def load_agent(base_url, verbose=False):
+    """가짜 서버를 가리키도록 환경 변수를 맞춘 뒤 ecount_agent 임포트 → (모듈, 오류 카운터)"""
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ["SUPABASE_KEY"] = "bench"
+    import ecount_agent as agent
+
+    # 에이전트 로그 파일(agent_log.txt)을 더럽히지 않도록 핸들러 교체
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+        h.close()
+    counter = _ErrorCounter()
+    root.addHandler(counter)
+    if verbose:
+        root.addHandler(logging.StreamHandler(sys.stdout))
+    root.setLevel(logging.INFO)
+    return agent, counter
+
+
+def seed(store, manifest):
+    store.reset()
+    store.seed("system_config", [
+        {"key": "parse_cache_mode", "value": "off"},       # 매번 실제로 파싱
+        {"key": "ecount_download_path", "value": manifest["dir"]},
+    ])
+    store.seed("warehouse_codes", manifest["warehouses"])
+    store.seed("item_master", manifest["item_master"])
+
+
+def _stage_total(agent, stage):
+    with agent.metrics.stage_seconds._lock:
+        return sum(total for key, (_, total) in agent.metrics.stage_seconds._values.items() if key[0] == stage)
+
+
+def measure(agent, store, errors, fn, manifest, memory=False):
+    parse0 = _stage_total(agent, "parse")
+    req0 = Counter(store.requests)
+    err0 = errors.count
+    agent.db.reset_stats()
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    fn(agent, manifest)
+    total = time.perf_counter() - started
+    peak = 0
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    parse = _stage_total(agent, "parse") - parse0
+    by_endpoint = Counter(store.requests)
+    by_endpoint.subtract(req0)
+    by_endpoint = {f"{m} {t}": c for (m, t), c in sorted(by_endpoint.items()) if c}
+    return {
+        "total_sec": round(total, 3), "parse_sec": round(parse, 3), "upload_sec": round(max(0.0, total - parse), 3),
+        "requests": sum(by_endpoint.values()), "errors": errors.count - err0,
+        "peak_mb": round(peak / 1024 / 1024, 1) if memory else None, "endpoints": by_endpoint,
+    }
+
+
+def run(scales, repeat=1, latency_ms=0, memory=True, verbose=False):
+    server, store, base_url = serve(latency_ms=latency_ms)
+    agent, errors = load_agent(base_url, verbose)
+    results = {}
+    try:
+        warmup = fixtures.build(WARMUP_SCALE)
+        for _, fn in SCENARIOS:
+            seed(store, warmup)
+            fn(agent, warmup)
+        for scale in scales:
+            manifest = fixtures.build(scale)
+            print(f"\n▶ x{scale}: 품목 {manifest['items']:,} / 재고 로트 {manifest['inventory_rows']:,} / "
+                  f"변동표 {manifest['movement_rows']:,}행")
+            for name, fn in SCENARIOS:
+                best = {}
+                for _ in range(repeat):
+                    seed(store, manifest)
+                    for phase in ("cold", "warm"):
+                        r = measure(agent, store, errors, fn, manifest)
+                        # 시간은 반복 중 최솟값, 나머지는 마지막 값
+                        prev = best.get(phase)
+                        if prev is None or r["total_sec"] < prev["total_sec"]:
+                            best[phase] = r
+                if memory:
+                    seed(store, manifest)
+                    best["cold"]["peak_mb"] = measure(agent, store, errors, fn, manifest, memory=True)["peak_mb"]
+                for phase, r in best.items():
+                    results[f"x{scale}/{name}/{phase}"] = r
+                    print(f"  {name:<20} {phase:<5} total {r['total_sec']:>7.2f}s  parse {r['parse_sec']:>7.2f}s  "
+                          f"upload {r['upload_sec']:>7.2f}s  req {r['requests']:>5}"
+                          + (f"  peak {r['peak_mb']:>7.1f}MB" if r.get("peak_mb") is not None else "")
+                          + (f"  ⚠️ 오류 로그 {r['errors']}건" if r["errors"] else ""))
+    finally:
+        server.shutdown()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """기준선 대비 회귀 목록 (시간/메모리: 허용 비율 초과, 요청 수: 증가, 오류: 발생)"""
+    regressions = []
+    for key, base in baseline.items():
+        cur = results.get(key)
+        if cur is None:
+            continue
+        for field in TIME_FIELDS:
+            if cur[field] > base[field] * (1 + tolerance) and cur[field] - base[field] > MIN_TIME_DELTA:
+                regressions.append(f"{key} {field}: {base[field]:.3f}s → {cur[field]:.3f}s")
+        if cur["requests"] > base["requests"]:
+            regressions.append(f"{key} requests: {base['requests']} → {cur['requests']}")
+        if cur.get("peak_mb") is not None and base.get("peak_mb") is not None \
+                and cur["peak_mb"] > base["peak_mb"] * (1 + tolerance) \
+                and cur["peak_mb"] - base["peak_mb"] > MIN_MEMORY_DELTA:
+            regressions.append(f"{key} peak_mb: {base['peak_mb']} → {cur['peak_mb']}")
+        if cur["errors"] > base.get("errors", 0):
+            regressions.append(f"{key} errors: {base.get('errors', 0)} → {cur['errors']}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10], help="픽스처 배율 (1 / 10 / 100)")
+    ap.add_argument("--repeat", type=int, default=1, help="시나리오 반복 횟수 (시간은 최솟값)")
+    ap.add_argument("--latency-ms", type=float, default=0, help="요청마다 추가할 지연 (원격 Supabase 왕복 흉내)")
+    ap.add_argument("--no-memory", action="store_true", help="tracemalloc 측정 생략")
+    ap.add_argument("--check", action="store_true", help="bench/baseline.json 대비 회귀면 종료 코드 1")
+    ap.add_argument("--save-baseline", action="store_true", help="결과를 bench/baseline.json 에 저장")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="시간/메모리 허용 증가 비율")
+    ap.add_argument("-v", "--verbose", action="store_true", help="에이전트 로그 출력")
+    args = ap.parse_args()
+
+    results = run(args.scale, args.repeat, args.latency_ms, not args.no_memory, args.verbose)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S.json"))
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"latency_ms": args.latency_ms, "results": results}, f, ensure_ascii=False, indent=1)
+    print(f"\n결과 저장: {out_path}")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update({k: {f: v for f, v in r.items() if f != "endpoints"} for k, r in results.items()})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"기준선 저장: {BASELINE_PATH} ({len(results)}개 항목)")
+
+    if args.check:
+        if not os.path.exists(BASELINE_PATH):
+            print("기준선이 없습니다. 먼저 --save-baseline 으로 저장하세요.")
+            return 1
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ 회귀 {len(regressions)}건 (허용 +{args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ 기준선 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
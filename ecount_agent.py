@@ -7,27 +7,50 @@
 import os
 import sys
 import time
-import requests
+import urllib.parse
+import numpy as np
 import pandas as pd
 import logging
 import atexit
 import signal
+import threading
+import socket
 from datetime import datetime, timezone, timedelta
-from utils.ecount_rpa import EcountRPA
+from utils.ecount_rpa import EcountRPA, ECOUNT_LOGIN_URL
+from utils.browser_pool import BrowserPool
+from utils.browser_supervisor import BrowserSupervisor
+from utils.collectors import REPORTS, RpaCollector, FallbackCollector
+from utils.ecount_api import ApiCollector, ECOUNT_API_URL
+from utils.db_client import PostgrestClient
+from utils.inventory_records import inventory_records_from_frame
+from utils.excel_reader import read_excel_table
+from utils.inventory_delta import SNAPSHOT_SELECT, compute_delta, merge_duplicate_keys
+from utils.monthly_history import HISTORY_SELECT, dedupe_entries, changed_months, expired_months
+from utils.demand_stats import movement_frame, latest_activity, outgoing_matrix, demand_stats, activity_class
+from utils.stage_pipeline import StagePipeline
+from utils.progress import ProgressReporter
+from utils.run_journal import RunJournal, file_sha256
+from utils.parse_cache import ParseCache
+from utils.job_queue import JobQueue
+from utils.metrics import AgentMetrics, serve as serve_metrics
+from utils.tracing import Tracer
+from utils.trigger_channel import PgNotifyChannel, PollingTriggerChannel, TriggerChannelError
 import re
 
-# 활성화된 RPA 인스턴스를 관리하기 위한 전역 셋
-active_rpa_instances = set()
+# 💡 종료 요청 플래그: 시그널/종료 시 세우면 레인 스레드의 파이프라인이 다음 단계 전에 멈춘다 (check_cancelled)
+stop_requested = threading.Event()
 
 def cleanup_active_rpa():
-    if active_rpa_instances:
-        log(f"🧹 [프로세스 종료] 잔존하는 {len(active_rpa_instances)}개의 RPA 브라우저 인스턴스를 강제 종료합니다.")
-        for rpa in list(active_rpa_instances):
-            try:
-                rpa.close()
-            except Exception as e:
-                log(f"  ⚠️ RPA 인스턴스 종료 중 에러: {e}")
-        active_rpa_instances.clear()
+    stop_requested.set()
+    if "journal" not in globals():
+        return   # 설정 로드 실패 등으로 전역 객체를 만들기 전에 종료됨 (정리할 자원 없음)
+    if journal.run_id:
+        journal.finish("interrupted")
+    # 브라우저는 만든 레인 스레드에서 닫는다 (풀 밖의 일회용 브라우저 포함, utils/browser_pool.py)
+    browser_pool.close_all()
+    browser_supervisor.close()
+    for api in list(api_collectors.values()):
+        api.close()
 
 # atexit 등록
 atexit.register(cleanup_active_rpa)
@@ -73,37 +96,126 @@ def log(msg, level="info"):
     elif level == "warning": logging.warning(msg)
 
 # --- 설정 로드 ---
-try:
-    import toml
-    secrets_path = os.path.join(os.path.dirname(__file__), ".streamlit", "secrets.toml")
-    secrets = toml.load(secrets_path)
-    SUPABASE_URL = secrets["supabase"]["url"]
-    SUPABASE_KEY = secrets["supabase"]["key"]
-except Exception as e:
-    print(f"❌ 설정 로드 실패: {e}")
-    sys.exit(1)
-
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json"
-}
+# 💡 SUPABASE_URL / SUPABASE_KEY 환경 변수가 있으면 secrets.toml 대신 사용 (bench/ 오프라인 벤치마크 등)
+if os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY"):
+    SUPABASE_URL = os.environ["SUPABASE_URL"]
+    SUPABASE_KEY = os.environ["SUPABASE_KEY"]
+    SUPABASE_DB_URL = os.environ.get("SUPABASE_DB_URL", "")
+else:
+    try:
+        import toml
+        secrets_path = os.path.join(os.path.dirname(__file__), ".streamlit", "secrets.toml")
+        secrets = toml.load(secrets_path)
+        SUPABASE_URL = secrets["supabase"]["url"]
+        SUPABASE_KEY = secrets["supabase"]["key"]
+        # 선택: Postgres 직접 접속 문자열 (LISTEN/NOTIFY 트리거 채널용)
+        SUPABASE_DB_URL = secrets["supabase"].get("db_url", "")
+    except Exception as e:
+        print(f"❌ 설정 로드 실패: {e}")
+        sys.exit(1)
+# 💡 ECOUNT_LOGIN_URL 환경 변수로 이카운트 로그인 페이지를 바꿀 수 있다 (bench/ecount_sim.py 로컬 시뮬레이터 리허설)
+ECOUNT_LOGIN_URL = os.environ.get("ECOUNT_LOGIN_URL") or ECOUNT_LOGIN_URL
+# 💡 ECOUNT_API_URL 환경 변수로 OpenAPI 주소를 바꿀 수 있다 (bench/ecount_api_mock.py 로컬 모의 서버)
+ECOUNT_API_URL = os.environ.get("ECOUNT_API_URL") or ECOUNT_API_URL
+
+# 💡 모든 PostgREST 호출은 공용 클라이언트(커넥션 풀 + 재시도 + 타임아웃)를 거친다
+db = PostgrestClient(SUPABASE_URL, SUPABASE_KEY)
+
+# 💡 메트릭: 단계 소요 시간 / 파싱 속도 / DB 지연 / 재시도·실패 / 작업별 마지막 성공 (로컬 /metrics)
+METRICS_PORT = int(os.environ.get("AGENT_METRICS_PORT", "9108") or 0)   # 0 이면 엔드포인트 끔
+metrics = AgentMetrics()
+db.observer = metrics.db_request
+
+# 💡 트레이스: 실행마다 단계별 중첩 스팬을 모아 종료 시 rpa_traces 에 적재 → 대시보드 워터폴 (rpa_traces.sql)
+tracer = Tracer(db, log=lambda m: log(m), channel_fn=lambda: getattr(_progress_ctx, "channel", None))
+
+# 💡 로그인된 브라우저를 실행 간 재사용 (레인 hq/hub 별 전용 스레드, 회사코드별 보관)
+browser_pool = BrowserPool(log=lambda m: log(m))
+# 💡 본사/허브가 크롬 프로세스 하나를 공유하고 계정별 컨텍스트만 분리 (system_config rpa_shared_browser=true 일 때만)
+# 공유 크롬은 127.0.0.1 CDP 포트를 인증 없이 열므로, 같은 PC 의 다른 프로세스를 신뢰할 수 있을 때만 켠다
+browser_supervisor = BrowserSupervisor(log=lambda m: log(m))
+# 💡 OpenAPI 수집기는 계정별로 실행 간 재사용 (세션 / 커넥션 / 품목 목록 유지, system_config ecount_collector=api)
+api_collectors = {}
+_api_collectors_lock = threading.Lock()
+# 💡 OpenAPI 로 받아도 되는 리포트. API 창고별재고현황은 창고×품목 합계라 유효기간(관리항목) 구분이 없어,
+# 유효기간 행의 유일한 출처인 허브 재고를 API 로 받으면 로트/유효기간 행이 모두 유효기간 없는 합계로 바뀐다.
+# API 가 유효기간을 주기 전까지는 비워 두어 OpenAPI 모드여도 모든 리포트를 브라우저로 받는다.
+API_REPORTS = frozenset()
+
+# 💡 실행 저널: 끝난 단계/창고와 검증된 다운로드 파일을 기록해 'resume' 작업으로 이어하기 (rpa_run_journal.sql)
+journal = RunJournal(db, log=lambda m: log(m))
+
+# 💡 작업 큐: 대시보드/스케줄 요청을 rpa_jobs 에 쌓고 우선순위 순으로 하나씩 실행 (rpa_job_queue.sql)
+AGENT_ID = socket.gethostname()
+jobs = JobQueue(db, AGENT_ID, log=lambda m: log(m))
+# 💡 파싱 캐시: 내용이 같은 엑셀은 다시 파싱/업로드하지 않음 (다운로드 폴더의 .parse_cache/)
+parse_cache = ParseCache(log=lambda m: log(m))
 
 def db_get(key):
     try:
-        url = f"{SUPABASE_URL}/rest/v1/system_config?key=eq.{key}&select=value"
-        resp = requests.get(url, headers=HEADERS, timeout=5)
+        resp = db.get(f"system_config?key=eq.{key}&select=value", timeout=(5, 5))
         data = resp.json()
         return data[0]['value'] if data else "NULL"
     except: return "ERROR"
 
 def db_set(key, value):
     try:
-        url = f"{SUPABASE_URL}/rest/v1/system_config"
-        requests.post(url, headers={**HEADERS, "Prefer": "resolution=merge-duplicates"}, 
-                      json={"key": key, "value": str(value)}, timeout=5)
+        db.post("system_config", json={"key": key, "value": str(value)},
+                prefer="resolution=merge-duplicates", timeout=(5, 5))
     except: pass
 
+def _in_filter(values):
+    """PostgREST in.(...) 필터 값 (쌍따옴표 인용 + URL 인코딩)"""
+    quoted = ",".join('"' + str(v).replace('"', '\\"') + '"' for v in values)
+    return urllib.parse.quote(f"({quoted})", safe="(),")
+
+# --- 진행 메시지 채널 ---
+# 본사/허브 파이프라인이 동시에 돌 때 서로의 메시지를 덮지 않도록 스레드별 채널을 둔다.
+PROGRESS_CHANNELS = {"hq": "[본사] ", "hub": "[Hub] "}
+PROGRESS_FLUSH_INTERVAL = 2.0
+_progress_ctx = threading.local()
+
+def db_set_many(values):
+    """여러 system_config 키를 한 번의 배치 upsert 로 기록"""
+    rows = [{"key": k, "value": str(v)} for k, v in values.items()]
+    db.post("system_config", json=rows, prefer="resolution=merge-duplicates,return=minimal", timeout=(5, 5))
+
+# 💡 진행 이벤트는 메모리에 모으고 2초마다 바뀐 값만 한 번에 기록 (rpa_progress JSON + rpa_message 호환 키)
+progress = ProgressReporter(db_set_many, interval=PROGRESS_FLUSH_INTERVAL, prefixes=PROGRESS_CHANNELS,
+                            log=lambda m: log(m, level="warning"))
+
+def report_progress(msg, done=None, total=None, stage=None):
+    """현재 스레드 채널(hq / hub)의 진행 상태 갱신. done/total 없이 부르면 msg 를 새 단계로 본다"""
+    if stage is None and done is None and total is None:
+        stage = msg
+    progress.update(getattr(_progress_ctx, "channel", None), msg, stage=stage, done=done, total=total)
+
+def report_rpa_log(msg):
+    """EcountRPA status_cb: 단계/진행 건수는 유지하고 메시지만 교체"""
+    progress.update(getattr(_progress_ctx, "channel", None), msg)
+
+def report_rpa_step(stage, done, total):
+    """EcountRPA progress_cb: 창고 순회 등 브라우저 단계의 처리 건수"""
+    progress.update(getattr(_progress_ctx, "channel", None), stage=stage, done=done, total=total)
+
+def report_rpa_metric(stage, seconds, ok):
+    """EcountRPA metrics_cb: login / navigate / download 소요 시간"""
+    metrics.stage(stage, seconds, channel=getattr(_progress_ctx, "channel", None), ok=ok)
+
+def report_rpa_resources(stats):
+    """EcountRPA resource_cb: 실행마다 차단 건수 / 로드·절약 바이트"""
+    metrics.resources(stats)
+
+def timed_stage(stage):
+    """parse / upload 구간 측정 (현재 스레드 채널 기준)"""
+    return metrics.timed(stage, channel=getattr(_progress_ctx, "channel", None))
+
+def record_parse(report, rows, started):
+    """파싱 한 번 기록: parse 단계 시간 + 행 수/초당 행 수 (started = time.monotonic()), 현재 스팬에도 속성으로 남김"""
+    seconds = time.monotonic() - started
+    metrics.parsed(report, rows, seconds, channel=getattr(_progress_ctx, "channel", None))
+    tracer.annotate(report=report, rows=rows, parse_sec=round(seconds, 2))
+
 # --- 핵심 RPA 실행 ---
 TASK_LABELS = {
     "all": "전체 데이터 수집",
@@ -112,220 +224,639 @@ TASK_LABELS = {
     "inventory_balance": "창고별재고현황 수집",
     "warehouse_inventory": "관리항목별재고현황(유효기간) 순회 수집",
     "item_master": "품목 마스터 수집",
+    "resume": "중단된 수집 이어하기",
 }
 
+def _resolve_download_path():
+    dl_path = db_get("ecount_download_path")
+    if dl_path in ("NULL", "ERROR", ""):
+        dl_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ecount_stocks")
+    try:
+        if not os.path.exists(dl_path):
+            os.makedirs(dl_path, exist_ok=True)
+    except Exception:
+        dl_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ecount_stocks")
+        os.makedirs(dl_path, exist_ok=True)
+    return dl_path
+
+def _account_download_path(dl_path, channel):
+    """계정별 하위 폴더 (본사/허브 파일이 '*품목*.xlsx' 같은 glob 에서 섞이지 않도록)"""
+    path = os.path.join(dl_path, channel)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class PartialCollection(Exception):
+    """파이프라인은 끝까지 돌았지만 일부 리포트 수집에 실패 (*:complete 를 남기지 않아 이어하기로 재시도)"""
+
+
+class RunCancelled(Exception):
+    """종료 요청(Ctrl+C / SIGTERM)으로 파이프라인 중단"""
+
+
+def check_cancelled():
+    """파이프라인 단계 사이에서 호출: 종료 요청이 있으면 RunCancelled"""
+    if stop_requested.is_set():
+        raise RunCancelled("종료 요청으로 수집을 중단했습니다")
+
+
+def _run_pipeline(channel, fn, *args):
+    """파이프라인 하나를 실행하고 결과 dict 반환. 예외는 삼켜서 다른 파이프라인에 영향 없음"""
+    _progress_ctx.channel = channel
+    started = time.time()
+    result = {"channel": channel, "ok": True, "partial": False, "message": ""}
+    try:
+        with tracer.span(f"pipeline:{channel}"):
+            result["message"] = fn(*args) or ""
+    except RunCancelled as e:
+        result["ok"] = False
+        result["message"] = str(e)
+        log(f"🛑 [{channel}] {e}", level="warning")
+    except PartialCollection as e:
+        result["partial"] = True
+        result["message"] = str(e)
+        log(f"⚠️ [{channel}] {e} - 대시보드 '이어하기'로 실패한 리포트만 재시도할 수 있습니다.", level="warning")
+    except Exception as e:
+        result["ok"] = False
+        result["message"] = str(e)
+        log(f"❌ [{channel}] 파이프라인 실패: {e}", level="error")
+    finally:
+        result["elapsed"] = round(time.time() - started, 1)
+        _progress_ctx.channel = None
+    return result
+
+def _warehouse_workers():
+    """창고 순회 동시 탭 수 (system_config ecount_warehouse_workers, 1~6, 미설정 시 1)"""
+    try:
+        return max(1, min(6, int(db_get("ecount_warehouse_workers"))))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _browser_profile():
+    """(프로필, 추가 허용 호스트) - system_config rpa_browser_profile=lean 이면 경량 프로필 (utils/lean_profile.py)
+
+    rpa_allow_hosts: 이카운트가 다른 도메인에서 받아야 하는 리소스가 있을 때 쉼표로 구분해 허용
+    """
+    profile = "lean" if str(db_get("rpa_browser_profile")).strip().lower() == "lean" else "full"
+    raw = db_get("rpa_allow_hosts")
+    allow = tuple(h.strip() for h in raw.split(",") if h.strip()) if raw not in ("NULL", "ERROR") else ()
+    return profile, allow
+
+def _checkout_rpa(label, com_code, user_id, user_pw, dl_path, is_headless, **opts):
+    """로그인된 EcountRPA 확보 → (rpa, pooled)
+
+    기본은 브라우저 풀에서 꺼내 세션이 살아 있으면 실행/로그인을 생략한다.
+    system_config rpa_keep_browser=false 면 기존처럼 매번 새로 띄우고 끝나면 닫는다.
+    """
+    pooled = str(db_get("rpa_keep_browser")).lower() != "false" and browser_pool.current_lane() is not None
+    profile, allow_hosts = _browser_profile()
+    supervisor = browser_supervisor if str(db_get("rpa_shared_browser")).strip().lower() == "true" else None
+    if pooled:
+        def factory():
+            log(f"🖥️ [{label}] 크롬 브라우저를 실행합니다... (잠시만 기다려 주세요)")
+            return EcountRPA(com_code, user_id, user_pw, dl_path, headless=is_headless,
+                             status_cb=report_rpa_log, progress_cb=report_rpa_step,
+                             metrics_cb=report_rpa_metric, span_cb=tracer.span,
+                             login_url=ECOUNT_LOGIN_URL, profile=profile, allow_hosts=allow_hosts,
+                             resource_cb=report_rpa_resources, supervisor=supervisor)
+        report_progress(f"{label} 이카운트 세션 확인 중...")
+        try:
+            # 💡 프로필 / 공유 브라우저 설정이 바뀌면 실행 방식이 달라지므로 fingerprint 에 넣어 브라우저를 새로 띄운다
+            fingerprint = (user_id, user_pw, is_headless, profile, allow_hosts, supervisor is not None)
+            rpa, reused = browser_pool.checkout(com_code, fingerprint, factory)
+        except RuntimeError as e:
+            raise Exception(f"{label} 로그인 실패: {e}")
+        rpa.download_path = dl_path
+        rpa.status_cb = report_rpa_log
+        rpa.progress_cb = report_rpa_step
+        for name, value in opts.items():
+            setattr(rpa, name, value)
+        log(f"[{label}] {'기존 브라우저 세션 재사용' if reused else '로그인 성공'}")
+        return rpa, True
+
+    log(f"🖥️ [{label}] 크롬 브라우저를 실행합니다... (잠시만 기다려 주세요)")
+    rpa = EcountRPA(com_code, user_id, user_pw, dl_path, headless=is_headless,
+                    status_cb=report_rpa_log, progress_cb=report_rpa_step,
+                    metrics_cb=report_rpa_metric, span_cb=tracer.span, login_url=ECOUNT_LOGIN_URL,
+                    profile=profile, allow_hosts=allow_hosts, resource_cb=report_rpa_resources,
+                    supervisor=supervisor, **opts)
+    browser_pool.track(rpa)
+    report_progress(f"{label} 이카운트 로그인 시도 중...")
+    log(f"[{label}] 이카운트 로그인 시도 중...")
+    success, msg = rpa.login()
+    if not success:
+        rpa.close()
+        browser_pool.untrack(rpa)
+        raise Exception(f"{label} 로그인 실패: {msg}")
+    log(f"[{label}] 로그인 성공!")
+    return rpa, False
+
+def _release_rpa(label, com_code, rpa, pooled):
+    """실행이 끝난 rpa 반납 (풀 사용 시 브라우저 유지, 아니면 종료)"""
+    if pooled:
+        log(f"[{label}] 브라우저를 다음 실행을 위해 유지합니다.")
+        browser_pool.release(com_code, rpa)
+    else:
+        log(f"{label} 브라우저를 종료합니다.")
+        rpa.close()
+        browser_pool.untrack(rpa)
+
+def _api_collector(label, com_code, user_id, api_key_name, dl_path):
+    """system_config ecount_collector=api 이고 API 인증키(api_key_name)가 있으면 계정별 ApiCollector, 아니면 None
+
+    ecount_api_rate: 초당 요청 수 (미설정 시 2, 0 이면 제한 없음)
+    """
+    if str(db_get("ecount_collector")).strip().lower() != "api":
+        return None
+    api_key = db_get(api_key_name)
+    if api_key in ("NULL", "ERROR", ""):
+        log(f"⚠️ [{label}] ecount_collector=api 이지만 {api_key_name} 가 없어 브라우저로 수집합니다.", level="warning")
+        return None
+    try:
+        rate = float(db_get("ecount_api_rate"))
+    except ValueError:
+        rate = 2.0
+    key = (com_code, user_id, api_key, ECOUNT_API_URL, rate)
+    with _api_collectors_lock:
+        api = api_collectors.get(key)
+        if api is None:
+            api = api_collectors[key] = ApiCollector(
+                com_code, user_id, api_key, dl_path, api_url=ECOUNT_API_URL, rate=rate,
+                log=lambda m: log(m), metrics_cb=report_rpa_metric, span_cb=tracer.span)
+    api.download_path = dl_path
+    return api
+
+def _collectors(label, com_code, user_id, user_pw, api_key_name, dl_path, is_headless, **opts):
+    """계정 하나의 수집기 → (리포트 수집기, RpaCollector)
+
+    브라우저는 처음 필요할 때 확보한다. OpenAPI 모드면 API 가 지원하는 리포트는 HTTP 로 받고
+    나머지 / API 실패분만 브라우저로 받는다 (utils/collectors.py, utils/ecount_api.py).
+    """
+    pooled = {}
+
+    def checkout():
+        rpa, pooled["value"] = _checkout_rpa(label, com_code, user_id, user_pw, dl_path, is_headless, **opts)
+        return rpa
+
+    rpa_collector = RpaCollector(checkout, lambda rpa: _release_rpa(label, com_code, rpa, pooled["value"]))
+    allowed = ApiCollector.reports & API_REPORTS
+    if not allowed:
+        if str(db_get("ecount_collector")).strip().lower() == "api":
+            log(f"ℹ️ [{label}] OpenAPI 수집 모드이지만 API 재고에 유효기간 구분이 없어 모든 리포트를 브라우저로 수집합니다.")
+        return rpa_collector, rpa_collector
+    api = _api_collector(label, com_code, user_id, api_key_name, dl_path)
+    if api is None:
+        return rpa_collector, rpa_collector
+    names = ", ".join(REPORTS[r] for r in sorted(allowed))
+    log(f"🔌 [{label}] OpenAPI 수집 모드: {names}은(는) API, 나머지는 브라우저로 수집합니다.")
+    return FallbackCollector(api, rpa_collector, log=lambda m: log(m), only=allowed), rpa_collector
+
+def _close_collector(label, collector):
+    api = getattr(collector, "primary", None)
+    if api is not None:
+        log(f"🔌 [{label}] OpenAPI {api.summary()}")
+    collector.close()
+
+
+@tracer.traced()
+def _journaled_report(step, label, collector, report, process_fn):
+    """리포트 하나(수집기 다운로드 → DB 동기화)를 저널 기준으로 실행.
+
+    이어하기 중이면 동기화까지 끝난 리포트는 건너뛰고, 받아 둔 파일이 해시까지 일치하면 다운로드를 생략한다.
+    process_fn() 이 참을 돌려줄 때만 동기화 완료로 기록한다 (실패하면 이어하기 때 받아 둔 파일로 다시 동기화).
+    """
+    tracer.annotate(step=step)
+    check_cancelled()
+    if journal.is_done(f"{step}:sync"):
+        tracer.annotate(resumed=True)
+        log(f"⏭️ [이어하기] {label}: 이미 동기화 완료 - 건너뜀")
+        return True, "이전 실행에서 완료"
+
+    reused = journal.verified_file(f"{step}:download")
+    if reused:
+        log(f"♻️ [이어하기] {label}: 받아 둔 파일 재사용 ({os.path.basename(reused)})")
+    else:
+        ok, msg = collector.fetch(report)
+        if not ok:
+            return False, msg
+        info = collector.last_download or {}
+        journal.mark_done(f"{step}:download", file_path=info.get("path"), sha256=info.get("sha256"))
+
+    if not process_fn():
+        return False, "DB 동기화 실패"
+    journal.mark_done(f"{step}:sync")
+    return True, "완료"
+
+
+def _run_hq_pipeline(task, task_label, dl_path, is_headless):
+    """본사(HQ) 계정 수집 루틴"""
+    log("🔍 [1단계] 본사 이카운트 설정값 읽는 중...")
+    com_code  = db_get("ecount_com_code")
+    user_id   = db_get("ecount_user_id")
+    user_pw   = db_get("ecount_user_pw")
+
+    if com_code in ("NULL", "ERROR") or user_id in ("NULL", "ERROR"):
+        raise Exception("이카운트 계정 정보가 DB에 없습니다. 환경설정에서 입력해 주세요.")
+
+    if journal.is_done("hq:complete"):
+        log("⏭️ [이어하기] 본사 수집은 이전 실행에서 모두 끝났습니다.")
+        return "본사 수집 완료 (이전 실행)"
+
+    collector, rpa_collector = _collectors("본사", com_code, user_id, user_pw, "ecount_api_key", dl_path, is_headless,
+                                           warehouse_workers=_warehouse_workers())
+
+    failed = []   # 실패한 리포트 (하나라도 있으면 hq:complete 를 남기지 않아 이어하기 때 다시 시도)
+    try:
+        log(f"[본사] '{task_label}' 수집을 시작합니다.")
+
+        # 작업 1: 관리항목별재고현황(유효기간) 순회
+        if task in ("all", "hq_only", "warehouse_inventory"):
+            check_cancelled()
+            log("🔄 [작업] 관리항목별재고현황(유효기간) 순회 수집 시작...")
+            report_progress("창고별 순회 수집 중...")
+
+            wh_resp = db.get("warehouse_codes?select=warehouse_code,warehouse_name")
+            warehouses = wh_resp.json()
+
+            if warehouses:
+                rpa = rpa_collector.browser()
+                log(f"   - 대상 창고: {len(warehouses)}개 (동시 탭 {rpa.warehouse_workers}개)")
+                if str(db_get("rpa_pipeline")).lower() != "false":
+                    # 다운로드와 파싱/업로드를 창고 단위로 겹쳐 실행 (창고별 저널 기록 → 이어하기 시 남은 창고만)
+                    success_iter, msg_iter = collect_warehouse_inventory_pipelined(rpa, warehouses)
+                    log(f"   - 결과: {msg_iter}")
+                    if not success_iter:
+                        failed.append("관리항목별재고현황")
+                elif journal.is_done("hq:warehouse_inventory:sync"):
+                    log("⏭️ [이어하기] 관리항목별재고현황: 이미 동기화 완료 - 건너뜀")
+                else:
+                    success_iter, msg_iter = rpa.get_item_inventory_by_warehouse(warehouses)
+                    log(f"   - 결과: {msg_iter}")
+                    if not success_iter:
+                        failed.append("관리항목별재고현황")
+
+                    check_cancelled()
+                    log("📊 [동기화] 창고별 유효기간 상세 → DB 업로드 중...")
+                    report_progress("유효기간 데이터 DB 동기화 중...")
+                    if process_warehouse_inventory_files(dl_path, warehouses):
+                        journal.mark_done("hq:warehouse_inventory:sync")
+                    elif "관리항목별재고현황" not in failed:
+                        failed.append("관리항목별재고현황")
+            else:
+                log("⚠️ 등록된 창고 코드가 없어 순회 수집을 건너뜁니다.")
+
+        # 작업 2: 품목 마스터 + 재고변동표
+        if task in ("all", "hq_only", "item_master"):
+            log("📦 [작업] 품목 마스터(품목등록) 수집 시작...")
+            report_progress("품목 마스터 수집 중...")
+
+            def sync_item_master():
+                log("📊 [동기화] 품목 마스터 → DB 업로드 중...")
+                return process_item_master_excel(dl_path)
+
+            success_item, item_file = _journaled_report(
+                "hq:item_master", "품목 마스터", collector, "item_master", sync_item_master)
+            if not success_item:
+                failed.append("품목 마스터")
+                log(f"⚠️ 품목 마스터 수집 건너뜀: {item_file}")
+
+            log("📊 [작업] 재고변동표 수집 시작...")
+            report_progress("재고변동표 수집 중...")
+
+            def sync_movement():
+                log("📊 [동기화] 재고변동표 → 월평균 사용량 계산 중...")
+                return process_inventory_movement_excel(dl_path)
+
+            success_mv, mv_msg = _journaled_report(
+                "hq:movement", "재고변동표", collector, "movement", sync_movement)
+            if not success_mv:
+                failed.append("재고변동표")
+                log(f"⚠️ 재고변동표 수집 건너뜀: {mv_msg}")
+
+        if failed:
+            raise PartialCollection(f"본사 수집 일부 실패 ({', '.join(failed)})")
+        journal.mark_done("hq:complete")
+        log(f"✅ [본사 완료] '{task_label}' 작업이 성공적으로 끝났습니다.")
+        return "본사 수집 완료"
+
+    finally:
+        _close_collector("본사", collector)
+
+def _run_hub_pipeline(task, dl_path, is_headless):
+    """허브(Hub) 계정 수집 루틴"""
+    hub_com = db_get("hub_com_code")
+    hub_id  = db_get("hub_user_id")
+    hub_pw  = db_get("hub_user_pw")
+
+    if not (hub_com and hub_id and hub_com not in ("NULL", "ERROR", "")):
+        log("⚠️ 허브 계정 정보가 등록되어 있지 않습니다.")
+        return "허브 계정 미등록 - 건너뜀"
+
+    if journal.is_done("hub:complete"):
+        log("⏭️ [이어하기] 허브 수집은 이전 실행에서 모두 끝났습니다.")
+        return "허브 수집 완료 (이전 실행)"
+
+    log("🏢 [허브] 허브 계정 설정이 확인되어 전용 수집을 시작합니다.")
+    collector, _ = _collectors("허브", hub_com, hub_id, hub_pw, "hub_api_key", dl_path, is_headless)
+
+    failed = []
+    try:
+        log("📊 [허브] 허브 재고 수집 시작...")
+        report_progress("창고별재고현황 수집 중...")
+
+        def sync_hub_inventory():
+            log("📊 [동기화] 허브 재고 엑셀 → DB 업로드 중...")
+            return process_inventory_excel(dl_path, is_hub=True)
+
+        ok, msg = _journaled_report("hub:inventory_balance", "허브 창고별재고현황",
+                                    collector, "inventory_balance", sync_hub_inventory)
+        if not ok:
+            failed.append("창고별재고현황")
+            log(f"⚠️ 허브 창고별재고현황 수집 건너뜀: {msg}")
+
+        if task == "all":
+            log("📦 [허브] 품목 마스터 수집 시작...")
+            report_progress("품목 마스터 수집 중...")
+
+            def sync_hub_item_master():
+                log("📊 [동기화] 허브 품목 마스터 → DB 업로드 중...")
+                return process_item_master_excel(dl_path, is_hub=True)
+
+            ok, msg = _journaled_report("hub:item_master", "허브 품목 마스터",
+                                        collector, "item_master", sync_hub_item_master)
+            if not ok:
+                failed.append("품목 마스터")
+                log(f"⚠️ 허브 품목 마스터 수집 건너뜀: {msg}")
+
+        if failed:
+            raise PartialCollection(f"허브 수집 일부 실패 ({', '.join(failed)})")
+        journal.mark_done("hub:complete")
+
+        log("✅ [허브 완료] 허브 용인 창고 재고 동기화가 완전히 끝났습니다.")
+        return "허브 수집 완료"
+    finally:
+        _close_collector("허브", collector)
+
 def execute_rpa(task="all"):
+    """수집 작업 하나 실행 → (성공 여부, 결과 메시지)"""
     if task not in TASK_LABELS:
         task = "all"
-    task_label = TASK_LABELS[task]
 
-    log(f"🚀 [RPA 시작] '{task_label}' 작업을 시작합니다.")
+    if task == "resume":
+        # 💡 마지막 미완료 실행을 이어서: 원래 task 로 돌리되 저널에 끝난 단계/창고는 건너뜀
+        resumed = journal.resume()
+        if not resumed:
+            log("ℹ️ [이어하기] 이어서 진행할 미완료 실행이 없습니다.")
+            db_set("rpa_message", "이어서 진행할 작업이 없습니다")
+            db_set("rpa_trigger", "idle")
+            return True, "이어서 진행할 미완료 실행 없음"
+        task = resumed if resumed in TASK_LABELS else "all"
+        task_label = f"{TASK_LABELS[task]} (이어하기)"
+    else:
+        journal.begin(task)
+        task_label = TASK_LABELS[task]
+
+    log(f"🚀 [RPA 시작] '{task_label}' 작업을 시작합니다. (실행 ID {journal.run_id})")
+    tracer.start_run(journal.run_id, f"execute_rpa:{task}", task=task, label=task_label)
+    db.reset_stats()
     db_set("rpa_status", "running")
-    db_set("rpa_message", f"{task_label} 준비 중...")
+    progress.start_run(task_label)
+    parse_cache.reset_stats()
+    run_started = time.monotonic()
+    outcome = (True, "")
 
     try:
-        # 다운로드 경로 설정
-        dl_path = db_get("ecount_download_path")
+        dl_path = _resolve_download_path()
         headless_val = db_get("ecount_headless")
         is_headless = True if str(headless_val).lower() == 'true' else False
 
-        if dl_path in ("NULL", "ERROR", ""):
-            dl_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ecount_stocks")
-
-        try:
-            if not os.path.exists(dl_path):
-                os.makedirs(dl_path, exist_ok=True)
-        except Exception:
-            dl_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ecount_stocks")
-            os.makedirs(dl_path, exist_ok=True)
-
-        # -------------------------------------------------------------
-        # 1. 본사(HQ) 계정 수집 루틴 (task != "hub_only" 일 때만 실행)
-        # -------------------------------------------------------------
+        pipelines = []
         if task != "hub_only":
-            log("🔍 [1단계] 본사 이카운트 설정값 읽는 중...")
-            com_code  = db_get("ecount_com_code")
-            user_id   = db_get("ecount_user_id")
-            user_pw   = db_get("ecount_user_pw")
-
-            if com_code in ("NULL", "ERROR") or user_id in ("NULL", "ERROR"):
-                raise Exception("이카운트 계정 정보가 DB에 없습니다. 환경설정에서 입력해 주세요.")
-
-            log("🖥️ [본사] 크롬 브라우저를 실행합니다... (잠시만 기다려 주세요)")
-            rpa = EcountRPA(com_code, user_id, user_pw, dl_path, headless=is_headless, status_cb=lambda m: db_set("rpa_message", m[:100]))
-            active_rpa_instances.add(rpa)
-
-            try:
-                db_set("rpa_message", "본사 이카운트 로그인 시도 중...")
-                log("[본사] 이카운트 로그인 시도 중...")
-                success, msg = rpa.login()
-
-                if not success:
-                    raise Exception(f"본사 로그인 실패: {msg}")
-
-                log(f"[본사] 로그인 성공! '{task_label}' 수집을 시작합니다.")
-
-                # 작업 1: 관리항목별재고현황(유효기간) 순회
-                if task in ("all", "hq_only", "warehouse_inventory"):
-                    log("🔄 [작업] 관리항목별재고현황(유효기간) 순회 수집 시작...")
-                    db_set("rpa_message", "창고별 순회 수집 중...")
-
-                    wh_url = f"{SUPABASE_URL}/rest/v1/warehouse_codes?select=warehouse_code,warehouse_name"
-                    wh_resp = requests.get(wh_url, headers=HEADERS, timeout=5)
-                    warehouses = wh_resp.json()
-
-                    if warehouses:
-                        log(f"   - 대상 창고: {len(warehouses)}개")
-                        success_iter, msg_iter = rpa.get_item_inventory_by_warehouse(warehouses)
-                        log(f"   - 결과: {msg_iter}")
-
-                        log("📊 [동기화] 창고별 유효기간 상세 → DB 업로드 중...")
-                        db_set("rpa_message", "유효기간 데이터 DB 동기화 중...")
-                        process_warehouse_inventory_files(dl_path, warehouses)
-                    else:
-                        log("⚠️ 등록된 창고 코드가 없어 순회 수집을 건너뜁니다.")
-
-                # 작업 2: 품목 마스터 + 재고변동표
-                if task in ("all", "hq_only", "item_master"):
-                    log("📦 [작업] 품목 마스터(품목등록) 수집 시작...")
-                    db_set("rpa_message", "품목 마스터 수집 중...")
-                    success_item, item_file = rpa.get_item_master_excel()
-                    if success_item:
-                        log("📊 [동기화] 품목 마스터 → DB 업로드 중...")
-                        process_item_master_excel(dl_path)
-                    else:
-                        log(f"⚠️ 품목 마스터 수집 건너뜀: {item_file}")
-
-                    log("📊 [작업] 재고변동표 수집 시작...")
-                    db_set("rpa_message", "재고변동표 수집 중...")
-                    success_mv, mv_msg = rpa.get_inventory_movement()
-                    if success_mv:
-                        log("📊 [동기화] 재고변동표 → 월평균 사용량 계산 중...")
-                        process_inventory_movement_excel(dl_path)
-                    else:
-                        log(f"⚠️ 재고변동표 수집 건너뜀: {mv_msg}")
-
-                log(f"✅ [본사 완료] '{task_label}' 작업이 성공적으로 끝났습니다.")
-
-            finally:
-                log("본사 브라우저를 종료합니다.")
-                rpa.close()
-                active_rpa_instances.discard(rpa)
-
-        # -------------------------------------------------------------
-        # 2. 허브(Hub) 계정 수집 루틴 (task in ("all", "hub_only") 일 때만 실행)
-        # -------------------------------------------------------------
+            pipelines.append(("hq", _run_hq_pipeline, task, task_label, _account_download_path(dl_path, "hq"), is_headless))
         if task in ("all", "hub_only"):
-            hub_com = db_get("hub_com_code")
-            hub_id  = db_get("hub_user_id")
-            hub_pw  = db_get("hub_user_pw")
-
-            if hub_com and hub_id and hub_com not in ("NULL", "ERROR", ""):
-                log("🏢 [허브] 허브 계정 설정이 확인되어 전용 수집을 시작합니다.")
-                
-                hub_rpa = EcountRPA(hub_com, hub_id, hub_pw, dl_path, headless=is_headless, status_cb=lambda m: db_set("rpa_message", f"[Hub] {m[:80]}"))
-                active_rpa_instances.add(hub_rpa)
-                
-                try:
-                    db_set("rpa_message", "[Hub] 허브 계정 로그인 시도 중...")
-                    success, msg = hub_rpa.login()
-                    if not success:
-                        log(f"⚠️ [허브] 로그인 실패: {msg}", level="warning")
-                    else:
-                        log("📊 [허브] 허브 재고 수집 시작...")
-                        db_set("rpa_message", "[Hub] 창고별재고현황 수집 중...")
-                        ok_inv, msg_inv = hub_rpa.get_inventory_balance()
-                        if ok_inv:
-                            log("📊 [동기화] 허브 재고 엑셀 → DB 업로드 중...")
-                            process_inventory_excel(dl_path, is_hub=True)
-
-                        if task == "all":
-                            log("📦 [허브] 품목 마스터 수집 시작...")
-                            db_set("rpa_message", "[Hub] 품목 마스터 수집 중...")
-                            success_item, item_file = hub_rpa.get_item_master_excel()
-                            if success_item:
-                                log("📊 [동기화] 허브 품목 마스터 → DB 업로드 중...")
-                                process_item_master_excel(dl_path, is_hub=True)
-
-                        log("✅ [허브 완료] 허브 용인 창고 재고 동기화가 완전히 끝났습니다.")
-                finally:
-                    log("허브 브라우저를 종료합니다.")
-                    hub_rpa.close()
-                    active_rpa_instances.discard(hub_rpa)
-            else:
-                log("⚠️ 허브 계정 정보가 등록되어 있지 않습니다.")
+            pipelines.append(("hub", _run_hub_pipeline, task, _account_download_path(dl_path, "hub"), is_headless))
+
+        # 💡 본사/허브는 서로 독립된 ERP 계정이므로 동시 실행 (system_config rpa_concurrent=false 로 순차 실행)
+        # 각 파이프라인은 브라우저 풀의 자기 레인 스레드에서 돈다 (Playwright 객체가 스레드에 묶여 있어 재사용 가능)
+        concurrent = len(pipelines) > 1 and str(db_get("rpa_concurrent")).lower() != "false"
+        if concurrent:
+            log("⚡ [동시 실행] 본사/허브 파이프라인을 병렬로 시작합니다.")
+            futures = [browser_pool.submit(p[0], _run_pipeline, p[0], *p[1:]) for p in pipelines]
+            results = [f.result() for f in futures]
+        else:
+            results = [browser_pool.submit(p[0], _run_pipeline, p[0], *p[1:]).result() for p in pipelines]
+
+        for r in results:
+            state = "실패" if not r["ok"] else ("일부 실패" if r["partial"] else "성공")
+            log(f"   - [{r['channel']}] {state} ({r['elapsed']}초): {r['message']}")
+
+        failed = [r for r in results if not r["ok"]]
+        if failed:
+            raise Exception(" / ".join(f"{PROGRESS_CHANNELS[r['channel']].strip()} {r['message']}" for r in failed))
 
-        import time
         time.sleep(2)
+        progress.finish()
+        # 💡 일부 리포트가 실패했으면 실행을 'partial' 로 남겨 이어하기 대상이 되게 한다
+        partial = [r for r in results if r["partial"]]
+        journal.finish("partial" if partial else "completed")
         db_set("rpa_status", "idle")
-        db_set("rpa_message", "대기 중")
+        db_set("rpa_message", "⚠️ 일부 리포트 수집 실패 ('이어하기'로 재시도 가능)" if partial else "대기 중")
+        outcome = (True, " / ".join(f"{r['message']} ({r['elapsed']}초)" for r in results))
 
     except Exception as e:
         error_msg = str(e)
+        progress.finish()
+        journal.finish("failed")
         db_set("rpa_status", "failed")
-        db_set("rpa_message", f"❌ {error_msg}")
+        db_set("rpa_message", f"❌ {error_msg} (대시보드 '이어하기'로 남은 작업만 재실행 가능)")
         log(f"❌ [에러] {error_msg}", level="error")
+        outcome = (False, error_msg)
     finally:
         db_set("rpa_trigger", "idle")
         db_set("rpa_updated_at", datetime.now(KST).isoformat())
+        log(f"📡 [DB 호출 통계] {db.stats_summary()}")
+        log(f"📨 [진행 보고] 이벤트 {progress.events}건 → DB 기록 {progress.flushes}회")
+        log(f"♻️ [브라우저 풀] {browser_pool.summary()}")
+        log(f"🗂️ [파싱 캐시] {parse_cache.summary()}")
+        metrics.task_finished(task, outcome[0], time.monotonic() - run_started)
+        tracer.finish_run("ok" if outcome[0] else "error", message=outcome[1][:200])
+        spans = tracer.flush()
+        if spans:
+            log(f"🧭 [트레이스] 스팬 {spans}건 기록 (실행 ID {journal.run_id})")
+    return outcome
+
+# --- warehouse_inventory_details 동기화 ---
+def _fetch_inventory_snapshot(scope_filter):
+    """동기화 범위(scope_filter)의 현재 DB 스냅샷 (페이지 단위로 전체 조회)"""
+    return db.select_all(f"warehouse_inventory_details?select={SNAPSHOT_SELECT}&{scope_filter}",
+                         order="warehouse_name,item_code,expiration_date")
+
+def _replace_inventory_rows(rows, scope_filter, label):
+    """기존 방식: 범위 전체 DELETE 후 재삽입 (동기화 중 대시보드에 빈 구간이 보임). 전부 성공하면 True"""
+    del_resp = db.delete(f"warehouse_inventory_details?{scope_filter}")
+    if del_resp.status_code not in (200, 204):
+        log(f"⚠️ [{label}] 기존 행 삭제 실패: {del_resp.status_code} {del_resp.text[:200]}", level="error")
+    ok = del_resp.status_code in (200, 204)
+    total = len(rows)
+    for i in range(0, total, 1000):
+        chunk = rows[i:i+1000]
+        report_progress(f"{label} DB 업로드 중... ({i}/{total}건)", done=i, total=total, stage=f"{label} DB 업로드")
+        resp = db.post("warehouse_inventory_details", json=chunk, prefer="return=minimal")
+        if resp.status_code not in (200, 201):
+            ok = False
+            log(f"⚠️ 업로드 실패 (chunk {i}): {resp.status_code} {resp.text[:200]}", level="error")
+    return ok
+
+@tracer.traced()
+def sync_inventory_rows(rows, scope_filter, label, old_rows=None):
+    """warehouse_inventory_details 의 scope_filter 범위를 rows 로 맞춘다.
+
+    💡 기본은 델타 모드: (창고, 품목, 유효기간) 키별 해시를 이전 스냅샷과 비교해
+    추가/변경/삭제분만 apply_inventory_delta RPC 한 번으로 원자 적용 (inventory_delta_sync.sql).
+    system_config 의 inventory_sync_mode 가 'replace' 이거나 스냅샷/RPC 가 실패하면 기존 방식으로 폴백.
+    반영이 모두 성공하면 True.
+    """
+    if db_get("inventory_sync_mode") == "replace":
+        return _replace_inventory_rows(rows, scope_filter, label)
 
+    if old_rows is None:
+        try:
+            old_rows = _fetch_inventory_snapshot(scope_filter)
+        except Exception as e:
+            log(f"  ⚠️ [{label}] 스냅샷 조회 실패 - 전체 재삽입으로 폴백: {e}", level="warning")
+            return _replace_inventory_rows(rows, scope_filter, label)
+
+    delta = compute_delta(old_rows, merge_duplicate_keys(rows))
+    log(f"  🔁 [{label}] 델타 계산: {delta.summary()}")
+    if delta.change_count == 0:
+        return True
+
+    report_progress(f"{label} 변경분 {delta.change_count}건 반영 중...")
+    resp = db.rpc("apply_inventory_delta", {"p_upserts": delta.upserts, "p_deletes": delta.deletes})
+    if resp.status_code == 200:
+        log(f"  ✅ [{label}] 델타 반영 완료: {resp.json()}")
+        return True
+    log(f"  ⚠️ [{label}] 델타 반영 실패({resp.status_code} {resp.text[:200]}) - 전체 재삽입으로 폴백", level="warning")
+    return _replace_inventory_rows(rows, scope_filter, label)
+
+def _replace_monthly_history(entries, division):
+    """기존 방식: 해당 구분의 월별 행 전체 DELETE 후 재삽입. 전부 성공하면 True"""
+    log(f"📊 [월별 이력] 기존 {division} 데이터 삭제 중...")
+    del_resp = db.delete(f"inventory_history?warehouse_name=eq.{division}")
+    if del_resp.status_code not in (200, 204):
+        log(f"  ⚠️ 기존 월별 데이터 삭제 실패: {del_resp.status_code} {del_resp.text}")
+
+    log(f"📊 [월별 이력] 신규 {len(entries)}건 업로드 중...")
+    success_upload = 0
+    for i in range(0, len(entries), 500):
+        chunk = entries[i:i+500]
+        post_resp = db.post("inventory_history", json=chunk, prefer="return=minimal")
+        if post_resp.status_code in (200, 201):
+            success_upload += len(chunk)
+        else:
+            log(f"  ⚠️ 월별 데이터 업로드 오류: {post_resp.status_code} {post_resp.text[:200]}")
+    log(f"✅ [월별 이력] {success_upload}건 DB 적재 완료 ({division})")
+    return del_resp.status_code in (200, 204) and success_upload == len(entries)
+
+@tracer.traced()
+def sync_monthly_history(entries, division, window):
+    """inventory_history 의 division(본사_월별/허브_월별) 행을 entries 로 맞춘다.
+
+    💡 기본은 증분 모드: (품목코드, 월말일자) 키로 기존 행과 비교해 내용이 바뀐 월만
+    sync_monthly_history RPC 로 월 단위 원자 적용 (monthly_history_sync.sql). window 밖의 월은 삭제.
+    system_config 의 history_sync_mode 가 'replace' 이거나 조회/RPC 가 실패하면 기존 방식으로 폴백.
+    반영이 모두 성공하면 True.
+    """
+    entries = dedupe_entries(entries)
+    if db_get("history_sync_mode") == "replace":
+        return _replace_monthly_history(entries, division)
+
+    try:
+        old_rows = db.select_all(f"inventory_history?select={HISTORY_SELECT}&warehouse_name=eq.{division}",
+                                 order="record_date,item_code")
+    except Exception as e:
+        log(f"  ⚠️ [월별 이력] 기존 데이터 조회 실패 - 전체 재적재로 폴백: {e}", level="warning")
+        return _replace_monthly_history(entries, division)
+
+    window = [d for d in window if d]
+    months = [m for m in changed_months(old_rows, entries) if m in window]
+    expired = expired_months(old_rows, window)
+    log(f"  🔁 [월별 이력] {division}: 변경 월 {len(months)}개 {months} / 기간 밖 월 {len(expired)}개 / "
+        f"유지 월 {len(window) - len(months)}개")
+    if not months and not expired:
+        return True
+
+    rows_by_month = {}
+    for e in entries:
+        rows_by_month.setdefault(e["record_date"], []).append(
+            {k: e[k] for k in ("item_code", "record_date", "item_name_spec", "curr_qty", "diff_qty")})
+    applied = 0
+    # 월 단위로 나눠 호출 (첫 실행처럼 12개월이 모두 바뀐 경우에도 요청 크기 제한)
+    for month in months or [None]:
+        rows = rows_by_month.get(month, []) if month else []
+        resp = db.rpc("sync_monthly_history", {"p_warehouse": division, "p_rows": rows,
+                                               "p_months": [month] if month else [], "p_window": window})
+        if resp.status_code != 200:
+            log(f"  ⚠️ [월별 이력] 증분 반영 실패({resp.status_code} {resp.text[:200]}) - 전체 재적재로 폴백",
+                level="warning")
+            return _replace_monthly_history(entries, division)
+        applied += len(rows)
+    log(f"✅ [월별 이력] {division} 증분 반영 완료: {len(months)}개월 {applied}건 upsert, 기간 밖 {len(expired)}개월 정리")
+    return True
+
+HUB_WAREHOUSE_PATTERNS = ["%HUB%", "%용인%"]
+
+@tracer.traced()
+def merge_inventory_snapshot(rows, label, is_hub=False):
+    """창고 묶음 하나의 전체 스냅샷을 merge_inventory_snapshot RPC 로 병합 (inventory_snapshot_merge.sql).
+
+    warehouse_inventory_details 병합과 inventory_history 변동 이력이 서버에서 한 트랜잭션으로 처리된다.
+    성공하면 True, 함수가 없거나 실패하면 False (호출자가 기존 클라이언트 비교 방식으로 폴백).
+    system_config 의 inventory_sync_mode 가 'replace' / 'delta' 면 사용하지 않는다.
+    """
+    if db_get("inventory_sync_mode") in ("replace", "delta"):
+        return False
+    if is_hub:
+        # 허브는 기존 DB의 모든 허브 창고([HUB] 관련 전체 및 용인 포함)를 동기화 범위로 (sync 범위와 동일)
+        scope = {"p_warehouses": [], "p_patterns": HUB_WAREHOUSE_PATTERNS}
+    else:
+        scope = {"p_warehouses": sorted({r["warehouse_name"] for r in rows}), "p_patterns": []}
+
+    report_progress(f"{label} 서버 병합 중... ({len(rows)}건)")
+    try:
+        resp = db.rpc("merge_inventory_snapshot", {"p_rows": merge_duplicate_keys(rows), **scope,
+                                                   "p_record_date": datetime.now(KST).strftime('%Y-%m-%d')})
+    except Exception as e:
+        log(f"  ⚠️ [{label}] 서버 병합 요청 실패 - 기존 방식으로 폴백: {e}", level="warning")
+        return False
+    if resp.status_code == 404:
+        return False  # 함수 미설치
+    if resp.status_code != 200:
+        log(f"  ⚠️ [{label}] 서버 병합 실패({resp.status_code} {resp.text[:200]}) - 기존 방식으로 폴백", level="warning")
+        return False
+    r = resp.json()
+    log(f"  🔁 [{label}] 서버 병합: 추가 {r.get('inserted')} / 변경 {r.get('updated')} / 삭제 {r.get('deleted')}"
+        f" / 유지 {r.get('unchanged')} / 변동 이력 {r.get('history')}건")
+    return True
+
+@tracer.traced()
 def process_inventory_excel(dl_path, is_hub=False):
-    """수집된 엑셀 파일을 읽어 DB(warehouse_inventory_details)에 업로드"""
+    """수집된 엑셀 파일을 읽어 DB(warehouse_inventory_details)에 업로드. 동기화가 성공하면 True"""
     import glob
     files = glob.glob(os.path.join(dl_path, "*창고별재고현황*.xlsx"))
     if not files:
         log(f"⚠️ 동기화할 엑셀 파일이 없습니다: {dl_path}", level="warning")
-        return
+        return False
     
     target_file = max(files, key=os.path.getmtime)
     log(f"📄 최신 창고별재고현황 탐색 완료: {os.path.basename(target_file)}")
 
     try:
-        df_raw = pd.read_excel(target_file, header=None)
-        
-        header_row_idx = -1
-        for i, row in df_raw.iterrows():
-            if any('품목코드' in str(v) for v in row.values if pd.notna(v)):
-                header_row_idx = i
-                break
-        
-        if header_row_idx == -1:
-            log(f"❌ 엑셀 내에서 '품목코드' 헤더를 찾을 수 없습니다: {target_file}", level="error")
-            return
-
-        df = pd.read_excel(target_file, header=header_row_idx)
-        df.columns = [str(c).strip() for c in df.columns]
-
-        # 컬럼 유연 매칭: 키워드 우선순위 순으로 스캔 (먼저 들어온 키워드가 우선)
-        def find_col(keywords, default):
-            cols_clean = {col: str(col).replace(' ', '').replace('\n', '') for col in df.columns}
-            for kw in keywords:
-                k_clean = kw.replace(' ', '')
-                # 1차: 완전일치
-                for col, c_clean in cols_clean.items():
-                    if c_clean == k_clean:
-                        return col
-                # 2차: 부분일치
-                for col, c_clean in cols_clean.items():
-                    if k_clean in c_clean:
-                        return col
-            return default
-
-        code_col = find_col(['품목코드', 'ItemCode', '상품코드'], '품목코드')
-        name_col = find_col(['품목명', 'ItemName', '상품명'], '품목명[규격]')
-        wh_col = find_col(['창고명', 'WarehouseName', 'Warehouse'], '창고명')
-        wh_code_col = find_col(['창고코드', 'WarehouseCode'], None)
-        qty_col = find_col(['재고수량', '현재고', 'Qty'], '재고수량')
-        price_col = find_col(['입고단가', '단가', 'Price', '원가'], '입고단가')
-
         # warehouse_codes 에서 정식 창고명 매핑 로드
         # 통합 파일의 '본사 A급 창고' 같은 표기를 정식명 '본사A급' 으로 통일
         wh_name_map = {}
         try:
-            wh_res = requests.get(
-                f"{SUPABASE_URL}/rest/v1/warehouse_codes?select=warehouse_code,warehouse_name",
-                headers=HEADERS, timeout=10
-            )
+            wh_res = db.get("warehouse_codes?select=warehouse_code,warehouse_name")
             if wh_res.status_code == 200:
                 for w in wh_res.json():
                     code = str(w.get('warehouse_code', '')).strip()
@@ -339,10 +870,7 @@ def process_inventory_excel(dl_path, is_hub=False):
         # 💡 [요구사항] item_master 에서 품목별 정식 입고단가 맵 로드 (본사/허브 구분 적용)
         master_price_map = {}
         try:
-            p_res = requests.get(
-                f"{SUPABASE_URL}/rest/v1/item_master?select=division,item_code,unit_price",
-                headers=HEADERS, timeout=10
-            )
+            p_res = db.get("item_master?select=division,item_code,unit_price")
             if p_res.status_code == 200:
                 for row in p_res.json():
                     div = str(row.get('division', '')).strip()
@@ -354,141 +882,101 @@ def process_inventory_excel(dl_path, is_hub=False):
         except Exception as e:
             log(f"   - 마스터 단가 맵 로드 실패: {e}", level="warning")
 
-        # 3. 데이터 정제 (유령 데이터 및 합계 행 제거)
-        def is_valid(val):
-            v = str(val).strip().lower()
-            return v not in ('nan', 'none', 'null', '', 'undefined', 'nan', '0', '0.0')
-
-        # 필수 컬럼(코드, 창고명) 유효성 검사 - 창고명이나 품목명이 비어있으면 삭제
-        if code_col in df.columns:
-            df = df[df[code_col].apply(lambda x: is_valid(x))]
-        if wh_col in df.columns:
-            df = df[df[wh_col].apply(lambda x: is_valid(x))]
-        if name_col in df.columns:
-            df = df[df[name_col].apply(lambda x: is_valid(x))]
-
-        exclude_keywords = '계|합계|소계|총계|Total'
-        df = df[~df[code_col].astype(str).str.contains(exclude_keywords, na=False)]
-        
-        # 컬럼 누락 방어 로직 (KeyError: '입고단가' 등 방지)
-        if qty_col not in df.columns:
-            df[qty_col] = 0
-        if price_col not in df.columns:
-            df[price_col] = 0
+        # 💡 파싱 구간(엑셀 읽기 + 레코드 변환)은 DB 조회와 분리해 측정
+        parse_started = time.monotonic()
+        df = read_excel_table(target_file)
+        if df is None:
+            log(f"❌ 엑셀 내에서 '품목코드' 헤더를 찾을 수 없습니다: {target_file}", level="error")
+            return False
 
-        df['calc_qty'] = pd.to_numeric(df[qty_col], errors='coerce').fillna(0)
-        df['calc_price'] = pd.to_numeric(df[price_col], errors='coerce').fillna(0)
-        df['calc_cost'] = df['calc_qty'] * df['calc_price']
+        # 컬럼 유연 매칭: 키워드 우선순위 순으로 스캔 (먼저 들어온 키워드가 우선)
+        def find_col(keywords, default):
+            cols_clean = {col: str(col).replace(' ', '').replace('\n', '') for col in df.columns}
+            for kw in keywords:
+                k_clean = kw.replace(' ', '')
+                # 1차: 완전일치
+                for col, c_clean in cols_clean.items():
+                    if c_clean == k_clean:
+                        return col
+                # 2차: 부분일치
+                for col, c_clean in cols_clean.items():
+                    if k_clean in c_clean:
+                        return col
+            return default
 
-        upload_data = []
-        for _, row in df.iterrows():
-            cat_col = next((c for c in row.index if '구분' in str(c)), None)
-            raw_cat = str(row.get(cat_col, '일반')).strip() if cat_col else '일반'
-            clean_cat = raw_cat.replace('[', '').replace(']', '')
-            if not clean_cat or clean_cat.lower() in ('nan', 'none', '일반', 'undefined'): clean_cat = '일반'
-            
-            exp_raw = str(row.get('관리항목명', '')).strip()
-            if not exp_raw or exp_raw.lower() == 'nan': exp_raw = str(row.get('유효기간', '')).strip()
-            
-            exp_date = None
-            if exp_raw and exp_raw.lower() not in ('nan', 'none', ''):
-                nums = re.sub(r'[^0-9]', '', exp_raw)
-                if len(nums) == 8: exp_date = f"{nums[:4]}-{nums[4:6]}-{nums[6:8]}"
-                elif len(nums) == 6: exp_date = f"20{nums[:2]}-{nums[2:4]}-{nums[4:6]}"
-                else: exp_date = exp_raw
-
-            # 창고코드 → 정식명 변환. 없으면 엑셀의 창고명 그대로
-            raw_wh_name = str(row.get(wh_col, '')).strip()
-            wh_name_final = raw_wh_name
-            if wh_code_col:
-                wh_code_val = str(row.get(wh_code_col, '')).strip()
-                if wh_code_val and wh_code_val in wh_name_map:
-                    wh_name_final = wh_name_map[wh_code_val]
-            
-            # 💡 [요구사항] 허브 수집 시 띄어쓰기 유연 매칭으로 '용인' 포함 창고만 100% 정밀 선택하고 명칭을 '[HUB] 용인 창고'로 통일
-            if is_hub:
-                clean_wh = re.sub(r'\s+', '', raw_wh_name)
-                if '용인' not in clean_wh:
-                    continue
-                wh_name_final = "[HUB] 용인 창고"
-            elif not wh_name_final.startswith("[HUB]"):
-                pass
-
-            item_name_spec_val = str(row.get(name_col, '')).strip()
-            # 💡 [요구사항] 본사 및 허브 구분 없이 품목명 대괄호([]) 및 내부 텍스트 일괄 제거 정제
-            item_name_spec_val = re.sub(r'\[.*?\]', '', item_name_spec_val).strip()
-                
-            item_code_val = str(row.get(code_col, '')).strip()
-            stock_qty_val = float(row.get('calc_qty', 0))
-            
-            # 💡 [요구사항] 엑셀 단가가 0원 이하인 경우, 마스터에 등록된 단가로 대체 매핑
-            excel_price = float(row.get('calc_price', 0))
-            div_key = "허브" if is_hub else "본사"
-            final_price = excel_price
-            if final_price <= 0 and item_code_val:
-                final_price = master_price_map.get(f"{div_key}_{item_code_val}", 0.0)
+        code_col = find_col(['품목코드', 'ItemCode', '상품코드'], '품목코드')
+        name_col = find_col(['품목명', 'ItemName', '상품명'], '품목명[규격]')
+        wh_col = find_col(['창고명', 'WarehouseName', 'Warehouse'], '창고명')
+        wh_code_col = find_col(['창고코드', 'WarehouseCode'], None)
+        qty_col = find_col(['재고수량', '현재고', 'Qty'], '재고수량')
+        price_col = find_col(['입고단가', '단가', 'Price', '원가'], '입고단가')
 
-            upload_data.append({
-                "warehouse_name": wh_name_final,
-                "item_code": item_code_val,
-                "item_name_spec": item_name_spec_val,
-                "category": clean_cat,
-                "expiration_date": exp_date,
-                "stock_qty": stock_qty_val,
-                "unit_price": final_price,
-                "inventory_cost": stock_qty_val * final_price
-            })
-        
-        if upload_data:
-            old_res = requests.get(f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details?select=*", headers=HEADERS)
-            old_data = {f"{r['warehouse_name']}_{r['item_code']}": r['stock_qty'] for r in old_res.json()} if old_res.status_code == 200 else {}
+        # 3. 데이터 정제 + 레코드 변환 (💡 컬럼 단위 벡터 연산, utils/inventory_records.py)
+        cols = {"code": code_col, "name": name_col, "wh": wh_col, "wh_code": wh_code_col,
+                "qty": qty_col, "price": price_col}
+        upload_data = inventory_records_from_frame(df, cols, wh_name_map, master_price_map, is_hub=is_hub)
+        record_parse("inventory_hub" if is_hub else "inventory", len(df), parse_started)
 
-            # 💡 [요구사항] 허브 수집 시 기존 DB의 모든 허브 창고([HUB] 관련 전체 및 용인 포함) 데이터를 싹 DELETE 초기화하여
+        if upload_data:
+            # 💡 [요구사항] 허브 수집 시 기존 DB의 모든 허브 창고([HUB] 관련 전체 및 용인 포함)를 동기화 범위로 잡아
             # 옛날 띄어쓰기 오기 데이터로 인한 수량 중복 합산 및 품절/사용중단 품목 잔여를 100% 차단!
-            import urllib.parse
             if is_hub:
-                log("🗑️ [허브 수집] 기존 DB의 모든 허브 창고 재고 데이터 전면 초기화(DELETE) 진행...")
-                requests.delete(f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details?warehouse_name=like.*HUB*", headers=HEADERS)
-                requests.delete(f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details?warehouse_name=like.*용인*", headers=HEADERS)
+                scope = "or=(warehouse_name.like.*HUB*,warehouse_name.like.*용인*)"
             else:
-                current_warehouses = list(set([item['warehouse_name'] for item in upload_data]))
-                for wh in current_warehouses:
-                    safe_wh = urllib.parse.quote(wh)
-                    requests.delete(f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details?warehouse_name=eq.{safe_wh}", headers=HEADERS)
-            
+                scope = f"warehouse_name=in.{_in_filter(sorted({item['warehouse_name'] for item in upload_data}))}"
+
+            label = "허브 재고" if is_hub else "창고별재고현황"
+            upload_started = time.monotonic()
+            channel = getattr(_progress_ctx, "channel", None)
+            # 💡 서버 측 일괄 병합: 스냅샷 병합 + 변동 이력을 RPC 한 번(한 트랜잭션)으로 처리
+            if merge_inventory_snapshot(upload_data, label, is_hub=is_hub):
+                metrics.stage("upload", time.monotonic() - upload_started, channel=channel)
+                log(f"✅ {len(upload_data)}건의 재고 데이터 동기화 완료")
+                return True
+
+            try:
+                old_rows = _fetch_inventory_snapshot(scope)
+            except Exception as e:
+                log(f"  ⚠️ 기존 재고 스냅샷 조회 실패: {e}", level="warning")
+                old_rows = None
+            old_data = {f"{r['warehouse_name']}_{r['item_code']}": r['stock_qty'] for r in old_rows or []}
+
+            synced = sync_inventory_rows(upload_data, scope, label, old_rows=old_rows)
+
             history_entries = []
             today_str = datetime.now(KST).strftime('%Y-%m-%d')
-            headers = {**HEADERS, "Prefer": "resolution=merge-duplicates"} 
-            
-            for i in range(0, len(upload_data), 1000):
-                chunk = upload_data[i:i+1000]
-                db_set("rpa_message", f"창고별재고현황 업로드 중... ({i}/{len(upload_data)}건)")
-                requests.post(f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details", headers=headers, json=chunk)
-                
-                for item in chunk:
-                    key = f"{item['warehouse_name']}_{item['item_code']}"
-                    prev = old_data.get(key, 0)
-                    curr = item['stock_qty']
-                    if prev != curr:
-                        history_entries.append({
-                            "record_date": today_str,
-                            "warehouse_name": item['warehouse_name'],
-                            "item_code": item['item_code'],
-                            "item_name_spec": item['item_name_spec'],
-                            "prev_qty": prev,
-                            "curr_qty": curr,
-                            "diff_qty": curr - prev
-                        })
+            for item in upload_data:
+                key = f"{item['warehouse_name']}_{item['item_code']}"
+                prev = old_data.get(key, 0)
+                curr = item['stock_qty']
+                if prev != curr:
+                    history_entries.append({
+                        "record_date": today_str,
+                        "warehouse_name": item['warehouse_name'],
+                        "item_code": item['item_code'],
+                        "item_name_spec": item['item_name_spec'],
+                        "prev_qty": prev,
+                        "curr_qty": curr,
+                        "diff_qty": curr - prev
+                    })
             
             if history_entries:
                 for i in range(0, len(history_entries), 1000):
-                    requests.post(f"{SUPABASE_URL}/rest/v1/inventory_history", headers=HEADERS, json=history_entries[i:i+1000])
+                    db.post("inventory_history", json=history_entries[i:i+1000], prefer="return=minimal")
             
+            metrics.stage("upload", time.monotonic() - upload_started, channel=channel, ok=synced)
+            if not synced:
+                log(f"❌ 재고 데이터 동기화 실패 ({len(upload_data)}건)", level="error")
+                return False
             log(f"✅ {len(upload_data)}건의 재고 데이터 동기화 완료")
+        return True
 
     except Exception as e:
+        metrics.failures.inc(kind="inventory_sync")
         log(f"❌ 엑셀 처리 중 오류 발생: {e}", level="error")
+        return False
 
+@tracer.traced()
 def _build_price_map(dl_path):
     """통합 창고별재고현황 파일에서 (창고코드, 품목코드) → 입고단가 맵 생성
 
@@ -502,15 +990,9 @@ def _build_price_map(dl_path):
         log(f"  ℹ️ 단가 참조용 통합 파일 없음 (단가 0으로 기록): {combined}")
         return price_map
     try:
-        df_raw = pd.read_excel(combined, header=None)
-        hdr = -1
-        for i, row in df_raw.iterrows():
-            if any('품목코드' in str(v) for v in row.values if pd.notna(v)):
-                hdr = i; break
-        if hdr < 0:
+        df = read_excel_table(combined)
+        if df is None:
             return price_map
-        df = pd.read_excel(combined, header=hdr)
-        df.columns = [str(c).strip() for c in df.columns]
 
         def fc(keywords):
             cols_clean = {col: str(col).replace(' ', '').replace('\n', '') for col in df.columns}
@@ -543,25 +1025,12 @@ def _build_price_map(dl_path):
     return price_map
 
 
-def process_warehouse_inventory_files(dl_path, warehouses):
-    """창고별 관리항목 상세 파일들을 읽어 유효기간 포함 DB 동기화
-
-    파일명 패턴: {MMDD}_{창고명}(1).xlsx (creator: get_item_inventory_by_warehouse)
-    파일 컬럼: 품목코드 / 품목명 / 유효기간코드(YYYYMMDD) / 유효기간일 / 수량
-    단가/재고비용은 통합 창고별재고현황 파일에서 (창고, 품목) 매핑으로 보강.
-    """
-    db_set("rpa_message", "유효기간 상세 데이터 파싱 준비 중...")
-    import urllib.parse
-    mmdd = datetime.now().strftime("%m%d")
-
-    # item_master에서 (품목코드 → 카테고리/단가) 맵 로드
+def _load_hq_master_maps():
+    """item_master(본사)에서 (품목코드 → 카테고리), (품목코드 → 단가) 맵 로드"""
     category_map = {}
     price_map = {}
     try:
-        r = requests.get(
-            f"{SUPABASE_URL}/rest/v1/item_master?select=item_code,category,unit_price&division=eq.본사",
-            headers=HEADERS, timeout=10
-        )
+        r = db.get("item_master?select=item_code,category,unit_price&division=eq.본사")
         if r.status_code == 200:
             for row in r.json():
                 code = str(row.get('item_code', '')).strip()
@@ -574,193 +1043,385 @@ def process_warehouse_inventory_files(dl_path, warehouses):
             log(f"  📋 카테고리/단가 맵 로드: {len(category_map)}건")
     except Exception as e:
         log(f"  ⚠️ 카테고리 맵 로드 실패: {e}", level="warning")
+    return category_map, price_map
+
+def parse_warehouse_inventory_file(target_file, wh_name, category_map, price_map):
+    """창고 하나의 관리항목 상세 파일 → 업로드 행 목록 (파일/헤더/필수 컬럼이 없으면 None)"""
+    if not os.path.exists(target_file):
+        log(f"  ⚠️ 건너뜀 (파일 없음): {wh_name}", level="warning")
+        return None
+
+    df = read_excel_table(target_file)
+    if df is None:
+        log(f"  ⚠️ 헤더 찾기 실패: {wh_name}", level="warning")
+        return None
+
+    def find_col(keywords):
+        for col in df.columns:
+            c_clean = str(col).replace(' ', '').replace('\n', '')
+            if any(k.replace(' ', '') in c_clean for k in keywords):
+                return col
+        return None
+
+    code_col = find_col(['품목코드', 'ItemCode'])
+    name_col = find_col(['품목명', 'ItemName'])
+    exp_code_col = find_col(['유효기간코드'])
+    qty_col = find_col(['수량', '재고수량', 'Qty'])
+
+    if not code_col or not qty_col:
+        log(f"  ⚠️ 필수 컬럼 없음 (품목코드/수량): {wh_name}", level="warning")
+        return None
+
+    df = df[df[code_col].notna()]
+    # 품목코드가 영문/숫자 식별자가 아닌 소계 행 제외 ('합계', '소계', '... 계' 등)
+    df = df[~df[code_col].astype(str).str.contains(r'합계|총계|소계|Total|\s계$', na=False, regex=True)]
+    # 품목코드가 영문+숫자 조합이 아닌 행 제외 (타임스탬프, 날짜 등 쓰레기 행 차단)
+    df = df[df[code_col].astype(str).str.match(r'^[A-Za-z0-9]+$', na=False)]
+
+    rows = []
+    for _, row in df.iterrows():
+        code = str(row.get(code_col, '')).strip()
+        if not code or code.lower() in ('nan', 'none', ''):
+            continue
+
+        exp_date = None  # 유효기간 없는 품목 → NULL 저장 → 대시보드에서 '해당없음' 표시
+        if exp_code_col:
+            exp_val = row.get(exp_code_col)
+            if pd.notna(exp_val):
+                # float이면 정수 변환 후 문자열화 (20281202.0 → '20281202')
+                if isinstance(exp_val, float):
+                    try:
+                        exp_raw = str(int(exp_val))
+                    except (ValueError, OverflowError):
+                        exp_raw = ''
+                else:
+                    exp_raw = str(exp_val).strip()
+                nums = re.sub(r'[^0-9]', '', exp_raw)
+                if len(nums) == 8:
+                    exp_date = f"{nums[:4]}-{nums[4:6]}-{nums[6:8]}"
+                elif len(nums) == 6:
+                    exp_date = f"20{nums[:2]}-{nums[2:4]}-{nums[4:6]}"
+                # 유효기간 코드가 00 등 날짜 형식이 아닌 경우
+                # exp_date는 None 유지 → DB에 NULL로 저장됨
+
+        qty_val = pd.to_numeric(row.get(qty_col, 0), errors='coerce')
+        if pd.isna(qty_val):
+            qty_val = 0
+
+        unit_price = price_map.get(code, 0.0)
+        stock_qty_i = int(float(qty_val))
+        # 💡 [요구사항] 본사 유효기간별 재고 품목명 대괄호([]) 및 내부 텍스트 제거 정제
+        raw_name = str(row.get(name_col, '')).strip() if name_col else ''
+        clean_name = re.sub(r'\[.*?\]', '', raw_name).strip() if raw_name else ''
+        rows.append({
+            "warehouse_name": wh_name,
+            "item_code": code,
+            "item_name_spec": clean_name,
+            "category": category_map.get(code),
+            "expiration_date": exp_date,
+            "stock_qty": stock_qty_i,
+            "unit_price": unit_price,
+            "inventory_cost": stock_qty_i * unit_price,
+        })
+
+        if len(rows) % 500 == 0:
+            report_progress(f"{wh_name} 창고 파싱 중... ({len(rows)}건)", done=len(rows), total=len(df),
+                            stage=f"{wh_name} 파싱")
+
+    log(f"  ✅ {wh_name}: {len(rows)}행 파싱 완료")
+    return rows
+
+@tracer.traced()
+def process_warehouse_inventory_files(dl_path, warehouses):
+    """창고별 관리항목 상세 파일들을 읽어 유효기간 포함 DB 동기화 (다운로드가 모두 끝난 뒤 일괄 처리)
+
+    파일명 패턴: {MMDD}_{창고명}(1).xlsx (creator: get_item_inventory_by_warehouse)
+    파일 컬럼: 품목코드 / 품목명 / 유효기간코드(YYYYMMDD) / 유효기간일 / 수량
+    단가/재고비용은 통합 창고별재고현황 파일에서 (창고, 품목) 매핑으로 보강.
+    모든 창고를 파싱해 동기화했으면 True (파일이 없거나 파싱에 실패한 창고가 있으면 False).
+    """
+    report_progress("유효기간 상세 데이터 파싱 준비 중...")
+    mmdd = datetime.now().strftime("%m%d")
+    category_map, price_map = _load_hq_master_maps()
 
     all_upload_data = []
     processed_warehouses = []
 
     for wh in warehouses:
         wh_name = str(wh.get('warehouse_name', '')).strip()
-        wh_code = str(wh.get('warehouse_code', '')).strip()
         if not wh_name:
             continue
         target_file = os.path.join(dl_path, f"{mmdd}_{wh_name}(1).xlsx")
-
-        if not os.path.exists(target_file):
-            log(f"  ⚠️ 건너뜀 (파일 없음): {wh_name}", level="warning")
-            continue
-
         try:
-            df_raw = pd.read_excel(target_file, header=None)
-            header_idx = -1
-            for i, row in df_raw.iterrows():
-                if any('품목코드' in str(v) for v in row.values if pd.notna(v)):
-                    header_idx = i
-                    break
-            if header_idx == -1:
-                log(f"  ⚠️ 헤더 찾기 실패: {wh_name}", level="warning")
-                continue
-
-            df = pd.read_excel(target_file, header=header_idx)
-            df.columns = [str(c).strip() for c in df.columns]
-
-            def find_col(keywords):
-                for col in df.columns:
-                    c_clean = str(col).replace(' ', '').replace('\n', '')
-                    if any(k.replace(' ', '') in c_clean for k in keywords):
-                        return col
-                return None
-
-            code_col = find_col(['품목코드', 'ItemCode'])
-            name_col = find_col(['품목명', 'ItemName'])
-            exp_code_col = find_col(['유효기간코드'])
-            qty_col = find_col(['수량', '재고수량', 'Qty'])
-
-            if not code_col or not qty_col:
-                log(f"  ⚠️ 필수 컬럼 없음 (품목코드/수량): {wh_name}", level="warning")
-                continue
-
-            df = df[df[code_col].notna()]
-            # 품목코드가 영문/숫자 식별자가 아닌 소계 행 제외 ('합계', '소계', '... 계' 등)
-            df = df[~df[code_col].astype(str).str.contains(r'합계|총계|소계|Total|\s계$', na=False, regex=True)]
-            # 품목코드가 영문+숫자 조합이 아닌 행 제외 (타임스탬프, 날짜 등 쓰레기 행 차단)
-            df = df[df[code_col].astype(str).str.match(r'^[A-Za-z0-9]+$', na=False)]
-
-            row_count = 0
-            for _, row in df.iterrows():
-                code = str(row.get(code_col, '')).strip()
-                if not code or code.lower() in ('nan', 'none', ''):
-                    continue
-
-                exp_date = None  # 유효기간 없는 품목 → NULL 저장 → 대시보드에서 '해당없음' 표시
-                if exp_code_col:
-                    exp_val = row.get(exp_code_col)
-                    if pd.notna(exp_val):
-                        # float이면 정수 변환 후 문자열화 (20281202.0 → '20281202')
-                        if isinstance(exp_val, float):
-                            try:
-                                exp_raw = str(int(exp_val))
-                            except (ValueError, OverflowError):
-                                exp_raw = ''
-                        else:
-                            exp_raw = str(exp_val).strip()
-                        nums = re.sub(r'[^0-9]', '', exp_raw)
-                        if len(nums) == 8:
-                            exp_date = f"{nums[:4]}-{nums[4:6]}-{nums[6:8]}"
-                        elif len(nums) == 6:
-                            exp_date = f"20{nums[:2]}-{nums[2:4]}-{nums[4:6]}"
-                        # 유효기간 코드가 00 등 날짜 형식이 아닌 경우
-                        # exp_date는 None 유지 → DB에 NULL로 저장됨
-
-                qty_val = pd.to_numeric(row.get(qty_col, 0), errors='coerce')
-                if pd.isna(qty_val):
-                    qty_val = 0
-
-                unit_price = price_map.get(code, 0.0)
-                stock_qty_i = int(float(qty_val))
-                # 💡 [요구사항] 본사 유효기간별 재고 품목명 대괄호([]) 및 내부 텍스트 제거 정제
-                raw_name = str(row.get(name_col, '')).strip() if name_col else ''
-                clean_name = re.sub(r'\[.*?\]', '', raw_name).strip() if raw_name else ''
-                all_upload_data.append({
-                    "warehouse_name": wh_name,
-                    "item_code": code,
-                    "item_name_spec": clean_name,
-                    "category": category_map.get(code),
-                    "expiration_date": exp_date,
-                    "stock_qty": stock_qty_i,
-                    "unit_price": unit_price,
-                    "inventory_cost": stock_qty_i * unit_price,
-                })
-                row_count += 1
-                
-                if row_count % 500 == 0:
-                    db_set("rpa_message", f"{wh_name} 창고 파싱 중... ({row_count}건)")
-
-            processed_warehouses.append(wh_name)
-            log(f"  ✅ {wh_name}: {row_count}행 파싱 완료")
-
+            started = time.monotonic()
+            with tracer.span("warehouse_parse", warehouse=wh_name):
+                rows = parse_warehouse_inventory_file(target_file, wh_name, category_map, price_map)
+                record_parse("warehouse_detail", len(rows or []), started)
         except Exception as e:
             log(f"  ❌ {wh_name} 처리 실패: {e}", level="error")
+            continue
+        if rows is not None:
+            all_upload_data.extend(rows)
+            processed_warehouses.append(wh_name)
 
     if not all_upload_data:
         log("⚠️ 업로드할 유효기간 데이터가 없습니다.")
-        return
-
-    # 처리한 창고들의 기존 데이터 삭제 후 재삽입
-    for wh_name in processed_warehouses:
-        safe_wh = urllib.parse.quote(wh_name)
-        requests.delete(
-            f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details?warehouse_name=eq.{safe_wh}",
-            headers=HEADERS
-        )
+        return False
+
+    # 처리한 창고 범위만 델타 동기화 (삭제 후 재삽입 없이 변경분만 원자 반영)
+    scope = f"warehouse_name=in.{_in_filter(processed_warehouses)}"
+    if not sync_inventory_rows(all_upload_data, scope, "유효기간 상세"):
+        log(f"❌ 유효기간 DB 동기화 실패: {len(processed_warehouses)}개 창고 / {len(all_upload_data)}건", level="error")
+        return False
+
+    log(f"📤 유효기간 DB 동기화 완료: {len(processed_warehouses)}개 창고 / {len(all_upload_data)}건")
+    missing = [name for name in (str(wh.get('warehouse_name', '')).strip() for wh in warehouses)
+               if name and name not in processed_warehouses]
+    if missing:
+        log(f"⚠️ 동기화하지 못한 창고 {len(missing)}개: {', '.join(missing)}", level="warning")
+        return False
+    return True
+
+@tracer.traced()
+def collect_warehouse_inventory_pipelined(rpa, warehouses):
+    """창고별 다운로드 → 파싱 → 업로드를 겹쳐 실행 (창고 N 파싱/업로드 중에 창고 N+1 다운로드)
+
+    💡 다운로드는 브라우저 스레드(이 스레드)에서, 파싱/업로드는 각자 전용 스레드에서 돈다.
+    단계 사이 큐는 크기 2로 제한되어 업로드가 밀리면 파싱이, 파싱이 밀리면 다음 다운로드가 기다린다.
+    창고별로 warehouse_name=eq 범위만 델타 동기화하므로 일괄 처리와 결과가 같다.
+    다운로드/동기화가 끝난 창고는 저널에 남겨 이어하기 때 동기화된 창고는 건너뛰고,
+    받아 둔 파일이 해시까지 일치하면 브라우저 없이 바로 파싱 단계로 넣는다.
+    다운로드 / 파싱 / 업로드 중 하나라도 실패해 동기화되지 않은 창고가 있으면 (False, 누락 창고 목록).
+    """
+    category_map, price_map = _load_hq_master_maps()
+    channel = getattr(_progress_ctx, "channel", None)
+    parent_span = tracer.current()   # 파싱/업로드 스레드의 스팬도 이 실행 단계 밑에 붙인다
+    uploaded = {"warehouses": 0, "rows": 0}
+    done_warehouses = set()   # 업로드까지 끝난 창고 (업로드 단계 스레드 하나에서만 갱신)
+
+    def bind_channel():
+        _progress_ctx.channel = channel
+
+    def parse_stage(item):
+        wh_name, path = item
+        started = time.monotonic()
+        with tracer.span("warehouse_parse", parent=parent_span, warehouse=wh_name):
+            rows = parse_warehouse_inventory_file(path, wh_name, category_map, price_map)
+            record_parse("warehouse_detail", len(rows or []), started)
+        # 💡 0행이어도 파싱에 성공했으면 업로드 단계로 넘겨 기존 행을 삭제 동기화한다 (None 은 파싱 실패)
+        return (wh_name, rows) if rows is not None else None
+
+    def upload_stage(item):
+        wh_name, rows = item
+        with timed_stage("upload"), \
+                tracer.span("warehouse_upload", parent=parent_span, warehouse=wh_name, rows=len(rows)):
+            synced = sync_inventory_rows(rows, f"warehouse_name=in.{_in_filter([wh_name])}",
+                                         f"유효기간 상세/{wh_name}")
+        if not synced:
+            # 단계 오류로 기록되고 저널에 남기지 않으므로 이어하기 때 받아 둔 파일로 다시 동기화
+            raise RuntimeError(f"{wh_name} DB 동기화 실패")
+        journal.mark_done("hq:warehouse_sync", wh_name)
+        done_warehouses.add(wh_name)
+        uploaded["warehouses"] += 1
+        uploaded["rows"] += len(rows)
+
+    def on_downloaded(wh, path):
+        check_cancelled()   # 종료 요청이면 순회를 멈춘다 (이 창고는 저널에 남기지 않음)
+        wh_name = str(wh['warehouse_name']).strip()
+        info = rpa.last_download or {}
+        journal.mark_done("hq:warehouse_download", wh_name, file_path=path, sha256=info.get("sha256"))
+        pipe.put((wh_name, path))
+
+    to_download, reused = [], []
+    for wh in warehouses:
+        wh_name = str(wh.get('warehouse_name', '')).strip()
+        if journal.is_done("hq:warehouse_sync", wh_name):
+            continue
+        path = journal.verified_file("hq:warehouse_download", wh_name)
+        if path:
+            reused.append((wh_name, path))
+        else:
+            to_download.append(wh)
+    skipped = len(warehouses) - len(to_download) - len(reused)
+    if skipped or reused:
+        log(f"⏯️ [이어하기] 동기화 완료 창고 {skipped}개 건너뜀 / 받아 둔 파일 {len(reused)}개 재사용")
+
+    pipe = StagePipeline([("파싱", parse_stage), ("업로드", upload_stage)], maxsize=2,
+                         source_name="다운로드", log=lambda m: log(m, level="error"),
+                         thread_init=bind_channel).start()
+    try:
+        for item in reused:
+            pipe.put(item)
+        if to_download:
+            ok, msg = rpa.get_item_inventory_by_warehouse(to_download, on_downloaded=on_downloaded)
+        else:
+            ok, msg = True, "다운로드할 창고 없음 (이전 실행에서 수집 완료)"
+    finally:
+        elapsed = pipe.close()
+    log(f"⏱️ [파이프라인] 총 {elapsed:.1f}초 | {pipe.summary()}")
+    log(f"📤 유효기간 DB 동기화 완료: {uploaded['warehouses']}개 창고 / {uploaded['rows']}건")
+
+    expected = [str(wh.get('warehouse_name', '')).strip() for wh in to_download] + [name for name, _ in reused]
+    missing = [name for name in expected if name not in done_warehouses]
+    errors = sum(st.errors for st in pipe.stats)
+    if missing or errors:
+        detail = f"동기화 누락 창고 {len(missing)}/{len(expected)}개: {', '.join(missing)}" if missing \
+            else f"단계 오류 {errors}건"
+        log(f"⚠️ [파이프라인] {detail}", level="warning")
+        return False, detail if ok else f"{msg} / {detail}"
+    return ok, msg
 
-    insert_headers = {**HEADERS, "Prefer": "return=minimal"}
-    total = len(all_upload_data)
-    for i in range(0, total, 1000):
-        chunk = all_upload_data[i:i+1000]
-        db_set("rpa_message", f"유효기간 상세 DB 업로드 중... ({i}/{total}건)")
-        resp = requests.post(
-            f"{SUPABASE_URL}/rest/v1/warehouse_inventory_details",
-            headers=insert_headers,
-            json=chunk
-        )
-        if resp.status_code not in (200, 201):
-            log(f"⚠️ 업로드 실패 (chunk {i}): {resp.status_code} {resp.text[:200]}", level="error")
 
-    log(f"📤 유효기간 DB 동기화 완료: {len(processed_warehouses)}개 창고 / {total}건")
+ITEM_MASTER_PARSER_VERSION = 1   # parse_item_master_frame 규칙을 바꾸면 올려서 파싱 캐시 무효화
 
+def parse_item_master_frame(df, is_hub=False):
+    """품목 엑셀 DataFrame → 정규화된 품목 DataFrame (파일 내용에만 의존, DB 설정값 병합 전).
 
+    컬럼: item_code, item_name, category, unit_price, brand, status
+    status: ok(업로드 대상) / discontinued(단종 → DB 제거) / excluded(카테고리 제외 → DB 제거)
+    """
+    # 컬럼 유연 매칭
+    def find_col(keywords, default):
+        for col in df.columns:
+            c_clean = str(col).replace(' ', '').replace('\n', '')
+            if any(k.replace(' ', '') in c_clean for k in keywords):
+                return col
+        return default
+
+    code_col = find_col(['품목코드', 'ItemCode'], '품목코드')
+    name_col = find_col(['품목명', 'ItemName'], '품목명')
+    cat_col = find_col(['구분', '카테고리'], '품목구분')
+    price_col = find_col(['입고단가', '단가', '원가'], '입고단가')
+    grp1_col = find_col(['품목그룹1', '품목그룹 1', '품목그룹(1)', 'Group1'], None)
+    grp2_col = find_col(['품목그룹2', '품목그룹 2', '품목그룹(2)', 'Group2'], None)
+    grp3_col = find_col(['품목그룹3', '품목그룹 3', '품목그룹(3)', 'Group3'], None)
+    log(f"  품목그룹 컬럼 매핑: G1={grp1_col}, G2={grp2_col}, G3={grp3_col}")
+    log(f"  엑셀 전체 컬럼: {list(df.columns)}")
+
+    rows = []
+    parsed = 0
+    footer_pat = re.compile(r'^\d{4}[-/]\d{1,2}[-/]\d{1,2}')
+    for _, row in df.iterrows():
+        code = str(row.get(code_col, '')).strip()
+        if not code or code.lower() in ('nan', 'none'): continue
+        # 날짜 형태 footer 행 제외
+        if footer_pat.match(code): continue
+        # 합계/소계 행 제외
+        if re.search(r'합계|총계|소계|Total', code, re.IGNORECASE): continue
+
+        item_name = str(row.get(name_col, '')).strip()
+        # item_name 이 NaN/빈값이면 의미없는 행
+        if not item_name or item_name.lower() in ('nan', 'none'): continue
+
+        cat_raw = str(row.get(cat_col, '일반')).strip()
+        cat_val = cat_raw.replace('[', '').replace(']', '').strip()
+        if not cat_val or cat_val.lower() in ('nan', 'none'):
+            cat_val = '일반'
+
+        # 허브 품목은 카테고리가 '상품'인 것만 수집, 본사는 '상품', '제품', '부재료' 수집
+        if is_hub:
+            if cat_val != '상품':
+                rows.append({"item_code": code, "status": "excluded"})
+                continue
+        else:
+            if cat_val not in ('상품', '제품', '부재료', '반제품'):
+                rows.append({"item_code": code, "status": "excluded"})
+                continue
+
+        # 품목그룹1/2/3 중 하나라도 '단종'이면 제외
+        is_discontinued = False
+        for grp_col in [grp1_col, grp2_col, grp3_col]:
+            if grp_col:
+                grp_val = str(row.get(grp_col, '')).strip().replace('[', '').replace(']', '').strip()
+                if grp_val == '단종':
+                    is_discontinued = True
+                    break
+        if is_discontinued:
+            rows.append({"item_code": code, "status": "discontinued"})
+            continue
+
+        raw_price = str(row.get(price_col, 0)).replace(',', '').strip()
+        unit_price_val = pd.to_numeric(raw_price, errors='coerce')
+        unit_price = int(float(unit_price_val)) if pd.notna(unit_price_val) else 0
+
+        brand_val = ""
+        if grp1_col:
+            brand_val = str(row.get(grp1_col, '')).strip().replace('[', '').replace(']', '').strip()
+            if brand_val.lower() in ('nan', 'none'):
+                brand_val = ""
+
+        rows.append({"item_code": code, "item_name": item_name, "category": cat_val,
+                     "unit_price": unit_price, "brand": brand_val, "status": "ok"})
+        parsed += 1
+        if parsed % 500 == 0:
+            report_progress(f"품목 데이터 파싱 중... ({parsed}건)", done=parsed,
+                            total=len(df), stage="품목 데이터 파싱")
+
+    return pd.DataFrame(rows, columns=["item_code", "item_name", "category", "unit_price", "brand", "status"])
+
+def _cached_parse(dl_path, kind, version, sha, target_file, parse_fn):
+    """파일 sha256 기준 파싱 캐시 조회, 없으면 parse_fn() 결과를 캐시에 저장 → DataFrame 또는 None"""
+    parsed = parse_cache.lookup(dl_path, kind, version, sha)
+    if parsed is not None:
+        log(f"  🗂️ [파싱 캐시] {os.path.basename(target_file)} 내용 동일 - 캐시된 파싱 결과 사용 ({len(parsed)}행)")
+        return parsed
+    parsed = parse_fn()
+    if parsed is not None:
+        parse_cache.store(dl_path, kind, version, sha, parsed)
+    return parsed
+
+def _parse_cache_enabled():
+    return db_get("parse_cache_mode") != "off"
+
+@tracer.traced()
 def process_item_master_excel(dl_path, is_hub=False):
-    """품목 마스터 엑셀을 읽어 DB 동기화"""
-    db_set("rpa_message", "품목 마스터 엑셀 파싱 중...")
+    """품목 마스터 엑셀을 읽어 DB 동기화
+
+    💡 파일 sha256 이 마지막 동기화 성공 때와 같으면 업로드를 생략하고, 파싱은 캐시(.parse_cache)에서 읽는다.
+    system_config 의 parse_cache_mode 가 'off' 면 캐시 없이 항상 파싱/업로드.
+    업로드/정리가 모두 성공하면 True.
+    """
+    report_progress("품목 마스터 엑셀 파싱 중...")
     try:
         import glob
         files = glob.glob(os.path.join(dl_path, "*품목*.xlsx"))
         if not files:
             log(f"⚠️ 품목 마스터 파일이 없습니다: {dl_path}", level="warning")
-            return
+            return False
         target_file = max(files, key=os.path.getmtime)
         log(f"📄 최신 품목 엑셀 탐색 완료: {os.path.basename(target_file)}")
 
-        df_raw = pd.read_excel(target_file, header=None)
-        header_row_idx = -1
-        for i, row in df_raw.iterrows():
-            if any('품목코드' in str(v) for v in row.values if pd.notna(v)):
-                header_row_idx = i
-                break
-        
-        if header_row_idx == -1:
-            log("❌ 품목 마스터 헤더를 찾을 수 없습니다.")
-            return
-
-        df = pd.read_excel(target_file, header=header_row_idx)
-        df.columns = [str(c).strip() for c in df.columns]
-        
-        # 컬럼 유연 매칭
-        def find_col(keywords, default):
-            for col in df.columns:
-                c_clean = str(col).replace(' ', '').replace('\n', '')
-                if any(k.replace(' ', '') in c_clean for k in keywords):
-                    return col
-            return default
+        def parse():
+            df = read_excel_table(target_file)
+            if df is None:
+                log("❌ 품목 마스터 헤더를 찾을 수 없습니다.")
+                return None
+            return parse_item_master_frame(df, is_hub)
+
+        kind = f"item_master_{'hub' if is_hub else 'hq'}"
+        use_cache = _parse_cache_enabled()
+        parse_started = time.monotonic()
+        if use_cache:
+            sha = file_sha256(target_file)
+            if parse_cache.is_synced(dl_path, kind, ITEM_MASTER_PARSER_VERSION, sha):
+                log("⏭️ [파싱 캐시] 품목 마스터 파일이 마지막 동기화와 동일 - 업로드 생략")
+                return True
+            items = _cached_parse(dl_path, kind, ITEM_MASTER_PARSER_VERSION, sha, target_file, parse)
+        else:
+            items = parse()
+        if items is None:
+            return False
+        record_parse(kind, len(items), parse_started)
+        discontinued_codes = items.loc[items["status"] == "discontinued", "item_code"].tolist()  # 단종 품목 코드
+        excluded_codes = items.loc[items["status"] == "excluded", "item_code"].tolist()  # 카테고리 변경 등으로 제외된 품목 코드
+        items = items[items["status"] == "ok"]
 
-        code_col = find_col(['품목코드', 'ItemCode'], '품목코드')
-        name_col = find_col(['품목명', 'ItemName'], '품목명')
-        spec_col = find_col(['규격'], '규격')
-        cat_col = find_col(['구분', '카테고리'], '품목구분')
-        price_col = find_col(['입고단가', '단가', '원가'], '입고단가')
-        grp1_col = find_col(['품목그룹1', '품목그룹 1', '품목그룹(1)', 'Group1'], None)
-        grp2_col = find_col(['품목그룹2', '품목그룹 2', '품목그룹(2)', 'Group2'], None)
-        grp3_col = find_col(['품목그룹3', '품목그룹 3', '품목그룹(3)', 'Group3'], None)
-        log(f"  품목그룹 컬럼 매핑: G1={grp1_col}, G2={grp2_col}, G3={grp3_col}")
-        log(f"  엑셀 전체 컬럼: {list(df.columns)}")
-        
         # 💡 [요구사항] 기존 DB에 등록된 품목 마스터의 사용자 설정값(안전재고, 활성도, 과잉배수, 목표배수, 버퍼배수)을 조회하여 병합함으로써 덮어쓰기 유실을 완벽 방어
         old_configs = {}
         try:
             target_div = "허브" if is_hub else "본사"
-            import urllib.parse
-            read_url = f"{SUPABASE_URL}/rest/v1/item_master?select=item_code,safety_stock,activity_status,safety_months,buffer_multiplier,excess_threshold&division=eq.{urllib.parse.quote(target_div)}&limit=5000"
-            r_old = requests.get(read_url, headers=HEADERS, timeout=10)
+            read_path = f"item_master?select=item_code,safety_stock,activity_status,safety_months,buffer_multiplier,excess_threshold&division=eq.{urllib.parse.quote(target_div)}&limit=5000"
+            r_old = db.get(read_path)
             if r_old.status_code == 200:
                 for row_old in r_old.json():
                     c_code = row_old.get("item_code")
@@ -768,155 +1429,105 @@ def process_item_master_excel(dl_path, is_hub=False):
                         old_configs[c_code] = row_old
         except Exception as ex_load:
             log(f"⚠️ 기존 마스터 설정값 로드 실패: {ex_load}", level="warning")
-        
-        upload_data = []
-        discontinued_codes = []  # 단종 품목 코드 수집
-        excluded_codes = []      # 카테고리 변경 등으로 제외된 품목 코드 수집
-        footer_pat = re.compile(r'^\d{4}[-/]\d{1,2}[-/]\d{1,2}')
-        for _, row in df.iterrows():
-            code = str(row.get(code_col, '')).strip()
-            if not code or code.lower() in ('nan', 'none'): continue
-            # 날짜 형태 footer 행 제외
-            if footer_pat.match(code): continue
-            # 합계/소계 행 제외
-            if re.search(r'합계|총계|소계|Total', code, re.IGNORECASE): continue
-
-            item_name = str(row.get(name_col, '')).strip()
-            # item_name 이 NaN/빈값이면 의미없는 행
-            if not item_name or item_name.lower() in ('nan', 'none'): continue
-
-            cat_raw = str(row.get(cat_col, '일반')).strip()
-            cat_val = cat_raw.replace('[', '').replace(']', '').strip()
-            if not cat_val or cat_val.lower() in ('nan', 'none'):
-                cat_val = '일반'
-                
-            # 허브 품목은 카테고리가 '상품'인 것만 수집, 본사는 '상품', '제품', '부재료' 수집
-            if is_hub:
-                if cat_val != '상품':
-                    excluded_codes.append(code)
-                    continue
-            else:
-                if cat_val not in ('상품', '제품', '부재료', '반제품'):
-                    excluded_codes.append(code)
-                    continue
-                
-            # 품목그룹1/2/3 중 하나라도 '단종'이면 제외
-            is_discontinued = False
-            for grp_col in [grp1_col, grp2_col, grp3_col]:
-                if grp_col:
-                    grp_val = str(row.get(grp_col, '')).strip().replace('[', '').replace(']', '').strip()
-                    if grp_val == '단종':
-                        is_discontinued = True
-                        break
-            if is_discontinued:
-                discontinued_codes.append(code)
-                continue
-                
-            raw_price = str(row.get(price_col, 0)).replace(',', '').strip()
-            unit_price_val = pd.to_numeric(raw_price, errors='coerce')
-            unit_price = int(float(unit_price_val)) if pd.notna(unit_price_val) else 0
 
+        ok = True
+        upload_data = []
+        for code, item_name, cat_val, unit_price, brand_val in zip(
+                items["item_code"], items["item_name"], items["category"], items["unit_price"], items["brand"]):
             # 기존 사용자 설정 획득 (유실 방어)
             old_cfg = old_configs.get(code, {})
-            safety_stock = old_cfg.get("safety_stock", 0)
-            activity_status = old_cfg.get("activity_status", "정상소진")
-            safety_months = old_cfg.get("safety_months", 2.0)
-            buffer_multiplier = old_cfg.get("buffer_multiplier", 1)
-            excess_threshold = old_cfg.get("excess_threshold", 5)
-
-            brand_val = ""
-            if grp1_col:
-                brand_val = str(row.get(grp1_col, '')).strip().replace('[', '').replace(']', '').strip()
-                if brand_val.lower() in ('nan', 'none'):
-                    brand_val = ""
-
             upload_data.append({
                 "division": "허브" if is_hub else "본사",
                 "item_code": code,
                 "item_name": item_name,
                 "category": cat_val,
-                "unit_price": unit_price,
+                "unit_price": int(unit_price),
                 "brand": brand_val,
                 # 사용자 설정 데이터 철벽 보존 주입
-                "safety_stock": safety_stock,
-                "activity_status": activity_status,
-                "safety_months": safety_months,
-                "buffer_multiplier": buffer_multiplier,
-                "excess_threshold": excess_threshold
+                "safety_stock": old_cfg.get("safety_stock", 0),
+                "activity_status": old_cfg.get("activity_status", "정상소진"),
+                "safety_months": old_cfg.get("safety_months", 2.0),
+                "buffer_multiplier": old_cfg.get("buffer_multiplier", 1),
+                "excess_threshold": old_cfg.get("excess_threshold", 5)
             })
-            
-            if len(upload_data) % 500 == 0:
-                db_set("rpa_message", f"품목 데이터 파싱 중... ({len(upload_data)}건)")
-        
+
         if upload_data:
-            headers = {**HEADERS, "Prefer": "resolution=merge-duplicates,return=representation"}
             success_count = 0
             total_cnt = len(upload_data)
+            upload_started = time.monotonic()
             for i in range(0, total_cnt, 1000):
                 chunk = upload_data[i:i+1000]
-                db_set("rpa_message", f"품목 마스터 업로드 중... ({i}/{total_cnt}건)")
-                resp = requests.post(f"{SUPABASE_URL}/rest/v1/item_master?on_conflict=division,item_code", headers=headers, json=chunk)
+                report_progress(f"품목 마스터 업로드 중... ({i}/{total_cnt}건)", done=i, total=total_cnt,
+                                stage="품목 마스터 업로드")
+                resp = db.post("item_master?on_conflict=division,item_code", json=chunk,
+                               prefer="resolution=merge-duplicates,return=minimal")
                 if resp.status_code in (200, 201):
                     success_count += len(chunk)
                 else:
                     log(f"❌ 품목 업로드 오류: {resp.status_code} {resp.text[:200]}", level="error")
+            metrics.stage("upload", time.monotonic() - upload_started,
+                          channel=getattr(_progress_ctx, "channel", None), ok=success_count == total_cnt)
             log(f"✅ 품목 마스터 {success_count}건 동기화 완료")
+            ok = success_count == total_cnt
 
             # 무형상품 DB에서 제거
-            db_set("rpa_message", "무형상품 정리 중...")
-            del_resp = requests.delete(
-                f"{SUPABASE_URL}/rest/v1/item_master?category=eq.무형상품&division=eq.{'허브' if is_hub else '본사'}",
-                headers=HEADERS
-            )
+            report_progress("무형상품 정리 중...")
+            del_resp = db.delete(f"item_master?category=eq.무형상품&division=eq.{'허브' if is_hub else '본사'}")
             if del_resp.status_code in (200, 204):
                 log("🗑️ 무형상품 카테고리 DB에서 제거 완료")
             else:
+                ok = False
                 log(f"⚠️ 무형상품 삭제 실패: {del_resp.status_code}", level="warning")
 
             # 단종 품목 DB에서 제거
             if discontinued_codes:
-                db_set("rpa_message", f"단종 품목 {len(discontinued_codes)}건 정리 중...")
-                import urllib.parse
-                dc_del_count = 0
-                for dc_code in discontinued_codes:
-                    dc_resp = requests.delete(
-                        f"{SUPABASE_URL}/rest/v1/item_master?item_code=eq.{urllib.parse.quote(dc_code)}&division=eq.{'허브' if is_hub else '본사'}",
-                        headers=HEADERS
-                    )
-                    if dc_resp.status_code in (200, 204):
-                        dc_del_count += 1
+                report_progress(f"단종 품목 {len(discontinued_codes)}건 정리 중...")
+                dc_del_count = _delete_item_codes(discontinued_codes, is_hub)
                 log(f"🗑️ 단종 품목 {dc_del_count}/{len(discontinued_codes)}건 DB에서 제거 완료")
+                ok = ok and dc_del_count == len(discontinued_codes)
 
             # 허브 전용: '상품'이 아닌 카테고리를 가진 허브 품목 DB에서 제거
             if is_hub:
-                db_set("rpa_message", "허브 비상품 품목 정리 중...")
-                del_hub_resp = requests.delete(
-                    f"{SUPABASE_URL}/rest/v1/item_master?division=eq.허브&category=not.eq.상품",
-                    headers=HEADERS
-                )
+                report_progress("허브 비상품 품목 정리 중...")
+                del_hub_resp = db.delete("item_master?division=eq.허브&category=not.eq.상품")
                 if del_hub_resp.status_code in (200, 204):
                     log("🗑️ 허브 비상품 카테고리 DB에서 제거 완료")
                 else:
+                    ok = False
                     log(f"⚠️ 허브 비상품 카테고리 삭제 실패: {del_hub_resp.status_code}", level="warning")
 
             # 카테고리 변경 등으로 제외된 품목들 DB에서 일괄 제거
             if excluded_codes:
-                db_set("rpa_message", f"제외 품목 {len(excluded_codes)}건 정리 중...")
-                import urllib.parse
-                ex_del_count = 0
-                for ex_code in excluded_codes:
-                    ex_resp = requests.delete(
-                        f"{SUPABASE_URL}/rest/v1/item_master?item_code=eq.{urllib.parse.quote(ex_code)}&division=eq.{'허브' if is_hub else '본사'}",
-                        headers=HEADERS
-                    )
-                    if ex_resp.status_code in (200, 204):
-                        ex_del_count += 1
+                report_progress(f"제외 품목 {len(excluded_codes)}건 정리 중...")
+                ex_del_count = _delete_item_codes(excluded_codes, is_hub)
                 log(f"🗑️ 카테고리 변경 제외 품목 {ex_del_count}/{len(excluded_codes)}건 DB에서 제거 완료")
+                ok = ok and ex_del_count == len(excluded_codes)
+
+            # 업로드가 모두 성공했을 때만 동기화 완료로 기록 (다음에 같은 파일이면 업로드 생략)
+            if use_cache and success_count == total_cnt:
+                parse_cache.mark_synced(dl_path, kind, ITEM_MASTER_PARSER_VERSION, sha)
+        return ok
 
     except Exception as e:
         log(f"❌ 품목 마스터 처리 오류: {e}", level="error")
+        return False
+
+
+def _delete_item_codes(codes, is_hub, batch=100):
+    """item_master 에서 품목코드 목록을 in.(...) 필터로 묶어 일괄 삭제. 삭제 요청에 포함된 코드 수 반환"""
+    division = urllib.parse.quote('허브' if is_hub else '본사')
+    deleted = 0
+    for i in range(0, len(codes), batch):
+        part = codes[i:i+batch]
+        resp = db.delete(f"item_master?item_code=in.{_in_filter(part)}&division=eq.{division}")
+        if resp.status_code in (200, 204):
+            deleted += len(part)
+    return deleted
+
 
+MOVEMENT_PARSER_VERSION = 1   # movement_frame 정제 규칙을 바꾸면 올려서 파싱 캐시 무효화
 
+@tracer.traced()
 def process_inventory_movement_excel(dl_path, is_hub=False):
     """재고변동표 엑셀을 파싱하여 품목별 월평균 사용량 계산 후 item_master 업데이트 및 월별 이력 적재
     
@@ -925,10 +1536,10 @@ def process_inventory_movement_excel(dl_path, is_hub=False):
     - 품목별 월별 행 (YYYY/MM)
     - '전일재고', 'XXX 계' 행 제외
     - 최근 3개월 출고수량 합산 ÷ 3 = 월평균
+    월별 이력과 월평균 업데이트가 모두 성공하면 True.
     """
-    db_set("rpa_message", "재고변동표 파싱 중...")
-    import glob, re as _re, calendar
-    from collections import defaultdict
+    report_progress("재고변동표 파싱 중...")
+    import glob, calendar
     from dateutil.relativedelta import relativedelta
     
     def get_month_end_date(date_str):
@@ -943,47 +1554,10 @@ def process_inventory_movement_excel(dl_path, is_hub=False):
         files = glob.glob(os.path.join(dl_path, "*재고변동*.xlsx"))
         if not files:
             log("⚠️ 재고변동표 파일이 없습니다.", level="warning")
-            return
+            return False
         target_file = max(files, key=os.path.getmtime)
         log(f"📄 재고변동표 파일: {os.path.basename(target_file)}")
 
-        # 헤더 탐색 (2행 기준)
-        df_raw = pd.read_excel(target_file, header=None)
-        header_row_idx = -1
-        for i, row in df_raw.iterrows():
-            vals = [str(v).strip() for v in row.values if pd.notna(v)]
-            if any('품목코드' in v for v in vals):
-                header_row_idx = i
-                break
-        if header_row_idx == -1:
-            log("❌ 재고변동표 헤더를 찾을 수 없습니다.")
-            return
-
-        df = pd.read_excel(target_file, header=header_row_idx)
-        df.columns = [str(c).strip() for c in df.columns]
-
-        # 컬럼 탐색
-        def find_col(keywords):
-            cols_clean = {col: str(col).replace(' ', '').replace('\n', '') for col in df.columns}
-            for kw in keywords:
-                k = kw.replace(' ', '')
-                for col, c in cols_clean.items():
-                    if k in c: return col
-            return None
-
-        code_col = find_col(['품목코드', 'ItemCode'])
-        name_col = find_col(['품목명', 'ItemName'])
-        date_col = find_col(['일자', 'Date'])
-        in_col = find_col(['입고수량', '입고'])
-        out_col = find_col(['출고수량', '출고'])
-        bal_col = find_col(['잔량', '기말잔량', '잔고', '기말재고'])
-
-        if not code_col or not date_col or not out_col:
-            log(f"❌ 필수 컬럼 없음: code={code_col}, date={date_col}, out={out_col}")
-            return
-
-        log(f"  컬럼 매핑: 품목코드={code_col}, 품목명={name_col}, 일자={date_col}, 입고={in_col}, 출고={out_col}, 잔량={bal_col}")
-
         # 기준 산정
         now = datetime.now(KST)
         
@@ -994,95 +1568,88 @@ def process_inventory_movement_excel(dl_path, is_hub=False):
         months_3 = set((now - relativedelta(months=m)).strftime("%Y/%m") for m in range(0, 4))
         months_6 = set((now - relativedelta(months=m)).strftime("%Y/%m") for m in range(0, 7))
 
-        log(f"  월평균 및 표준편차 기준(12개월): {months_history[0]} ~ {months_history[-1]}")
-        log(f"  정상소진(분기) 기준: {sorted(months_3)}")
+        def parse():
+            # 헤더 탐색 (2행 기준) + 본문 파싱을 한 번에
+            df = read_excel_table(target_file)
+            if df is None:
+                log("❌ 재고변동표 헤더를 찾을 수 없습니다.")
+                return None
 
-        # 품목별 집계 및 최근 활동 월 추적
-        item_outgoing_monthly = defaultdict(lambda: defaultdict(int))
-        item_latest_activity = {}  # 품목코드 -> 가장 최근 활동(입고/출고) 월
-        monthly_history_entries = [] # inventory_history에 업로드할 월별 데이터 리스트
-        date_pattern = _re.compile(r'^\d{4}/\d{2}$')
+            # 컬럼 탐색
+            def find_col(keywords):
+                cols_clean = {col: str(col).replace(' ', '').replace('\n', '') for col in df.columns}
+                for kw in keywords:
+                    k = kw.replace(' ', '')
+                    for col, c in cols_clean.items():
+                        if k in c: return col
+                return None
 
-        for _, row in df.iterrows():
-            code = str(row.get(code_col, '')).strip()
-            if not code or not _re.match(r'^[A-Za-z0-9_.-]+$', code): # 대시나 언더바 등 포함할 수도 있으므로 러프하게 변경
-                continue
+            code_col = find_col(['품목코드', 'ItemCode'])
+            name_col = find_col(['품목명', 'ItemName'])
+            date_col = find_col(['일자', 'Date'])
+            in_col = find_col(['입고수량', '입고'])
+            out_col = find_col(['출고수량', '출고'])
+            bal_col = find_col(['잔량', '기말잔량', '잔고', '기말재고'])
 
-            date_val = str(row.get(date_col, '')).strip()
-            if not date_pattern.match(date_val):
-                continue
+            if not code_col or not date_col or not out_col:
+                log(f"❌ 필수 컬럼 없음: code={code_col}, date={date_col}, out={out_col}")
+                return None
 
-            raw_name_val = str(row.get(name_col, '')).strip() if name_col and pd.notna(row.get(name_col)) else ""
-            # 💡 [요구사항] 본사 변동표 재고 품목명 대괄호([]) 및 내부 텍스트 제거 정제
-            name_val = re.sub(r'\[.*?\]', '', raw_name_val).strip() if raw_name_val else ""
-            in_qty = pd.to_numeric(row.get(in_col, 0), errors='coerce') if in_col else 0
-            out_qty = pd.to_numeric(row.get(out_col, 0), errors='coerce')
-            bal_qty = pd.to_numeric(row.get(bal_col, 0), errors='coerce') if bal_col else 0
-            
-            in_qty = in_qty if pd.notna(in_qty) else 0
-            out_qty = out_qty if pd.notna(out_qty) else 0
-            bal_qty = bal_qty if pd.notna(bal_qty) else 0
-            
-            has_activity = (in_qty > 0) or (out_qty > 0)
-
-            # 활동 월 기록
-            if has_activity:
-                if code not in item_latest_activity or date_val > item_latest_activity[code]:
-                    item_latest_activity[code] = date_val
-
-            # 12개월 사용량을 위한 출고 집계 및 월별 이력 수집
-            if date_val in months_history:
-                if out_qty > 0:
-                    item_outgoing_monthly[code][date_val] += int(out_qty)
-                    
-                end_date = get_month_end_date(date_val)
-                if end_date:
-                    diff_val = in_qty - out_qty
-                    monthly_history_entries.append({
-                        "warehouse_name": f"{'허브' if is_hub else '본사'}_월별",
-                        "record_date": end_date,
-                        "item_code": code,
-                        "item_name_spec": name_val,
-                        "curr_qty": float(bal_qty),
-                        "diff_qty": float(diff_val)
-                    })
+            log(f"  컬럼 매핑: 품목코드={code_col}, 품목명={name_col}, 일자={date_col}, 입고={in_col}, 출고={out_col}, 잔량={bal_col}")
+            # 변동표 행 정제 (한 번에)
+            return movement_frame(df, {'code': code_col, 'name': name_col, 'date': date_col,
+                                       'in': in_col, 'out': out_col, 'bal': bal_col})
+
+        # 💡 결과는 파일 내용 외에 기준 월(12개월 구간)과 품목 마스터 구성에도 의존하므로 둘 다 동기화 조건에 포함
+        kind = f"movement_{'hub' if is_hub else 'hq'}"
+        use_cache = _parse_cache_enabled()
+        parse_started = time.monotonic()
+        if use_cache:
+            sha = file_sha256(target_file)
+            item_sync = parse_cache.synced(dl_path, f"item_master_{'hub' if is_hub else 'hq'}") or {}
+            context = f"{months_history[0]}|{item_sync.get('sha256', '')}"
+            if parse_cache.is_synced(dl_path, kind, MOVEMENT_PARSER_VERSION, sha, context):
+                log("⏭️ [파싱 캐시] 재고변동표 파일/기준 월/품목 마스터가 마지막 동기화와 동일 - 업로드 생략")
+                return True
+            mv = _cached_parse(dl_path, kind, MOVEMENT_PARSER_VERSION, sha, target_file, parse)
+        else:
+            mv = parse()
+        if mv is None:
+            return False
+        record_parse(kind, len(mv), parse_started)
 
-        log(f"  총 활동 품목(최근 1년): {len(item_latest_activity)}건 / 12개월 출고 집계 품목: {len(item_outgoing_monthly)}건")
+        log(f"  월평균 및 표준편차 기준(12개월): {months_history[0]} ~ {months_history[-1]}")
+        log(f"  정상소진(분기) 기준: {sorted(months_3)}")
+
+        # 최근 활동 월 / 월별 이력
+        item_latest_activity = latest_activity(mv)
+        hist = mv[mv["month"].isin(months_history)]
+        month_end = {m: get_month_end_date(m) for m in hist["month"].unique()}
+        target_division = f"{'허브' if is_hub else '본사'}_월별"
+        monthly_history_entries = [  # inventory_history에 업로드할 월별 데이터 리스트
+            {"warehouse_name": target_division, "record_date": month_end[m], "item_code": c,
+             "item_name_spec": n, "curr_qty": float(bal), "diff_qty": float(i - o)}
+            for c, m, n, i, o, bal in zip(hist["code"], hist["month"], hist["name"],
+                                          hist["in_qty"], hist["out_qty"], hist["bal_qty"])
+            if month_end[m]
+        ]
+        outgoing_codes = hist.loc[hist["out_qty"] > 0, "code"].nunique()
+
+        log(f"  총 활동 품목(최근 1년): {len(item_latest_activity)}건 / 12개월 출고 집계 품목: {outgoing_codes}건")
         
         # 월별 이력 DB 적재
-        target_division = f"{'허브' if is_hub else '본사'}_월별"
         if monthly_history_entries:
-            log(f"📊 [월별 이력] 기존 {target_division} 데이터 삭제 중...")
-            del_resp = requests.delete(
-                f"{SUPABASE_URL}/rest/v1/inventory_history?warehouse_name=eq.{target_division}",
-                headers=HEADERS
-            )
-            if del_resp.status_code not in (200, 204):
-                log(f"  ⚠️ 기존 월별 데이터 삭제 실패: {del_resp.status_code} {del_resp.text}")
-                
-            log(f"📊 [월별 이력] 신규 {len(monthly_history_entries)}건 업로드 중...")
-            success_upload = 0
-            for i in range(0, len(monthly_history_entries), 500):
-                chunk = monthly_history_entries[i:i+500]
-                post_resp = requests.post(
-                    f"{SUPABASE_URL}/rest/v1/inventory_history",
-                    headers=HEADERS,
-                    json=chunk
-                )
-                if post_resp.status_code in (200, 201):
-                    success_upload += len(chunk)
-                else:
-                    log(f"  ⚠️ 월별 데이터 업로드 오류: {post_resp.status_code} {post_resp.text[:200]}")
-            log(f"✅ [월별 이력] {success_upload}건 DB 적재 완료 ({target_division})")
+            window = [get_month_end_date(m) for m in months_history]
+            with timed_stage("upload"):
+                history_ok = sync_monthly_history(monthly_history_entries, target_division, window)
+        else:
+            history_ok = True
 
         # DB에서 기존 item 읽기 (전체 품목을 대상으로 상태 업데이트)
-        db_set("rpa_message", "품목 상태 및 안전재고 계산 중...")
+        report_progress("품목 상태 및 안전재고 계산 중...")
         all_db_items = []
         try:
-            r = requests.get(
-                f"{SUPABASE_URL}/rest/v1/item_master?select=item_code,safety_months,buffer_multiplier,excess_threshold&division=eq.{'허브' if is_hub else '본사'}",
-                headers=HEADERS, timeout=10
-            )
+            r = db.get(f"item_master?select=item_code,safety_months,buffer_multiplier,excess_threshold&division=eq.{'허브' if is_hub else '본사'}")
             if r.status_code == 200:
                 all_db_items = r.json()
         except Exception as e:
@@ -1090,61 +1657,33 @@ def process_inventory_movement_excel(dl_path, is_hub=False):
 
         if not all_db_items:
             log("⚠️ DB에 등록된 품목이 없어 재고변동표 분석을 건너뜁니다.")
-            return
+            return history_ok
 
-        # 월평균 계산 + 안전재고 + 활성도 상태 자동산출
-        update_data = []
-        import math
-        for item in all_db_items:
-            code = item['item_code']
-            
-            # 월평균, 표준편차 계산 (최근 12개월 출고 기준)
-            monthly_data = [item_outgoing_monthly[code].get(m, 0) for m in months_history]
-            mean_usage = sum(monthly_data) / 12.0
-            variance = sum((x - mean_usage) ** 2 for x in monthly_data) / 12.0
-            std_usage = math.sqrt(variance)
-            
+        # 월평균 계산 + 안전재고 + 활성도 상태 자동산출 (품목 × 12개월 출고 행렬 한 번에)
+        codes = [item['item_code'] for item in all_db_items]
+        stats = demand_stats(
+            outgoing_matrix(mv, codes, months_history),
             # DB에서 배수 설정 불러오기 (UI에서 설정한 값)
-            safety_m = float(item.get('safety_months') if item.get('safety_months') is not None else 2.0)
-            buffer_mult = float(item.get('buffer_multiplier') if item.get('buffer_multiplier') is not None else 1.0)
-            
-            # 보정된 월 기준량 = 평균 + (표준편차 * 버퍼배수)
-            smoothed_usage = int(mean_usage + (std_usage * buffer_mult))
-            safety_stock = int(smoothed_usage * safety_m)
-            
-            excess_val = item.get('excess_threshold')
-            if excess_val is None or float(excess_val) <= 0:
-                excess_threshold = safety_stock * 4 if safety_stock > 0 else 500
-            else:
-                excess_threshold = int(float(excess_val))
-
-            # 활성도 상태 (activity_status) 판단
-            latest_month = item_latest_activity.get(code)
-            if latest_month and latest_month in months_3:
-                activity_status = "정상소진"
-            elif latest_month and latest_month in months_6:
-                activity_status = "소진요청"
-            else:
-                # 6개월 초과 또는 1년간 활동 없음
-                activity_status = "폐기요청"
+            safety_months=[item.get('safety_months') for item in all_db_items],
+            buffer_multiplier=[item.get('buffer_multiplier') for item in all_db_items],
+            excess_threshold=[item.get('excess_threshold') for item in all_db_items],
+        )
+        activity = activity_class(codes, item_latest_activity, months_3, months_6)
+        counts = dict(zip(*np.unique(activity, return_counts=True)))
+        log("  활성도: " + ", ".join(f"{k} {counts.get(k, 0)}건" for k in ("정상소진", "소진요청", "폐기요청")))
 
-            # 💡 [요구사항] 안전재고, 활성도 등 사용자 고유 설정값을 덮어쓰지 않도록 딕셔너리에서 필드 제외 (월평균 사용량만 업데이트)
-            update_data.append({
-                "division": "허브" if is_hub else "본사",
-                "item_code": code,
-                "monthly_avg_usage": int(mean_usage)
-            })
+        # 💡 [요구사항] 안전재고, 활성도 등 사용자 고유 설정값을 덮어쓰지 않도록 딕셔너리에서 필드 제외 (월평균 사용량만 업데이트)
+        division = "허브" if is_hub else "본사"
+        update_data = [{"division": division, "item_code": code, "monthly_avg_usage": int(avg)}
+                       for code, avg in zip(codes, stats["mean"])]
 
         # DB 업데이트 (upsert)
-        db_set("rpa_message", f"품목 상태 및 월평균 DB 업데이트 중... ({len(update_data)}건)")
-        headers = {**HEADERS, "Prefer": "resolution=merge-duplicates,return=representation"}
+        report_progress(f"품목 상태 및 월평균 DB 업데이트 중... ({len(update_data)}건)")
         success_count = 0
         for i in range(0, len(update_data), 500):
             chunk = update_data[i:i+500]
-            resp = requests.post(
-                f"{SUPABASE_URL}/rest/v1/item_master?on_conflict=division,item_code",
-                headers=headers, json=chunk
-            )
+            resp = db.post("item_master?on_conflict=division,item_code", json=chunk,
+                           prefer="resolution=merge-duplicates,return=minimal")
             if resp.status_code in (200, 201):
                 success_count += len(chunk)
             else:
@@ -1152,8 +1691,62 @@ def process_inventory_movement_excel(dl_path, is_hub=False):
 
         log(f"✅ 품목 마스터 자동 분석 {success_count}건 업데이트 완료 (활성도, 3개월 기준)")
 
+        # 월별 이력 + 월평균 업로드가 모두 성공했을 때만 동기화 완료로 기록
+        synced = history_ok and success_count == len(update_data)
+        if use_cache and synced:
+            parse_cache.mark_synced(dl_path, kind, MOVEMENT_PARSER_VERSION, sha, context)
+        return synced
+
     except Exception as e:
         log(f"❌ 재고변동표 처리 오류: {e}", level="error")
+        return False
+
+# --- 트리거 대기 설정 ---
+HEARTBEAT_INTERVAL = 30        # 대시보드 무응답 판정(300초)보다 충분히 짧게
+FALLBACK_POLL_INTERVAL = 15    # 푸시 채널이 없거나 끊겼을 때의 저속 폴링 주기
+RECONNECT_INTERVAL = 60        # 끊긴 푸시 채널 재연결 시도 주기
+
+def _is_task_trigger(value):
+    return value not in (None, "idle", "NULL", "ERROR", "")
+
+def _parse_scheduled_times(value):
+    """'09:00, 13:30' → ['09:00', '13:30']. 읽기 실패 시 None (다음 하트비트에 재시도)"""
+    if value == "ERROR":
+        return None
+    if value in (None, "NULL", ""):
+        return []
+    return [t.strip() for t in str(value).split(",") if t.strip()]
+
+def _accept_trigger(task):
+    """기존 rpa_trigger 요청 처리: 작업 큐가 있으면 큐에 등록하고 None, 없으면 바로 실행할 task 반환"""
+    if jobs.enqueue(task, source="trigger") is None:
+        return task
+    log(f"📥 [작업 큐] rpa_trigger 요청을 큐에 등록했습니다. (작업: {task})")
+    db_set("rpa_trigger", "idle")
+    return None
+
+def _run_job(job):
+    """큐에서 꺼낸 작업 실행 + 결과/소요시간 기록"""
+    log(f"🚀 [작업 큐] job #{job['id']} '{job['task']}' 실행 (우선순위 {job['priority']}, 요청: {job['source']})")
+    ok, message = False, ""
+    try:
+        ok, message = execute_rpa(task=job["task"])
+    except Exception as e:
+        message = str(e)
+        raise
+    finally:
+        jobs.complete(job["id"], ok, message)
+
+def _connect_channel(channel):
+    if channel is None:
+        return False
+    try:
+        channel.connect()
+        log(f"📡 트리거 채널 연결됨 ({channel.name})")
+        return True
+    except TriggerChannelError as e:
+        log(f"⚠️ 트리거 채널 연결 실패 - 저속 폴링({FALLBACK_POLL_INTERVAL}초)으로 동작: {e}", level="warning")
+        return False
 
 def main():
     print("=" * 60)
@@ -1162,33 +1755,111 @@ def main():
     print("=" * 60)
     
     log("Supabase 연결 확인 성공")
-    
-    last_run_id = "" 
+
+    if METRICS_PORT:
+        try:
+            serve_metrics(metrics.registry, METRICS_PORT)
+            log(f"📈 메트릭 엔드포인트: http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            log(f"⚠️ 메트릭 엔드포인트 시작 실패 (포트 {METRICS_PORT}): {e}", level="warning")
+
+    # 💡 2초 폴링 대신 LISTEN/NOTIFY 로 블로킹 대기. 채널이 끊기면 저속 폴링으로 폴백
+    push_channel = PgNotifyChannel(SUPABASE_DB_URL) if SUPABASE_DB_URL else None
+    fallback_channel = PollingTriggerChannel(db_get, interval=FALLBACK_POLL_INTERVAL)
+    push_ok = _connect_channel(push_channel)
+    if push_channel is not None and not push_channel.supported:
+        push_channel = None   # psycopg2 가 없으면 재연결을 시도하지 않고 폴링만 사용
+    next_reconnect = time.monotonic() + RECONNECT_INTERVAL
+
+    # 에이전트가 꺼져 있던 동안 들어온 요청/스케줄 반영
+    trigger = db_get("rpa_trigger")
+    scheduled_times_str = db_get("rpa_scheduled_times")
+    fallback_channel.prime("rpa_trigger", trigger)
+    fallback_channel.prime("rpa_scheduled_times", scheduled_times_str)
+    scheduled_times = _parse_scheduled_times(scheduled_times_str)
+    pending_task = None
+    stale = jobs.recover_stale()
+    if stale:
+        log(f"🧹 [작업 큐] 이전 에이전트가 실행 중이던 작업 {stale}건을 실패 처리했습니다.")
+    if _is_task_trigger(trigger):
+        pending_task = _accept_trigger(trigger)
+
+    last_run_id = ""
+    last_heartbeat = 0.0
 
     while True:
         try:
-            db_set("agent_heartbeat", datetime.now(KST).isoformat())
-            
-            trigger = db_get("rpa_trigger")
-            if trigger not in ("idle", "NULL", "ERROR", ""):
-                log(f"🚀 [트리거] 대시보드에서 수집 요청이 들어왔습니다. (작업: {trigger})")
-                execute_rpa(task=trigger)
+            if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                db_set("agent_heartbeat", datetime.now(KST).isoformat())
+                metrics.beat()
+                last_heartbeat = time.monotonic()
+                if scheduled_times is None:
+                    scheduled_times = _parse_scheduled_times(db_get("rpa_scheduled_times"))
+
+            if pending_task:
+                # 작업 큐가 없을 때의 기존 rpa_trigger 방식
+                task, pending_task = pending_task, None
+                log(f"🚀 [트리거] 대시보드에서 수집 요청이 들어왔습니다. (작업: {task})")
+                execute_rpa(task=task)
+                last_heartbeat = 0.0
+                continue
+
+            job = jobs.claim()
+            if job:
+                _run_job(job)
+                last_heartbeat = 0.0
+                continue
             
             now = datetime.now(KST)
             current_minute = now.strftime("%H:%M")
             
-            scheduled_times_str = db_get("rpa_scheduled_times")
-            if scheduled_times_str not in ("NULL", "ERROR"):
-                scheduled_times = [t.strip() for t in scheduled_times_str.split(",")]
-                
-                if current_minute in scheduled_times:
-                    run_id = f"{now.strftime('%Y-%m-%d')} {current_minute}"
-                    if last_run_id != run_id:
-                        log(f"⏰ [스케줄] 지정된 시각({current_minute})이 되어 자동 수집을 시작합니다.")
+            if scheduled_times and current_minute in scheduled_times:
+                run_id = f"{now.strftime('%Y-%m-%d')} {current_minute}"
+                if last_run_id != run_id:
+                    log(f"⏰ [스케줄] 지정된 시각({current_minute})이 되어 자동 수집을 시작합니다.")
+                    last_run_id = run_id
+                    # 큐가 있으면 낮은 우선순위로 등록 → 대기 중인 수동 요청이 먼저 실행됨
+                    if jobs.enqueue("all", source="schedule") is None:
                         execute_rpa(task="all")
-                        last_run_id = run_id
-            
-            time.sleep(2) 
+                        last_heartbeat = 0.0
+                    continue
+
+            # 다음 분 경계(스케줄 확인) 또는 다음 하트비트 중 빠른 시점까지 블로킹 대기
+            until_minute = 60 - now.second - now.microsecond / 1_000_000 + 0.05
+            until_heartbeat = HEARTBEAT_INTERVAL - (time.monotonic() - last_heartbeat)
+            timeout = max(0.0, min(until_minute, until_heartbeat))
+            if not push_ok:
+                # 푸시 알림이 없으면 작업 큐도 폴링 주기마다 확인
+                timeout = min(timeout, FALLBACK_POLL_INTERVAL)
+
+            events = []
+            if push_ok:
+                try:
+                    events = push_channel.wait(timeout)
+                except TriggerChannelError as e:
+                    log(f"⚠️ 트리거 채널 끊김 - 저속 폴링으로 전환: {e}", level="warning")
+                    metrics.failures.inc(kind="trigger_channel")
+                    push_ok = False
+                    next_reconnect = time.monotonic() + RECONNECT_INTERVAL
+                    fallback_channel.connect()
+            else:
+                if push_channel is not None and time.monotonic() >= next_reconnect:
+                    metrics.retries.inc(kind="trigger_channel")
+                    push_ok = _connect_channel(push_channel)
+                    next_reconnect = time.monotonic() + RECONNECT_INTERVAL
+                    if push_ok:
+                        # 재연결 직전까지 놓친 변경분을 한 번 읽어 보정
+                        fallback_channel.connect()
+                        events = fallback_channel.wait(0)
+                if not push_ok:
+                    events = fallback_channel.wait(timeout)
+
+            for ev in events:
+                if ev.key == "rpa_trigger" and _is_task_trigger(ev.value):
+                    pending_task = _accept_trigger(ev.value)
+                elif ev.key == "rpa_scheduled_times":
+                    scheduled_times = _parse_scheduled_times(ev.value)
+                    log(f"🗓️ 스케줄 갱신: {scheduled_times}")
         except KeyboardInterrupt:
             break
         except Exception as e:
@@ -0,0 +1,69 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- warehouse_inventory_details 델타 동기화
+-- 에이전트가 (창고, 품목, 유효기간) 키 기준 변경분만 계산해 apply_inventory_delta 를 한 번 호출하면
+-- 추가/변경/삭제가 하나의 트랜잭션으로 반영됩니다. (동기화 중 테이블이 비어 보이는 구간 제거)
+-- 함수가 없으면 에이전트는 기존 방식(삭제 후 재삽입)으로 자동 폴백합니다.
+-- 강제로 기존 방식을 쓰려면: system_config 에 inventory_sync_mode = 'replace'
+
+-- 1. 키 중복 정리 (유니크 인덱스 생성 전 1회)
+--    에이전트의 merge_duplicate_keys 와 같이 같은 키의 수량/재고비용을 한 행에 합산하고 나머지 행은 삭제
+--    (한 문장 안에서 처리해야 UPDATE 로 바뀌는 ctid 와 섞이지 않음)
+WITH dup AS (
+    SELECT warehouse_name, item_code, expiration_date, max(ctid) AS keep_ctid,
+           sum(coalesce(stock_qty, 0)) AS stock_qty, sum(coalesce(inventory_cost, 0)) AS inventory_cost
+    FROM public.warehouse_inventory_details
+    GROUP BY warehouse_name, item_code, expiration_date
+    HAVING count(*) > 1
+), removed AS (
+    DELETE FROM public.warehouse_inventory_details d
+    USING dup
+    WHERE d.warehouse_name = dup.warehouse_name
+      AND d.item_code = dup.item_code
+      AND d.expiration_date IS NOT DISTINCT FROM dup.expiration_date
+      AND d.ctid <> dup.keep_ctid
+)
+UPDATE public.warehouse_inventory_details d
+SET stock_qty = dup.stock_qty, inventory_cost = dup.inventory_cost
+FROM dup
+WHERE d.ctid = dup.keep_ctid;
+
+-- 2. 동기화 키 유니크 인덱스 (유효기간 NULL 도 하나의 키로 취급, PostgreSQL 15+)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_warehouse_inventory_details_key
+    ON public.warehouse_inventory_details (warehouse_name, item_code, expiration_date) NULLS NOT DISTINCT;
+
+-- 3. 변경분 원자 적용 함수
+--    p_upserts: 추가/변경 행 배열, p_deletes: [{warehouse_name, item_code, expiration_date}] 배열
+CREATE OR REPLACE FUNCTION public.apply_inventory_delta(
+    p_upserts jsonb DEFAULT '[]'::jsonb,
+    p_deletes jsonb DEFAULT '[]'::jsonb
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_deleted int := 0;
+    v_upserted int := 0;
+BEGIN
+    DELETE FROM public.warehouse_inventory_details d
+    USING jsonb_to_recordset(p_deletes) AS x(warehouse_name text, item_code text, expiration_date text)
+    WHERE d.warehouse_name = x.warehouse_name
+      AND d.item_code = x.item_code
+      AND d.expiration_date::text IS NOT DISTINCT FROM x.expiration_date;
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    INSERT INTO public.warehouse_inventory_details
+        (warehouse_name, item_code, item_name_spec, category, expiration_date, stock_qty, unit_price, inventory_cost)
+    SELECT r.warehouse_name, r.item_code, r.item_name_spec, r.category, r.expiration_date,
+           r.stock_qty, r.unit_price, r.inventory_cost
+    FROM jsonb_populate_recordset(NULL::public.warehouse_inventory_details, p_upserts) AS r
+    ON CONFLICT (warehouse_name, item_code, expiration_date) DO UPDATE SET
+        item_name_spec = EXCLUDED.item_name_spec,
+        category       = EXCLUDED.category,
+        stock_qty      = EXCLUDED.stock_qty,
+        unit_price     = EXCLUDED.unit_price,
+        inventory_cost = EXCLUDED.inventory_cost;
+    GET DIAGNOSTICS v_upserted = ROW_COUNT;
+
+    RETURN jsonb_build_object('upserted', v_upserted, 'deleted', v_deleted);
+END;
+$$;
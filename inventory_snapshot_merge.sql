@@ -0,0 +1,106 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- 창고별재고현황 스냅샷 서버 측 일괄 병합
+-- 에이전트가 창고 묶음 하나의 전체 스냅샷(JSON 배열)을 merge_inventory_snapshot 에 한 번 넘기면
+--   1) 품목별 이전/현재 수량 비교 → inventory_history 변동 이력 기록
+--      (기존 클라이언트 방식과 같이 이번 스냅샷에 있는 품목만 기록. 사라진 품목은 이력 없이 2) 에서 삭제)
+--   2) warehouse_inventory_details 병합 (추가 / 변경 / 사라진 행 삭제)
+-- 이 하나의 트랜잭션으로 처리되고 건수를 돌려줍니다.
+-- (기존: 전체 스냅샷 GET + 업로드 청크 + 이력 청크 POST 를 클라이언트에서 각각 요청)
+-- 동시에 두 동기화가 겹쳐도 advisory lock 으로 순서대로 실행되어 변동 이력이 항상 직전 커밋 기준입니다.
+-- 선행: inventory_delta_sync.sql (uq_warehouse_inventory_details_key 유니크 인덱스)
+-- 함수가 없으면 에이전트는 기존 방식(apply_inventory_delta / 삭제 후 재삽입)으로 자동 폴백합니다.
+-- 강제로 기존 방식을 쓰려면: system_config 에 inventory_sync_mode = 'delta' (클라이언트 델타) 또는 'replace'
+
+CREATE OR REPLACE FUNCTION public.merge_inventory_snapshot(
+    p_rows jsonb,                              -- [{warehouse_name, item_code, item_name_spec, category, expiration_date, stock_qty, unit_price, inventory_cost}]
+    p_warehouses text[] DEFAULT '{}',          -- 동기화 범위: 창고명 목록
+    p_patterns text[] DEFAULT '{}',            -- 동기화 범위: 창고명 LIKE 패턴 (허브: '%HUB%', '%용인%')
+    p_record_date date DEFAULT (now() AT TIME ZONE 'Asia/Seoul')::date,
+    p_history boolean DEFAULT true
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_history int := 0;
+    v_deleted int := 0;
+    v_inserted int := 0;
+    v_updated int := 0;
+    v_total int := jsonb_array_length(p_rows);
+BEGIN
+    -- 같은 테이블을 병합하는 동기화끼리 직렬화 (트랜잭션 종료 시 자동 해제)
+    PERFORM pg_advisory_xact_lock(hashtext('merge_inventory_snapshot'));
+
+    CREATE TEMP TABLE _snapshot ON COMMIT DROP AS
+    SELECT r.warehouse_name, r.item_code, r.item_name_spec, r.category, r.expiration_date,
+           r.stock_qty, r.unit_price, r.inventory_cost
+    FROM jsonb_populate_recordset(NULL::public.warehouse_inventory_details, p_rows) AS r;
+
+    -- 1. 변동 이력: (창고, 품목) 합계 수량 기준, 스냅샷에 있는 품목만 (처음 보는 품목은 이전 0)
+    IF p_history THEN
+        INSERT INTO public.inventory_history
+            (record_date, warehouse_name, item_code, item_name_spec, prev_qty, curr_qty, diff_qty)
+        SELECT p_record_date, n.warehouse_name, n.item_code, n.item_name_spec,
+               COALESCE(o.qty, 0),
+               COALESCE(n.qty, 0),
+               COALESCE(n.qty, 0) - COALESCE(o.qty, 0)
+        FROM (
+            SELECT warehouse_name, item_code, max(item_name_spec) AS item_name_spec, sum(stock_qty) AS qty
+            FROM _snapshot
+            GROUP BY warehouse_name, item_code
+        ) n
+        LEFT JOIN (
+            SELECT warehouse_name, item_code, sum(stock_qty) AS qty
+            FROM public.warehouse_inventory_details
+            WHERE warehouse_name = ANY (p_warehouses) OR warehouse_name LIKE ANY (p_patterns)
+            GROUP BY warehouse_name, item_code
+        ) o ON o.warehouse_name = n.warehouse_name AND o.item_code = n.item_code
+        WHERE COALESCE(n.qty, 0) IS DISTINCT FROM COALESCE(o.qty, 0);
+        GET DIAGNOSTICS v_history = ROW_COUNT;
+    END IF;
+
+    -- 2. 범위 안에서 스냅샷에 없는 행 삭제
+    DELETE FROM public.warehouse_inventory_details d
+    WHERE (d.warehouse_name = ANY (p_warehouses) OR d.warehouse_name LIKE ANY (p_patterns))
+      AND NOT EXISTS (
+          SELECT 1 FROM _snapshot s
+          WHERE s.warehouse_name = d.warehouse_name
+            AND s.item_code = d.item_code
+            AND s.expiration_date IS NOT DISTINCT FROM d.expiration_date
+      );
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    -- 3. 추가 / 값이 바뀐 행만 갱신 (같은 값이면 행을 다시 쓰지 않음)
+    WITH upserted AS (
+        INSERT INTO public.warehouse_inventory_details
+            (warehouse_name, item_code, item_name_spec, category, expiration_date, stock_qty, unit_price, inventory_cost)
+        SELECT warehouse_name, item_code, item_name_spec, category, expiration_date,
+               stock_qty, unit_price, inventory_cost
+        FROM _snapshot
+        ON CONFLICT (warehouse_name, item_code, expiration_date) DO UPDATE SET
+            item_name_spec = EXCLUDED.item_name_spec,
+            category       = EXCLUDED.category,
+            stock_qty      = EXCLUDED.stock_qty,
+            unit_price     = EXCLUDED.unit_price,
+            inventory_cost = EXCLUDED.inventory_cost
+        WHERE (warehouse_inventory_details.item_name_spec, warehouse_inventory_details.category,
+               warehouse_inventory_details.stock_qty, warehouse_inventory_details.unit_price,
+               warehouse_inventory_details.inventory_cost)
+              IS DISTINCT FROM
+              (EXCLUDED.item_name_spec, EXCLUDED.category, EXCLUDED.stock_qty,
+               EXCLUDED.unit_price, EXCLUDED.inventory_cost)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+    INTO v_inserted, v_updated
+    FROM upserted;
+
+    RETURN jsonb_build_object(
+        'inserted', v_inserted,
+        'updated', v_updated,
+        'deleted', v_deleted,
+        'unchanged', v_total - v_inserted - v_updated,
+        'history', v_history
+    );
+END;
+$$;
@@ -8,6 +8,7 @@ import time
 import io
 import os
 from utils.style import apply_premium_style, ensure_authenticated_session, get_chart_colors
+from utils.job_queue import task_priority
 
 # 1. 페이지 설정 (최상단 고정)
 st.set_page_config(page_title="IWP 통합 관제 시스템", layout="wide", initial_sidebar_state="expanded")
@@ -816,6 +817,153 @@ else:
         st.sidebar.subheader("🔄 ERP 동기화")
 
         @st.fragment(run_every=5)
+        def show_rpa_progress():
+            """에이전트가 2초 간격으로 기록하는 rpa_progress JSON → 채널별 진행 바"""
+            try:
+                prog = json.loads(get_config("rpa_progress", "") or "{}")
+            except (TypeError, ValueError):
+                return
+            if not prog.get("active"):
+                return
+            labels = {"hq": "본사", "hub": "허브", "main": "공통"}
+            for key, ch in (prog.get("channels") or {}).items():
+                if key == "main" and len(prog["channels"]) > 1:
+                    continue
+                caption = f"**{labels.get(key, key)}** · {ch.get('stage') or ''}"
+                if ch.get("total"):
+                    caption += f" ({ch.get('done') or 0:,}/{ch['total']:,})"
+                if ch.get("eta_sec"):
+                    caption += f" · 약 {int(ch['eta_sec']) // 60}분 {int(ch['eta_sec']) % 60}초 남음"
+                st.caption(caption)
+                if ch.get("percent") is not None:
+                    st.progress(min(1.0, float(ch["percent"]) / 100))
+
+        RPA_TASK_LABELS = {"all": "전체 수집", "hq_only": "본사 전용", "hub_only": "허브 전용",
+                           "inventory_balance": "창고별재고", "warehouse_inventory": "관리항목별",
+                           "item_master": "품목마스터", "resume": "이어하기"}
+
+        def request_rpa_job(task, rpa_status):
+            """작업 큐(rpa_jobs)에 등록. 큐가 없으면 기존 rpa_trigger 키로 폴백"""
+            try:
+                supabase.rpc("enqueue_rpa_job", {"p_task": task, "p_priority": task_priority(task),
+                                                 "p_source": "dashboard"}).execute()
+            except Exception:
+                set_config("rpa_trigger", task)
+            if rpa_status != "running":
+                set_config("rpa_status", "pending")
+
+        def cancel_pending_rpa_jobs():
+            try:
+                supabase.table("rpa_jobs").update({
+                    "status": "cancelled", "finished_at": datetime.now(KST).isoformat(),
+                    "message": "대시보드에서 취소"}).eq("status", "pending").execute()
+            except Exception:
+                pass
+
+        def show_rpa_queue():
+            """대기 작업 + 최근 이력 (소요시간 포함)"""
+            try:
+                res = supabase.table("rpa_jobs").select(
+                    "id,task,priority,status,source,created_at,duration_sec,message"
+                ).order("created_at", desc=True).limit(10).execute()
+            except Exception:
+                return  # 큐 테이블 미설치
+            if not res.data:
+                return
+            status_icons = {"pending": "⏳", "running": "🔵", "done": "✅", "failed": "❌", "cancelled": "🚫"}
+            pending = [j for j in res.data if j["status"] == "pending"]
+            with st.expander(f"📋 작업 대기열 ({len(pending)}건 대기) / 최근 이력", expanded=bool(pending)):
+                rows = []
+                for j in res.data:
+                    dur = j.get("duration_sec")
+                    rows.append({
+                        "상태": f"{status_icons.get(j['status'], '')} {j['status']}",
+                        "작업": RPA_TASK_LABELS.get(j["task"], j["task"]),
+                        "우선순위": j["priority"],
+                        "요청": j["source"],
+                        "등록": str(j["created_at"])[5:16].replace("T", " "),
+                        "소요": f"{int(float(dur)) // 60}분 {int(float(dur)) % 60}초" if dur is not None else "",
+                    })
+                st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+        TRACE_COLORS = {"hq": "#1f77b4", "hub": "#ff7f0e"}
+
+        def trace_waterfall(spans):
+            """rpa_traces 스팬 → 워터폴(가로 막대) 차트. 부모 바로 아래 자식 순서, 실행 대비 1% 미만 스팬은 생략"""
+            children = {}
+            for s in spans:
+                children.setdefault(s["parent_id"], []).append(s)
+            roots = children.get(None, [])
+            if not roots:
+                return None, 0
+            root = roots[0]
+            t0 = pd.to_datetime(root["started_at"])
+            min_ms = float(root["duration_ms"] or 0) * 0.01
+
+            ordered, hidden = [], 0
+            def walk(span, depth):
+                nonlocal hidden
+                for child in sorted(children.get(span["span_id"], []), key=lambda c: c["started_at"]):
+                    if depth > 3 or (float(child["duration_ms"] or 0) < min_ms and child["status"] == "ok"):
+                        hidden += 1
+                        continue
+                    ordered.append((child, depth))
+                    walk(child, depth + 1)
+            ordered.append((root, 0))
+            walk(root, 1)
+
+            labels, bases, widths, colors, hovers = [], [], [], [], []
+            for s, depth in ordered:
+                attrs = s.get("attrs") or {}
+                name = s["name"] + (f" · {attrs['warehouse']}" if attrs.get("warehouse") else "")
+                labels.append("  " * depth + name)
+                bases.append((pd.to_datetime(s["started_at"]) - t0).total_seconds())
+                widths.append(float(s["duration_ms"] or 0) / 1000)
+                colors.append("#d62728" if s["status"] == "error" else TRACE_COLORS.get(s.get("channel"), "#7f7f7f"))
+                extra = "<br>".join(f"{k}: {v}" for k, v in attrs.items())
+                hovers.append(f"<b>{s['name']}</b> ({s.get('channel') or '공통'})<br>"
+                              f"시작 +{bases[-1]:.1f}초 · {widths[-1]:.2f}초<br>{extra}")
+
+            y = list(range(len(ordered)))
+            fig = go.Figure(go.Bar(y=y, x=widths, base=bases, orientation="h", marker_color=colors,
+                                   hovertext=hovers, hoverinfo="text"))
+            fig.update_layout(height=max(220, 22 * len(ordered) + 60), margin=dict(l=0, r=0, t=10, b=0),
+                              xaxis_title="경과(초)", template="plotly_white", showlegend=False)
+            fig.update_yaxes(tickvals=y, ticktext=labels, autorange="reversed", tickfont=dict(size=10))
+            return fig, hidden
+
+        def show_rpa_traces(limit=10):
+            """최근 실행(rpa_traces 루트 스팬) 선택 → 단계별 워터폴"""
+            try:
+                runs = supabase.table("rpa_traces").select("run_id,name,started_at,duration_ms,status") \
+                    .is_("parent_id", "null").order("started_at", desc=True).limit(limit).execute().data
+            except Exception:
+                return  # 트레이스 테이블 미설치
+            if not runs:
+                return
+            with st.expander(f"🧭 실행 타임라인 (최근 {len(runs)}회)"):
+                options = {}
+                for r in runs:
+                    task = r["name"].split(":", 1)[-1]
+                    sec = int(float(r["duration_ms"] or 0) / 1000)
+                    mark = "❌ " if r["status"] == "error" else ""
+                    options[f"{mark}{str(r['started_at'])[5:16].replace('T', ' ')} · "
+                            f"{RPA_TASK_LABELS.get(task, task)} · {sec // 60}분 {sec % 60}초"] = r["run_id"]
+                picked = st.selectbox("실행 선택", list(options), label_visibility="collapsed")
+                try:
+                    spans = supabase.table("rpa_traces").select(
+                        "span_id,parent_id,name,channel,started_at,duration_ms,status,attrs"
+                    ).eq("run_id", options[picked]).order("span_id").limit(3000).execute().data
+                except Exception as e:
+                    st.caption(f"트레이스 조회 실패: {e}")
+                    return
+                fig, hidden = trace_waterfall(spans or [])
+                if fig is None:
+                    st.caption("기록된 스팬이 없습니다.")
+                    return
+                st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+                st.caption("🟦 본사 · 🟧 허브 · 🟥 오류" + (f" · 짧은 단계 {hidden}개 생략" if hidden else ""))
+
         def show_rpa_controls():
             rpa_status = get_config("rpa_status", "idle")
             rpa_msg = get_config("rpa_message", "대기 중")
@@ -846,33 +994,39 @@ else:
             status_icon = "🟢" if rpa_status == "idle" else "🟡" if rpa_status == "pending" else "🔵" if rpa_status == "running" else "🔴"
             st.info(f"{status_icon} **상태**: {rpa_msg}")
 
-            if rpa_status in ("idle", "completed", "failed"):
-                if st.button("🚀 전체 데이터 수집", use_container_width=True, type="primary"):
-                    set_config("rpa_trigger", "all")
-                    set_config("rpa_status", "pending")
-                    st.success("전체 수집 명령 전달됨!"); time.sleep(1); st.rerun()
-
-                r1, r2 = st.columns(2)
-                with r1:
-                    if st.button("🏢 본사 전용", use_container_width=True):
-                        set_config("rpa_trigger", "hq_only")
-                        set_config("rpa_status", "pending"); st.rerun()
-                with r2:
-                    if st.button("🚚 허브 전용", use_container_width=True):
-                        set_config("rpa_trigger", "hub_only")
-                        set_config("rpa_status", "pending"); st.rerun()
-
-                if st.button("📦 품목마스터", use_container_width=True):
-                    set_config("rpa_trigger", "item_master")
-                    set_config("rpa_status", "pending"); st.rerun()
-                if st.button("🔄 관리항목별 수집", use_container_width=True):
-                    set_config("rpa_trigger", "warehouse_inventory")
-                    set_config("rpa_status", "pending"); st.rerun()
-            else:
+            if rpa_status == "running":
+                show_rpa_progress()
+
+            # 💡 버튼은 작업 큐에 쌓이므로 실행 중에도 요청 가능 (같은 작업 중복 요청은 하나로 합쳐짐)
+            if st.button("🚀 전체 데이터 수집", use_container_width=True, type="primary"):
+                request_rpa_job("all", rpa_status)
+                st.success("전체 수집 명령 전달됨!"); time.sleep(1); st.rerun()
+
+            r1, r2 = st.columns(2)
+            with r1:
+                if st.button("🏢 본사 전용", use_container_width=True):
+                    request_rpa_job("hq_only", rpa_status); st.rerun()
+            with r2:
+                if st.button("🚚 허브 전용", use_container_width=True):
+                    request_rpa_job("hub_only", rpa_status); st.rerun()
+
+            if st.button("📦 품목마스터", use_container_width=True):
+                request_rpa_job("item_master", rpa_status); st.rerun()
+            if st.button("🔄 관리항목별 수집", use_container_width=True):
+                request_rpa_job("warehouse_inventory", rpa_status); st.rerun()
+            # 중단/실패한 마지막 실행에서 끝난 단계·창고는 건너뛰고 남은 작업만 수행
+            if st.button("⏯️ 중단된 수집 이어하기", use_container_width=True):
+                request_rpa_job("resume", rpa_status); st.rerun()
+
+            if rpa_status in ("running", "pending"):
                 if st.button("🛑 수집 중단 요청", use_container_width=True):
+                    cancel_pending_rpa_jobs()
                     set_config("rpa_trigger", "idle")
                     set_config("rpa_status", "idle"); st.rerun()
 
+            show_rpa_queue()
+            show_rpa_traces()
+
         with st.sidebar:
             show_rpa_controls()
 
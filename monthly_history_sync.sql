@@ -0,0 +1,73 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- inventory_history 월별 이력(본사_월별 / 허브_월별) 증분 동기화
+-- 에이전트가 재고변동표에서 내용이 바뀐 월만 골라 sync_monthly_history 를 한 번 호출하면
+-- 그 월의 행 upsert + 사라진 품목 삭제 + 기간 밖 월 삭제가 하나의 트랜잭션으로 반영됩니다.
+-- (기존: 매번 월별 행 전체 삭제 후 12개월 × 전 품목 재삽입)
+-- 함수가 없으면 에이전트는 기존 방식으로 자동 폴백합니다.
+-- 강제로 기존 방식을 쓰려면: system_config 에 history_sync_mode = 'replace'
+
+-- 1. 월별 키 중복 정리 (유니크 인덱스 생성 전 1회)
+DELETE FROM public.inventory_history a
+USING public.inventory_history b
+WHERE a.ctid < b.ctid
+  AND a.warehouse_name LIKE '%\_월별'
+  AND a.warehouse_name = b.warehouse_name
+  AND a.item_code = b.item_code
+  AND a.record_date = b.record_date;
+
+-- 2. 월별 이력 키 유니크 인덱스 (일별 변동 이력은 같은 날 여러 번 쌓일 수 있어 월별 행에만 적용)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_inventory_history_monthly
+    ON public.inventory_history (warehouse_name, item_code, record_date)
+    WHERE warehouse_name LIKE '%\_월별';
+
+-- 3. 증분 적용 함수
+--    p_rows   : 바뀐 월의 행 전체 [{item_code, record_date, item_name_spec, curr_qty, diff_qty}]
+--    p_months : 바뀐 월의 월말 일자 목록 (이 월에서 p_rows 에 없는 품목은 삭제)
+--    p_window : 유지할 전체 월말 일자 목록 (그 밖의 월별 행은 삭제)
+CREATE OR REPLACE FUNCTION public.sync_monthly_history(
+    p_warehouse text,
+    p_rows jsonb DEFAULT '[]'::jsonb,
+    p_months date[] DEFAULT '{}',
+    p_window date[] DEFAULT '{}'
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_expired int := 0;
+    v_deleted int := 0;
+    v_upserted int := 0;
+BEGIN
+    IF p_warehouse NOT LIKE '%\_월별' THEN
+        RAISE EXCEPTION 'sync_monthly_history: 월별 이력만 동기화할 수 있습니다 (%).', p_warehouse;
+    END IF;
+
+    DELETE FROM public.inventory_history h
+    WHERE h.warehouse_name = p_warehouse
+      AND h.record_date <> ALL (p_window);
+    GET DIAGNOSTICS v_expired = ROW_COUNT;
+
+    DELETE FROM public.inventory_history h
+    WHERE h.warehouse_name = p_warehouse
+      AND h.record_date = ANY (p_months)
+      AND NOT EXISTS (
+          SELECT 1 FROM jsonb_to_recordset(p_rows) AS x(item_code text, record_date date)
+          WHERE x.item_code = h.item_code AND x.record_date = h.record_date
+      );
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    INSERT INTO public.inventory_history
+        (warehouse_name, item_code, record_date, item_name_spec, curr_qty, diff_qty)
+    SELECT p_warehouse, x.item_code, x.record_date, x.item_name_spec, x.curr_qty, x.diff_qty
+    FROM jsonb_to_recordset(p_rows)
+         AS x(item_code text, record_date date, item_name_spec text, curr_qty numeric, diff_qty numeric)
+    ON CONFLICT (warehouse_name, item_code, record_date) WHERE warehouse_name LIKE '%\_월별'
+    DO UPDATE SET
+        item_name_spec = EXCLUDED.item_name_spec,
+        curr_qty       = EXCLUDED.curr_qty,
+        diff_qty       = EXCLUDED.diff_qty;
+    GET DIAGNOSTICS v_upserted = ROW_COUNT;
+
+    RETURN jsonb_build_object('upserted', v_upserted, 'deleted', v_deleted, 'expired', v_expired);
+END;
+$$;
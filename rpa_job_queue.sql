@@ -0,0 +1,99 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- RPA 작업 큐 (rpa_trigger 단일 키 대체)
+-- 대시보드 버튼/스케줄이 작업을 큐에 넣고, 에이전트가 우선순위 순으로 하나씩 꺼내(claim) 실행합니다.
+-- - priority 가 작을수록 먼저 실행 (수동 품목마스터 > 예약된 전체 수집)
+-- - 같은 task 의 대기(pending) 작업은 하나로 합쳐짐 (더 높은 우선순위 유지)
+-- - 끝난 작업은 상태/메시지/소요시간과 함께 이력으로 남음
+-- 테이블이 없으면 에이전트는 기존 rpa_trigger 방식으로 동작합니다.
+
+-- 1. 작업 테이블
+CREATE TABLE IF NOT EXISTS public.rpa_jobs (
+    id            bigserial   PRIMARY KEY,
+    task          text        NOT NULL,
+    priority      int         NOT NULL DEFAULT 50,
+    status        text        NOT NULL DEFAULT 'pending',   -- pending / running / done / failed / cancelled
+    source        text        NOT NULL DEFAULT 'dashboard', -- dashboard / schedule / trigger
+    worker        text,
+    message       text,
+    created_at    timestamptz NOT NULL DEFAULT now(),
+    started_at    timestamptz,
+    finished_at   timestamptz,
+    duration_sec  numeric GENERATED ALWAYS AS (EXTRACT(EPOCH FROM (finished_at - started_at))) STORED
+);
+
+-- 같은 task 의 대기 작업은 하나만
+CREATE UNIQUE INDEX IF NOT EXISTS uq_rpa_jobs_pending_task
+    ON public.rpa_jobs (task) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_rpa_jobs_claim
+    ON public.rpa_jobs (priority, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_rpa_jobs_history
+    ON public.rpa_jobs (created_at DESC);
+
+ALTER TABLE public.rpa_jobs DISABLE ROW LEVEL SECURITY;
+
+-- 2. 등록 (중복 대기 작업이면 우선순위만 높여서 기존 id 반환)
+CREATE OR REPLACE FUNCTION public.enqueue_rpa_job(
+    p_task text,
+    p_priority int DEFAULT 50,
+    p_source text DEFAULT 'dashboard'
+)
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_id bigint;
+BEGIN
+    INSERT INTO public.rpa_jobs (task, priority, source)
+    VALUES (p_task, p_priority, p_source)
+    ON CONFLICT (task) WHERE status = 'pending'
+    DO UPDATE SET priority = LEAST(public.rpa_jobs.priority, EXCLUDED.priority)
+    RETURNING id INTO v_id;
+    RETURN v_id;
+END;
+$$;
+
+-- 3. 꺼내기: 우선순위 → 등록순으로 하나를 running 으로 (동시 에이전트끼리 SKIP LOCKED 로 경합 없음)
+CREATE OR REPLACE FUNCTION public.claim_rpa_job(p_worker text)
+RETURNS SETOF public.rpa_jobs
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE public.rpa_jobs j
+    SET status = 'running', started_at = now(), worker = p_worker
+    WHERE j.id = (
+        SELECT id FROM public.rpa_jobs
+        WHERE status = 'pending'
+        ORDER BY priority, created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING j.*;
+END;
+$$;
+
+-- 4. 완료 기록
+CREATE OR REPLACE FUNCTION public.complete_rpa_job(p_id bigint, p_status text, p_message text DEFAULT NULL)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE public.rpa_jobs
+    SET status = p_status, message = left(p_message, 500), finished_at = now()
+    WHERE id = p_id;
+$$;
+
+-- 5. 새 작업 등록 시 에이전트 즉시 깨우기 (rpa_trigger_notify.sql 과 같은 채널)
+CREATE OR REPLACE FUNCTION public.notify_rpa_job()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM pg_notify('rpa_trigger', json_build_object('key', 'rpa_jobs', 'value', NEW.task)::text);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_notify_rpa_job ON public.rpa_jobs;
+CREATE TRIGGER trg_notify_rpa_job
+AFTER INSERT ON public.rpa_jobs
+FOR EACH ROW EXECUTE FUNCTION public.notify_rpa_job();
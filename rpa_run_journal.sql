@@ -0,0 +1,28 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- RPA 실행 저널 (중단된 수집 이어하기)
+-- 실행(run_id)마다 끝난 단계/창고와 검증된 다운로드 파일(sha256)을 기록합니다.
+-- 에이전트가 중단되거나 실패한 뒤 'resume' 작업을 트리거하면 끝난 단계는 건너뛰고,
+-- 이미 받은 파일은 해시가 일치할 때만 다시 내려받지 않고 재사용합니다.
+-- 테이블이 없으면 에이전트는 저널 없이 기존처럼 동작합니다.
+
+CREATE TABLE IF NOT EXISTS public.rpa_run_journal (
+    run_id      text        NOT NULL,
+    step        text        NOT NULL,              -- 'run' = 실행 자체, 그 외 'hq:warehouse_sync' 등
+    item        text        NOT NULL DEFAULT '',   -- 창고명 등 단계 안의 개별 항목
+    status      text        NOT NULL DEFAULT 'done',
+    task        text,
+    file_path   text,
+    sha256      text,
+    detail      jsonb,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+    updated_at  timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, step, item)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rpa_run_journal_runs
+    ON public.rpa_run_journal (updated_at DESC) WHERE step = 'run';
+
+ALTER TABLE public.rpa_run_journal DISABLE ROW LEVEL SECURITY;
+
+-- 오래된 저널 정리 (선택, 30일 보관)
+-- DELETE FROM public.rpa_run_journal WHERE updated_at < now() - interval '30 days';
@@ -0,0 +1,27 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- RPA 실행별 트레이스 (스팬 타임라인)
+-- 실행(run_id)마다 루트 스팬(실행 전체) 아래로 로그인 / 메뉴 이동 / 다운로드 / 파싱 / 업로드 단계가
+-- 중첩 스팬(부모 span_id, 시작 시각, 소요 ms, 속성)으로 실행 종료 시 한 번에 적재됩니다.
+-- 대시보드 사이드바 'ERP 동기화 > 실행 타임라인' 에서 최근 실행을 워터폴 차트로 볼 수 있습니다.
+-- 테이블이 없으면 에이전트는 트레이스 적재 없이 기존처럼 동작합니다.
+
+CREATE TABLE IF NOT EXISTS public.rpa_traces (
+    run_id       text        NOT NULL,              -- rpa_run_journal 의 run_id 와 동일
+    span_id      int         NOT NULL,
+    parent_id    int,                               -- NULL = 루트 스팬 (실행 전체)
+    name         text        NOT NULL,
+    channel      text,                              -- hq / hub
+    started_at   timestamptz NOT NULL,
+    duration_ms  numeric     NOT NULL DEFAULT 0,
+    status       text        NOT NULL DEFAULT 'ok', -- ok / error
+    attrs        jsonb,
+    PRIMARY KEY (run_id, span_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rpa_traces_runs
+    ON public.rpa_traces (started_at DESC) WHERE parent_id IS NULL;
+
+ALTER TABLE public.rpa_traces DISABLE ROW LEVEL SECURITY;
+
+-- 오래된 트레이스 정리 (선택, 30일 보관)
+-- DELETE FROM public.rpa_traces WHERE started_at < now() - interval '30 days';
@@ -0,0 +1,24 @@
+-- [Supabase SQL Editor에서 실행해주세요]
+-- RPA 에이전트 트리거 푸시 채널 (LISTEN/NOTIFY)
+-- system_config 의 rpa_trigger / rpa_scheduled_times 가 바뀌면 'rpa_trigger' 채널로 즉시 알림.
+-- 에이전트는 .streamlit/secrets.toml 의 [supabase] db_url (직접 접속 문자열)이 있으면 이 채널을 LISTEN 하고,
+-- 없거나 연결이 끊기면 저속 폴링으로 동작합니다.
+
+-- 1. 알림 함수
+CREATE OR REPLACE FUNCTION public.notify_rpa_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.key IN ('rpa_trigger', 'rpa_scheduled_times') THEN
+        PERFORM pg_notify('rpa_trigger', json_build_object('key', NEW.key, 'value', NEW.value)::text);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+-- 2. system_config 변경 트리거
+DROP TRIGGER IF EXISTS trg_notify_rpa_trigger ON public.system_config;
+CREATE TRIGGER trg_notify_rpa_trigger
+AFTER INSERT OR UPDATE OF value ON public.system_config
+FOR EACH ROW EXECUTE FUNCTION public.notify_rpa_trigger();
@@ -0,0 +1,187 @@
+"""
+재고변동표 수요 통계 벤치마크 (기존 iterrows + 품목별 리스트 루프 vs 품목×월 행렬 배열 연산).
+
+실행: python scratch/bench_demand_stats.py [--items 20000] [--months 24] [--stats-only]
+- 재고변동표 export 구조(품목별 전일재고 / YYYY/MM 월 행 / 'XXX 계' 행)의 합성 데이터를 사용
+- 월평균 / 표준편차 / 보정 사용량 / 안전재고 / 과잉기준 / 활성도를 두 구현으로 계산해 대조 후 시간 출력
+- --stats-only: 행 파싱은 빼고 집계 이후(품목 루프 vs 행렬 연산)만 비교
+"""
+import argparse
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.demand_stats import (  # noqa: E402
+    activity_class, demand_stats, latest_activity, movement_frame, outgoing_matrix,
+)
+
+COLS = {"code": "품목코드", "name": "품목명", "date": "일자", "in": "입고수량", "out": "출고수량", "bal": "잔량"}
+
+
+def make_export(items, months, now, seed=42):
+    """재고변동표 export 와 같은 행 구성의 합성 DataFrame (품목마다 전일재고 + 월 행 + 계 행)"""
+    rng = np.random.default_rng(seed)
+    month_keys = [(now - relativedelta(months=m)).strftime("%Y/%m") for m in range(months - 1, -1, -1)]
+    codes = np.array([f"A{10000 + i}" for i in range(items)], dtype=object)
+    # 품목별 활동 패턴: 최근까지 활발 / 몇 달 전 중단 / 거의 없음
+    stop = rng.integers(0, months + 1, items)
+    rate = rng.gamma(1.5, 40, items)
+
+    code_col, name_col, date_col = [], [], []
+    qin, qout, bal = [], [], []
+    for i, code in enumerate(codes):
+        name = f"품목{i % 977} [{i % 13}ml]"
+        code_col.append(code); name_col.append(name); date_col.append("전일재고")
+        qin.append(np.nan); qout.append(np.nan); bal.append(100.0)
+        out = rng.poisson(rate[i], months).astype(float)
+        out[months - stop[i]:] = 0
+        inc = rng.poisson(rate[i], months).astype(float) * (rng.random(months) < 0.3)
+        inc[months - stop[i]:] = 0
+        for m, key in enumerate(month_keys):
+            code_col.append(code); name_col.append(name); date_col.append(key)
+            qin.append(inc[m]); qout.append(out[m] + (0.5 if out[m] and m % 5 == 0 else 0)); bal.append(float(m))
+        code_col.append(f"{code} 계"); name_col.append(None); date_col.append(None)
+        qin.append(inc.sum()); qout.append(out.sum()); bal.append(np.nan)
+    df = pd.DataFrame({COLS["code"]: code_col, COLS["name"]: name_col, COLS["date"]: date_col,
+                       COLS["in"]: qin, COLS["out"]: qout, COLS["bal"]: bal})
+    settings = [{"item_code": c,
+                 "safety_months": None if i % 3 == 0 else 1.5,
+                 "buffer_multiplier": None if i % 4 == 0 else 0.5,
+                 "excess_threshold": None if i % 5 else 1000}
+                for i, c in enumerate(codes)]
+    return df, settings
+
+
+def legacy_aggregate(df, months_history):
+    """기존 ecount_agent.process_inventory_movement_excel 의 행 루프 집계 (대조 기준)"""
+    item_outgoing_monthly = defaultdict(lambda: defaultdict(int))
+    item_latest_activity = {}
+    date_pattern = re.compile(r'^\d{4}/\d{2}$')
+    for _, row in df.iterrows():
+        code = str(row.get(COLS["code"], '')).strip()
+        if not code or not re.match(r'^[A-Za-z0-9_.-]+$', code):
+            continue
+        date_val = str(row.get(COLS["date"], '')).strip()
+        if not date_pattern.match(date_val):
+            continue
+        in_qty = pd.to_numeric(row.get(COLS["in"], 0), errors='coerce')
+        out_qty = pd.to_numeric(row.get(COLS["out"], 0), errors='coerce')
+        in_qty = in_qty if pd.notna(in_qty) else 0
+        out_qty = out_qty if pd.notna(out_qty) else 0
+        if (in_qty > 0) or (out_qty > 0):
+            if code not in item_latest_activity or date_val > item_latest_activity[code]:
+                item_latest_activity[code] = date_val
+        if date_val in months_history and out_qty > 0:
+            item_outgoing_monthly[code][date_val] += int(out_qty)
+    return item_outgoing_monthly, item_latest_activity
+
+
+def legacy_stats(all_db_items, item_outgoing_monthly, item_latest_activity, months_history, months_3, months_6):
+    """기존 품목별 리스트 루프 (대조 기준). 기간은 len(months_history) 개월"""
+    n = float(len(months_history))
+    result = []
+    for item in all_db_items:
+        code = item['item_code']
+        monthly_data = [item_outgoing_monthly[code].get(m, 0) for m in months_history]
+        mean_usage = sum(monthly_data) / n
+        variance = sum((x - mean_usage) ** 2 for x in monthly_data) / n
+        std_usage = math.sqrt(variance)
+        safety_m = float(item.get('safety_months') if item.get('safety_months') is not None else 2.0)
+        buffer_mult = float(item.get('buffer_multiplier') if item.get('buffer_multiplier') is not None else 1.0)
+        smoothed_usage = int(mean_usage + (std_usage * buffer_mult))
+        safety_stock = int(smoothed_usage * safety_m)
+        excess_val = item.get('excess_threshold')
+        if excess_val is None or float(excess_val) <= 0:
+            excess_threshold = safety_stock * 4 if safety_stock > 0 else 500
+        else:
+            excess_threshold = int(float(excess_val))
+        latest_month = item_latest_activity.get(code)
+        if latest_month and latest_month in months_3:
+            activity_status = "정상소진"
+        elif latest_month and latest_month in months_6:
+            activity_status = "소진요청"
+        else:
+            activity_status = "폐기요청"
+        result.append((mean_usage, std_usage, smoothed_usage, safety_stock, excess_threshold, activity_status))
+    return result
+
+
+def vector_stats(mv, all_db_items, months_history, months_3, months_6):
+    codes = [item['item_code'] for item in all_db_items]
+    stats = demand_stats(
+        outgoing_matrix(mv, codes, months_history),
+        safety_months=[item.get('safety_months') for item in all_db_items],
+        buffer_multiplier=[item.get('buffer_multiplier') for item in all_db_items],
+        excess_threshold=[item.get('excess_threshold') for item in all_db_items],
+    )
+    stats["activity"] = activity_class(codes, latest_activity(mv), months_3, months_6)
+    return stats
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=20000)
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--stats-only", action="store_true")
+    args = ap.parse_args()
+
+    now = datetime.now()
+    months_history = [(now - relativedelta(months=m)).strftime("%Y/%m") for m in range(1, args.months + 1)]
+    months_3 = set((now - relativedelta(months=m)).strftime("%Y/%m") for m in range(0, 4))
+    months_6 = set((now - relativedelta(months=m)).strftime("%Y/%m") for m in range(0, 7))
+
+    df, items = make_export(args.items, args.months + 1, now)
+    print(f"입력: 품목 {args.items:,} × {args.months}개월 (변동표 {len(df):,}행)")
+
+    mv, t_parse_new = _timed(movement_frame, df, COLS)
+    if args.stats_only:
+        # 집계 결과는 새 구현에서 만들어 양쪽에 같은 입력을 준다
+        agg = defaultdict(lambda: defaultdict(int))
+        hit = mv[mv["month"].isin(months_history) & (mv["out_qty"] > 0)]
+        for c, m, o in zip(hit["code"], hit["month"], hit["out_qty"]):
+            agg[c][m] += int(o)
+        latest = latest_activity(mv).to_dict()
+        t_parse_old = 0.0
+    else:
+        (agg, latest), t_parse_old = _timed(legacy_aggregate, df, months_history)
+
+    old, t_old = _timed(legacy_stats, items, agg, latest, months_history, months_3, months_6)
+    new, t_new = _timed(vector_stats, mv, items, months_history, months_3, months_6)
+
+    # 대조: 정수 지표/활성도는 완전 일치, 평균·표준편차는 부동소수 오차 범위
+    o_mean, o_std, o_smooth, o_safety, o_excess, o_act = (np.array(x) for x in zip(*old))
+    assert np.allclose(o_mean, new["mean"], rtol=1e-12, atol=1e-9)
+    assert np.allclose(o_std, new["std"], rtol=1e-9, atol=1e-9)
+    int_diff = {k: int((a != new[k]).sum()) for k, a in
+                (("smoothed_usage", o_smooth), ("safety_stock", o_safety), ("excess_threshold", o_excess))}
+    assert not any(int_diff.values()), int_diff
+    assert (o_act == new["activity"]).all()
+    counts = {str(k): int(v) for k, v in zip(*np.unique(new["activity"], return_counts=True))}
+
+    print(f"결과 일치 (활성도 분포: {counts})")
+    if not args.stats_only:
+        print(f"  행 파싱   기존 iterrows : {t_parse_old:8.3f}s  /  movement_frame : {t_parse_new:8.3f}s"
+              f"  (x{t_parse_old / t_parse_new:.1f})")
+    print(f"  품목 통계 기존 리스트 루프: {t_old:8.3f}s  /  행렬 연산      : {t_new:8.3f}s  (x{t_old / t_new:.1f})")
+    if not args.stats_only:
+        total_old, total_new = t_parse_old + t_old, t_parse_new + t_new
+        print(f"  합계      {total_old:8.3f}s → {total_new:8.3f}s  (x{total_old / total_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+창고별재고현황 레코드 변환 벤치마크 (기존 iterrows 루프 vs 컬럼 단위 파이프라인).
+
+실행: python scratch/bench_inventory_records.py [--rows 50000] [--xlsx 실제_창고별재고현황.xlsx] [--hub]
+- --xlsx 를 주면 실제 엑셀을, 없으면 창고별재고현황 export 구조의 합성 데이터를 사용
+- 두 구현의 결과 레코드가 동일한지 대조 후 rows/s 를 출력
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.excel_reader import read_excel_table  # noqa: E402
+from utils.inventory_records import inventory_records_from_frame  # noqa: E402
+
+WH_NAME_MAP = {"W001": "본사A급", "W002": "본사B급", "W003": "반품창고", "W009": "[HUB] 용인 창고"}
+RAW_WAREHOUSES = [("W001", "본사 A급 창고"), ("W002", "본사 B급 창고"), ("W003", "반품 창고"),
+                  ("W009", "허브 용인 창고"), ("W010", "용 인 물류")]
+
+
+def make_export(rows, seed=42):
+    """창고별재고현황 export 와 같은 컬럼 구성의 합성 DataFrame"""
+    rng = np.random.default_rng(seed)
+    wh_idx = rng.integers(0, len(RAW_WAREHOUSES), rows)
+    codes = np.char.add("A", rng.integers(10000, 99999, rows).astype(str)).astype(object)
+    # 유령/합계 행 섞기
+    codes[rng.random(rows) < 0.01] = np.nan
+    codes[rng.random(rows) < 0.005] = "합계"
+    exp_kind = rng.integers(0, 5, rows)
+    exp = np.where(exp_kind == 0, "20281202", np.where(exp_kind == 1, "281202",
+                   np.where(exp_kind == 2, "유효기간 없음", np.where(exp_kind == 3, "2027.03.15", None))))
+    cat = rng.choice(np.array(["[상품]", "제품", "일반", None, "부재료"], dtype=object), rows)
+    price = rng.integers(0, 50000, rows).astype(float)
+    price[rng.random(rows) < 0.2] = 0
+    return pd.DataFrame({
+        "품목코드": codes,
+        "품목명[규격]": [f"품목{i % 977} [{i % 13}ml]" for i in range(rows)],
+        "품목구분": cat,
+        "창고코드": [RAW_WAREHOUSES[i][0] for i in wh_idx],
+        "창고명": [RAW_WAREHOUSES[i][1] for i in wh_idx],
+        "관리항목명": exp,
+        "재고수량": rng.integers(-5, 500, rows),
+        "입고단가": price,
+    })
+
+
+def legacy_records(df, cols, wh_name_map, master_price_map, is_hub=False):
+    """기존 ecount_agent.process_inventory_excel 의 행 루프 구현 (대조 기준)"""
+    code_col, name_col, wh_col = cols["code"], cols["name"], cols["wh"]
+    wh_code_col, qty_col, price_col = cols["wh_code"], cols["qty"], cols["price"]
+
+    def is_valid(val):
+        v = str(val).strip().lower()
+        return v not in ('nan', 'none', 'null', '', 'undefined', 'nan', '0', '0.0')
+
+    if code_col in df.columns:
+        df = df[df[code_col].apply(lambda x: is_valid(x))]
+    if wh_col in df.columns:
+        df = df[df[wh_col].apply(lambda x: is_valid(x))]
+    if name_col in df.columns:
+        df = df[df[name_col].apply(lambda x: is_valid(x))]
+    df = df[~df[code_col].astype(str).str.contains('계|합계|소계|총계|Total', na=False)].copy()
+    if qty_col not in df.columns:
+        df[qty_col] = 0
+    if price_col not in df.columns:
+        df[price_col] = 0
+    df['calc_qty'] = pd.to_numeric(df[qty_col], errors='coerce').fillna(0)
+    df['calc_price'] = pd.to_numeric(df[price_col], errors='coerce').fillna(0)
+
+    upload_data = []
+    for _, row in df.iterrows():
+        cat_col = next((c for c in row.index if '구분' in str(c)), None)
+        raw_cat = str(row.get(cat_col, '일반')).strip() if cat_col else '일반'
+        clean_cat = raw_cat.replace('[', '').replace(']', '')
+        if not clean_cat or clean_cat.lower() in ('nan', 'none', '일반', 'undefined'):
+            clean_cat = '일반'
+        exp_raw = str(row.get('관리항목명', '')).strip()
+        if not exp_raw or exp_raw.lower() == 'nan':
+            exp_raw = str(row.get('유효기간', '')).strip()
+        exp_date = None
+        if exp_raw and exp_raw.lower() not in ('nan', 'none', ''):
+            nums = re.sub(r'[^0-9]', '', exp_raw)
+            if len(nums) == 8:
+                exp_date = f"{nums[:4]}-{nums[4:6]}-{nums[6:8]}"
+            elif len(nums) == 6:
+                exp_date = f"20{nums[:2]}-{nums[2:4]}-{nums[4:6]}"
+            else:
+                exp_date = exp_raw
+        raw_wh_name = str(row.get(wh_col, '')).strip()
+        wh_name_final = raw_wh_name
+        if wh_code_col:
+            wh_code_val = str(row.get(wh_code_col, '')).strip()
+            if wh_code_val and wh_code_val in wh_name_map:
+                wh_name_final = wh_name_map[wh_code_val]
+        if is_hub:
+            if '용인' not in re.sub(r'\s+', '', raw_wh_name):
+                continue
+            wh_name_final = "[HUB] 용인 창고"
+        item_name_spec_val = re.sub(r'\[.*?\]', '', str(row.get(name_col, '')).strip()).strip()
+        item_code_val = str(row.get(code_col, '')).strip()
+        stock_qty_val = float(row.get('calc_qty', 0))
+        final_price = float(row.get('calc_price', 0))
+        if final_price <= 0 and item_code_val:
+            final_price = master_price_map.get(f"{'허브' if is_hub else '본사'}_{item_code_val}", 0.0)
+        upload_data.append({
+            "warehouse_name": wh_name_final, "item_code": item_code_val,
+            "item_name_spec": item_name_spec_val, "category": clean_cat,
+            "expiration_date": exp_date, "stock_qty": stock_qty_val,
+            "unit_price": final_price, "inventory_cost": stock_qty_val * final_price,
+        })
+    return upload_data
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--xlsx", default=None)
+    ap.add_argument("--hub", action="store_true")
+    args = ap.parse_args()
+
+    if args.xlsx:
+        df = read_excel_table(args.xlsx)
+    else:
+        df = make_export(args.rows)
+
+    cols = {"code": "품목코드", "name": "품목명[규격]", "wh": "창고명", "wh_code": "창고코드",
+            "qty": "재고수량", "price": "입고단가"}
+    master = {f"{'허브' if args.hub else '본사'}_A{c}": c % 900 for c in range(10000, 99999, 3)}
+
+    old, t_old = _timed(legacy_records, df, cols, WH_NAME_MAP, master, is_hub=args.hub)
+    new, t_new = _timed(inventory_records_from_frame, df, cols, WH_NAME_MAP, master, is_hub=args.hub)
+
+    assert len(old) == len(new), (len(old), len(new))
+    for i, (a, b) in enumerate(zip(old, new)):
+        assert a == b, (i, a, b)
+
+    n = len(df)
+    print(f"입력 {n:,}행 → 레코드 {len(new):,}건 (결과 일치)")
+    print(f"  기존 iterrows : {t_old:8.3f}s  {n / t_old:12,.0f} rows/s")
+    print(f"  컬럼 파이프라인: {t_new:8.3f}s  {n / t_new:12,.0f} rows/s  (x{t_old / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
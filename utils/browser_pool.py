@@ -0,0 +1,204 @@
+"""
+로그인된 이카운트 브라우저를 에이전트 프로세스 수명 동안 재사용하는 풀.
+
+기존에는 execute_rpa 마다 크롬 실행 → 로그인 → 종료를 반복해 계정당 10~20초가 들었다.
+Playwright sync 객체는 만든 스레드에서만 쓸 수 있으므로 레인(hq / hub)마다 전용 단일 스레드를 두고,
+그 레인의 파이프라인과 브라우저 조작은 항상 같은 스레드에서 실행한다.
+레인 안에서 브라우저는 회사코드별로 보관하며, 꺼낼 때 세션을 가볍게 확인하고 만료된 경우에만 재로그인한다.
+레인 스레드는 daemon 이라 Ctrl+C / SIGTERM 으로 프로세스가 끝날 때 진행 중인 수집을 기다리지 않는다.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Slot:
+    __slots__ = ("rpa", "fingerprint", "last_used", "runs")
+
+    def __init__(self, rpa, fingerprint):
+        self.rpa = rpa
+        self.fingerprint = fingerprint
+        self.last_used = time.monotonic()
+        self.runs = 0
+
+
+class _Lane:
+    """레인 하나의 전용 daemon 스레드 + 작업 큐 (ThreadPoolExecutor 스레드는 종료 시 join 되어 쓰지 않음)"""
+
+    def __init__(self, name, init):
+        self._queue = queue.Queue()
+        self._init = init
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f"rpa-{name}")
+        self.thread.start()
+
+    def _run(self):
+        self._init()
+        while True:
+            work = self._queue.get()
+            if work is None:
+                return
+            future, fn, args, kwargs = work
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self):
+        self._queue.put(None)
+
+
+class BrowserPool:
+    """레인별 전용 스레드 + (레인, 회사코드)별 로그인 브라우저 보관소.
+
+    사용법:
+        future = pool.submit("hq", pipeline_fn, ...)       # 레인 스레드에서 실행
+        # pipeline_fn 안에서
+        rpa, reused = pool.checkout(com_code, fingerprint, factory)
+        try: ... finally: pool.release(com_code, rpa, keep=True)
+    idle_ttl 초 이상 쓰지 않은 브라우저는 다음 checkout 때 새로 띄운다 (장시간 켜둔 크롬 메모리 정리).
+    풀에 넣지 않는 일회용 브라우저는 track(rpa) / untrack(rpa) 로 등록해 두면 close_all 때 만든 스레드에서 닫는다.
+    """
+
+    def __init__(self, idle_ttl=6 * 3600, log=print):
+        self.idle_ttl = idle_ttl
+        self.log = log
+        self._lanes = {}
+        self._slots = {}
+        self._tracked = {}   # 레인(없으면 None) → 풀 밖의 일회용 rpa
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ───────── 레인 스레드 ─────────
+
+    def _init_lane(self, lane):
+        self._local.lane = lane
+
+    def _lane(self, lane):
+        with self._lock:
+            worker = self._lanes.get(lane)
+            if worker is None:
+                worker = self._lanes[lane] = _Lane(lane, lambda: self._init_lane(lane))
+            return worker
+
+    def submit(self, lane, fn, *args, **kwargs):
+        """lane 전용 스레드에서 fn 실행 (Future 반환)"""
+        return self._lane(lane).submit(fn, *args, **kwargs)
+
+    def current_lane(self):
+        return getattr(self._local, "lane", None)
+
+    # ───────── 브라우저 대여/반납 (레인 스레드 안에서만 호출) ─────────
+
+    def checkout(self, key, fingerprint, factory):
+        """로그인된 rpa 반환: (rpa, reused). 로그인에 실패하면 브라우저를 닫고 RuntimeError.
+
+        fingerprint 가 바뀌면(계정 비밀번호/헤드리스 설정 변경 등) 기존 브라우저를 닫고 새로 띄운다.
+        """
+        lane = self.current_lane()
+        if lane is None:
+            raise RuntimeError("BrowserPool.checkout 은 레인 스레드(submit) 안에서만 호출할 수 있습니다.")
+
+        slot = self._slots.get((lane, key))
+        if slot is not None:
+            idle = time.monotonic() - slot.last_used
+            if slot.fingerprint != fingerprint or idle > self.idle_ttl:
+                reason = "설정 변경" if slot.fingerprint != fingerprint else f"{idle / 3600:.1f}시간 미사용"
+                self.log(f"♻️ [{lane}] {key} 브라우저 교체 ({reason})")
+                self._drop(lane, key)
+                slot = None
+
+        if slot is None:
+            slot = _Slot(factory(), fingerprint)
+            self._slots[(lane, key)] = slot
+
+        ok, msg, reused = slot.rpa.ensure_login()
+        if not ok:
+            self._drop(lane, key)
+            raise RuntimeError(msg)
+        slot.runs += 1
+        return slot.rpa, reused
+
+    def release(self, key, rpa, keep=True):
+        """실행이 끝난 rpa 반납. keep=False 거나 브라우저가 죽었으면 닫고 버린다"""
+        lane = self.current_lane()
+        slot = self._slots.get((lane, key))
+        if slot is None or slot.rpa is not rpa:
+            rpa.close()
+            return
+        if keep and rpa.is_alive():
+            try:
+                rpa.reset_run_state()
+            except Exception as e:
+                self.log(f"⚠️ [{lane}] {key} 브라우저 정리 실패 - 폐기: {e}")
+                self._drop(lane, key)
+                return
+            slot.last_used = time.monotonic()
+        else:
+            self._drop(lane, key)
+
+    def track(self, rpa):
+        """풀 밖의 rpa 를 현재 스레드(레인) 소유로 등록"""
+        with self._lock:
+            self._tracked.setdefault(self.current_lane(), set()).add(rpa)
+
+    def untrack(self, rpa):
+        with self._lock:
+            self._tracked.get(self.current_lane(), set()).discard(rpa)
+
+    def _close_tracked(self, lane):
+        with self._lock:
+            loose = list(self._tracked.pop(lane, ()))
+        if loose:
+            self.log(f"🧹 [프로세스 종료] 잔존하는 {len(loose)}개의 RPA 브라우저 인스턴스를 강제 종료합니다.")
+        for rpa in loose:
+            try:
+                rpa.close()
+            except Exception as e:
+                self.log(f"  ⚠️ RPA 인스턴스 종료 중 에러: {e}")
+
+    def _drop(self, lane, key):
+        slot = self._slots.pop((lane, key), None)
+        if slot is not None:
+            try:
+                slot.rpa.close()
+            except Exception as e:
+                self.log(f"⚠️ [{lane}] {key} 브라우저 종료 중 오류: {e}")
+
+    def _close_lane(self, lane):
+        for (ln, key) in [k for k in self._slots if k[0] == lane]:
+            self._drop(ln, key)
+        self._close_tracked(lane)
+
+    # ───────── 종료 ─────────
+
+    def close_all(self, timeout=30):
+        """모든 레인의 브라우저를 각자의 스레드에서 닫고 스레드 종료.
+
+        레인에서 수집이 돌고 있으면 그 작업이 끝난 뒤에 닫힌다 (호출자가 먼저 중단 플래그를 세워 두어야 빨리 끝남).
+        timeout 안에 끝나지 않은 레인은 다른 스레드에서 Playwright 객체를 건드리지 않고 그대로 두며,
+        daemon 스레드라 프로세스 종료와 함께 정리된다.
+        """
+        with self._lock:
+            lanes = dict(self._lanes)
+            self._lanes.clear()
+        futures = {lane: worker.submit(self._close_lane, lane) for lane, worker in lanes.items()}
+        for worker in lanes.values():
+            worker.shutdown()
+        self._close_tracked(None)   # 레인 밖(호출 스레드)에서 만든 브라우저
+        deadline = time.monotonic() + timeout
+        for lane, f in futures.items():
+            try:
+                f.result(timeout=max(0.1, deadline - time.monotonic()))
+            except Exception as e:
+                self.log(f"⚠️ [{lane}] 브라우저 풀 종료 대기 실패 (진행 중인 수집이 끝나지 않음): {e!r}")
+
+    def summary(self):
+        return ", ".join(f"{lane}/{key}: {slot.runs}회" for (lane, key), slot in self._slots.items()) or "없음"
@@ -0,0 +1,121 @@
+"""
+본사 / 허브 계정이 크롬 프로세스 하나를 나눠 쓰도록 하는 공유 브라우저 관리자.
+
+기존에는 계정(EcountRPA)마다 sync_playwright() 와 크롬을 따로 띄워 동시 실행 시 크롬 두 개가 메모리에 올라가고,
+두 번째 계정도 크롬 콜드 스타트를 그대로 기다렸다.
+여기서는 전용 스레드가 크롬 하나를 원격 디버깅(CDP) 포트와 함께 띄워 수명을 관리하고,
+각 계정은 자기 레인 스레드에서 connect_over_cdp 로 붙어 독립된 브라우저 컨텍스트(쿠키/세션 분리)만 만든다.
+(Playwright sync 객체는 만든 스레드에서만 쓸 수 있으므로 프로세스는 공유하되 연결은 레인마다 따로 둔다)
+- acquire() 로 쓰는 동안 참조를 잡고 release() 로 놓는다. 마지막 사용자가 놓으면 크롬을 닫는다.
+- 실행 설정(채널 / 헤드리스 / 실행 인자)이 바뀌었거나 크롬이 죽었으면 사용자가 없을 때 새로 띄운다.
+  다른 계정이 쓰는 중이면 None 을 돌려주고 호출자는 기존처럼 자기 크롬을 띄운다.
+CDP 포트는 127.0.0.1 에만 열리지만 인증이 없어 같은 PC 의 어떤 프로세스든 붙어 로그인된 ERP 세션(쿠키 포함)을 조작할 수 있다.
+(Playwright Python 에는 토큰이 붙는 launch_server 가 없다) 그래서 에이전트에서는 기본으로 끄고
+system_config rpa_shared_browser=true 로 켠 경우에만 쓴다. 사무실 전용 PC 처럼 로컬 사용자를 신뢰할 수 있을 때만 켤 것.
+"""
+import json
+import socket
+import threading
+import urllib.request
+
+from playwright.sync_api import sync_playwright
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BrowserSupervisor:
+    """크롬 프로세스 하나의 실행 / 공유 / 종료"""
+
+    def __init__(self, log=print, start_timeout=60):
+        self.log = log
+        self.start_timeout = start_timeout
+        self._lock = threading.Lock()
+        self._users = 0
+        self._config = None
+        self._endpoint = None
+        self._stop = None
+        self._thread = None
+        self.launches = 0
+
+    # ───────── 브라우저 스레드 ─────────
+
+    def _run(self, config, port, ready, stop, state):
+        channel, headless, args = config
+        try:
+            with sync_playwright() as pw:
+                browser = pw.chromium.launch(channel=channel, headless=headless,
+                                             args=list(args) + [f"--remote-debugging-port={port}"])
+                state["endpoint"] = f"http://127.0.0.1:{port}"
+                ready.set()
+                stop.wait()
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+        except Exception as e:
+            state["error"] = e
+            ready.set()
+
+    def _healthy(self):
+        try:
+            with urllib.request.urlopen(f"{self._endpoint}/json/version", timeout=2) as resp:
+                return bool(json.load(resp).get("webSocketDebuggerUrl"))
+        except Exception:
+            return False
+
+    def _start_locked(self, config):
+        ready, stop, state = threading.Event(), threading.Event(), {}
+        thread = threading.Thread(target=self._run, args=(config, _free_port(), ready, stop, state),
+                                  daemon=True, name="shared-browser")
+        thread.start()
+        if not ready.wait(self.start_timeout) or "error" in state:
+            stop.set()
+            raise RuntimeError(f"공유 브라우저 실행 실패: {state.get('error', '시간 초과')}")
+        self._config, self._endpoint, self._stop, self._thread = config, state["endpoint"], stop, thread
+        self.launches += 1
+        self.log(f"🖥️ [공유 브라우저] 크롬 실행 ({self._endpoint})")
+
+    def _shutdown_locked(self, timeout=15):
+        if self._stop is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self.log("🧹 [공유 브라우저] 크롬 종료")
+        self._config = self._endpoint = self._stop = self._thread = None
+
+    # ───────── 공개 ─────────
+
+    def acquire(self, channel, headless, args=()):
+        """공유 크롬의 CDP 주소 (필요하면 실행). 설정이 다른 크롬을 다른 계정이 쓰는 중이거나 실행에 실패하면 None"""
+        config = (channel, bool(headless), tuple(args))
+        with self._lock:
+            if self._endpoint is not None and (config != self._config or not self._healthy()):
+                if self._users:
+                    self.log("ℹ️ [공유 브라우저] 다른 계정이 다른 설정으로 사용 중 - 전용 브라우저로 실행")
+                    return None
+                self._shutdown_locked()
+            if self._endpoint is None:
+                try:
+                    self._start_locked(config)
+                except Exception as e:
+                    self.log(f"⚠️ {e}")
+                    return None
+            self._users += 1
+            return self._endpoint
+
+    def release(self):
+        """acquire 한 만큼 호출. 마지막 사용자가 놓으면 크롬 종료"""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self._shutdown_locked()
+
+    def close(self):
+        """에이전트 종료 시: 사용자와 관계없이 크롬 종료"""
+        with self._lock:
+            self._users = 0
+            self._shutdown_locked()
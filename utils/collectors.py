@@ -0,0 +1,115 @@
+"""
+이카운트 리포트 수집기(collector) 인터페이스.
+
+에이전트 파이프라인은 리포트를 '어떻게' 받는지 모르고 수집기의 fetch(report) 만 부른다.
+- RpaCollector      : 기존 브라우저 자동화 (EcountRPA 의 get_* 호출, 브라우저는 처음 필요할 때 확보)
+- ApiCollector      : 이카운트 OpenAPI JSON 수집 (utils/ecount_api.py)
+- FallbackCollector : primary 가 지원하는 리포트는 primary 로, 지원하지 않거나 실패하면 fallback 으로
+
+모든 수집기는 같은 계약을 따른다.
+- fetch(report) → (성공 여부, 메시지). 다운로드 폴더에 이카운트 export 와 같은 파일명/모양의 엑셀을 남긴다
+  (process_* 파싱, 실행 저널 이어하기, 파싱 캐시가 수집 방식과 무관하게 그대로 동작)
+- last_download : 마지막으로 받은 파일 {"path", "bytes", "sha256", "elapsed"}
+- covers(report) : 지원 여부 / close() : 자원 반납
+report 는 REPORTS 의 키.
+"""
+
+# 리포트 키 → 화면 이름 (로그용)
+REPORTS = {
+    "inventory_balance": "창고별재고현황",
+    "item_master": "품목마스터",
+    "movement": "재고변동표",
+}
+
+
+class Collector:
+    """수집기 기본형"""
+
+    name = ""
+    reports = frozenset()
+
+    def covers(self, report):
+        return report in self.reports
+
+    def fetch(self, report):
+        raise NotImplementedError
+
+    @property
+    def last_download(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class RpaCollector(Collector):
+    """브라우저 자동화 수집기. checkout() 으로 로그인된 EcountRPA 를 처음 필요할 때 확보하고 release(rpa) 로 반납한다.
+
+    창고 순회(관리항목별재고현황)처럼 수집기 계약에 맞지 않는 흐름은 browser() 로 EcountRPA 를 직접 쓴다.
+    """
+
+    name = "rpa"
+    METHODS = {
+        "inventory_balance": "get_inventory_balance",
+        "item_master": "get_item_master_excel",
+        "movement": "get_inventory_movement",
+    }
+    reports = frozenset(METHODS)
+
+    def __init__(self, checkout, release):
+        self._checkout = checkout
+        self._release = release
+        self.rpa = None
+
+    def browser(self):
+        if self.rpa is None:
+            self.rpa = self._checkout()
+        return self.rpa
+
+    def fetch(self, report):
+        return getattr(self.browser(), self.METHODS[report])()
+
+    @property
+    def last_download(self):
+        return self.rpa.last_download if self.rpa is not None else None
+
+    def close(self):
+        if self.rpa is not None:
+            rpa, self.rpa = self.rpa, None
+            self._release(rpa)
+
+
+class FallbackCollector(Collector):
+    """primary 우선, 지원하지 않거나 실패한 리포트는 fallback 으로 (close 는 둘 다)
+
+    only 를 주면 그 리포트만 primary 로 받는다 (primary 가 지원해도 결과가 부족한 리포트 제외용).
+    """
+
+    def __init__(self, primary, fallback, log=print, only=None):
+        self.primary = primary
+        self.fallback = fallback
+        self.only = only
+        self.log = log
+        self.name = f"{primary.name}+{fallback.name}"
+        self.reports = primary.reports | fallback.reports
+        self._last = None
+
+    def fetch(self, report):
+        if self.primary.covers(report) and (self.only is None or report in self.only):
+            ok, msg = self.primary.fetch(report)
+            if ok:
+                self._last = self.primary
+                return ok, msg
+            self.log(f"⚠️ [{self.primary.name}] {REPORTS.get(report, report)} 수집 실패 - {self.fallback.name} 로 재시도: {msg}")
+        self._last = self.fallback
+        return self.fallback.fetch(report)
+
+    @property
+    def last_download(self):
+        return self._last.last_download if self._last is not None else None
+
+    def close(self):
+        try:
+            self.primary.close()
+        finally:
+            self.fallback.close()
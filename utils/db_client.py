@@ -0,0 +1,262 @@
+"""
+Supabase PostgREST 공용 HTTP 클라이언트.
+
+ecount_agent 의 모든 DB 호출이 이 클라이언트 하나를 거친다.
+- keep-alive 커넥션 풀 (requests.Session + HTTPAdapter)
+- 큰 JSON 본문 gzip 압축 전송 (서버가 거부하면 자동으로 끄고 평문 재전송)
+- 모든 요청에 상한 타임아웃 (연결, 읽기)
+- 5xx / 429 / 연결 오류 시 지수 백오프 재시도 (Retry-After 존중)
+  재시도는 다시 보내도 결과가 같은 요청만: GET/HEAD/PUT/DELETE, upsert(resolution=merge-duplicates),
+  SAFE_RPCS 의 함수. 일반 INSERT(POST)는 응답만 잃었을 때 중복 행이 생기므로 재시도하지 않는다.
+- 엔드포인트별 지연시간/오류/재시도 카운터
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# 두 번 실행돼도 결과가 같은 RPC (upsert/delete 기반 병합, 대기 작업 중복 합치기, 상태 덮어쓰기).
+# claim_rpa_job 은 재시도하면 작업 하나를 잃고 다른 작업을 꺼낼 수 있어 넣지 않는다.
+SAFE_RPCS = {
+    "apply_inventory_delta",
+    "sync_monthly_history",
+    "merge_inventory_snapshot",
+    "enqueue_rpa_job",
+    "complete_rpa_job",
+}
+
+# gzip 본문을 풀지 못했을 때 400 응답 본문에 나오는 표현 (그 외 400 은 요청 자체의 오류)
+GZIP_DECODE_ERRORS = ("gzip", "content-encoding", "decod", "pgrst102", "invalid json")
+
+
+class EndpointStats:
+    __slots__ = ("count", "errors", "retries", "total_ms", "max_ms", "bytes_sent")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bytes_sent = 0
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count, "errors": self.errors, "retries": self.retries,
+            "avg_ms": round(self.avg_ms, 1), "max_ms": round(self.max_ms, 1),
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class PostgrestClient:
+    """PostgREST(/rest/v1) 호출용 세션 래퍼.
+
+    path 는 '/rest/v1/' 이후 부분 (예: "system_config?key=eq.x&select=value").
+    반환값은 requests.Response 이므로 기존 status_code / json() 처리 코드를 그대로 쓴다.
+    재시도를 모두 소진한 연결 오류는 requests.RequestException 으로 전파된다.
+    """
+
+    def __init__(self, base_url, api_key, timeout=(5, 60), max_retries=4, backoff=0.5,
+                 max_backoff=15.0, pool_size=8, gzip_min_bytes=16 * 1024):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.gzip_min_bytes = gzip_min_bytes
+        self.gzip_enabled = gzip_min_bytes is not None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+        self._stats = defaultdict(EndpointStats)
+        self._lock = threading.Lock()
+        # 선택: observer(endpoint, seconds, failed, retried) - 요청/재시도마다 호출 (메트릭 수집용)
+        self.observer = None
+
+    # ───────── 내부 유틸 ─────────
+
+    @staticmethod
+    def _endpoint(method, path):
+        """'GET item_master?select=...' → 'GET item_master' (쿼리 제외한 통계 키)"""
+        return f"{method} {path.split('?', 1)[0].strip('/')}"
+
+    def _sleep_before_retry(self, attempt, resp=None):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if resp is not None:
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    delay = min(self.max_backoff, max(delay, float(retry_after)))
+                except ValueError:
+                    pass
+        time.sleep(delay * (0.8 + random.random() * 0.4))
+
+    @staticmethod
+    def _retryable(method, path, prefer):
+        """다시 보내도 안전한 요청인지 (응답을 잃어도 중복 반영이 없는지)"""
+        if method in IDEMPOTENT_METHODS:
+            return True
+        if method != "POST":
+            return False
+        if prefer and "resolution=merge-duplicates" in prefer:
+            return True
+        name = path.split("?", 1)[0].strip("/")
+        return name.startswith("rpc/") and name[4:] in SAFE_RPCS
+
+    @staticmethod
+    def _gzip_rejected(resp):
+        """서버가 gzip 본문을 거부했는지: 415, 또는 400 이면서 본문이 압축 해제/JSON 해석 실패를 말할 때"""
+        if resp.status_code == 415:
+            return True
+        if resp.status_code != 400:
+            return False
+        text = (resp.text or "")[:500].lower()
+        return any(marker in text for marker in GZIP_DECODE_ERRORS)
+
+    def _encode_body(self, json_body):
+        if json_body is None:
+            return None, {}
+        raw = json.dumps(json_body, ensure_ascii=False, default=str).encode("utf-8")
+        if self.gzip_enabled and len(raw) >= self.gzip_min_bytes:
+            return gzip.compress(raw, compresslevel=5), {"Content-Encoding": "gzip"}
+        return raw, {}
+
+    def _record(self, endpoint, elapsed_ms, sent, failed=False, retried=False):
+        with self._lock:
+            st = self._stats[endpoint]
+            if retried:
+                st.retries += 1
+            else:
+                st.count += 1
+                st.total_ms += elapsed_ms
+                st.max_ms = max(st.max_ms, elapsed_ms)
+                st.bytes_sent += sent
+                if failed:
+                    st.errors += 1
+        if self.observer is not None:
+            try:
+                self.observer(endpoint, elapsed_ms / 1000.0, failed, retried)
+            except Exception:
+                pass
+
+    # ───────── 공개 메서드 ─────────
+
+    def request(self, method, path, json=None, headers=None, prefer=None, timeout=None, retry=None):
+        """retry: None 이면 메서드/Prefer/RPC 이름으로 판단, True/False 로 강제"""
+        url = f"{self.base_url}/rest/v1/{path.lstrip('/')}"
+        endpoint = self._endpoint(method, path)
+        req_headers = dict(headers or {})
+        if prefer:
+            req_headers["Prefer"] = prefer
+        body, enc_headers = self._encode_body(json)
+        max_retries = self.max_retries if (self._retryable(method, path, prefer) if retry is None else retry) else 0
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, data=body, headers={**req_headers, **enc_headers},
+                                            timeout=timeout or self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, (time.perf_counter() - started) * 1000, 0, failed=True)
+                if attempt >= max_retries:
+                    raise
+                self._record(endpoint, 0, 0, retried=True)
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            # 서버가 gzip 본문을 받지 못하면 이후로는 평문 전송 (요청이 반영되지 않았으므로 재전송은 안전)
+            if enc_headers and self.gzip_enabled and self._gzip_rejected(resp):
+                self.gzip_enabled = False
+                body, enc_headers = self._encode_body(json)
+                self._record(endpoint, elapsed_ms, 0, retried=True)
+                continue
+
+            failed = resp.status_code >= 400
+            self._record(endpoint, elapsed_ms, len(body) if body else 0, failed=failed)
+            if resp.status_code in RETRY_STATUS and attempt < max_retries:
+                self._record(endpoint, 0, 0, retried=True)
+                self._sleep_before_retry(attempt, resp)
+                attempt += 1
+                continue
+            return resp
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request("POST", path, json=json, **kwargs)
+
+    def patch(self, path, json=None, **kwargs):
+        return self.request("PATCH", path, json=json, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def select_all(self, path, order, page_size=1000, **kwargs):
+        """서버 max-rows(기본 1000) 제한을 넘는 조회를 limit/offset 페이지로 모두 읽는다.
+
+        order 는 페이지 경계가 흔들리지 않도록 고유한 정렬 기준을 준다 (예: "id" 또는 "a,b,c").
+        실패 시 requests.HTTPError 를 던진다.
+        """
+        sep = "&" if "?" in path else "?"
+        rows, offset = [], 0
+        while True:
+            resp = self.get(f"{path}{sep}order={order}&limit={page_size}&offset={offset}", **kwargs)
+            resp.raise_for_status()
+            page = resp.json()
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+    def rpc(self, function_name, payload=None, **kwargs):
+        """Postgres 함수 호출 (POST /rest/v1/rpc/<name>)."""
+        return self.request("POST", f"rpc/{function_name}", json=payload or {}, **kwargs)
+
+    def stats(self):
+        """엔드포인트별 통계 스냅샷 {endpoint: {...}}"""
+        with self._lock:
+            return {ep: st.as_dict() for ep, st in self._stats.items()}
+
+    def stats_summary(self, top=8):
+        """로그용 한 줄 요약 (총 시간이 큰 순)."""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)[:top]
+            return " | ".join(
+                f"{ep}: {st.count}회 avg {st.avg_ms:.0f}ms max {st.max_ms:.0f}ms"
+                + (f" 재시도 {st.retries}" if st.retries else "")
+                + (f" 오류 {st.errors}" if st.errors else "")
+                for ep, st in items
+            )
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,345 @@
+"""
+이카운트 OpenAPI 수집기 (system_config ecount_collector=api, utils/collectors.py 의 ApiCollector).
+
+브라우저로 화면을 열고 조회 → Excel 변환 → 다운로드를 기다리는 대신 OpenAPI 의 JSON 을 HTTP 로 받는다.
+OpenAPI 가 제공하는 리포트만 담당하고 나머지(관리항목별 유효기간 상세, 재고변동표)는 FallbackCollector 로 RPA 가 받는다.
+- 창고별재고현황 : InventoryBalance/GetListInventoryBalanceStatusByLocation
+                  (+ InventoryBasic/GetBasicProductsList 품목 목록으로 품목구분 / 입고단가 보강)
+흐름: Zone 조회 → OAPILogin 으로 SESSION_ID 발급 (만료되면 한 번 재로그인) → 리포트 조회
+- 페이지 조회 : 첫 페이지의 TotalCnt 로 페이지 수를 정하고 나머지 페이지는 스레드 풀로 동시 요청
+- 속도 제한   : 모든 요청이 토큰 버킷(RateLimiter) 하나를 거친다. 429 / 5xx 는 Retry-After 만큼 버킷을 비우고 재시도
+- 결과        : 이카운트 export 와 같은 파일명/헤더의 엑셀로 저장 → process_* 파싱 / 저널 이어하기 / 파싱 캐시 그대로 사용
+  내용이 직전 저장분과 같으면 파일을 다시 쓰지 않아(mtime 만 갱신) sha256 이 유지된다 (파싱 캐시 '업로드 생략')
+💡 API 재고는 창고×품목 잔량이라 유효기간(관리항목) 구분이 없다. 허브 재고의 유효기간 행이 사라지므로
+   에이전트는 API_REPORTS(ecount_agent.py)에 넣기 전까지 이 리포트도 브라우저로 받는다 (지금은 bench/api_bench.py 측정용).
+💡 품목마스터는 API 로 받지 않는다. 품목 목록 API 는 품목그룹을 그룹코드(CLASS_CD)로만 주는데
+   parse_item_master_frame 은 그룹명으로 브랜드와 '단종' 을 판정하므로, 그대로 쓰면 단종 품목이 정상으로 올라간다.
+bench/ecount_api_mock.py 로컬 모의 서버로 리허설 / 측정할 수 있다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import openpyxl
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.collectors import Collector
+from utils.run_journal import file_sha256
+
+ECOUNT_API_URL = "https://oapi.ecount.com"
+
+BALANCE_PATH = "/OAPI/V2/InventoryBalance/GetListInventoryBalanceStatusByLocation"
+PRODUCTS_PATH = "/OAPI/V2/InventoryBasic/GetBasicProductsList"
+
+# 이카운트 품목구분 코드 → export 표기
+PROD_TYPES = {"0": "원재료", "1": "제품", "2": "반제품", "3": "상품", "4": "부재료", "7": "무형상품"}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+PRODUCTS_TTL = 300   # 품목 목록 재사용 시간 (본사/허브 재수집, 이어하기가 짧은 간격으로 다시 부를 때)
+
+
+class ApiError(Exception):
+    pass
+
+
+class SessionExpired(ApiError):
+    pass
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+class RateLimiter:
+    """토큰 버킷: 초당 rate 건, 최대 burst 건까지 몰아서 (스레드 공유). rate <= 0 이면 제한 없음"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """서버가 속도 제한을 알려 오면 seconds 동안 모든 스레드가 쉬도록 버킷을 비운다"""
+        if self.rate <= 0:
+            time.sleep(seconds)
+            return
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+def _number(value):
+    """API 수량/단가 문자열('12.0000') → int / float (빈 값 0)"""
+    try:
+        num = float(str(value).replace(",", "") or 0)
+    except ValueError:
+        return 0
+    return int(num) if num.is_integer() else num
+
+
+def _retry_after(resp, default):
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class ApiCollector(Collector):
+    """이카운트 OpenAPI 수집기 (계정 하나). 여러 실행에 걸쳐 재사용하면 세션 / 커넥션 / 품목 목록을 이어 쓴다."""
+
+    name = "api"
+    reports = frozenset({"inventory_balance"})
+
+    def __init__(self, com_code, user_id, api_key, download_path, api_url=ECOUNT_API_URL, workers=4,
+                 rate=2.0, burst=2, page_size=1000, timeout=(5, 60), max_retries=3, log=print,
+                 metrics_cb=None, span_cb=None):
+        self.com_code = com_code
+        self.user_id = user_id
+        self.api_key = api_key
+        self.download_path = download_path
+        self.api_url = api_url.rstrip("/")
+        self.workers = max(1, int(workers))
+        self.page_size = max(1, int(page_size))
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.log = log
+        self.metrics_cb = metrics_cb
+        self.span_cb = span_cb
+        self.limiter = RateLimiter(rate, burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.workers + 1, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._login_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._session_id = None
+        self._base = None
+        self._products = None        # (받은 시각, {품목코드: 행})
+        self._written = {}           # 저장 경로 → (내용 해시, 파일 sha256)
+        self._last = None
+        self.calls = 0
+        self.retries = 0
+
+    # ───────── HTTP ─────────
+
+    def _span(self, name, **attrs):
+        return self.span_cb(name, **attrs) if self.span_cb is not None else _NoSpan()
+
+    def _metric(self, stage, started, ok):
+        if self.metrics_cb is not None:
+            try:
+                self.metrics_cb(stage, time.monotonic() - started, ok)
+            except Exception:
+                pass
+
+    def _post(self, url, body):
+        """요청 하나 (속도 제한 + 429/5xx/연결 오류 재시도) → 응답의 Data"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            last = attempt == self.max_retries
+            try:
+                resp = self.session.post(url, json=body, timeout=self.timeout)
+            except requests.RequestException as e:
+                if last:
+                    raise ApiError(f"연결 실패: {e}")
+                with self._stats_lock:
+                    self.retries += 1
+                time.sleep(min(8.0, 0.5 * 2 ** attempt))
+                continue
+            with self._stats_lock:
+                self.calls += 1
+            if resp.status_code in RETRY_STATUS:
+                if last:
+                    raise ApiError(f"HTTP {resp.status_code} (재시도 {self.max_retries}회 소진)")
+                with self._stats_lock:
+                    self.retries += 1
+                self.limiter.penalize(_retry_after(resp, 0.5 * 2 ** attempt))
+                continue
+            if resp.status_code == 401:
+                raise SessionExpired("HTTP 401")
+            try:
+                payload = resp.json()
+            except ValueError:
+                raise ApiError(f"JSON 아님 (HTTP {resp.status_code}): {resp.text[:120]}")
+            status = str(payload.get("Status", resp.status_code))
+            if status == "200":
+                return payload.get("Data") or {}
+            message = (payload.get("Error") or {}).get("Message") or f"Status {status}"
+            if status == "401":
+                raise SessionExpired(message)
+            raise ApiError(message)
+        raise ApiError("재시도 소진")
+
+    def _login(self):
+        """SESSION_ID (없으면 Zone 조회 + 로그인)"""
+        with self._login_lock:
+            if self._session_id:
+                return self._session_id
+            started = time.monotonic()
+            ok = False
+            try:
+                with self._span("api:login"):
+                    zone = str(self._post(f"{self.api_url}/OAPI/V2/Zone", {"COM_CODE": self.com_code}).get("ZONE") or "")
+                    # 💡 기본 주소면 존별 호스트로, 그 외(모의 서버 / 프록시)는 지정한 주소를 그대로 쓴다
+                    self._base = f"https://oapi{zone.lower()}.ecount.com" \
+                        if self.api_url == ECOUNT_API_URL and zone else self.api_url
+                    data = self._post(f"{self._base}/OAPI/V2/OAPILogin", {
+                        "COM_CODE": self.com_code, "USER_ID": self.user_id, "API_CERT_KEY": self.api_key,
+                        "LAN_TYPE": "ko-KR", "ZONE": zone,
+                    })
+                session_id = (data.get("Datas") or {}).get("SESSION_ID")
+                if not session_id:
+                    raise ApiError("로그인 응답에 SESSION_ID 없음")
+                self._session_id = session_id
+                ok = True
+                self.log(f"🔑 [OpenAPI] 로그인 성공 (존 {zone or '-'})")
+                return session_id
+            finally:
+                self._metric("login", started, ok)
+
+    def _call(self, path, body):
+        """세션이 필요한 API 호출 → Data (세션 만료면 한 번 재로그인)"""
+        for attempt in range(2):
+            session_id = self._login()
+            try:
+                return self._post(f"{self._base}{path}?SESSION_ID={session_id}", body)
+            except SessionExpired:
+                with self._login_lock:
+                    if self._session_id == session_id:
+                        self._session_id = None
+                if attempt:
+                    raise
+                self.log("🔄 [OpenAPI] 세션 만료 - 재로그인")
+
+    def _fetch_all(self, path, body):
+        """페이지 전체 조회: 첫 페이지의 TotalCnt 로 페이지 수를 정하고 나머지는 동시 요청 → (행 목록, 페이지 수)"""
+        def page(n):
+            return self._call(path, dict(body, PAGE_CURRENT=n, PAGE_SIZE=self.page_size)).get("Result") or []
+
+        first = self._call(path, dict(body, PAGE_CURRENT=1, PAGE_SIZE=self.page_size))
+        rows = list(first.get("Result") or [])
+        total = int(first.get("TotalCnt") or len(rows))
+        if len(rows) >= total:   # 페이지를 나누지 않고 한 번에 준 경우
+            return rows, 1
+        pages = -(-total // self.page_size)
+        with ThreadPoolExecutor(max_workers=min(self.workers, pages - 1), thread_name_prefix="ecount-api") as pool:
+            for part in pool.map(page, range(2, pages + 1)):   # map 은 페이지 순서를 유지한다
+                rows.extend(part)
+        return rows, pages
+
+    def _product_map(self):
+        """품목코드 → 품목 행 (PRODUCTS_TTL 동안 재사용)"""
+        cached = self._products
+        if cached is not None and time.monotonic() - cached[0] < PRODUCTS_TTL:
+            return cached[1]
+        rows, _ = self._fetch_all(PRODUCTS_PATH, {})
+        products = {str(r.get("PROD_CD", "")).strip(): r for r in rows if r.get("PROD_CD")}
+        self._products = (time.monotonic(), products)
+        return products
+
+    # ───────── 리포트 ─────────
+
+    def _inventory_balance(self):
+        mmdd = datetime.now().strftime("%m%d")
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ecount-api-products") as pool:
+            products = pool.submit(self._product_map)   # 잔량 페이지와 품목 목록을 동시에 받는다
+            balance, pages = self._fetch_all(BALANCE_PATH, {"BASE_DATE": datetime.now().strftime("%Y%m%d")})
+            products = products.result()
+        rows = []
+        for r in balance:
+            code = str(r.get("PROD_CD", "")).strip()
+            item = products.get(code, {})
+            size = str(r.get("PROD_SIZE_DES") or item.get("SIZE_DES") or "").strip()
+            name = str(r.get("PROD_DES") or item.get("PROD_DES") or "").strip()
+            rows.append((code, f"{name}[{size}]" if size else name,
+                         PROD_TYPES.get(str(item.get("PROD_TYPE", "")), ""),
+                         str(r.get("WH_CD", "")).strip(), str(r.get("WH_DES", "")).strip(),
+                         _number(r.get("BAL_QTY")), _number(item.get("IN_PRICE"))))
+        path = self._write_report(f"{mmdd}_창고별재고현황(1).xlsx", "창고별재고현황 (OpenAPI)",
+                                  ["품목코드", "품목명[규격]", "품목구분", "창고코드", "창고명", "재고수량", "입고단가"], rows)
+        return path, len(rows), pages
+
+    def _write_report(self, filename, title, header, rows):
+        """export 모양(1행 안내, 2행 헤더) 엑셀 저장. 내용이 직전 저장분과 같으면 다시 쓰지 않는다 → 경로"""
+        path = os.path.abspath(os.path.join(self.download_path, filename))
+        digest = hashlib.sha256(json.dumps([header, rows], ensure_ascii=False, default=str).encode()).hexdigest()
+        prev = self._written.get(path)
+        if prev and prev[0] == digest and os.path.exists(path) and file_sha256(path) == prev[1]:
+            os.utime(path)   # '가장 최근 파일' 탐색에 잡히도록 mtime 만 갱신
+            return path
+        book = openpyxl.Workbook(write_only=True)
+        sheet = book.create_sheet()
+        sheet.append([f"{title} / {datetime.now():%Y/%m/%d %H:%M}"])
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        part = path + ".part"
+        book.save(part)
+        os.replace(part, path)
+        self._written[path] = (digest, file_sha256(path))
+        return path
+
+    # ───────── 수집기 계약 ─────────
+
+    def fetch(self, report):
+        if report not in self.reports:
+            return False, f"OpenAPI 미지원 리포트: {report}"
+        started = time.monotonic()
+        calls0 = self.calls
+        ok = False
+        try:
+            with self._span(f"api:{report}") as span:
+                path, count, pages = getattr(self, f"_{report}")()
+                span.set(rows=count, pages=pages, calls=self.calls - calls0)
+            elapsed = time.monotonic() - started
+            self._last = {"path": path, "bytes": os.path.getsize(path), "sha256": self._written[path][1],
+                          "elapsed": elapsed}
+            ok = True
+            self.log(f"  💾 [OpenAPI] {os.path.basename(path)}: {count:,}행 / {pages}페이지 / "
+                     f"요청 {self.calls - calls0}건 ({elapsed:.1f}s)")
+            return True, os.path.basename(path)
+        except Exception as e:
+            return False, f"OpenAPI 오류: {e}"
+        finally:
+            self._metric("download", started, ok)
+
+    @property
+    def last_download(self):
+        return self._last
+
+    def close(self):
+        self.session.close()
+
+    def summary(self):
+        return (f"요청 {self.calls}건 / 재시도 {self.retries}건 / 속도 제한 대기 {self.limiter.waited:.1f}s")
@@ -4,39 +4,152 @@ Ecount ERP RPA - Playwright sync API 버전 v2.
 Selenium 스타일의 time.sleep + 키보드 매크로 → Playwright 네이티브 패턴으로 전환.
 - auto-waiting / wait_for_url / wait_for_load_state 활용
 - get_by_role / get_by_text 등 사용자 관점 로케이터
-- page.expect_download() + 폴백 파일 감시
+- page.expect_download() + save_as (폴더 감시 없음)
 
 Selenium 버전은 utils/ecount_rpa_selenium.py 에 백업되어 있음.
 공개 인터페이스(클래스/메서드 시그니처)는 동일하므로 ecount_agent.py 수정 불필요.
 """
 import os
-import glob
 import time
+import hashlib
 import logging
+import functools
+import threading
 from datetime import datetime
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
 
+from utils.page_readiness import PageReadiness, WaitStats
+from utils.lean_profile import LEAN_ARGS, LEAN_VIEWPORT, ResourceFilter, shared_sizes, summary as resource_summary
+
+ECOUNT_LOGIN_URL = "https://login.ecount.com/"
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    """파일을 청크 단위로 읽으며 (크기, sha256 hex) 계산"""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+            size += len(chunk)
+    return size, h.hexdigest()
+
+
+def _result_ok(result):
+    """(ok, msg) 튜플은 ok, 그 외 반환값은 False 가 아니면 성공"""
+    return bool(result[0]) if isinstance(result, tuple) else result is not False
+
+
+def _observed(stage):
+    """메서드 소요 시간을 metrics_cb(stage, 초, 성공 여부) 로 보고하고 span_cb 스팬으로 감싸는 데코레이터.
+
+    반환값은 _result_ok 기준, 예외는 실패로 본다.
+    같은 단계가 안에서 다시 불리면(즐겨찾기 → 메뉴검색 폴백 등) 바깥 호출만 기록한다.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            key = (stage, threading.get_ident())   # 창고 순회 탭 스레드마다 따로
+            if (self.metrics_cb is None and self.span_cb is None) or key in self._observing:
+                return fn(self, *args, **kwargs)
+            self._observing.add(key)
+            started = time.monotonic()
+            ok = False
+            try:
+                with self._span(stage, method=fn.__name__) as span:
+                    result = fn(self, *args, **kwargs)
+                    ok = _result_ok(result)
+                    span.set(ok=ok)
+                return result
+            finally:
+                self._observing.discard(key)
+                if self.metrics_cb is not None:
+                    try:
+                        self.metrics_cb(stage, time.monotonic() - started, ok)
+                    except Exception:
+                        pass
+        return wrapper
+    return deco
+
+
+def _traced(fn):
+    """리포트 수집 메서드 전체를 span_cb 스팬(메서드 이름)으로 감싸는 데코레이터"""
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._span(fn.__name__) as span:
+            result = fn(self, *args, **kwargs)
+            span.set(ok=_result_ok(result))
+            return result
+    return wrapper
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
 
 class EcountRPA:
-    def __init__(self, com_code, user_id, user_pw, download_path, headless=True, status_cb=None):
+    def __init__(self, com_code, user_id, user_pw, download_path, headless=True, status_cb=None,
+                 warehouse_workers=1, download_timeout=90, progress_cb=None, metrics_cb=None,
+                 span_cb=None, login_url=ECOUNT_LOGIN_URL, browser_channel="chrome", profile="full",
+                 allow_hosts=(), resource_cb=None, supervisor=None):
         self.com_code = com_code
         self.user_id = user_id
         self.user_pw = user_pw
         self.download_path = download_path
         self.headless = headless
+        # 로그인 페이지 주소 (bench/ecount_sim.py 같은 로컬 시뮬레이터로 돌릴 때 교체)
+        self.login_url = login_url
+        # None 이면 설치된 크롬 대신 Playwright 번들 Chromium 사용
+        self.browser_channel = browser_channel
+        # "lean" 이면 이미지/폰트/외부 호스트 요청 차단 + 캐시 상한 실행 인자 (utils/lean_profile.py)
+        self.profile = profile
+        self.allow_hosts = tuple(allow_hosts or ())
+        # resource_cb(stats): 실행마다 차단 건수 / 절약 바이트 / 로드 바이트 보고
+        self.resource_cb = resource_cb
+        self._resources = None
+        # 공유 브라우저 관리자 (utils/browser_supervisor.py). 있으면 크롬을 따로 띄우지 않고 붙어서 컨텍스트만 만든다
+        self.supervisor = supervisor
+        self._shared = False
         self.status_cb = status_cb
+        # progress_cb(stage, done, total): 창고 순회처럼 건수가 있는 단계의 진행률 보고
+        self.progress_cb = progress_cb
+        # metrics_cb(stage, seconds, ok): login / navigate / download 단계 소요 시간 보고 (utils/metrics.py)
+        self.metrics_cb = metrics_cb
+        # span_cb(name, **attrs) → 컨텍스트 매니저: 로그인/메뉴 이동/다운로드/리포트 수집 트레이스 스팬 (utils/tracing.py)
+        self.span_cb = span_cb
+        self._observing = set()
+        # 관리항목별재고현황 창고 순회 시 동시에 여는 탭 수 (1 = 기존 단일 탭 순차 방식)
+        self.warehouse_workers = max(1, int(warehouse_workers or 1))
+        # 리포트 하나의 Excel 다운로드 제한 시간(초) 과 마지막 다운로드 정보 (경로/크기/sha256/소요시간)
+        self.download_timeout = download_timeout
+        self.last_download = None
         self._pw = None
         self._browser = None
         self._context = None
         self.page = None
+        # 화면 준비 신호 추적기 (페이지별) + 라벨별 대기 시간 통계 (전체 공유)
+        self.wait_stats = WaitStats()
+        self._readiness = {}
 
         # storage_state 파일 경로 (로그인 세션 영구 보관)
+        # 회사코드별로 분리해 본사/허브 계정이 동시에 돌아도 서로의 세션을 덮거나 복원하지 않도록 한다.
         base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self._state_path = os.path.join(base, "chrome_profile_pw", "storage_state.json")
+        self._state_path = os.path.join(base, "chrome_profile_pw", f"storage_state_{com_code}.json")
+        self._sizes_path = os.path.join(base, "chrome_profile_pw", "resource_sizes.json")
         os.makedirs(os.path.dirname(self._state_path), exist_ok=True)
 
     # ───────────────────────── 내부 유틸 ─────────────────────────
 
+    def _span(self, name, **attrs):
+        return self.span_cb(name, **attrs) if self.span_cb is not None else _NoSpan()
+
     def _log(self, msg):
         try:
             logging.info(msg)
@@ -52,6 +165,17 @@ class EcountRPA:
             except:
                 pass
 
+    def _report_step(self, stage, done, total):
+        if self.progress_cb:
+            try:
+                self.progress_cb(stage, done, total)
+            except Exception:
+                pass
+
+    def _on_login_page(self, url=None):
+        """로그인 페이지에 머물러 있는지 (로그인 성공 / 세션 만료 판정용)"""
+        return (url if url is not None else self.page.url).startswith(self.login_url)
+
     def _setup_browser(self):
         """브라우저 실행 + 컨텍스트 생성."""
         # 💡 [요구사항] 네트워크 경로(UNC) 인식 실패(WinError 123 등) 시 로컬 Ecount_stocks 폴더로 안전하게 폴백
@@ -62,25 +186,39 @@ class EcountRPA:
             self.download_path = os.path.join(base_dir, "Ecount_stocks")
             os.makedirs(self.download_path, exist_ok=True)
 
+        lean = self.profile == "lean"
+        launch_args = [
+            "--disable-blink-features=AutomationControlled",
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--start-maximized",
+        ] + (LEAN_ARGS if lean else [])
         self._pw = sync_playwright().start()
-        self._browser = self._pw.chromium.launch(
-            channel="chrome",
-            headless=self.headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--start-maximized",
-            ],
-        )
+        self._browser = None
+        if self.supervisor is not None:
+            endpoint = self.supervisor.acquire(self.browser_channel, self.headless, launch_args)
+            if endpoint:
+                try:
+                    self._browser = self._pw.chromium.connect_over_cdp(endpoint)
+                    self._shared = True
+                    self._log("  🔗 공유 브라우저에 연결 (계정별 컨텍스트 분리)")
+                except Exception as e:
+                    self.supervisor.release()
+                    self._log(f"  ⚠️ 공유 브라우저 연결 실패 - 전용 브라우저로 실행: {e}")
+        if self._browser is None:
+            self._browser = self._pw.chromium.launch(
+                channel=self.browser_channel,
+                headless=self.headless,
+                args=launch_args,
+            )
 
         ctx_kwargs = {
             "accept_downloads": True,
             "no_viewport": True,
         }
-        if self.headless:
+        if self.headless or lean:
             ctx_kwargs.pop("no_viewport")
-            ctx_kwargs["viewport"] = {"width": 1920, "height": 1080}
+            ctx_kwargs["viewport"] = LEAN_VIEWPORT if lean else {"width": 1920, "height": 1080}
 
         if os.path.exists(self._state_path):
             try:
@@ -90,9 +228,29 @@ class EcountRPA:
                 pass
 
         self._context = self._browser.new_context(**ctx_kwargs)
+        # 경량 프로필은 요청 차단, 일반 프로필은 라우트 없이 응답 리스너로 '막았을' 리소스 크기만 학습 (절약량 계산용)
+        self._resources = ResourceFilter(self.login_url, self.allow_hosts, block=lean,
+                                         sizes=shared_sizes(self._sizes_path))
+        self._resources.attach(self._context)
+        if lean:
+            self._log(f"  🪶 경량 프로필: 이미지/폰트/외부 호스트 차단, 뷰포트 {LEAN_VIEWPORT['width']}x{LEAN_VIEWPORT['height']}")
         self.page = self._context.new_page()
         self.page.set_default_timeout(15000)
 
+    def _report_resources(self):
+        """이번 실행의 리소스 통계 로그 + resource_cb 보고"""
+        if self._resources is None:
+            return
+        stats = self._resources.take_stats()
+        if not stats["responses"] and not stats["blocked_total"]:
+            return
+        self._log(f"🪶 리소스 ({stats['profile']}): {resource_summary(stats)}")
+        if self.resource_cb:
+            try:
+                self.resource_cb(stats)
+            except Exception:
+                pass
+
     def _save_state(self):
         """로그인 성공 후 세션 상태 저장."""
         try:
@@ -102,67 +260,79 @@ class EcountRPA:
 
     # ───────── Playwright 네이티브: 프레임 & 로딩 대기 ─────────
 
-    def _work_frame(self):
+    def _work_frame(self, page=None):
         """이카운트 작업 iframe 반환. name 기반 우선 탐색 → 폴백으로 마지막 iframe."""
+        page = page or self.page
         # 이카운트의 주요 작업 iframe 이름들
         for name in ["ifrmExcel", "ifrm", "ifrmContent"]:
-            f = self.page.frame(name=name)
+            f = page.frame(name=name)
             if f and not f.is_detached():
                 self._log(f"  📦 작업 frame: {name}")
                 return f
         # 폴백: 마지막 non-main iframe
-        non_main = [f for f in self.page.frames if f is not self.page.main_frame and not f.is_detached()]
+        non_main = [f for f in page.frames if f is not page.main_frame and not f.is_detached()]
         if non_main:
             chosen = non_main[-1]
             self._log(f"  📦 작업 frame: {chosen.name or 'unnamed'} (총 {len(non_main)}개)")
             return chosen
-        return self.page.main_frame
-
-    def _wait_page_ready(self, timeout=5.0):
-        """메뉴 진입 후 페이지 데이터 로딩 대기.
-        
-        iframe이 감지되면 추가 2초 대기 후 진행.
-        이카운트는 SPA 방식이라 networkidle이 불안정하므로 
-        iframe 감지 + 고정 대기 조합 사용.
+        return page.main_frame
+
+    def _ready(self, page=None):
+        """페이지별 PageReadiness (처음 쓸 때 네트워크 이벤트 구독)"""
+        page = page or self.page
+        tracker = self._readiness.get(id(page))
+        if tracker is None or tracker.page is not page:
+            tracker = PageReadiness(page, self.wait_stats)
+            self._readiness[id(page)] = tracker
+        return tracker
+
+    def _wait_page_ready(self, timeout=8.0, page=None, label="메뉴", after=None):
+        """메뉴 진입/조회 후 페이지 데이터 로딩 대기.
+
+        이카운트는 SPA 방식이라 networkidle 이 불안정하므로 고정 sleep 대신
+        XHR 완료 + 로딩 오버레이 사라짐 + 그리드 행 수 안정 신호로 판정한다 (utils/page_readiness.py).
+        after 는 동작 직전 self._ready(page).mark() 값 (조회 요청이 시작되기 전에 통과하는 것 방지).
         """
-        start = time.time()
-        while time.time() - start < timeout:
-            non_main = [f for f in self.page.frames if f is not self.page.main_frame and not f.is_detached()]
-            if non_main:
-                time.sleep(2)  # iframe 콘텐츠 렌더링 대기
-                return
-            time.sleep(0.3)
-        # timeout 경과해도 iframe 없으면 고정 대기 후 진행
-        time.sleep(2)
-
-    def _search_menu(self, keyword):
+        ok = self._ready(page).wait(label, timeout=timeout, after=after, require_frame=True)
+        if not ok:
+            self._log(f"  ⏳ '{label}' 준비 신호 대기 {timeout:.0f}초 초과 - 그대로 진행")
+        return ok
+
+    @_observed("navigate")
+    def _search_menu(self, keyword, page=None):
         """(백업용) 상단 메뉴 검색박스에 키워드 입력 후 Enter."""
-        self.page.bring_to_front()
-        box = self.page.locator("#txtSearch")
+        page = page or self.page
+        page.bring_to_front()
+        box = page.locator("#txtSearch")
         try:
             box.wait_for(state="visible", timeout=5000)
         except PWTimeout:
-            box = self.page.get_by_placeholder("메뉴검색")
+            box = page.get_by_placeholder("메뉴검색")
             box.wait_for(state="visible", timeout=5000)
         box.click()
         box.fill("")
         box.type(keyword, delay=100)
-        time.sleep(0.3)
+        # 자동완성 목록 조회가 끝날 때까지
+        self._ready(page).wait("메뉴검색 입력", timeout=1.5)
+        seq = self._ready(page).mark()
         box.press("Enter", no_wait_after=True)
         # 메뉴 전환 후 iframe 로딩 대기
-        self._wait_page_ready()
+        self._wait_page_ready(page=page, after=seq)
 
-    def _click_favorite_menu(self, menu_text):
+    @_observed("navigate")
+    def _click_favorite_menu(self, menu_text, page=None):
         """즐겨찾기 메뉴에서 해당 텍스트를 클릭하여 메뉴 이동.
         
         로그인 후 메인 화면의 즐겨찾기 영역에서 menu_text와 일치하는
         링크/버튼을 찾아 클릭합니다.
         """
+        page = page or self.page
         self._log(f"⭐ 즐겨찾기 메뉴 '{menu_text}' 클릭 시도...")
-        self.page.bring_to_front()
+        page.bring_to_front()
 
         # 전략 1: 메인 페이지에서 즐겨찾기 텍스트 클릭
-        for frame in [self.page.main_frame] + list(self.page.frames):
+        seq = self._ready(page).mark()
+        for frame in [page.main_frame] + list(page.frames):
             if frame.is_detached():
                 continue
             try:
@@ -170,30 +340,30 @@ class EcountRPA:
                 if loc.count() > 0:
                     loc.click()
                     self._log(f"  ✅ 즐겨찾기 '{menu_text}' 클릭 성공 (frame: {frame.name or 'main'})")
-                    self._wait_page_ready()
+                    self._wait_page_ready(page=page, after=seq)
                     return True
             except Exception:
                 continue
 
         # 전략 2: a 태그 title 속성으로 탐색
         try:
-            loc = self.page.locator(f"a[title*='{menu_text}']")
+            loc = page.locator(f"a[title*='{menu_text}']")
             if loc.count() > 0:
                 loc.first.click()
                 self._log(f"  ✅ 즐겨찾기 '{menu_text}' title 속성 클릭 성공")
-                self._wait_page_ready()
+                self._wait_page_ready(page=page, after=seq)
                 return True
         except Exception:
             pass
 
         # 전략 3: 메뉴 검색 폴백
         self._log(f"  ⚠️ 즐겨찾기에서 '{menu_text}' 못 찾음 - 메뉴 검색 폴백")
-        self._search_menu(menu_text)
+        self._search_menu(menu_text, page=page)
         return True
 
     # ───────── Playwright 네이티브: Excel 다운로드 ─────────
 
-    def _collect_excel_candidates(self):
+    def _collect_excel_candidates(self, page=None):
         """모든 frame에서 Excel 버튼 후보 수집 (iframe 우선, 메인 최후).
 
         각 후보는 (label, locator) 튜플. 호출자가 차례로 클릭 시도하여 다운로드 이벤트
@@ -208,13 +378,14 @@ class EcountRPA:
             ("img[alt*='Excel']", lambda f: f.locator("img[alt*='Excel' i]")),
             ("img[src*='excel']", lambda f: f.locator("img[src*='excel' i]")),
         ]
-        non_main = [f for f in self.page.frames
-                    if f is not self.page.main_frame and not f.is_detached()]
-        ordered = list(reversed(non_main)) + [self.page.main_frame]
+        page = page or self.page
+        non_main = [f for f in page.frames
+                    if f is not page.main_frame and not f.is_detached()]
+        ordered = list(reversed(non_main)) + [page.main_frame]
 
         candidates = []
         for frame in ordered:
-            tag = frame.name or ("main" if frame is self.page.main_frame else "iframe")
+            tag = frame.name or ("main" if frame is page.main_frame else "iframe")
             for sel_name, sel_fn in selectors:
                 try:
                     loc = sel_fn(frame).first
@@ -224,16 +395,23 @@ class EcountRPA:
                     continue
         return candidates
 
-    def _download_excel(self, target_filename):
+    @_observed("download")
+    def _download_excel(self, target_filename, page=None, timeout=None):
         """모든 Excel 버튼 후보를 순차 클릭하며 다운로드 이벤트 발생하는 것을 찾는다.
 
         각 후보를 6초 타임아웃으로 시도 - 가짜 버튼이면 빠르게 다음 후보로 넘어감.
-        후보 모두 실패 시 폴더 감시 폴백.
+        마지막 후보는 리포트 타임아웃(timeout, 기본 self.download_timeout)의 남은 시간 전부를 기다린다.
+        수신한 다운로드는 '.part' 임시 파일로 save_as 후 대상 파일명으로 원자적 교체하고,
+        청크 단위 sha256 을 계산해 self.last_download 에 남긴다.
+        (다운로드 폴더를 감시하지 않으므로 다른 파일을 집어오는 경합이 없다)
         """
+        page = page or self.page
+        timeout = timeout or self.download_timeout
         target_path = os.path.abspath(os.path.join(self.download_path, target_filename))
-        before_files = set(glob.glob(os.path.join(self.download_path, "*.xlsx")))
+        started = time.monotonic()
+        deadline = started + timeout
 
-        candidates = self._collect_excel_candidates()
+        candidates = self._collect_excel_candidates(page)
         if not candidates:
             self._log("  ❌ Excel 버튼 후보를 어떤 frame에서도 찾지 못함")
             return False, "Excel 버튼 탐색 실패"
@@ -242,8 +420,12 @@ class EcountRPA:
 
         download = None
         for idx, (label, loc) in enumerate(candidates, 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_s = remaining if idx == len(candidates) else min(6.0, remaining)
             try:
-                with self.page.expect_download(timeout=6000) as dl_info:
+                with page.expect_download(timeout=wait_s * 1000) as dl_info:
                     self._log(f"  🎯 [{idx}/{len(candidates)}] {label} 클릭 시도")
                     loc.click(timeout=3000, force=True)
                 download = dl_info.value
@@ -256,35 +438,36 @@ class EcountRPA:
                 self._log(f"  ⏭️ [{idx}/{len(candidates)}] {label} - 클릭 실패({e}), 다음 후보")
                 continue
 
-        if download is not None:
-            self._log(f"  ⬇️ 다운로드 수신: '{download.suggested_filename}'")
-            if os.path.exists(target_path):
-                os.remove(target_path)
-            download.save_as(target_path)
-            if os.path.exists(target_path) and os.path.getsize(target_path) > 0:
-                self._log(f"  💾 저장 완료: {os.path.getsize(target_path):,} bytes")
-                return True, target_filename
-            return False, f"저장 실패: {target_path}"
-
-        # 모든 후보 실패 → 폴더 감시 폴백 (마지막 클릭이 비동기로 떨어졌을 수 있음)
-        self._log("  ⚠️ 모든 후보에서 다운로드 미발생 - 폴더 감시 폴백")
-        for _ in range(10):
-            time.sleep(2)
-            new_files = set(glob.glob(os.path.join(self.download_path, "*.xlsx"))) - before_files
-            if new_files:
-                newest = max(new_files, key=os.path.getmtime)
-                self._log(f"  📁 폴백 성공: '{os.path.basename(newest)}'")
-                if os.path.abspath(newest) != target_path:
-                    if os.path.exists(target_path):
-                        os.remove(target_path)
-                    os.rename(newest, target_path)
-                if os.path.exists(target_path) and os.path.getsize(target_path) > 0:
-                    self._log(f"  💾 저장 완료: {os.path.getsize(target_path):,} bytes")
-                    return True, target_filename
-        return False, "모든 후보 클릭했으나 다운로드 미발생"
+        if download is None:
+            return False, f"다운로드 미발생 ({timeout:.0f}초 내 모든 후보 실패)"
+
+        self._log(f"  ⬇️ 다운로드 수신: '{download.suggested_filename}'")
+        part_path = target_path + ".part"
+        try:
+            # save_as 는 브라우저 쪽 다운로드가 끝날 때까지 블록된다
+            download.save_as(part_path)
+            failure = download.failure()
+            if failure:
+                raise RuntimeError(failure)
+            size, digest = _file_sha256(part_path)
+            if size == 0:
+                raise RuntimeError("빈 파일")
+            os.replace(part_path, target_path)
+        except Exception as e:
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            return False, f"저장 실패: {e}"
+
+        elapsed = time.monotonic() - started
+        self.last_download = {"path": target_path, "bytes": size, "sha256": digest, "elapsed": elapsed}
+        self._log(f"  💾 저장 완료: {size:,} bytes, sha256 {digest[:12]}… ({elapsed:.1f}s)")
+        return True, target_filename
+
     # ───────── 출력구분 클릭 ─────────
 
-    def _click_output_type(self, frame, label="(종)"):
+    def _click_output_type(self, frame, label="(종)", page=None):
         """출력구분 라디오/탭에서 지정 텍스트를 찾아 클릭.
         
         다양한 전략으로 탐색:
@@ -292,10 +475,11 @@ class EcountRPA:
         2. get_by_label (라디오 버튼 라벨)
         3. CSS 셀렉터 (라디오/input 주변 텍스트)
         """
+        page = page or self.page
         search_targets = []
         # 작업 frame + 메인 + 전체
         seen = set()
-        for f in [frame, self.page.main_frame] + list(self.page.frames):
+        for f in [frame, page.main_frame] + list(page.frames):
             if f.is_detached() or id(f) in seen:
                 continue
             seen.add(id(f))
@@ -359,41 +543,11 @@ class EcountRPA:
 
     # ───────────────────── 공개 메서드 ─────────────────────
 
+    @_observed("login")
     def login(self):
         try:
             self._setup_browser()
-            self._log("🌐 이카운트 로그인 페이지 접속 중...")
-            self.page.goto("https://login.ecount.com/", wait_until="domcontentloaded")
-
-            # 이미 로그인된 세션이면 패스
-            try:
-                self.page.locator("#txtSearch").wait_for(state="visible", timeout=3000)
-                self._log("✅ 기존 세션으로 자동 로그인됨")
-                return True, "로그인 성공 (기존 세션)"
-            except PWTimeout:
-                pass
-
-            self._log("🏢 회사코드/아이디/비밀번호 입력...")
-            self.page.locator("#com_code").fill(self.com_code)
-            self.page.locator("#id").fill(self.user_id)
-            self.page.locator("#passwd").fill(self.user_pw)
-
-            self._log("🚀 로그인 버튼 클릭")
-            self.page.locator("#save").click()
-
-            # Playwright 네이티브: URL 변경 감지 (로그인 성공 시 리다이렉트)
-            self._log("⌛ 메인 화면 진입 확인 중...")
-            try:
-                self.page.wait_for_url(
-                    lambda url: "login.ecount.com" not in url,
-                    timeout=10000
-                )
-                self._log("✅ 로그인 성공")
-                self._save_state()
-                return True, "로그인 성공"
-            except PWTimeout:
-                return False, "로그인 실패 (메인 화면 미진입)"
-
+            return self._login_on_page()
         except Exception as e:
             self._log(f"❌ 로그인 오류: {e}")
             try:
@@ -402,6 +556,108 @@ class EcountRPA:
                 pass
             return False, f"로그인 실패: {e}"
 
+    def _login_on_page(self):
+        """이미 떠 있는 브라우저/컨텍스트에서 로그인 페이지 접속 후 로그인"""
+        self._log("🌐 이카운트 로그인 페이지 접속 중...")
+        self.page.goto(self.login_url, wait_until="domcontentloaded")
+
+        # 이미 로그인된 세션이면 패스
+        try:
+            self.page.locator("#txtSearch").wait_for(state="visible", timeout=3000)
+            self._log("✅ 기존 세션으로 자동 로그인됨")
+            return True, "로그인 성공 (기존 세션)"
+        except PWTimeout:
+            pass
+
+        self._log("🏢 회사코드/아이디/비밀번호 입력...")
+        self.page.locator("#com_code").fill(self.com_code)
+        self.page.locator("#id").fill(self.user_id)
+        self.page.locator("#passwd").fill(self.user_pw)
+
+        self._log("🚀 로그인 버튼 클릭")
+        self.page.locator("#save").click()
+
+        # Playwright 네이티브: URL 변경 감지 (로그인 성공 시 리다이렉트)
+        self._log("⌛ 메인 화면 진입 확인 중...")
+        try:
+            self.page.wait_for_url(
+                lambda url: not self._on_login_page(url),
+                timeout=10000
+            )
+            self._log("✅ 로그인 성공")
+            self._save_state()
+            return True, "로그인 성공"
+        except PWTimeout:
+            return False, "로그인 실패 (메인 화면 미진입)"
+
+    # ───────── 브라우저 재사용 (utils/browser_pool.py) ─────────
+
+    def is_alive(self):
+        """브라우저 프로세스와 컨텍스트가 살아 있는지"""
+        try:
+            return bool(self._browser and self._browser.is_connected() and self._context)
+        except Exception:
+            return False
+
+    def is_session_valid(self, timeout=5000):
+        """현재 페이지를 새로고침해 로그인 세션이 유효한지 가볍게 확인 (1초 내외)
+
+        세션이 만료되면 이카운트는 로그인 페이지로 보내므로 URL 과 메뉴검색 박스로 판정한다.
+        """
+        if not self.is_alive() or self.page is None or self.page.is_closed():
+            return False
+        try:
+            self.page.reload(wait_until="domcontentloaded", timeout=timeout)
+            if self._on_login_page():
+                return False
+            self.page.locator("#txtSearch").wait_for(state="visible", timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    @_observed("login")
+    def ensure_login(self):
+        """살아 있는 브라우저는 재사용하고, 세션이 만료됐을 때만 다시 로그인.
+
+        반환: (성공 여부, 메시지, 재사용 여부)
+        """
+        if not self.is_alive():
+            if self._pw is not None:
+                self.close()
+            ok, msg = self.login()
+            return ok, msg, False
+        try:
+            if self.page is None or self.page.is_closed():
+                self.page = self._context.new_page()
+                self.page.set_default_timeout(15000)
+            if self.is_session_valid():
+                self._log("♻️ 기존 브라우저 세션 재사용 (로그인 생략)")
+                return True, "세션 재사용", True
+            self._log("🔑 세션 만료 - 같은 브라우저에서 재로그인")
+            ok, msg = self._login_on_page()
+            return ok, msg, ok
+        except Exception as e:
+            self._log(f"⚠️ 세션 재사용 실패 - 브라우저 재시작: {e}")
+            self.close()
+            ok, msg = self.login()
+            return ok, msg, False
+
+    def reset_run_state(self):
+        """실행 1회가 끝난 뒤 재사용 전 정리: 추가 탭 닫기 + 대기 통계 출력/초기화"""
+        if self._context is not None:
+            for extra in list(self._context.pages):
+                if extra is not self.page:
+                    try:
+                        extra.close()
+                    except Exception:
+                        pass
+        if self.wait_stats.as_dict():
+            self._log(f"⏱️ 화면 대기 통계: {self.wait_stats.summary()}")
+        self._report_resources()
+        self.wait_stats = WaitStats()
+        self._readiness = {}
+
+    @_traced
     def get_inventory_balance(self):
         """창고별재고현황 수집"""
         try:
@@ -414,9 +670,10 @@ class EcountRPA:
             self._click_output_type(frame, "(종)")
             
             self._log("🔍 F8 조회")
+            seq = self._ready().mark()
             frame.locator("body").press("F8")
             # 조회 결과 로딩 대기
-            self._wait_page_ready()
+            self._wait_page_ready(timeout=30, label="창고별재고현황 조회", after=seq)
 
             mmdd = datetime.now().strftime("%m%d")
             self._log("📥 Excel 다운로드 중...")
@@ -431,77 +688,155 @@ class EcountRPA:
             self._log(f"❌ 수집 중 오류: {e}")
             return False, f"오류: {e}"
 
-    def get_item_inventory_by_warehouse(self, warehouses):
-        """관리항목별재고현황 - 창고별 순회 수집"""
+    def _submit_warehouse_query(self, page, wh_code, first):
+        """관리항목별재고현황 화면에서 창고코드를 입력하고 조회까지 실행 (다운로드는 하지 않음).
+
+        반환값은 조회 직전 readiness mark (_export_warehouse 의 조회 완료 대기에 사용)
+        """
+        frame = self._work_frame(page)
+        body = frame.locator("body")
+        ready = self._ready(page)
+
+        if first:
+            self._log("  ⌨️ 첫 창고 시퀀스")
+            self._press_keys(frame, ("Tab", 4))
+            body.type(wh_code, delay=50)
+            seq = ready.mark()
+            body.press("Enter")
+            # 창고코드 검색(코드 확인) 응답 대기
+            ready.wait("창고코드 입력", timeout=2, after=seq)
+            self._click_output_type(frame, "(종)", page=page)
+            ready.wait("출력구분", timeout=2)
+            # +4일 버튼 클릭으로 조회 (최근 1년 클릭 방식과 동일)
+            self._log("  📅 '+4일' 버튼 클릭...")
+            seq = ready.mark()
+            clicked_4day = False
+            for f in [frame, page.main_frame] + list(page.frames):
+                if f.is_detached():
+                    continue
+                try:
+                    loc = f.get_by_text("+4일", exact=True).first
+                    if loc.count() > 0:
+                        loc.click(force=True)
+                        self._log("  ✅ '+4일' 클릭 성공")
+                        clicked_4day = True
+                        break
+                except Exception:
+                    continue
+            if not clicked_4day:
+                self._log("  ⚠️ '+4일' 텍스트 못 찾음 - F8 폴백")
+                body.press("F8")
+        else:
+            self._log("  ⌨️ 다음 창고 시퀀스")
+            seq = ready.mark()
+            body.press("F3")
+            # 검색창 열림 (검색조건 로딩)
+            ready.wait("검색창 열기", timeout=3, after=seq)
+            self._press_keys(frame, ("Tab", 3), "Space")
+            ready.wait("검색조건 초기화", timeout=1)
+            body.press("Shift+Tab")
+            body.press("Tab")
+            body.type(wh_code, delay=50)
+            seq = ready.mark()
+            body.press("Enter")
+            ready.wait("창고코드 입력", timeout=2, after=seq)
+            seq = ready.mark()
+            body.press("F8")
+        return seq
+
+    def _export_warehouse(self, page, wh_name, mmdd, after=None):
+        """조회 결과 로딩 대기 후 Excel 다운로드"""
+        self._wait_page_ready(timeout=30, page=page, label="창고 조회", after=after)
+        self._log("  📥 Excel 다운로드 시도...")
+        ok, msg = self._download_excel(f"{mmdd}_{wh_name}(1).xlsx", page=page)
+        if ok:
+            self._log(f"  ✅ 완료: {msg}")
+        else:
+            self._log(f"  ⚠️ {wh_name}: {msg}")
+        return ok
+
+    def _open_warehouse_pages(self, count):
+        """같은 로그인 컨텍스트에서 관리항목별재고현황 탭을 count 개 준비 (첫 탭은 self.page)"""
+        pages = [self.page]
+        for _ in range(count - 1):
+            try:
+                extra = self._context.new_page()
+                extra.set_default_timeout(15000)
+                extra.goto(self.page.url, wait_until="domcontentloaded")
+                pages.append(extra)
+            except Exception as e:
+                self._log(f"  ⚠️ 추가 탭 생성 실패 - {len(pages)}개 탭으로 진행: {e}")
+                break
+        for p in pages:
+            self._click_favorite_menu("관리항목별재고현황", page=p)
+        return pages
+
+    @_traced
+    def get_item_inventory_by_warehouse(self, warehouses, workers=None, on_downloaded=None):
+        """관리항목별재고현황 - 창고별 순회 수집
+
+        workers > 1 이면 같은 로그인 컨텍스트에 탭을 workers 개 열고 창고 목록을 나눠 맡긴다.
+        sync API 는 한 스레드에서만 조작할 수 있으므로, 각 탭에 조회를 먼저 모두 걸어 두고
+        (서버 조회가 동시에 진행) 탭을 차례로 돌며 다운로드하는 웨이브 방식으로 겹쳐 실행한다.
+        창고 하나가 끝날 때마다 status_cb 로 진행 상황을 보고한다.
+        on_downloaded(wh, path) 를 주면 다운로드에 성공한 창고마다 즉시 호출한다
+        (다음 창고를 받는 동안 파싱/업로드를 진행하는 파이프라인용, 이 스레드에서 호출됨).
+        다운로드에 실패한 창고가 하나라도 있으면 나머지는 계속 받고 (False, 실패 창고 목록) 을 돌려준다.
+        """
+        workers = max(1, min(int(workers or self.warehouse_workers), len(warehouses) or 1))
+        pages = []
         try:
             mmdd = datetime.now().strftime("%m%d")
-            self._log("⭐ '관리항목별재고현황' 즐겨찾기 메뉴 이동...")
-            self._click_favorite_menu("관리항목별재고현황")
-
-            for i, wh in enumerate(warehouses):
-                wh_code = str(wh['warehouse_code']).strip()
-                wh_name = str(wh['warehouse_name']).strip()
-                self._log(f"🏢 [{i+1}/{len(warehouses)}] {wh_name} ({wh_code}) 수집...")
-
-                frame = self._work_frame()
-                body = frame.locator("body")
-
-                if i == 0:
-                    self._log("  ⌨️ 첫 창고 시퀀스")
-                    self._press_keys(frame, ("Tab", 4))
-                    body.type(wh_code, delay=50)
-                    body.press("Enter")
-                    time.sleep(0.3)
-                    self._click_output_type(frame, "(종)")
-                    time.sleep(0.5)
-                    # +4일 버튼 클릭으로 조회 (최근 1년 클릭 방식과 동일)
-                    self._log("  📅 '+4일' 버튼 클릭...")
-                    clicked_4day = False
-                    for f in [frame, self.page.main_frame] + list(self.page.frames):
-                        if f.is_detached():
-                            continue
-                        try:
-                            loc = f.get_by_text("+4일", exact=True).first
-                            if loc.count() > 0:
-                                loc.click(force=True)
-                                self._log("  ✅ '+4일' 클릭 성공")
-                                clicked_4day = True
-                                break
-                        except Exception:
-                            continue
-                    if not clicked_4day:
-                        self._log("  ⚠️ '+4일' 텍스트 못 찾음 - F8 폴백")
-                        body.press("F8")
-                else:
-                    self._log("  ⌨️ 다음 창고 시퀀스")
-                    body.press("F3")
-                    time.sleep(1.5)
-                    self._press_keys(frame, ("Tab", 3), "Space")
-                    time.sleep(0.3)
-                    body.press("Shift+Tab")
-                    body.press("Tab")
-                    body.type(wh_code, delay=50)
-                    body.press("Enter")
-                    time.sleep(0.5)
-                    body.press("F8")
-
-                # 조회 결과 로딩 대기
-                self._wait_page_ready()
-
-                self._log(f"  📥 Excel 다운로드 시도...")
-                ok, msg = self._download_excel(f"{mmdd}_{wh_name}(1).xlsx")
-                if ok:
-                    self._log(f"  ✅ 완료: {msg}")
-                else:
-                    self._log(f"  ⚠️ {wh_name}: {msg}")
-
+            total = len(warehouses)
+            done = 0
+            failed = []
+
+            if workers == 1:
+                self._log("⭐ '관리항목별재고현황' 즐겨찾기 메뉴 이동...")
+                self._click_favorite_menu("관리항목별재고현황")
+                pages = [self.page]
+            else:
+                self._log(f"⭐ '관리항목별재고현황' 탭 {workers}개 준비 (병렬 순회)...")
+                pages = self._open_warehouse_pages(workers)
+
+            # 라운드로빈 샤딩: 탭 k 는 warehouses[k::n]
+            shards = [warehouses[k::len(pages)] for k in range(len(pages))]
+            for rnd in range(max(len(sh) for sh in shards)):
+                wave = [(page, shard[rnd]) for page, shard in zip(pages, shards) if rnd < len(shard)]
+                marks = []
+                for page, wh in wave:
+                    wh_code = str(wh['warehouse_code']).strip()
+                    wh_name = str(wh['warehouse_name']).strip()
+                    self._log(f"🏢 [{done + 1}/{total}] {wh_name} ({wh_code}) 조회...")
+                    marks.append(self._submit_warehouse_query(page, wh_code, first=(rnd == 0)))
+                for (page, wh), seq in zip(wave, marks):
+                    wh_name = str(wh['warehouse_name']).strip()
+                    ok = self._export_warehouse(page, wh_name, mmdd, after=seq)
+                    if not ok:
+                        failed.append(wh_name)
+                    elif on_downloaded is not None:
+                        on_downloaded(wh, os.path.join(self.download_path, f"{mmdd}_{wh_name}(1).xlsx"))
+                    done += 1
+                    self._log(f"📦 창고 수집 진행 [{done}/{total}] {wh_name}")
+                    self._report_step("창고 수집", done, total)
+
+            if failed:
+                self._log(f"⚠️ 창고 {len(failed)}/{total}개 다운로드 실패: {', '.join(failed)}")
+                return False, f"{total - len(failed)}/{total}개 창고 수집 (실패: {', '.join(failed)})"
             self._log("🎉 모든 창고 수집 완료")
-            return True, f"{len(warehouses)}개 창고 수집 완료"
+            return True, f"{total}개 창고 수집 완료"
 
         except Exception as e:
             self._log(f"❌ 순회 수집 오류: {e}")
             return False, str(e)
+        finally:
+            for extra in pages[1:]:
+                try:
+                    extra.close()
+                except Exception:
+                    pass
 
+    @_traced
     def get_item_master_excel(self):
         """품목등록 메뉴에서 품목 마스터 다운로드"""
         try:
@@ -521,6 +856,7 @@ class EcountRPA:
             self._log(f"❌ 품목 마스터 수집 오류: {e}")
             return False, str(e)
 
+    @_traced
     def get_inventory_movement(self):
         """재고변동표 수집 - 월별/최근 1년 기준"""
         try:
@@ -549,7 +885,7 @@ class EcountRPA:
             if not clicked_monthly:
                 self._log("  ⚠️ '월별' 텍스트 못 찾음 - 키보드 폴백")
 
-            time.sleep(0.5)
+            self._ready().wait("출력구분", timeout=2)
 
             # "최근 1년" 기간 클릭
             self._log("📅 기간 '최근 1년' 클릭...")
@@ -569,17 +905,17 @@ class EcountRPA:
             if not clicked_period:
                 self._log("  ⚠️ '최근 1년' 텍스트 못 찾음")
 
-            time.sleep(0.5)
+            self._ready().wait("기간 선택", timeout=2)
 
-            # F8 조회
+            # F8 조회 (대량 데이터라 그리드 행 수가 멈출 때까지 대기)
             self._log("🔍 F8 조회")
+            seq = self._ready().mark()
             body.press("F8")
-            self._wait_page_ready()
-            time.sleep(2)  # 대량 데이터 로딩 추가 대기
+            self._wait_page_ready(timeout=60, label="재고변동표 조회", after=seq)
 
             # Excel 다운로드
             self._log("📥 Excel 다운로드 중...")
-            ok, msg = self._download_excel(f"{mmdd}_재고변동표(1).xlsx")
+            ok, msg = self._download_excel(f"{mmdd}_재고변동표(1).xlsx", timeout=max(180, self.download_timeout))
             if ok:
                 self._log(f"✅ 재고변동표 다운로드 완료: {msg}")
                 return True, msg
@@ -591,6 +927,9 @@ class EcountRPA:
             return False, str(e)
 
     def close(self):
+        if self.wait_stats.as_dict():
+            self._log(f"⏱️ 화면 대기 통계: {self.wait_stats.summary()}")
+        self._report_resources()
         self._log("🧹 RPA 리소스 해제 및 브라우저 종료 시도...")
         try:
             if self.page:
@@ -606,9 +945,13 @@ class EcountRPA:
             
         try:
             if self._browser:
+                # 공유 브라우저면 이 계정의 연결만 끊긴다 (크롬은 관리자가 닫음)
                 self._browser.close()
         except Exception as e:
             self._log(f"  ⚠️ browser 종료 중 오류: {e}")
+        if self._shared:
+            self._shared = False
+            self.supervisor.release()
             
         try:
             if self._pw:
@@ -617,6 +960,8 @@ class EcountRPA:
             self._log(f"  ⚠️ playwright stop 중 오류: {e}")
             
         self.page = None
+        self._readiness = {}
+        self._resources = None
         self._context = None
         self._browser = None
         self._pw = None
@@ -0,0 +1,92 @@
+"""
+이카운트 Excel 내보내기 공용 리더.
+
+이카운트 엑셀은 상단에 회사명/기간 등 안내 행이 있고 그 아래에 '품목코드' 헤더가 온다.
+기존에는 pd.read_excel(header=None) 로 한 번 읽어 헤더 행을 찾고, header=idx 로 다시 읽어
+같은 파일을 두 번 파싱했다. 여기서는 openpyxl read-only 모드로 시트를 한 번만 스트리밍하면서
+헤더 행을 찾고, pandas 의 TextParser 로 read_excel 과 동일한 컬럼 타입 추론을 적용한다.
+"""
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+try:
+    import openpyxl
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+except ImportError:  # openpyxl 이 없으면 pandas 기본 엔진으로 한 번만 읽는다
+    openpyxl = None
+
+
+def _convert_cell(cell):
+    """pandas openpyxl 리더와 동일한 셀 변환 (빈 셀 '', 정수형 실수 → int)"""
+    value = cell.value
+    if value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    return value
+
+
+def _trim_and_pad(rows, last_row_with_data):
+    """뒤쪽 빈 행 제거 + 행 길이를 최대 폭으로 맞춤 (pandas get_sheet_data 와 동일)"""
+    rows = rows[: last_row_with_data + 1]
+    if rows:
+        width = max(len(r) for r in rows)
+        rows = [r + [""] * (width - len(r)) for r in rows]
+    return rows
+
+
+def _has_keyword(row, keyword):
+    return any(keyword in str(v) for v in row if v != "" and not (isinstance(v, float) and np.isnan(v)))
+
+
+def _stream_rows(path, keyword):
+    """시트를 한 번 스트리밍하며 (행 목록, 헤더 행 인덱스) 반환. 헤더가 없으면 인덱스 -1"""
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = book.worksheets[0]
+        sheet.reset_dimensions()
+        rows, header_idx, last_row_with_data = [], -1, -1
+        for row_number, cells in enumerate(sheet.rows):
+            converted = [_convert_cell(c) for c in cells]
+            while converted and converted[-1] == "":
+                converted.pop()
+            if converted:
+                last_row_with_data = row_number
+                if header_idx < 0 and _has_keyword(converted, keyword):
+                    header_idx = row_number
+            rows.append(converted)
+        return _trim_and_pad(rows, last_row_with_data), header_idx
+    finally:
+        book.close()
+
+
+def _pandas_rows(path, keyword):
+    """openpyxl 을 쓸 수 없을 때의 폴백: header=None 으로 한 번만 읽어 같은 형태로 변환"""
+    raw = pd.read_excel(path, header=None, dtype=object)
+    rows = [["" if pd.isna(v) else v for v in r] for r in raw.itertuples(index=False, name=None)]
+    header_idx = next((i for i, r in enumerate(rows) if _has_keyword(r, keyword)), -1)
+    return rows, header_idx
+
+
+def read_excel_table(path, header_keyword='품목코드'):
+    """header_keyword 가 들어 있는 첫 행을 헤더로 삼아 DataFrame 반환.
+
+    - 컬럼명은 str(c).strip() 으로 정규화
+    - 컬럼 타입은 pd.read_excel(header=idx) 와 동일하게 추론
+    - 헤더 행을 찾지 못하면 None
+    """
+    if openpyxl is not None and str(path).lower().endswith((".xlsx", ".xlsm")):
+        rows, header_idx = _stream_rows(path, header_keyword)
+    else:
+        rows, header_idx = _pandas_rows(path, header_keyword)
+
+    if header_idx < 0:
+        return None
+
+    df = TextParser(rows, header=header_idx, skip_blank_lines=False).read()
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
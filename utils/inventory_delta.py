@@ -0,0 +1,94 @@
+"""
+warehouse_inventory_details 델타 동기화 계산.
+
+(warehouse_name, item_code, expiration_date) 를 키로 각 행의 값 해시를 비교해
+이전 스냅샷 대비 insert / update / delete 만 골라낸다.
+적용은 apply_inventory_delta RPC (inventory_delta_sync.sql) 한 번으로 원자적으로 처리한다.
+"""
+import hashlib
+import json
+
+KEY_FIELDS = ("warehouse_name", "item_code", "expiration_date")
+VALUE_FIELDS = ("item_name_spec", "category", "stock_qty", "unit_price", "inventory_cost")
+SNAPSHOT_SELECT = ",".join(KEY_FIELDS + VALUE_FIELDS)
+
+
+def _norm_text(v):
+    if v is None:
+        return None
+    s = str(v).strip()
+    return s if s else None
+
+
+def _norm_num(v):
+    try:
+        return round(float(v), 6)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def row_key(row):
+    return tuple(_norm_text(row.get(f)) for f in KEY_FIELDS)
+
+
+def row_hash(row):
+    values = [_norm_text(row.get("item_name_spec")), _norm_text(row.get("category"))]
+    values += [_norm_num(row.get(f)) for f in ("stock_qty", "unit_price", "inventory_cost")]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def merge_duplicate_keys(rows):
+    """같은 키가 여러 번 나오면 수량/재고비용을 합산해 한 행으로 합친다 (유니크 키 충돌 방지)"""
+    merged = {}
+    for row in rows:
+        key = row_key(row)
+        if key in merged:
+            base = merged[key]
+            base["stock_qty"] = (base.get("stock_qty") or 0) + (row.get("stock_qty") or 0)
+            base["inventory_cost"] = (base.get("inventory_cost") or 0) + (row.get("inventory_cost") or 0)
+        else:
+            merged[key] = dict(row)
+    return list(merged.values())
+
+
+class InventoryDelta:
+    __slots__ = ("inserts", "updates", "deletes", "unchanged")
+
+    def __init__(self):
+        self.inserts = []
+        self.updates = []
+        self.deletes = []    # 키 dict 목록
+        self.unchanged = 0
+
+    @property
+    def upserts(self):
+        return self.inserts + self.updates
+
+    @property
+    def change_count(self):
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def summary(self):
+        return (f"추가 {len(self.inserts)} / 변경 {len(self.updates)} / 삭제 {len(self.deletes)}"
+                f" / 유지 {self.unchanged}")
+
+
+def compute_delta(old_rows, new_rows):
+    """이전 스냅샷(old_rows) → 새 스냅샷(new_rows) 변경분. new_rows 는 merge_duplicate_keys 적용 후 전달"""
+    old_hashes = {row_key(r): row_hash(r) for r in old_rows}
+    delta = InventoryDelta()
+    seen = set()
+    for row in new_rows:
+        key = row_key(row)
+        seen.add(key)
+        prev = old_hashes.get(key)
+        if prev is None:
+            delta.inserts.append(row)
+        elif prev != row_hash(row):
+            delta.updates.append(row)
+        else:
+            delta.unchanged += 1
+    for key in old_hashes:
+        if key not in seen:
+            delta.deletes.append(dict(zip(KEY_FIELDS, key)))
+    return delta
@@ -0,0 +1,119 @@
+"""
+창고별재고현황 엑셀 → warehouse_inventory_details 레코드 변환.
+
+행 단위 iterrows / apply / re.sub 대신 pandas 문자열 연산으로 컬럼 전체를 한 번에 처리한다.
+결과 레코드는 기존 행 루프 구현과 동일하다 (scratch/bench_inventory_records.py 에서 대조 검증).
+"""
+import numpy as np
+import pandas as pd
+
+# is_valid() 기준 무효 토큰 (소문자 비교)
+INVALID_TOKENS = ('nan', 'none', 'null', '', 'undefined', '0', '0.0')
+EXCLUDE_CODE_PATTERN = '계|합계|소계|총계|Total'
+HUB_WAREHOUSE_NAME = "[HUB] 용인 창고"
+
+
+def str_col(df, col):
+    """str(value).strip() 과 동일한 문자열 컬럼. 컬럼이 없으면 빈 문자열."""
+    if col is None or col not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    # np.asarray(dtype=str) 는 NaN → 'nan', None → 'None' 으로 str() 과 같게 변환한다
+    values = np.asarray(df[col].to_numpy(dtype=object), dtype=str)
+    return pd.Series(values, index=df.index, dtype=object).str.strip()
+
+
+def _format_exp_dates(raw):
+    """관리항목명/유효기간 원문 → 'YYYY-MM-DD' (8자리/6자리 숫자), 그 외는 원문, 빈 값은 None"""
+    lowered = raw.str.lower()
+    present = (raw != '') & ~lowered.isin(('nan', 'none'))
+    nums = raw.str.replace(r'[^0-9]', '', regex=True)
+    n_len = nums.str.len()
+    ymd8 = nums.str[:4] + '-' + nums.str[4:6] + '-' + nums.str[6:8]
+    ymd6 = '20' + nums.str[:2] + '-' + nums.str[2:4] + '-' + nums.str[4:6]
+    formatted = pd.Series(
+        np.select([n_len == 8, n_len == 6], [ymd8, ymd6], default=raw),
+        index=raw.index, dtype=object,
+    )
+    return formatted.where(present, None)
+
+
+def inventory_records_from_frame(df, cols, wh_name_map, master_price_map, is_hub=False):
+    """창고별재고현황 DataFrame → 업로드 레코드 목록.
+
+    cols: {'code', 'name', 'wh', 'wh_code', 'qty', 'price'} → 실제 컬럼명 (없으면 None/기본값)
+    wh_name_map: 창고코드 → 정식 창고명
+    master_price_map: '{본사|허브}_{품목코드}' → 마스터 입고단가 (엑셀 단가가 0 이하일 때 대체)
+    """
+    code_col, name_col, wh_col = cols['code'], cols['name'], cols['wh']
+    wh_code_col, qty_col, price_col = cols.get('wh_code'), cols['qty'], cols['price']
+
+    # 문자열 컬럼은 한 번만 변환해 필터/레코드 생성에 재사용
+    text = {col: str_col(df, col) for col in (code_col, wh_col, name_col, wh_code_col) if col is not None}
+
+    # 필수 컬럼(코드, 창고명, 품목명) 유효성 검사 + 합계 행 제거
+    keep = pd.Series(True, index=df.index)
+    for col in (code_col, wh_col, name_col):
+        if col in df.columns:
+            keep &= ~text[col].str.lower().isin(INVALID_TOKENS)
+    keep &= ~df[code_col].astype(str).str.contains(EXCLUDE_CODE_PATTERN, na=False)
+    if not keep.any():
+        return []
+    df = df[keep]
+    text = {col: series[keep] for col, series in text.items()}
+
+    qty = pd.to_numeric(df[qty_col], errors='coerce').fillna(0).astype(float) if qty_col in df.columns \
+        else pd.Series(0.0, index=df.index)
+    price = pd.to_numeric(df[price_col], errors='coerce').fillna(0).astype(float) if price_col in df.columns \
+        else pd.Series(0.0, index=df.index)
+
+    # 구분(카테고리): 컬럼 탐색은 한 번만
+    cat_col = next((c for c in df.columns if '구분' in str(c)), None)
+    if cat_col is not None:
+        category = str_col(df, cat_col).str.replace(r'[\[\]]', '', regex=True)
+        category = category.where(
+            (category != '') & ~category.str.lower().isin(('nan', 'none', '일반', 'undefined')), '일반')
+    else:
+        category = pd.Series('일반', index=df.index, dtype=object)
+
+    # 유효기간: 관리항목명 우선, 비어 있으면 유효기간 컬럼
+    exp_primary = str_col(df, '관리항목명')
+    use_fallback = (exp_primary == '') | (exp_primary.str.lower() == 'nan')
+    exp_raw = exp_primary.where(~use_fallback, str_col(df, '유효기간')) if use_fallback.any() else exp_primary
+    exp_date = _format_exp_dates(exp_raw)
+
+    # 창고코드 → 정식명 변환. 없으면 엑셀의 창고명 그대로
+    raw_wh_name = text.get(wh_col, pd.Series('', index=df.index, dtype=object))
+    wh_name = raw_wh_name
+    if wh_code_col:
+        mapped = text[wh_code_col].map(wh_name_map)
+        wh_name = mapped.where(mapped.notna(), raw_wh_name)
+
+    item_code = text[code_col]
+    item_name = text.get(name_col, pd.Series('', index=df.index, dtype=object))
+    item_name = item_name.str.replace(r'\[.*?\]', '', regex=True).str.strip()
+
+    # 엑셀 단가가 0원 이하인 경우 마스터 단가로 대체 (품목코드가 있을 때만)
+    div_key = "허브" if is_hub else "본사"
+    master_price = (div_key + '_' + item_code).map(master_price_map).fillna(0.0).astype(float)
+    final_price = price.where((price > 0) | (item_code == ''), master_price)
+
+    columns = {
+        "warehouse_name": wh_name,
+        "item_code": item_code,
+        "item_name_spec": item_name,
+        "category": category,
+        "expiration_date": exp_date,
+        "stock_qty": qty,
+        "unit_price": final_price,
+        "inventory_cost": qty * final_price,
+    }
+
+    # 허브 수집 시 띄어쓰기 무관하게 '용인' 포함 창고만 선택하고 명칭 통일
+    if is_hub:
+        is_yongin = raw_wh_name.str.replace(r'\s+', '', regex=True).str.contains('용인', regex=False)
+        columns = {k: v[is_yongin] for k, v in columns.items()}
+        columns["warehouse_name"] = pd.Series(HUB_WAREHOUSE_NAME, index=columns["item_code"].index, dtype=object)
+
+    # to_dict('records') 보다 리스트 zip 이 빠르고 파이썬 기본 타입(float/str/None)을 그대로 준다
+    keys = list(columns)
+    return [dict(zip(keys, vals)) for vals in zip(*(columns[k].tolist() for k in keys))]
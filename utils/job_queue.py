@@ -0,0 +1,98 @@
+"""
+RPA 작업 큐 클라이언트 (rpa_job_queue.sql).
+
+대시보드/스케줄이 enqueue_rpa_job 으로 작업을 넣고, 에이전트는 claim_rpa_job 으로
+우선순위가 가장 높은(숫자가 작은) 대기 작업을 하나씩 꺼내 실행한 뒤 complete_rpa_job 으로 결과를 남긴다.
+테이블/함수가 없으면 enabled=False 가 되어 호출자가 기존 rpa_trigger 방식으로 폴백한다.
+"""
+import urllib.parse
+from datetime import datetime, timezone
+
+# 작업별 기본 우선순위 (작을수록 먼저). 예약 실행은 SCHEDULE_PRIORITY 로 가장 뒤에 선다.
+TASK_PRIORITIES = {
+    "resume": 10,
+    "item_master": 20,
+    "warehouse_inventory": 30,
+    "inventory_balance": 30,
+    "hub_only": 40,
+    "hq_only": 40,
+    "all": 50,
+}
+SCHEDULE_PRIORITY = 90
+DEFAULT_PRIORITY = 50
+
+
+def task_priority(task, source="dashboard"):
+    if source == "schedule":
+        return SCHEDULE_PRIORITY
+    return TASK_PRIORITIES.get(task, DEFAULT_PRIORITY)
+
+
+class JobQueue:
+    """PostgrestClient 위의 얇은 래퍼. 실패는 로그만 남기고 None/False 로 돌려준다."""
+
+    def __init__(self, db, worker, log=print):
+        self.db = db
+        self.worker = worker
+        self.log = log
+        self.enabled = True
+
+    def _missing(self, resp):
+        # PostgREST: 없는 함수/테이블은 404 (PGRST202 / PGRST205)
+        if resp.status_code == 404:
+            if self.enabled:
+                self.enabled = False
+                self.log("ℹ️ [작업 큐] rpa_jobs 가 없어 rpa_trigger 방식으로 동작합니다. (rpa_job_queue.sql)")
+            return True
+        return False
+
+    def enqueue(self, task, priority=None, source="dashboard"):
+        """작업 등록 → job id (같은 task 가 이미 대기 중이면 그 id)"""
+        if not self.enabled:
+            return None
+        if priority is None:
+            priority = task_priority(task, source)
+        try:
+            resp = self.db.rpc("enqueue_rpa_job", {"p_task": task, "p_priority": priority, "p_source": source})
+        except Exception as e:
+            self.log(f"⚠️ [작업 큐] 등록 실패: {e}")
+            return None
+        if self._missing(resp) or resp.status_code != 200:
+            return None
+        return resp.json()
+
+    def claim(self):
+        """대기 작업 하나를 running 으로 꺼냄 → job dict 또는 None"""
+        if not self.enabled:
+            return None
+        try:
+            resp = self.db.rpc("claim_rpa_job", {"p_worker": self.worker})
+        except Exception as e:
+            self.log(f"⚠️ [작업 큐] 꺼내기 실패: {e}")
+            return None
+        if self._missing(resp) or resp.status_code != 200:
+            return None
+        rows = resp.json()
+        return rows[0] if rows else None
+
+    def complete(self, job_id, ok, message=""):
+        try:
+            self.db.rpc("complete_rpa_job", {"p_id": job_id, "p_status": "done" if ok else "failed",
+                                             "p_message": message})
+        except Exception as e:
+            self.log(f"⚠️ [작업 큐] 완료 기록 실패 (job {job_id}): {e}")
+
+    def recover_stale(self):
+        """이 워커가 running 으로 남긴 작업(에이전트 비정상 종료) → failed 로 정리. 정리 건수 반환"""
+        try:
+            resp = self.db.patch(
+                f"rpa_jobs?status=eq.running&worker=eq.{urllib.parse.quote(self.worker)}",
+                json={"status": "failed", "message": "에이전트 재시작으로 중단됨 (이어하기 가능)",
+                      "finished_at": datetime.now(timezone.utc).isoformat()},
+                prefer="return=representation")
+        except Exception as e:
+            self.log(f"⚠️ [작업 큐] 중단 작업 정리 실패: {e}")
+            return 0
+        if self._missing(resp) or resp.status_code != 200:
+            return 0
+        return len(resp.json())
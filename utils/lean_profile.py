@@ -0,0 +1,195 @@
+"""
+수집용 경량 브라우저 프로필 (EcountRPA profile="lean", system_config rpa_browser_profile=lean).
+
+사무실 저사양 PC 에서 이카운트 화면마다 이미지 / 폰트 / 외부 추적 스크립트까지 받느라
+화면 로딩과 크롬 메모리가 커지는 것을 줄인다.
+- Playwright 라우트 가로채기로 리소스 종류(BLOCKED_TYPES)와 외부 호스트(로그인 주소의 사이트 밖) 요청을 차단
+- 렌더러 캐시 상한 / 백그라운드 기능 끄기 등 실행 인자(LEAN_ARGS) + 작은 뷰포트
+- 차단 건수와 절약 바이트를 실행마다 보고
+
+차단된 요청은 받지 않으므로 크기를 알 수 없다. 그래서 일반 프로필로 돌 때 '경량 프로필이었다면 막았을' 응답의
+크기(Content-Length)를 URL 별로 chrome_profile_pw/resource_sizes.json 에 학습해 두고, 경량 실행에서는 그 합을 절약량으로 본다
+(한 번도 본 적 없는 URL 은 '크기 미확인' 건수로 따로 센다).
+일반 프로필에는 라우트 없이 응답 리스너만 붙인다 (요청 가로채기 / 캐시 동작은 평소와 같음).
+💡 라우트를 걸면 Playwright 가 HTTP 캐시를 끄므로 경량 프로필에서는 허용된 스크립트/CSS 를 매번 네트워크로 받는다.
+   bench/rpa_bench.py --profile lean / full 로 시뮬레이터에서 비교한 뒤 켜는 것을 권장.
+"""
+import ipaddress
+import json
+import os
+import threading
+import urllib.parse
+from collections import Counter
+
+# 차단할 리소스 종류 (화면 판정에 쓰는 document / script / stylesheet / xhr / fetch 는 유지)
+BLOCKED_TYPES = frozenset({"image", "media", "font", "manifest", "texttrack"})
+
+LEAN_ARGS = [
+    "--disk-cache-size=33554432",        # 렌더러 HTTP 캐시 32MB 상한
+    "--media-cache-size=1048576",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--mute-audio",
+    "--no-first-run",
+    "--renderer-process-limit=2",        # 창고 순회 추가 탭도 렌더러 프로세스를 나눠 쓴다
+]
+LEAN_VIEWPORT = {"width": 1366, "height": 768}
+
+MAX_LEARNED_SIZES = 5000
+
+
+def site_of(url):
+    """URL 의 사이트(등록 도메인 근사: 호스트 뒤 두 마디, IP / localhost 는 그대로)"""
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    parts = host.split(".")
+    return ".".join(parts[-2:]) if len(parts) > 2 else host
+
+
+class ResourceSizes:
+    """URL 별 응답 크기 학습 테이블 (파일 하나를 여러 브라우저가 공유)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._sizes = json.load(f)
+        except (OSError, ValueError):
+            self._sizes = {}
+
+    def get(self, url):
+        with self._lock:
+            return self._sizes.get(url)
+
+    def learn(self, url, size):
+        with self._lock:
+            if self._sizes.get(url) != size and (url in self._sizes or len(self._sizes) < MAX_LEARNED_SIZES):
+                self._sizes[url] = size
+                self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data, self._dirty = dict(self._sizes), False
+        tmp = self.path + ".part"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+_shared_sizes = {}
+_shared_lock = threading.Lock()
+
+
+def shared_sizes(path):
+    """경로별 ResourceSizes 하나를 프로세스 안에서 공유 (본사/허브 브라우저가 같은 파일 사용)"""
+    with _shared_lock:
+        sizes = _shared_sizes.get(path)
+        if sizes is None:
+            sizes = _shared_sizes[path] = ResourceSizes(path)
+        return sizes
+
+
+class ResourceFilter:
+    """브라우저 컨텍스트 하나의 요청 차단기 + 실행 단위 통계.
+
+    block=False (일반 프로필) 면 차단하지 않고 '차단 대상이었을' 응답 크기만 학습한다.
+    allow_hosts: 로그인 주소 외에 허용할 호스트 (하위 도메인 포함)
+    """
+
+    def __init__(self, login_url, allow_hosts=(), block=True, sizes=None):
+        self.block = block
+        self.sizes = sizes
+        self._allow = {site_of(login_url)} | {h.strip().lower() for h in allow_hosts if h and h.strip()}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.blocked = Counter()
+        self.saved_bytes = 0
+        self.unknown = 0
+        self.loaded_bytes = 0
+        self.responses = 0
+
+    def block_reason(self, url, resource_type):
+        """차단 사유 (리소스 종류 / third_party) 또는 None"""
+        if url.startswith(("data:", "blob:", "about:")):
+            return None
+        if resource_type in BLOCKED_TYPES:
+            return resource_type
+        host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        if host and not any(host == a or host.endswith("." + a) for a in self._allow):
+            return "third_party"
+        return None
+
+    def attach(self, context):
+        """경량: 라우트 차단 + 응답 통계 / 일반: 응답 리스너만 (크기 학습, 라우트 없음)"""
+        if self.block:
+            context.route("**/*", self._route)
+        context.on("response", self._on_response)
+
+    def _route(self, route):
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            route.continue_()
+            return
+        size = self.sizes.get(request.url) if self.sizes is not None else None
+        with self._lock:
+            self.blocked[reason] += 1
+            if size is None:
+                self.unknown += 1
+            else:
+                self.saved_bytes += size
+        route.abort("blockedbyclient")
+
+    def _on_response(self, response):
+        headers = response.headers
+        if headers.get("content-disposition", "").startswith("attachment"):
+            return   # 엑셀 다운로드는 화면 로딩이 아니므로 제외
+        try:
+            size = int(headers.get("content-length") or 0)
+        except (TypeError, ValueError):
+            size = 0
+        with self._lock:
+            self.responses += 1
+            self.loaded_bytes += size
+        if self.sizes is not None and size:
+            request = response.request
+            if self.block_reason(request.url, request.resource_type) is not None:
+                self.sizes.learn(request.url, size)
+
+    def take_stats(self):
+        """이번 실행 통계를 돌려주고 초기화 (학습한 크기는 파일에 저장)"""
+        with self._lock:
+            stats = {"profile": "lean" if self.block else "full", "blocked": dict(self.blocked),
+                     "blocked_total": sum(self.blocked.values()), "saved_bytes": self.saved_bytes,
+                     "unknown_size": self.unknown, "loaded_bytes": self.loaded_bytes, "responses": self.responses}
+            self._reset()
+        if self.sizes is not None:
+            self.sizes.save()
+        return stats
+
+
+def summary(stats):
+    """로그용 한 줄 요약"""
+    line = f"로드 {stats['loaded_bytes'] / 1024:,.0f}KB / 응답 {stats['responses']}건"
+    if stats["profile"] == "lean":
+        detail = ", ".join(f"{k} {v}" for k, v in sorted(stats["blocked"].items(), key=lambda kv: -kv[1]))
+        line = (f"차단 {stats['blocked_total']}건" + (f" ({detail})" if detail else "")
+                + f", 절약 약 {stats['saved_bytes'] / 1024:,.0f}KB"
+                + (f" (크기 미확인 {stats['unknown_size']}건)" if stats["unknown_size"] else "") + ", " + line)
+    return line
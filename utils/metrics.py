@@ -0,0 +1,237 @@
+"""
+에이전트 메트릭 + 로컬 /metrics HTTP 엔드포인트 (Prometheus 텍스트 형식 0.0.4).
+
+지금까지 관측 수단은 agent_stdout/stderr 로그와 하트비트 문자열뿐이라 동기화 성능 저하를
+시간 축으로 볼 방법이 없었다. prometheus_client 의존성 없이 필요한 만큼만 구현한다.
+- Counter / Gauge / Histogram: 라벨 조합별 값, 스레드 안전
+- MetricsRegistry.render(): 텍스트 노출 형식
+- serve(): http.server 기반 데몬 스레드 (GET /metrics)
+- AgentMetrics: 에이전트가 쓰는 시리즈 묶음 + 기록 헬퍼
+"""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 브라우저 단계(수 초~수 분) / DB 요청(수십 ms~수 초) 에 맞춘 버킷 (초)
+STAGE_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines += self._render_locked()
+        return lines
+
+    def _render_locked(self):
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _render_locked(self):
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, counts):
+                le = (("le", _fmt(bound)),)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def serve(registry, port, host="127.0.0.1"):
+    """GET /metrics 를 응답하는 HTTP 서버를 데몬 스레드로 시작 → 서버 객체 (포트 사용 중이면 OSError)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # 스크레이프마다 stderr 에 접근 로그를 남기지 않음
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
+
+
+class AgentMetrics:
+    """ecount_agent 메트릭 시리즈.
+
+    stage    : login / navigate / download (EcountRPA), parse / upload (동기화)
+    channel  : hq / hub (파이프라인 레인)
+    report   : 리포트 종류 (품목 마스터, 재고변동표 등)
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.started = r.gauge("ecount_agent_start_time_seconds", "에이전트 시작 시각 (unix time)")
+        self.stage_seconds = r.histogram("ecount_rpa_stage_duration_seconds", "RPA/동기화 단계 소요 시간",
+                                         ("stage", "channel", "status"), STAGE_BUCKETS)
+        self.rows_parsed = r.counter("ecount_rows_parsed_total", "파싱한 엑셀 행 수", ("report",))
+        self.rows_per_second = r.gauge("ecount_rows_parsed_per_second", "마지막 파싱의 초당 처리 행 수",
+                                       ("report",))
+        self.db_seconds = r.histogram("ecount_postgrest_request_duration_seconds", "PostgREST 요청 지연 시간",
+                                      ("endpoint", "status"), LATENCY_BUCKETS)
+        self.retries = r.counter("ecount_retries_total", "재시도 횟수", ("kind",))
+        self.failures = r.counter("ecount_failures_total", "실패 횟수", ("kind",))
+        self.task_seconds = r.histogram("ecount_task_duration_seconds", "수집 작업 전체 소요 시간",
+                                        ("task", "status"), STAGE_BUCKETS)
+        self.last_success = r.gauge("ecount_task_last_success_timestamp_seconds",
+                                    "작업 종류별 마지막 성공 시각 (unix time)", ("task",))
+        self.heartbeat = r.gauge("ecount_agent_heartbeat_timestamp_seconds", "마지막 하트비트 시각 (unix time)")
+        self.browser_blocked = r.counter("ecount_browser_requests_blocked_total",
+                                         "경량 프로필이 차단한 브라우저 요청 수", ("reason",))
+        self.browser_bytes = r.counter("ecount_browser_bytes_total",
+                                       "브라우저 화면 로딩 바이트 (loaded: 받은 양, saved: 차단으로 아낀 양 추정)", ("kind",))
+        self.started.set(time.time())
+
+    # ───────── 기록 헬퍼 ─────────
+
+    def stage(self, stage, seconds, channel="", ok=True):
+        self.stage_seconds.observe(seconds, stage=stage, channel=channel or "main", status="ok" if ok else "error")
+        if not ok:
+            self.failures.inc(kind=stage)
+
+    @contextmanager
+    def timed(self, stage, channel=""):
+        """with metrics.timed("upload", channel): ...  (예외가 나면 status=error 로 기록 후 다시 던짐)"""
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.stage(stage, time.monotonic() - started, channel, ok)
+
+    def parsed(self, report, rows, seconds, channel=""):
+        """파싱 한 번: parse 단계 시간 + 행 수 + 초당 행 수"""
+        self.stage("parse", seconds, channel)
+        self.rows_parsed.inc(rows, report=report)
+        if seconds > 0:
+            self.rows_per_second.set(round(rows / seconds, 1), report=report)
+
+    def db_request(self, endpoint, seconds, failed=False, retried=False):
+        """PostgrestClient.observer 콜백"""
+        if retried:
+            self.retries.inc(kind="postgrest")
+            return
+        self.db_seconds.observe(seconds, endpoint=endpoint, status="error" if failed else "ok")
+        if failed:
+            self.failures.inc(kind="postgrest")
+
+    def task_finished(self, task, ok, seconds):
+        self.task_seconds.observe(seconds, task=task, status="ok" if ok else "error")
+        if ok:
+            self.last_success.set(time.time(), task=task)
+        else:
+            self.failures.inc(kind=f"task:{task}")
+
+    def resources(self, stats):
+        """EcountRPA resource_cb: 실행 하나의 차단 건수 / 로드·절약 바이트"""
+        for reason, count in stats["blocked"].items():
+            self.browser_blocked.inc(count, reason=reason)
+        self.browser_bytes.inc(stats["loaded_bytes"], kind="loaded")
+        if stats["saved_bytes"]:
+            self.browser_bytes.inc(stats["saved_bytes"], kind="saved")
+
+    def beat(self):
+        self.heartbeat.set(time.time())
@@ -0,0 +1,44 @@
+"""
+inventory_history 월별 이력(본사_월별 / 허브_월별) 증분 동기화 계산.
+
+재고변동표는 매번 12개월치를 다시 내려주지만 실제로 바뀌는 건 보통 이번/지난 달뿐이다.
+(품목코드, 월말일자) 를 키로 기존 DB 행과 비교해 내용이 바뀐 월만 골라내고,
+적용은 sync_monthly_history RPC (monthly_history_sync.sql) 로 월 단위 원자 처리한다.
+"""
+HISTORY_SELECT = "item_code,record_date,item_name_spec,curr_qty,diff_qty"
+
+
+def _norm_num(v):
+    try:
+        return round(float(v), 6)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _row_value(row):
+    return ((row.get("item_name_spec") or "").strip(), _norm_num(row.get("curr_qty")), _norm_num(row.get("diff_qty")))
+
+
+def dedupe_entries(entries):
+    """같은 (품목코드, 월말일자) 가 여러 번 나오면 마지막 행만 남긴다 (유니크 키 충돌 방지)"""
+    return list({(e["item_code"], e["record_date"]): e for e in entries}.values())
+
+
+def group_by_month(rows):
+    """월말일자 → {품목코드: 값 튜플}"""
+    months = {}
+    for r in rows:
+        months.setdefault(str(r["record_date"])[:10], {})[r["item_code"]] = _row_value(r)
+    return months
+
+
+def changed_months(old_rows, new_rows):
+    """내용(품목 구성 또는 수량/품목명)이 하나라도 다른 월말일자 목록 (정렬). 새 데이터에서 통째로 빠진 월 포함"""
+    old, new = group_by_month(old_rows), group_by_month(new_rows)
+    return sorted(m for m in set(old) | set(new) if old.get(m) != new.get(m))
+
+
+def expired_months(old_rows, window):
+    """DB 에는 있지만 이번 기간(window)에 없는 월말일자 목록"""
+    keep = set(window)
+    return sorted({str(r["record_date"])[:10] for r in old_rows} - keep)
@@ -0,0 +1,148 @@
+"""
+이카운트 화면 준비 상태 판정 (고정 sleep 대체).
+
+이카운트는 SPA 라 networkidle 이 불안정해서 기존에는 iframe 감지 후 time.sleep(2) 를 고정으로 걸었다.
+여기서는 실제 신호를 폴링해 준비되는 즉시 다음 단계로 넘어간다.
+- 진행 중인 XHR/fetch 가 없고 (리포트 조회 요청 완료)
+- 로딩 오버레이(loading / spinner / blockUI)가 보이지 않고
+- 그리드 행 수가 연속 두 번 같을 때 (렌더링 종료)
+대기마다 라벨별 소요 시간을 WaitStats 에 남겨 어느 단계가 느린지 로그로 확인한다.
+"""
+import threading
+import time
+
+# 모든 frame 에서 실행: 로딩 오버레이 표시 여부 + 그리드 행 수
+_PROBE_JS = """() => {
+    const visible = (el) => {
+        const r = el.getBoundingClientRect();
+        if (r.width === 0 || r.height === 0) return false;
+        const s = getComputedStyle(el);
+        return s.display !== 'none' && s.visibility !== 'hidden' && s.opacity !== '0';
+    };
+    const overlays = document.querySelectorAll(
+        '[class*="loading" i], [id*="loading" i], [class*="spinner" i], .blockUI');
+    let loading = false;
+    for (const el of overlays) { if (visible(el)) { loading = true; break; } }
+    const rows = document.querySelectorAll('table tbody tr, [role="row"]').length;
+    return {state: document.readyState, loading: loading, rows: rows};
+}"""
+
+XHR_TYPES = ("xhr", "fetch")
+
+
+class WaitStats:
+    """라벨별 대기 시간 누적 (여러 페이지/탭이 공유)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, label, seconds, timed_out=False):
+        with self._lock:
+            st = self._stats.setdefault(label, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            st["count"] += 1
+            st["total"] += seconds
+            st["max"] = max(st["max"], seconds)
+            if timed_out:
+                st["timeouts"] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+    def summary(self):
+        """로그용 한 줄 요약 (총 대기 시간이 큰 순)"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda kv: kv[1]["total"], reverse=True)
+            return " | ".join(
+                f"{label}: {st['count']}회 avg {st['total'] / st['count']:.2f}s max {st['max']:.2f}s"
+                + (f" 타임아웃 {st['timeouts']}" if st["timeouts"] else "")
+                for label, st in items
+            )
+
+
+class PageReadiness:
+    """페이지 하나의 준비 상태 추적기.
+
+    사용법: seq = ready.mark() → 조회 키 입력 → ready.wait("조회", after=seq)
+    after 를 주면 그 이후 XHR 이 최소 한 번 끝나야 준비로 본다 (조회 요청 시작 전에 통과하는 것 방지).
+    XHR 이 끝내 안 보이면 xhr_grace 초 뒤부터는 화면 신호만으로 판정한다 (캐시 응답 등).
+    """
+
+    def __init__(self, page, stats=None, poll_ms=100, quiet=0.25, xhr_grace=1.5):
+        self.page = page
+        self.stats = stats or WaitStats()
+        self.poll_ms = poll_ms
+        self.quiet = quiet
+        self.xhr_grace = xhr_grace
+        self._inflight = set()
+        self._finished = 0
+        self._last_activity = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    # ───────── 네트워크 이벤트 ─────────
+
+    def _on_request(self, request):
+        if request.resource_type in XHR_TYPES:
+            self._inflight.add(request)
+            self._last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        if request in self._inflight:
+            self._inflight.discard(request)
+            self._finished += 1
+            self._last_activity = time.monotonic()
+
+    def mark(self):
+        """동작 직전 호출. 반환값을 wait(after=...) 에 넘긴다"""
+        return self._finished
+
+    # ───────── 화면 신호 ─────────
+
+    def _probe(self):
+        """(작업 iframe 존재, 로딩 중 여부, 전체 그리드 행 수, 문서 로딩 완료)"""
+        has_frame, loading, rows, complete = False, False, 0, True
+        for frame in self.page.frames:
+            if frame.is_detached():
+                continue
+            if frame is not self.page.main_frame:
+                has_frame = True
+            try:
+                res = frame.evaluate(_PROBE_JS)
+            except Exception:
+                # 탐색 중인 frame 은 아직 준비 안 된 것으로 본다
+                complete = False
+                continue
+            loading = loading or res["loading"]
+            rows += res["rows"]
+            complete = complete and res["state"] == "complete"
+        return has_frame, loading, rows, complete
+
+    def wait(self, label, timeout=8.0, after=None, require_frame=False):
+        """준비되면 True, timeout 이면 False. 어느 쪽이든 소요 시간을 stats 에 기록"""
+        start = time.monotonic()
+        prev_rows, stable_since = None, None
+        ready = False
+        while True:
+            now = time.monotonic()
+            if now - start >= timeout:
+                break
+            has_frame, loading, rows, complete = self._probe()
+            now = time.monotonic()
+
+            if rows != prev_rows:
+                prev_rows, stable_since = rows, now
+            xhr_seen = after is None or self._finished > after or now - start >= self.xhr_grace
+            net_quiet = not self._inflight and now - self._last_activity >= self.quiet
+            if (complete and not loading and net_quiet and xhr_seen
+                    and now - stable_since >= self.quiet
+                    and (has_frame or not require_frame)):
+                ready = True
+                break
+            # wait_for_timeout 은 대기 중에도 Playwright 이벤트(request 등)를 처리한다
+            self.page.wait_for_timeout(self.poll_ms)
+
+        self.stats.record(label, time.monotonic() - start, timed_out=not ready)
+        return ready
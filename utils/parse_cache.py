@@ -0,0 +1,143 @@
+"""
+ERP 엑셀 파싱 결과 캐시 (파일 SHA-256 + 파서 버전 기준).
+
+같은 품목/재고변동 엑셀이 내용 그대로 다시 내려받아지는 일이 잦아, 매번 엑셀을 다시 파싱하고
+DB 에 다시 올리고 있었다. 다운로드 폴더의 .parse_cache/ 에
+- 정규화된 파싱 결과(DataFrame): pyarrow 가 있으면 Parquet, 없으면 gzip JSON
+- 종류별 마지막 동기화 성공 기록(synced.json): sha256 / 파서 버전 / 동기화 조건(context)
+을 남겨, 파싱은 캐시에서 읽고 마지막 동기화와 완전히 같은 입력이면 업로드를 생략한다.
+파서 로직을 바꾸면 해당 파서의 버전 상수를 올려 기존 캐시를 무효화한다.
+"""
+import gzip
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # 선택 의존성: 없으면 gzip JSON 으로 저장
+    pyarrow = None
+
+CACHE_DIRNAME = ".parse_cache"
+SYNCED_FILE = "synced.json"
+
+
+class ParseCache:
+    """다운로드 폴더별 파싱 캐시 + 동기화 기록. 적중/생략 통계는 실행 단위로 집계 (HQ/허브 스레드 공용)."""
+
+    def __init__(self, log=print, keep=3):
+        self.log = log
+        self.keep = keep              # 종류별로 남겨 둘 캐시 파일 수
+        self.ext = ".parquet" if pyarrow is not None else ".json.gz"
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.skipped = 0
+
+    # ───────── 파싱 결과 ─────────
+
+    def _dir(self, base_dir):
+        path = os.path.join(base_dir, CACHE_DIRNAME)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _path(self, base_dir, kind, version, sha256):
+        return os.path.join(self._dir(base_dir), f"{kind}-v{version}-{sha256[:16]}{self.ext}")
+
+    def lookup(self, base_dir, kind, version, sha256):
+        """캐시된 파싱 결과 DataFrame (없거나 읽기 실패면 None)"""
+        path = self._path(base_dir, kind, version, sha256)
+        df = None
+        if os.path.exists(path):
+            try:
+                if pyarrow is not None:
+                    df = pd.read_parquet(path)
+                else:
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        # dtype=False: '00123' 같은 코드 문자열이 숫자로 바뀌지 않도록
+                        df = pd.read_json(io.StringIO(f.read()), orient="split", dtype=False)
+            except Exception as e:
+                self.log(f"⚠️ [파싱 캐시] {os.path.basename(path)} 읽기 실패 - 다시 파싱: {e}")
+                df = None
+        with self._lock:
+            if df is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return df
+
+    def store(self, base_dir, kind, version, sha256, df):
+        path = self._path(base_dir, kind, version, sha256)
+        tmp = path + ".part"
+        try:
+            if pyarrow is not None:
+                df.to_parquet(tmp, index=False)
+            else:
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    f.write(df.to_json(orient="split", index=False, force_ascii=False))
+            os.replace(tmp, path)
+        except Exception as e:
+            self.log(f"⚠️ [파싱 캐시] 저장 실패 ({kind}): {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._prune(os.path.dirname(path), kind, keep_path=path)
+
+    def _prune(self, cache_dir, kind, keep_path):
+        files = [os.path.join(cache_dir, n) for n in os.listdir(cache_dir)
+                 if n.startswith(f"{kind}-v") and not n.endswith(".part")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[self.keep:]:
+            if path != keep_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # ───────── 동기화 기록 ─────────
+
+    def _load_synced(self, base_dir):
+        try:
+            with open(os.path.join(self._dir(base_dir), SYNCED_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def synced(self, base_dir, kind):
+        """kind 의 마지막 동기화 기록 dict (없으면 None)"""
+        with self._lock:
+            return self._load_synced(base_dir).get(kind)
+
+    def is_synced(self, base_dir, kind, version, sha256, context=""):
+        """마지막 동기화 성공과 파일/파서/조건이 모두 같으면 True (업로드 생략 대상)"""
+        entry = self.synced(base_dir, kind)
+        same = bool(entry) and entry.get("sha256") == sha256 and entry.get("version") == version \
+            and entry.get("context", "") == context
+        if same:
+            with self._lock:
+                self.skipped += 1
+        return same
+
+    def mark_synced(self, base_dir, kind, version, sha256, context=""):
+        with self._lock:
+            data = self._load_synced(base_dir)
+            data[kind] = {"sha256": sha256, "version": version, "context": context,
+                          "synced_at": datetime.now().isoformat(timespec="seconds")}
+            path = os.path.join(self._dir(base_dir), SYNCED_FILE)
+            with open(path + ".part", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(path + ".part", path)
+
+    def summary(self):
+        with self._lock:
+            total = self.hits + self.misses
+            rate = f"{100.0 * self.hits / total:.0f}%" if total else "-"
+            return f"파싱 캐시 적중 {self.hits}/{total} ({rate}) / 변경 없음 업로드 생략 {self.skipped}건"
@@ -0,0 +1,155 @@
+"""
+RPA 진행 상황 보고기.
+
+기존에는 진행 이벤트(파싱 500행마다, 업로드 청크마다, EcountRPA 로그 한 줄마다)가
+곧바로 system_config upsert 한 번씩이었다. 여기서는 채널(hq / hub)별 단계·진행률·처리 건수·ETA 를
+메모리에 모아 두고 interval 초마다 바뀐 값만 한 번의 배치 upsert 로 기록한다.
+
+기록 키
+- rpa_progress        : 대시보드 진행 바용 구조화 JSON (아래 snapshot() 형식)
+- rpa_message         : 마지막 메시지 (채널 접두어 포함, 기존 대시보드 호환)
+- rpa_message_{채널}  : 채널별 마지막 메시지
+"""
+import json
+import threading
+import time
+from datetime import datetime
+
+
+class _ChannelState:
+    __slots__ = ("stage", "message", "done", "total", "stage_started", "updated_at")
+
+    def __init__(self):
+        self.stage = ""
+        self.message = ""
+        self.done = None
+        self.total = None
+        self.stage_started = time.monotonic()
+        self.updated_at = None
+
+    def as_dict(self):
+        percent = eta = None
+        if self.total and self.done is not None:
+            percent = round(min(100.0, 100.0 * self.done / self.total), 1)
+            elapsed = time.monotonic() - self.stage_started
+            if 0 < self.done < self.total and elapsed > 0:
+                eta = round((self.total - self.done) * elapsed / self.done)
+        return {"stage": self.stage, "message": self.message, "done": self.done, "total": self.total,
+                "percent": percent, "eta_sec": eta, "updated_at": self.updated_at}
+
+
+class ProgressReporter:
+    """채널별 진행 상태 버퍼 + 저속 배치 기록.
+
+    write_fn(values: dict[key, str]) 은 한 번의 요청으로 여러 키를 기록하는 함수.
+    update() 는 메모리만 갱신하고, 백그라운드 스레드가 interval 초마다 변경분을 flush 한다.
+    finish() 는 남은 변경분을 즉시 기록하고 다음 start_run() 까지 갱신을 무시한다
+    (실행 종료 후 최종 상태 메시지를 늦게 도착한 진행 메시지가 덮지 않도록).
+    """
+
+    def __init__(self, write_fn, interval=2.0, prefixes=None, log=print):
+        self.write_fn = write_fn
+        self.interval = interval
+        self.prefixes = prefixes or {}
+        self.log = log
+        self._lock = threading.Lock()
+        # 기록 순서 보장: 백그라운드 flush 가 finish() 의 최종 기록보다 늦게 도착하지 않도록 직렬화
+        self._flush_lock = threading.Lock()
+        self._channels = {}
+        self._dirty_channels = set()
+        self._last_message = None
+        self._task = ""
+        self._started_at = None
+        self._active = False
+        self.events = 0
+        self.flushes = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="progress-flush")
+        self._thread.start()
+
+    # ───────── 실행 경계 ─────────
+
+    def start_run(self, task_label):
+        with self._lock:
+            self._channels = {}
+            self._dirty_channels = set()
+            self._last_message = None
+            self._task = task_label
+            self._started_at = datetime.now().isoformat(timespec="seconds")
+            self._active = True
+            self.events = 0
+            self.flushes = 0
+        self.update(None, f"{task_label} 준비 중...", stage="준비")
+        self.flush()
+
+    def finish(self):
+        """비활성화 후 남은 변경분(active=false 포함) 기록. (이벤트 수, 실제 기록 수) 반환"""
+        with self._lock:
+            self._active = False
+            self._dirty_channels.add("main")
+        self.flush()
+        return self.events, self.flushes
+
+    # ───────── 갱신 ─────────
+
+    def update(self, channel, message=None, stage=None, done=None, total=None):
+        """채널 상태 갱신 (메모리만). stage 가 바뀌면 진행 건수와 ETA 기준 시각을 초기화"""
+        key = channel or "main"
+        with self._lock:
+            if not self._active:
+                return
+            ch = self._channels.get(key)
+            if ch is None:
+                ch = self._channels[key] = _ChannelState()
+            if stage is not None and stage != ch.stage:
+                ch.stage = stage
+                ch.done = ch.total = None
+                ch.stage_started = time.monotonic()
+            if message is not None:
+                ch.message = message[:100]
+                self._last_message = f"{self.prefixes.get(channel, '')}{message}"[:100]
+            if total is not None:
+                ch.total = total
+            if done is not None:
+                ch.done = done
+            ch.updated_at = datetime.now().isoformat(timespec="seconds")
+            self._dirty_channels.add(key)
+            self.events += 1
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self):
+        return {
+            "task": self._task,
+            "started_at": self._started_at,
+            "active": self._active,
+            "message": self._last_message,
+            "channels": {k: ch.as_dict() for k, ch in self._channels.items()},
+        }
+
+    # ───────── 기록 ─────────
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty_channels:
+                    return False
+                values = {"rpa_progress": json.dumps(self._snapshot_locked(), ensure_ascii=False)}
+                if self._last_message:
+                    values["rpa_message"] = self._last_message
+                for key in self._dirty_channels:
+                    if key in self._channels and key != "main":
+                        values[f"rpa_message_{key}"] = self._channels[key].message
+                self._dirty_channels = set()
+                self.flushes += 1
+            try:
+                self.write_fn(values)
+            except Exception as e:
+                self.log(f"⚠️ 진행 상황 기록 실패: {e}")
+            return True
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
@@ -0,0 +1,143 @@
+"""
+RPA 실행 저널 (rpa_run_journal.sql).
+
+실행(run_id)마다 끝난 단계와 항목(창고 등), 검증된 다운로드 파일 경로/sha256 을 기록해
+중단·실패한 실행을 'resume' 작업으로 이어서 돌릴 수 있게 한다.
+- step='run' 행: 실행 자체 (task, status = running / completed / failed / interrupted)
+- 그 외 행: 끝난 단계 ("hq:warehouse_download" + item=창고명 등)
+테이블이 없거나 DB 오류가 나면 저널은 꺼지고(모든 is_done=False) 수집은 평소대로 진행된다.
+"""
+import hashlib
+import os
+import threading
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+RUN_STEP = "run"
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RunJournal:
+    """현재 실행 하나의 저널. begin() 또는 resume() 으로 run_id 를 정한 뒤 mark_done / is_done 사용.
+
+    max_resume_age: 이 시간보다 오래된 실행은 이어하지 않는다 (전날 받은 재고 파일 재사용 방지).
+    """
+
+    def __init__(self, db, table="rpa_run_journal", log=print, max_resume_age=timedelta(hours=12)):
+        self.db = db
+        self.table = table
+        self.log = log
+        self.max_resume_age = max_resume_age
+        self.run_id = None
+        self.task = None
+        self.enabled = True
+        self._done = {}
+        self._lock = threading.Lock()
+
+    # ───────── 내부 ─────────
+
+    def _upsert(self, row):
+        if not self.enabled or not self.run_id:
+            return
+        row = {"run_id": self.run_id, "item": "", "updated_at": datetime.now(KST).isoformat(), **row}
+        try:
+            resp = self.db.post(self.table, json=row, prefer="resolution=merge-duplicates,return=minimal")
+            if resp.status_code == 404:
+                self._disable("rpa_run_journal 테이블 없음")
+            elif resp.status_code >= 400:
+                self.log(f"⚠️ [저널] 기록 실패 {resp.status_code}: {resp.text[:150]}")
+        except Exception as e:
+            self.log(f"⚠️ [저널] 기록 실패: {e}")
+
+    def _disable(self, reason):
+        if self.enabled:
+            self.enabled = False
+            self.log(f"ℹ️ [저널] 비활성화 ({reason}) - 이어하기 없이 진행합니다.")
+
+    # ───────── 실행 경계 ─────────
+
+    def begin(self, task):
+        """새 실행 시작 → run_id"""
+        self.run_id = datetime.now(KST).strftime("%Y%m%d-%H%M%S-") + task
+        self.task = task
+        with self._lock:
+            self._done = {}
+        self._upsert({"step": RUN_STEP, "status": "running", "task": task})
+        return self.run_id
+
+    def resume(self):
+        """가장 최근 실행이 끝나지 않았으면 그 run_id 로 이어붙이고 원래 task 반환 (없으면 None)"""
+        self.run_id = self.task = None
+        try:
+            resp = self.db.get(f"{self.table}?select=run_id,task,status,created_at&step=eq.{RUN_STEP}"
+                               f"&order=updated_at.desc&limit=1")
+        except Exception as e:
+            self.log(f"⚠️ [저널] 실행 조회 실패: {e}")
+            return None
+        if resp.status_code == 404:
+            self._disable("rpa_run_journal 테이블 없음")
+            return None
+        if resp.status_code != 200 or not resp.json():
+            return None
+
+        last = resp.json()[0]
+        if last["status"] == "completed":
+            return None
+        try:
+            started = datetime.fromisoformat(last["created_at"])
+            if datetime.now(KST) - started > self.max_resume_age:
+                self.log(f"ℹ️ [저널] 마지막 미완료 실행({last['run_id']})이 너무 오래되어 이어하지 않습니다.")
+                return None
+        except (TypeError, ValueError):
+            pass
+
+        try:
+            rows = self.db.select_all(
+                f"{self.table}?select=step,item,file_path,sha256&run_id=eq.{urllib.parse.quote(last['run_id'])}"
+                f"&step=neq.{RUN_STEP}&status=eq.done", order="step,item")
+        except Exception as e:
+            self.log(f"⚠️ [저널] 완료 단계 조회 실패: {e}")
+            return None
+        self.run_id, self.task = last["run_id"], last["task"]
+        with self._lock:
+            self._done = {(r["step"], r["item"]): r for r in rows}
+        self._upsert({"step": RUN_STEP, "status": "running", "task": self.task})
+        self.log(f"⏯️ [저널] 실행 {self.run_id} ({self.task}) 이어하기 - 완료된 단계 {len(rows)}건 건너뜀")
+        return self.task
+
+    def finish(self, status):
+        """실행 종료 상태 기록 (completed / partial / failed / interrupted) - completed 가 아니면 이어하기 대상"""
+        self._upsert({"step": RUN_STEP, "status": status, "task": self.task})
+
+    # ───────── 단계 ─────────
+
+    def is_done(self, step, item=""):
+        with self._lock:
+            return (step, item) in self._done
+
+    def mark_done(self, step, item="", file_path=None, sha256=None, detail=None):
+        entry = {"step": step, "item": item, "status": "done", "file_path": file_path,
+                 "sha256": sha256, "detail": detail}
+        with self._lock:
+            self._done[(step, item)] = entry
+        self._upsert(entry)
+
+    def verified_file(self, step, item=""):
+        """이전에 받은 파일이 그대로(sha256 일치) 남아 있으면 경로, 아니면 None"""
+        with self._lock:
+            entry = self._done.get((step, item))
+        path = entry and entry.get("file_path")
+        if not path or not entry.get("sha256") or not os.path.exists(path):
+            return None
+        try:
+            return path if file_sha256(path) == entry["sha256"] else None
+        except OSError:
+            return None
@@ -0,0 +1,116 @@
+"""
+다운로드 → 파싱 → 업로드 단계를 겹쳐 실행하는 작은 스테이지 파이프라인.
+
+브라우저 다운로드는 Playwright 스레드 제약 때문에 호출 스레드(소스)에서 put() 으로 흘려 넣고,
+뒤 단계들은 각자 전용 스레드에서 돈다. 단계 사이 큐는 크기가 제한되어 있어
+뒤 단계가 밀리면 앞 단계(브라우저 포함)가 put 에서 기다린다 (backpressure).
+단계별로 처리 건수 / 작업 시간 / 입력 대기 / 출력 대기(backpressure) 를 기록한다.
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class StageStats:
+    __slots__ = ("name", "items", "errors", "busy", "wait_in", "wait_out")
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0       # 실제 작업 시간
+        self.wait_in = 0.0    # 앞 단계 결과를 기다린 시간
+        self.wait_out = 0.0   # 뒤 단계 큐가 가득 차서 기다린 시간 (backpressure)
+
+    def as_dict(self):
+        return {"items": self.items, "errors": self.errors, "busy": round(self.busy, 2),
+                "wait_in": round(self.wait_in, 2), "wait_out": round(self.wait_out, 2)}
+
+    def summary(self):
+        return (f"{self.name} {self.items}건 작업 {self.busy:.1f}s"
+                f" / 입력대기 {self.wait_in:.1f}s / 출력대기 {self.wait_out:.1f}s"
+                + (f" / 오류 {self.errors}" if self.errors else ""))
+
+
+class StagePipeline:
+    """stages = [(이름, fn), ...]. fn(item) 의 반환값이 다음 단계 입력 (None 이면 그 항목은 버림).
+
+    사용법:
+        pipe = StagePipeline([("파싱", parse), ("업로드", upload)], source_name="다운로드")
+        pipe.start()
+        try:
+            for x in produce(): pipe.put(x)
+        finally:
+            pipe.close()
+    단계 함수의 예외는 해당 항목만 실패로 기록하고 다음 항목을 계속 처리한다.
+    """
+
+    def __init__(self, stages, maxsize=2, source_name="source", log=print, thread_init=None):
+        self.log = log
+        self.thread_init = thread_init
+        self.source = StageStats(source_name)
+        self.stats = [StageStats(name) for name, _ in stages]
+        self._fns = [fn for _, fn in stages]
+        self._queues = [queue.Queue(maxsize=maxsize) for _ in stages]
+        self._threads = []
+        self._last_put = None
+        self._started = None
+
+    def start(self):
+        self._started = self._last_put = time.monotonic()
+        for idx in range(len(self._fns)):
+            t = threading.Thread(target=self._worker, args=(idx,), daemon=True,
+                                 name=f"stage-{self.stats[idx].name}")
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def _worker(self, idx):
+        if self.thread_init:
+            self.thread_init()
+        fn, st = self._fns[idx], self.stats[idx]
+        q_in = self._queues[idx]
+        q_out = self._queues[idx + 1] if idx + 1 < len(self._queues) else None
+        while True:
+            t0 = time.monotonic()
+            item = q_in.get()
+            t1 = time.monotonic()
+            st.wait_in += t1 - t0
+            if item is _DONE:
+                if q_out is not None:
+                    q_out.put(_DONE)
+                return
+            try:
+                out = fn(item)
+            except Exception as e:
+                st.errors += 1
+                out = None
+                self.log(f"  ❌ [{st.name}] 단계 처리 실패: {e}")
+            t2 = time.monotonic()
+            st.busy += t2 - t1
+            st.items += 1
+            if q_out is not None and out is not None:
+                q_out.put(out)
+                st.wait_out += time.monotonic() - t2
+
+    def put(self, item):
+        """소스(호출 스레드) 결과를 첫 단계에 전달. 첫 큐가 가득 차면 기다린다"""
+        now = time.monotonic()
+        self.source.busy += now - self._last_put
+        self.source.items += 1
+        self._queues[0].put(item)
+        self._last_put = time.monotonic()
+        self.source.wait_out += self._last_put - now
+
+    def close(self, timeout=None):
+        """입력 종료를 알리고 모든 단계가 끝날 때까지 대기. 전체 경과 시간(초) 반환"""
+        self.source.busy += time.monotonic() - self._last_put
+        self._queues[0].put(_DONE)
+        for t in self._threads:
+            t.join(timeout)
+        return time.monotonic() - self._started
+
+    def summary(self):
+        return " | ".join(st.summary() for st in [self.source] + self.stats)
@@ -0,0 +1,195 @@
+"""
+RPA 실행 단위 트레이스 (rpa_traces.sql).
+
+동기화가 느려졌을 때 로그인 / 창고 순회 / 엑셀 파싱 / 업로드 중 어디가 원인인지 보려고,
+실행(run_id) 하나를 루트 스팬으로 두고 그 아래 단계들을 중첩 스팬(이름, 속성, 시작 시각, 소요 시간)으로 모은다.
+- 부모 스팬은 스레드별 스택으로 정한다. 스택이 빈 스레드(레인/파이프라인 스레드)는 parent 를 넘기지 않으면 루트 밑에 붙는다.
+- 스팬은 메모리에 모았다가 실행이 끝날 때 flush() 로 한 번에 적재한다 (실행 중 DB 호출 없음).
+테이블이 없거나 DB 오류가 나면 트레이스 적재만 꺼지고 수집은 평소대로 진행된다.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+MAX_SPANS = 3000          # 실행 하나에 남길 최대 스팬 수 (창고 수천 개 순회 대비)
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "channel", "started_at", "_t0", "duration_ms", "status", "attrs")
+
+    def __init__(self, span_id, parent_id, name, channel, attrs):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.channel = channel
+        self.started_at = datetime.now(KST)
+        self._t0 = time.monotonic()
+        self.duration_ms = None
+        self.status = "ok"
+        self.attrs = dict(attrs)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, status="ok"):
+        self.duration_ms = round((time.monotonic() - self._t0) * 1000, 1)
+        self.status = status
+
+    def row(self, run_id):
+        return {"run_id": run_id, "span_id": self.span_id, "parent_id": self.parent_id, "name": self.name,
+                "channel": self.channel, "started_at": self.started_at.isoformat(),
+                "duration_ms": self.duration_ms, "status": self.status,
+                "attrs": {k: v if isinstance(v, (int, float, bool, str)) or v is None else str(v)
+                          for k, v in self.attrs.items()}}
+
+
+class Tracer:
+    """실행 하나의 스팬 모음. start_run() → span()/traced() → finish_run() → flush()
+
+    channel_fn: 스팬을 연 스레드의 채널(hq / hub)을 돌려주는 함수 (없으면 None)
+    """
+
+    def __init__(self, db, table="rpa_traces", log=print, channel_fn=None):
+        self.db = db
+        self.table = table
+        self.log = log
+        self.channel_fn = channel_fn or (lambda: None)
+        self.enabled = True
+        self.run_id = None
+        self.root = None
+        self.dropped = 0
+        self._spans = []
+        self._next_id = 1
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # ───────── 내부 ─────────
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _new_span(self, name, parent_id, attrs):
+        with self._lock:
+            if self.run_id is None:
+                return None
+            if len(self._spans) >= MAX_SPANS:
+                self.dropped += 1
+                return None
+            span = Span(self._next_id, parent_id, name, self.channel_fn(), attrs)
+            self._next_id += 1
+            self._spans.append(span)
+        return span
+
+    # ───────── 실행 경계 ─────────
+
+    def start_run(self, run_id, name, **attrs):
+        """새 실행: 이전 스팬을 비우고 루트 스팬 시작"""
+        with self._lock:
+            self.run_id = run_id
+            self._spans = []
+            self._next_id = 1
+            self.dropped = 0
+        self._local.stack = []
+        self.root = self._new_span(name, None, attrs)
+        return self.root
+
+    def finish_run(self, status="ok", **attrs):
+        if self.root is None:
+            return
+        if self.dropped:
+            attrs["dropped_spans"] = self.dropped
+        self.root.set(**attrs)
+        self.root.end(status)
+
+    # ───────── 스팬 ─────────
+
+    def current(self):
+        """현재 스레드의 가장 안쪽 스팬 (없으면 루트)"""
+        stack = self._stack()
+        return stack[-1] if stack else self.root
+
+    @contextmanager
+    def span(self, name, parent=None, **attrs):
+        """with tracer.span("parse", file=...) as sp: ... sp.set(rows=n)   (예외는 status=error 로 기록 후 다시 던짐)
+
+        parent: 다른 스레드에서 연 스팬 밑에 붙일 때 지정 (기본: 현재 스레드의 안쪽 스팬 → 루트)
+        """
+        parent = parent or self.current()
+        span = self._new_span(name, parent.span_id if parent else None, attrs)
+        if span is None:
+            yield _NULL_SPAN
+            return
+        stack = self._stack()
+        stack.append(span)
+        status = "error"
+        try:
+            yield span
+            status = "ok"
+        except Exception as e:
+            span.set(error=str(e)[:200])
+            raise
+        finally:
+            stack.pop()
+            span.end(status)
+
+    def traced(self, name=None):
+        """함수 호출 전체를 스팬으로 감싸는 데코레이터 (반환값 False 는 result=false 속성으로 남김)"""
+        def deco(fn):
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name) as span:
+                    result = fn(*args, **kwargs)
+                    if result is False:
+                        span.set(result=False)
+                    return result
+            return wrapper
+        return deco
+
+    def annotate(self, **attrs):
+        """현재 스레드의 안쪽 스팬에 속성 추가 (행 수 등)"""
+        span = self.current()
+        if span is not None:
+            span.set(**attrs)
+
+    # ───────── 적재 ─────────
+
+    def flush(self, chunk=1000):
+        """끝난 스팬을 rpa_traces 에 적재 → 적재 건수"""
+        with self._lock:
+            run_id, spans = self.run_id, list(self._spans)
+            self.run_id = None
+        if not self.enabled or not run_id:
+            return 0
+        rows = [s.row(run_id) for s in spans if s.duration_ms is not None]
+        sent = 0
+        try:
+            for i in range(0, len(rows), chunk):
+                resp = self.db.post(f"{self.table}?on_conflict=run_id,span_id", json=rows[i:i + chunk],
+                                    prefer="resolution=merge-duplicates,return=minimal")
+                if resp.status_code == 404:
+                    self.enabled = False
+                    self.log("ℹ️ [트레이스] rpa_traces 테이블 없음 - 트레이스 적재를 끕니다.")
+                    return sent
+                if resp.status_code >= 400:
+                    self.log(f"⚠️ [트레이스] 적재 실패 {resp.status_code}: {resp.text[:150]}")
+                    return sent
+                sent += len(rows[i:i + chunk])
+        except Exception as e:
+            self.log(f"⚠️ [트레이스] 적재 실패: {e}")
+        return sent
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
@@ -0,0 +1,199 @@
+"""
+에이전트 작업 트리거 채널.
+
+대시보드가 system_config 의 rpa_trigger / rpa_scheduled_times 를 바꾸면
+에이전트가 2초 폴링 없이 즉시 깨어나도록 하는 알림 채널 모음.
+
+- PgNotifyChannel      : Postgres LISTEN/NOTIFY (rpa_trigger_notify.sql 트리거 필요)
+- PollingTriggerChannel: 채널 연결이 끊겼을 때 쓰는 저속 폴링 폴백
+- LocalTriggerChannel  : DB 없이 동작하는 프로세스 내 스탠드인 (테스트/오프라인용)
+
+모든 채널은 wait(timeout) 으로 블로킹하며, 변경된 (key, value) 이벤트 목록을 돌려준다.
+타임아웃이면 빈 리스트, 채널이 끊기면 TriggerChannelError 를 던진다.
+"""
+import json
+import queue
+import select
+import time
+
+try:
+    import psycopg2
+    import psycopg2.extensions
+except ImportError:  # 선택 의존성: 없으면 폴링 폴백만 사용
+    psycopg2 = None
+
+NOTIFY_CHANNEL = "rpa_trigger"
+WATCH_KEYS = ("rpa_trigger", "rpa_scheduled_times")
+
+
+class TriggerChannelError(Exception):
+    """채널 연결 끊김 등 복구가 필요한 오류."""
+
+
+class TriggerEvent:
+    __slots__ = ("key", "value")
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+    def __repr__(self):
+        return f"TriggerEvent({self.key!r}, {self.value!r})"
+
+
+class PgNotifyChannel:
+    """Postgres LISTEN/NOTIFY 기반 푸시 채널.
+
+    Supabase 의 직접 접속 문자열(db_url)이 필요하다. payload 는
+    {"key": ..., "value": ...} JSON 이며 rpa_trigger_notify.sql 의 트리거가 발행한다.
+    """
+
+    name = "pg_notify"
+    supported = psycopg2 is not None
+
+    def __init__(self, dsn, channel=NOTIFY_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+
+    @property
+    def connected(self):
+        return self._conn is not None and not self._conn.closed
+
+    def connect(self):
+        self.close()
+        # 💡 psycopg2 가 없으면 연결 단계에서 실패 → 호출자가 저속 폴링으로 폴백
+        if psycopg2 is None:
+            raise TriggerChannelError("psycopg2 미설치 - LISTEN/NOTIFY 사용 불가")
+        try:
+            conn = psycopg2.connect(self.dsn, connect_timeout=10,
+                                    keepalives=1, keepalives_idle=30,
+                                    keepalives_interval=10, keepalives_count=3)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.channel};")
+        except Exception as e:
+            raise TriggerChannelError(f"LISTEN 연결 실패: {e}")
+        self._conn = conn
+
+    def wait(self, timeout):
+        if not self.connected:
+            raise TriggerChannelError("채널이 연결되어 있지 않습니다.")
+        try:
+            if not self._conn.notifies:
+                ready, _, _ = select.select([self._conn], [], [], max(timeout, 0))
+                if not ready:
+                    return []
+            self._conn.poll()
+        except Exception as e:
+            self.close()
+            raise TriggerChannelError(f"LISTEN 연결 끊김: {e}")
+
+        events = []
+        while self._conn.notifies:
+            note = self._conn.notifies.pop(0)
+            try:
+                data = json.loads(note.payload)
+                events.append(TriggerEvent(data.get("key"), data.get("value")))
+            except (ValueError, AttributeError):
+                continue
+        return events
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+
+class PollingTriggerChannel:
+    """채널이 없거나 끊겼을 때 쓰는 저속 폴링 폴백.
+
+    fetch_fn(key) 로 값을 읽어 이전 값과 달라진 키만 이벤트로 돌려준다.
+    ("ERROR" 응답은 변경으로 보지 않는다.)
+    """
+
+    name = "polling"
+
+    def __init__(self, fetch_fn, keys=WATCH_KEYS, interval=15.0):
+        self.fetch_fn = fetch_fn
+        self.keys = tuple(keys)
+        self.interval = interval
+        self._last = {}
+        self._next_poll = 0.0
+
+    @property
+    def connected(self):
+        return True
+
+    def connect(self):
+        self._next_poll = 0.0
+
+    def prime(self, key, value):
+        """이미 알고 있는 값을 등록해 중복 이벤트를 막는다."""
+        self._last[key] = value
+
+    def wait(self, timeout):
+        remaining = self._next_poll - time.monotonic()
+        if remaining > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        if remaining > 0:
+            time.sleep(remaining)
+        self._next_poll = time.monotonic() + self.interval
+
+        events = []
+        for key in self.keys:
+            value = self.fetch_fn(key)
+            if value == "ERROR":
+                continue
+            if self._last.get(key) != value:
+                self._last[key] = value
+                events.append(TriggerEvent(key, value))
+        return events
+
+    def close(self):
+        pass
+
+
+class LocalTriggerChannel:
+    """프로세스 내 스탠드인 채널. publish() 로 넣은 이벤트를 wait() 가 즉시 돌려준다."""
+
+    name = "local"
+    supported = True
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._connected = False
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def connect(self):
+        self._connected = True
+
+    def publish(self, key, value):
+        self._queue.put(TriggerEvent(key, value))
+
+    def drop(self):
+        """연결 끊김 시뮬레이션."""
+        self._connected = False
+
+    def wait(self, timeout):
+        if not self._connected:
+            raise TriggerChannelError("로컬 채널 끊김")
+        try:
+            events = [self._queue.get(timeout=max(timeout, 0))]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        self._connected = False